@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
@@ -12,6 +12,10 @@ import os
 import argparse
 import time
 import secrets
+import itertools
+import queue
+import sqlite3
+from collections import OrderedDict
 
 # Import ROS client
 from ros_client import PF400ROSClient
@@ -59,6 +63,11 @@ robot_client = None
 #
 # We are intentionally layering this onto the existing PF400 GUI backend so you can
 # demo tomorrow without introducing a new service deployment yet.
+#
+# Submitted actions run on NODE_JOB_WORKERS worker threads (default 1: the arm
+# executes one motion at a time), taken by priority, then submit order.
+# Finished job records expire after NODE_JOB_TTL_S / beyond NODE_MAX_FINISHED_JOBS;
+# NODE_JOB_DB (a SQLite path) keeps them across restarts for NODE_JOB_DB_TTL_S.
 
 def _new_ulid_str() -> str:
     """
@@ -98,6 +107,8 @@ class NodeActionRequestModel(BaseModel):
     action: str
     args: Dict[str, Any] = {}
     locations: Dict[str, Any] = {}
+    # Queue order for submitted actions: higher runs first
+    priority: int = 0
 
 
 class NodeActionResponseModel(BaseModel):
@@ -109,24 +120,204 @@ class NodeActionResponseModel(BaseModel):
     error: Optional[str] = None
 
 
+class NodeBatchSubmitRequestModel(BaseModel):
+    requests: List[NodeActionRequestModel] = []
+
+
+class NodeBatchStatusRequestModel(BaseModel):
+    execution_ids: List[str] = []
+
+
+class NodeBatchResponseModel(BaseModel):
+    # One response per request / execution_id, in the same order
+    responses: List[NodeActionResponseModel] = []
+
+
 class _NodeJob:
-    def __init__(self, request_id: str, action: str, args: Dict[str, Any], locations: Dict[str, Any]):
+    def __init__(self, request_id: str, action: str, args: Dict[str, Any], locations: Dict[str, Any],
+                 priority: int = 0):
         self.request_id = request_id
         self.execution_id = _new_ulid_str()
         self.action = action
         self.args = args
         self.locations = locations
+        self.priority = priority
         self.status = "queued"
         self.success = True
         self.result: Dict[str, Any] = {}
         self.error: Optional[str] = None
         self.created_at = time.time()
         self.updated_at = time.time()
+        # Set once the job reaches a terminal status; see mark_done()
+        self.done = threading.Event()
+        # (loop, future) of long-polling status requests
+        self._waiters: List[tuple] = []
+        self._waiters_lock = threading.Lock()
+
+    def mark_done(self) -> None:
+        """Set `done` and wake every status request waiting on this job"""
+        with self._waiters_lock:
+            self.done.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve_node_waiter, future)
+
+    async def wait_done(self, timeout: float) -> bool:
+        """Wait on the running loop, without a thread, until the job is done; False on timeout"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._waiters_lock:
+            if self.done.is_set():
+                return True
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait({future}, timeout=timeout)
+            return future.done()
+        finally:
+            with self._waiters_lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+
+def _resolve_node_waiter(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+# Longest a status request may be held open (`?wait=`)
+NODE_MAX_STATUS_WAIT_S = 60.0
+
+class _NodeJobStore:
+    """
+    Jobs by execution_id and by request_id, with finished jobs expiring.
+
+    Finished jobs are dropped once they are older than `ttl_s` or beyond the
+    newest `max_finished`; queued and running jobs are never dropped. With
+    `db_path`, jobs are also written to SQLite, so a restarted node still
+    answers status requests and deduplicates resubmitted request_ids for jobs
+    from the last `db_ttl_s`. Not thread-safe: callers hold `_node_jobs_lock`.
+    """
+
+    def __init__(self, ttl_s: float = 3600.0, max_finished: int = 10_000, db_path: Optional[str] = None,
+                 db_ttl_s: float = 86400.0):
+        self.ttl_s = ttl_s
+        self.max_finished = max_finished
+        self.db_ttl_s = db_ttl_s
+        self.evicted = 0
+        self._by_execution_id: Dict[str, _NodeJob] = {}
+        self._execution_id_by_request_id: Dict[str, str] = {}
+        # execution_id -> finish time, oldest first
+        self._finished: OrderedDict[str, float] = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pruned_at = 0.0
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                execution_id TEXT PRIMARY KEY,
+                request_id TEXT NOT NULL UNIQUE,
+                action TEXT NOT NULL,
+                status TEXT NOT NULL,
+                success INTEGER NOT NULL,
+                result TEXT NOT NULL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL)""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at)")
+            # Jobs that were queued or running when the node stopped will never finish
+            self._db.execute("UPDATE jobs SET status = 'failed', success = 0, error = ?, updated_at = ? "
+                             "WHERE status IN ('queued', 'running')",
+                             ("Node restarted before the job finished", time.time()))
+
+    def __len__(self) -> int:
+        return len(self._by_execution_id)
+
+    def add(self, job: _NodeJob) -> None:
+        self._by_execution_id[job.execution_id] = job
+        self._execution_id_by_request_id[job.request_id] = job.execution_id
+        self._save(job)
+        self.evict()
+
+    def finish(self, job: _NodeJob) -> None:
+        """Record that `job` reached a terminal status (starts its TTL)"""
+        self._finished[job.execution_id] = job.updated_at
+        self._save(job)
+        self.evict()
+
+    def get(self, execution_id: str) -> Optional[_NodeJob]:
+        job = self._by_execution_id.get(execution_id)
+        return job if job is not None else self._load("execution_id", execution_id)
+
+    def get_by_request_id(self, request_id: str) -> Optional[_NodeJob]:
+        execution_id = self._execution_id_by_request_id.get(request_id)
+        if execution_id is not None:
+            return self._by_execution_id[execution_id]
+        return self._load("request_id", request_id)
+
+    def evict(self) -> int:
+        """Drop expired and surplus finished jobs; returns how many"""
+        now = time.time()
+        evicted = 0
+        while self._finished:
+            execution_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and now - finished_at <= self.ttl_s:
+                break
+            self._finished.popitem(last=False)
+            job = self._by_execution_id.pop(execution_id, None)
+            if job is not None and self._execution_id_by_request_id.get(job.request_id) == execution_id:
+                del self._execution_id_by_request_id[job.request_id]
+            evicted += 1
+        self.evicted += evicted
+        if self._db is not None and now - self._db_pruned_at > 60.0:
+            self._db_pruned_at = now
+            self._db.execute("DELETE FROM jobs WHERE updated_at < ? AND status NOT IN ('queued', 'running')",
+                             (now - self.db_ttl_s,))
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "jobs": len(self._by_execution_id),
+            "finished": len(self._finished),
+            "evicted": self.evicted,
+            "persisted": self._db is not None,
+        }
+
+    def _save(self, job: _NodeJob) -> None:
+        if self._db is None:
+            return
+        self._db.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (job.execution_id, job.request_id, job.action, job.status, int(job.success),
+                          json.dumps(job.result), job.error, job.created_at, job.updated_at))
+
+    def _load(self, column: str, value: str) -> Optional[_NodeJob]:
+        """A finished job from the database (no longer in memory, or from before a restart)"""
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT execution_id, request_id, action, status, success, result, error, "
+                               f"created_at, updated_at FROM jobs WHERE {column} = ?", (value,)).fetchone()
+        if row is None:
+            return None
+        job = _NodeJob(request_id=row[1], action=row[2], args={}, locations={})
+        job.execution_id = row[0]
+        job.status = row[3]
+        job.success = bool(row[4])
+        job.result = json.loads(row[5])
+        job.error = row[6]
+        job.created_at = row[7]
+        job.updated_at = row[8]
+        job.done.set()
+        return job
 
 
 _node_jobs_lock = threading.Lock()
-_node_jobs_by_execution_id: Dict[str, _NodeJob] = {}
-_node_execution_by_request_id: Dict[str, str] = {}
+_node_jobs = _NodeJobStore(
+    ttl_s=float(os.environ.get("NODE_JOB_TTL_S", "3600")),
+    max_finished=int(os.environ.get("NODE_MAX_FINISHED_JOBS", "10000")),
+    db_path=os.environ.get("NODE_JOB_DB") or None,
+    db_ttl_s=float(os.environ.get("NODE_JOB_DB_TTL_S", "86400")),
+)
 
 
 def _node_supported_actions() -> List[NodeActionModel]:
@@ -278,6 +469,80 @@ def _node_run_job(job: _NodeJob) -> None:
     finally:
         with _node_jobs_lock:
             job.updated_at = time.time()
+            _node_jobs.finish(job)
+        job.mark_done()
+
+
+class _NodeJobExecutor:
+    """
+    Fixed pool of worker threads fed by a priority queue.
+
+    Higher `priority` runs first; equal priorities run in submit order. Workers
+    start on the first submit.
+    """
+
+    def __init__(self, run_job, workers: int = 1):
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1 (got {workers})")
+        self.workers = workers
+        self._run_job = run_job
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._running = 0
+        self._submitted = 0
+        self._started = 0
+        self._completed = 0
+        self._wait_total_s = 0.0
+        self._wait_max_s = 0.0
+
+    def submit(self, job: _NodeJob) -> None:
+        with self._lock:
+            if not self._threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._worker, daemon=True, name=f"nodejob-worker-{i}")
+                    thread.start()
+                    self._threads.append(thread)
+            self._submitted += 1
+            self._queue.put((-job.priority, next(self._sequence), job))
+
+    def _worker(self) -> None:
+        while True:
+            _, _, job = self._queue.get()
+            waited = max(0.0, time.time() - job.created_at)
+            with self._lock:
+                self._running += 1
+                self._started += 1
+                self._wait_total_s += waited
+                self._wait_max_s = max(self._wait_max_s, waited)
+            try:
+                self._run_job(job)
+            except Exception as e:
+                # _node_run_job records failures on the job; keep the worker alive regardless
+                print(f"Node job {job.execution_id} raised: {e}")
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self._queue.qsize(),
+                "running": self._running,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "queue_wait_s": {
+                    "count": self._started,
+                    "mean": self._wait_total_s / self._started if self._started else 0.0,
+                    "max": self._wait_max_s,
+                },
+            }
+
+
+_node_executor = _NodeJobExecutor(_node_run_job, workers=int(os.environ.get("NODE_JOB_WORKERS", "1")))
 
 
 @app.get("/health")
@@ -308,39 +573,13 @@ async def node_definition():
     )
 
 
-@app.post("/actions/{action}", response_model=NodeActionResponseModel)
-async def node_action_sync(action: str, req: NodeActionRequestModel):
-    request_id = req.request_id or _new_ulid_str()
-    try:
-        result = _node_call_action_sync(action, req.args or {})
-        return NodeActionResponseModel(
-            request_id=request_id,
-            execution_id="",
-            status="succeeded",
-            success=True,
-            result=result if isinstance(result, dict) else {"result": result},
-            error=None,
-        )
-    except HTTPException as e:
-        return NodeActionResponseModel(
-            request_id=request_id,
-            execution_id="",
-            status="failed",
-            success=False,
-            result={},
-            error=str(e.detail),
-        )
-
-
-@app.post("/actions/{action}/submit", response_model=NodeActionResponseModel)
-async def node_action_submit(action: str, req: NodeActionRequestModel):
+def _node_submit_job(action: str, req: NodeActionRequestModel) -> NodeActionResponseModel:
     request_id = req.request_id or _new_ulid_str()
 
     # Idempotency: if we already have a job for this request_id, return it.
     with _node_jobs_lock:
-        existing_exec = _node_execution_by_request_id.get(request_id)
-        if existing_exec and existing_exec in _node_jobs_by_execution_id:
-            job = _node_jobs_by_execution_id[existing_exec]
+        job = _node_jobs.get_by_request_id(request_id)
+        if job is not None:
             return NodeActionResponseModel(
                 request_id=job.request_id,
                 execution_id=job.execution_id,
@@ -355,12 +594,11 @@ async def node_action_submit(action: str, req: NodeActionRequestModel):
             action=action,
             args=req.args or {},
             locations=req.locations or {},
+            priority=req.priority,
         )
-        _node_jobs_by_execution_id[job.execution_id] = job
-        _node_execution_by_request_id[request_id] = job.execution_id
+        _node_jobs.add(job)
 
-    t = threading.Thread(target=_node_run_job, args=(job,), daemon=True, name=f"nodejob-{job.execution_id}")
-    t.start()
+    _node_executor.submit(job)
 
     return NodeActionResponseModel(
         request_id=job.request_id,
@@ -372,12 +610,7 @@ async def node_action_submit(action: str, req: NodeActionRequestModel):
     )
 
 
-@app.get("/actions/status/{execution_id}", response_model=NodeActionResponseModel)
-async def node_action_status(execution_id: str):
-    with _node_jobs_lock:
-        job = _node_jobs_by_execution_id.get(execution_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="Unknown execution_id")
+def _node_status_response(job: _NodeJob) -> NodeActionResponseModel:
     return NodeActionResponseModel(
         request_id=job.request_id,
         execution_id=job.execution_id,
@@ -387,6 +620,76 @@ async def node_action_status(execution_id: str):
         error=job.error if job.status == "failed" else None,
     )
 
+
+# Registered before /actions/{action} so "batch" and "status:batch" aren't taken as action names
+@app.post("/actions/batch/submit", response_model=NodeBatchResponseModel)
+async def node_action_batch_submit(req: NodeBatchSubmitRequestModel):
+    # Each request is submitted (and deduplicated on its request_id) as by /actions/{action}/submit
+    return NodeBatchResponseModel(responses=[_node_submit_job(item.action, item) for item in req.requests])
+
+
+@app.post("/actions/status:batch", response_model=NodeBatchResponseModel)
+async def node_action_batch_status(req: NodeBatchStatusRequestModel):
+    responses = []
+    with _node_jobs_lock:
+        for execution_id in req.execution_ids:
+            job = _node_jobs.get(execution_id)
+            if job is None:
+                responses.append(NodeActionResponseModel(request_id="", execution_id=execution_id,
+                                                         status="unknown", success=False,
+                                                         error="Unknown execution_id"))
+            else:
+                responses.append(_node_status_response(job))
+    return NodeBatchResponseModel(responses=responses)
+
+
+@app.post("/actions/{action}", response_model=NodeActionResponseModel)
+async def node_action_sync(action: str, req: NodeActionRequestModel):
+    request_id = req.request_id or _new_ulid_str()
+    try:
+        result = _node_call_action_sync(action, req.args or {})
+        return NodeActionResponseModel(
+            request_id=request_id,
+            execution_id="",
+            status="succeeded",
+            success=True,
+            result=result if isinstance(result, dict) else {"result": result},
+            error=None,
+        )
+    except HTTPException as e:
+        return NodeActionResponseModel(
+            request_id=request_id,
+            execution_id="",
+            status="failed",
+            success=False,
+            result={},
+            error=str(e.detail),
+        )
+
+
+@app.post("/actions/{action}/submit", response_model=NodeActionResponseModel)
+async def node_action_submit(action: str, req: NodeActionRequestModel):
+    return _node_submit_job(action, req)
+
+
+@app.get("/stats")
+async def node_stats():
+    with _node_jobs_lock:
+        store = _node_jobs.stats()
+    return {**_node_executor.stats(), "store": store}
+
+
+@app.get("/actions/status/{execution_id}", response_model=NodeActionResponseModel)
+async def node_action_status(execution_id: str, wait: float = Query(0.0, ge=0.0)):
+    with _node_jobs_lock:
+        job = _node_jobs.get(execution_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Unknown execution_id")
+    if wait > 0:
+        # Long-poll until the job finishes or `wait` passes; holds no thread while waiting
+        await job.wait_done(min(wait, NODE_MAX_STATUS_WAIT_S))
+    return _node_status_response(job)
+
 class ActionRequest(BaseModel):
     action_handle: str
     vars: Dict[str, Any]
@@ -2,7 +2,10 @@
 Unit tests for FastAPI main application.
 """
 import pytest
+import asyncio
 import json
+import threading
+import time
 from unittest.mock import Mock, patch, MagicMock
 from fastapi.testclient import TestClient
 import sys
@@ -294,3 +297,187 @@ class TestSimClient:
         
         assert result["description"] == "PF400 Simulator Interface"
 
+
+
+class TestNodeJobQueue:
+    """Test suite for the Node job executor and /stats."""
+    
+    def test_jobs_run_by_priority_then_submit_order(self):
+        """Higher priority first, FIFO within a priority, one at a time."""
+        from main import _NodeJob, _NodeJobExecutor
+        
+        order = []
+        blocking = threading.Event()
+        gate = threading.Event()
+        finished = threading.Event()
+        
+        def run_job(job):
+            if job.action == "block":
+                blocking.set()
+                gate.wait(5)
+            order.append(job.action)
+            if len(order) == 5:
+                finished.set()
+        
+        executor = _NodeJobExecutor(run_job, workers=1)
+        executor.submit(_NodeJob("r0", "block", {}, {}))
+        assert blocking.wait(5)
+        for request_id, action, priority in [("r1", "a", 0), ("r2", "b", 5), ("r3", "c", 0), ("r4", "d", 5)]:
+            executor.submit(_NodeJob(request_id, action, {}, {}, priority=priority))
+        gate.set()
+        
+        assert finished.wait(5)
+        assert order == ["block", "b", "d", "a", "c"]
+        stats = executor.stats()
+        assert stats["submitted"] == 5
+        assert stats["completed"] == 5
+        assert stats["queue_depth"] == 0
+        assert stats["queue_wait_s"]["count"] == 5
+    
+    @pytest.fixture
+    def stub_node(self):
+        """Swap in a fresh job store and an executor whose runner only records the action."""
+        import main
+        from main import _NodeJobExecutor, _NodeJobStore
+        ran = []
+        # Jobs finish once this is set (clear it to hold them)
+        self.gate = threading.Event()
+        self.gate.set()
+        
+        def run_job(job):
+            self.gate.wait(5)
+            ran.append((job.request_id, job.action))
+            with main._node_jobs_lock:
+                job.status = "succeeded"
+                job.success = True
+                job.result = {"action": job.action}
+                main._node_jobs.finish(job)
+            job.mark_done()
+        
+        with patch('main._node_jobs', _NodeJobStore()), \
+                patch('main._node_executor', _NodeJobExecutor(run_job, workers=1)):
+            yield ran
+    
+    def test_stats_endpoint(self, stub_node):
+        """Test /stats reports the job queue and store."""
+        from main import app
+        client = TestClient(app)
+        
+        response = client.get("/stats")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["workers"] == 1
+        assert data["queue_depth"] == 0
+        assert data["store"]["jobs"] == 0
+    
+    def test_batch_endpoints(self, stub_node):
+        """Test batch submit and status:batch are routed as batch endpoints, not actions."""
+        import main
+        from main import app
+        client = TestClient(app)
+        
+        response = client.post("/actions/batch/submit", json={"requests": [
+            {"request_id": "batch-1", "action": "get_joints"},
+            {"request_id": "batch-2", "action": "get_joints"},
+        ]})
+        
+        assert response.status_code == 200
+        submitted = response.json()["responses"]
+        assert [item["request_id"] for item in submitted] == ["batch-1", "batch-2"]
+        for item in submitted:
+            assert main._node_jobs.get(item["execution_id"]).done.wait(5)
+        assert stub_node == [("batch-1", "get_joints"), ("batch-2", "get_joints")]
+        
+        execution_ids = [submitted[0]["execution_id"], "missing"]
+        response = client.post("/actions/status:batch", json={"execution_ids": execution_ids})
+        
+        assert response.status_code == 200
+        statuses = response.json()["responses"]
+        assert [item["execution_id"] for item in statuses] == execution_ids
+        assert statuses[0]["status"] == "succeeded"
+        assert statuses[0]["result"] == {"action": "get_joints"}
+        assert statuses[1]["status"] == "unknown"
+    
+    @pytest.mark.asyncio
+    async def test_status_wait_returns_when_job_finishes(self, stub_node):
+        """Test ?wait holds the status request until the job finishes, then answers at once."""
+        import httpx
+        from main import app
+        self.gate.clear()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://node") as client:
+            response = await client.post("/actions/get_joints/submit",
+                                         json={"request_id": "poll-1", "action": "get_joints"})
+            execution_id = response.json()["execution_id"]
+            polls = [asyncio.create_task(client.get(f"/actions/status/{execution_id}", params={"wait": 30}))
+                     for _ in range(3)]
+            await asyncio.sleep(0.2)
+            assert not any(poll.done() for poll in polls)
+            
+            started = time.monotonic()
+            self.gate.set()
+            responses = await asyncio.wait_for(asyncio.gather(*polls), 5)
+        
+        assert time.monotonic() - started < 2.0
+        assert [response.json()["status"] for response in responses] == ["succeeded"] * 3
+
+
+class TestNodeJobStore:
+    """Test suite for the bounded Node job store."""
+    
+    def _finished_job(self, store, request_id):
+        from main import _NodeJob
+        job = _NodeJob(request_id, "get_joints", {}, {})
+        store.add(job)
+        job.status = "succeeded"
+        job.result = {"request": request_id}
+        store.finish(job)
+        return job
+    
+    def test_finished_jobs_are_bounded(self):
+        """Only the newest finished jobs are kept; running jobs are never dropped."""
+        from main import _NodeJob, _NodeJobStore
+        store = _NodeJobStore(max_finished=10)
+        running = _NodeJob("running", "jog", {}, {})
+        store.add(running)
+        
+        jobs = [self._finished_job(store, f"r{i}") for i in range(100)]
+        
+        assert len(store) == 11
+        assert store.evicted == 90
+        assert store.get(jobs[0].execution_id) is None
+        assert store.get_by_request_id("r0") is None
+        assert store.get_by_request_id("r99") is jobs[-1]
+        assert store.get(running.execution_id) is running
+    
+    def test_finished_jobs_expire(self):
+        """Finished jobs older than the TTL are dropped."""
+        from main import _NodeJobStore
+        store = _NodeJobStore(ttl_s=60.0)
+        job = self._finished_job(store, "r1")
+        job.updated_at -= 120.0
+        store._finished[job.execution_id] = job.updated_at
+        
+        assert store.evict() == 1
+        assert store.get(job.execution_id) is None
+    
+    def test_sqlite_keeps_jobs_across_restarts(self, tmp_path):
+        """Evicted and pre-restart jobs are still found by either id."""
+        from main import _NodeJob, _NodeJobStore
+        db_path = str(tmp_path / "jobs.db")
+        store = _NodeJobStore(max_finished=1, db_path=db_path)
+        first = self._finished_job(store, "r1")
+        self._finished_job(store, "r2")
+        interrupted = _NodeJob("r3", "jog", {}, {})
+        store.add(interrupted)
+        
+        evicted = store.get(first.execution_id)
+        assert evicted.status == "succeeded"
+        assert evicted.result == {"request": "r1"}
+        
+        restarted = _NodeJobStore(db_path=db_path)
+        assert restarted.get_by_request_id("r1").execution_id == first.execution_id
+        job = restarted.get(interrupted.execution_id)
+        assert job.status == "failed"
+        assert job.done.is_set()
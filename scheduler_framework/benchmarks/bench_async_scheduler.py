@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Threaded vs asyncio scheduler benchmark.
+
+Runs the same worklists together on a cell with many devices (one
+location each) through PlateScheduler/RobotScheduler with thread-timed
+devices, and through AsyncPlateScheduler with native async devices.
+Reports makespan, the peak number of threads in the process and the gap
+from a plate's job completing to its next job starting on a device. The
+async gap includes the robot move; the threaded scheduler hands the job
+to the device before the move has run.
+
+Usage:
+  python3 benchmarks/bench_async_scheduler.py
+  python3 benchmarks/bench_async_scheduler.py --devices 100 --worklists 40
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import threading
+import time
+
+import synthetic_deck  # noqa: F401  (adds the package to sys.path)
+from scheduler import (
+    AsyncPlateScheduler, AsyncDeviceInterface, AsyncRobotInterface, PlateScheduler, RobotScheduler,
+    PlateLocation, PlatePlace, Plate, PlateTask, Worklist, TransferOverview, Transfer
+)
+from scheduler.device_manager import AccessibleDeviceInterface, DeviceManager, RobotInterface
+
+
+def _locations(name: str, count: int):
+    locations = []
+    for i in range(count):
+        location = PlateLocation(f"{name}_loc{i}", name)
+        location.places = [PlatePlace(f"{name}_place{i}", location)]
+        locations.append(location)
+    return locations
+
+
+class ThreadTimedDevice(AccessibleDeviceInterface):
+    """Sync device: a timer thread completes each job"""
+
+    def __init__(self, name: str, product_name: str, num_locations: int, delay: float, log: dict):
+        super().__init__(name, product_name)
+        self.delay = delay
+        self.log = log
+        self.locations = _locations(name, num_locations)
+
+    @property
+    def plate_location_info(self):
+        return self.locations
+
+    def get_available_location(self, active_plate):
+        for location in self.locations:
+            if not location.reserved.is_set():
+                return location
+        return None
+
+    def reserve_location(self, location, active_plate) -> bool:
+        location.reserved.set()
+        return True
+
+    def lock_place(self, place_name: str):
+        pass
+
+    def add_job(self, active_plate):
+        freed = self.log["freed"].pop(active_plate, None)
+        if freed is not None:
+            self.log["latency"].append(time.perf_counter() - freed)
+        timer = threading.Timer(self.delay, self._complete, args=(active_plate,))
+        timer.daemon = True
+        timer.start()
+
+    def _complete(self, active_plate):
+        self.log["freed"][active_plate] = time.perf_counter()
+        active_plate.mark_job_completed()
+
+
+class SleepDevice(ThreadTimedDevice, AsyncDeviceInterface):
+    """Native async device: each job is an asyncio.sleep"""
+
+    async def run_job(self, active_plate):
+        freed = self.log["freed"].pop(active_plate, None)
+        if freed is not None:
+            self.log["latency"].append(time.perf_counter() - freed)
+        await asyncio.sleep(self.delay)
+        self.log["freed"][active_plate] = time.perf_counter()
+
+    add_job = AsyncDeviceInterface.add_job
+
+
+class InstantRobot(RobotInterface):
+    def transfer_plate(self, src_device, src_place, dst_device, dst_place, labware_name, barcode):
+        pass
+
+    def get_transfer_weight(self, src_device, src_location, src_place,
+                            dst_device, dst_location, dst_place) -> float:
+        return float('inf') if src_location is dst_location else 1.0
+
+
+class InstantAsyncRobot(InstantRobot, AsyncRobotInterface):
+    async def transfer_plate(self, src_device, src_place, dst_device, dst_place, labware_name, barcode):
+        pass
+
+
+def _worklist(name: str, num_plates: int, num_tasks: int) -> Worklist:
+    """Each source plate is read `num_tasks` times, then hit-picked"""
+    worklist = Worklist(name)
+    destination = Plate(f"{name}_DST000", "96-well", "96-well")
+    worklist.add_destination_plate(destination)
+    sources = {}
+    transfers = []
+    for i in range(num_plates):
+        source = Plate(f"{name}_SRC{i:03d}", "96-well", "96-well")
+        worklist.add_source_plate(source)
+        sources[source.barcode] = source
+        transfers.append(Transfer(source, destination, volume=10.0))
+    overview = TransferOverview(transfers=transfers, source_plates=sources,
+                                destination_plates={destination.barcode: destination})
+    overview.tasks.source_prehitpick_tasks = [PlateTask("Reader", f"read{t}") for t in range(num_tasks)]
+    worklist.transfer_overview = overview
+    return worklist
+
+
+def _device_manager(device_class, robot_class, num_devices: int, job_seconds: float, log: dict):
+    device_manager = DeviceManager()
+    for i in range(num_devices):
+        device_manager.register_device(device_class(f"Reader{i}", "Reader", 1, job_seconds, log))
+    device_manager.register_device(device_class("Bumblebee1", "Bumblebee", 8, job_seconds, log))
+    device_manager.register_robot(robot_class("Robot"))
+    return device_manager
+
+
+class ThreadSampler:
+    """Peak thread count of the process while running"""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(0.002):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stop.set()
+        self._thread.join()
+
+
+def _worklists(num_worklists: int, num_plates: int, num_tasks: int):
+    return [_worklist(f"WL{w:02d}", num_plates, num_tasks) for w in range(num_worklists)]
+
+
+def run_threaded(num_devices: int, num_worklists: int, num_plates: int, num_tasks: int,
+                 job_seconds: float):
+    log = {"freed": {}, "latency": []}
+    device_manager = _device_manager(ThreadTimedDevice, InstantRobot, num_devices, job_seconds, log)
+    robot_scheduler = RobotScheduler(device_manager)
+    robot_scheduler.start_scheduler()
+    scheduler = PlateScheduler(robot_scheduler, device_manager)
+    done = threading.Semaphore(0)
+    with ThreadSampler() as sampler:
+        start = time.perf_counter()
+        for worklist in _worklists(num_worklists, num_plates, num_tasks):
+            worklist.add_completion_callback(lambda *args: done.release())
+            scheduler.enqueue_worklist(worklist)
+        scheduler.start_scheduler()
+        for _ in range(num_worklists):
+            done.acquire()
+        elapsed = time.perf_counter() - start
+    scheduler.stop_scheduler()
+    robot_scheduler.stop_scheduler()
+    return elapsed, sampler.peak, log["latency"]
+
+
+def run_async(num_devices: int, num_worklists: int, num_plates: int, num_tasks: int,
+              job_seconds: float):
+    log = {"freed": {}, "latency": []}
+    device_manager = _device_manager(SleepDevice, InstantAsyncRobot, num_devices, job_seconds, log)
+    scheduler = AsyncPlateScheduler(device_manager)
+    with ThreadSampler() as sampler:
+        start = time.perf_counter()
+        scheduler.run_worklists_sync(_worklists(num_worklists, num_plates, num_tasks))
+        elapsed = time.perf_counter() - start
+    return elapsed, sampler.peak, log["latency"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Threaded vs asyncio scheduler benchmark")
+    parser.add_argument("--devices", type=int, default=60, help="Number of reader devices")
+    parser.add_argument("--worklists", type=int, default=20, help="Worklists run together")
+    parser.add_argument("--plates", type=int, default=6, help="Source plates per worklist")
+    parser.add_argument("--tasks", type=int, default=3, help="Reader tasks per source plate")
+    parser.add_argument("--job-ms", type=float, default=20.0, help="Device job duration in ms")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    job_seconds = args.job_ms / 1000.0
+
+    print(f"\n{'='*70}")
+    print(f"{args.devices} readers, {args.worklists} worklists x {args.plates} plates x "
+          f"{args.tasks} reads, {args.job_ms:.0f} ms jobs")
+    print(f"{'='*70}")
+    print(f"  {'scheduler':<10} {'makespan s':>11} {'peak threads':>13} {'p50 gap ms':>11} {'p95 gap ms':>11}")
+    for name, runner in (("threaded", run_threaded), ("asyncio", run_async)):
+        elapsed, peak, gaps = runner(args.devices, args.worklists, args.plates, args.tasks, job_seconds)
+        gaps = sorted(gaps) or [0.0]
+        p95 = gaps[min(len(gaps) - 1, int(len(gaps) * 0.95))]
+        print(f"  {name:<10} {elapsed:11.2f} {peak:13d} "
+              f"{statistics.median(gaps) * 1000:11.2f} {p95 * 1000:11.2f}")
+
+
+if __name__ == "__main__":
+    main()
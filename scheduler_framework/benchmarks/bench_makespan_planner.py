@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Offline makespan planner report.
+
+Builds hit-picking worklists of several shapes (hit-pick time grows with the
+number of transfers of a plate), predicts the greedy PlateScheduler makespan
+and the makespan of the optimized dispatch plan, and prints the comparison.
+With --execute, the smallest worklist is also run through PlateScheduler on
+timed devices, greedily and following the plan, to check the predictions.
+
+To report on recorded worklists, build them as Worklist objects and pass
+them to makespan_planner.compare_with_greedy() with the same planner.
+
+Usage:
+  python3 benchmarks/bench_makespan_planner.py
+  python3 benchmarks/bench_makespan_planner.py --iterations 500 --execute
+"""
+
+import argparse
+import logging
+import random
+import threading
+import time
+from collections import Counter
+
+import synthetic_deck  # noqa: F401  (adds the package to sys.path)
+from scheduler import (
+    PlateScheduler, RobotScheduler, MakespanPlanner, PlateLocation, PlatePlace, Plate,
+    PlateTask, Worklist, TransferOverview, Transfer
+)
+from scheduler.device_manager import AccessibleDeviceInterface, DeviceManager, RobotInterface
+from scheduler.makespan_planner import compare_with_greedy, format_report
+
+# (name, sources, destinations, transfers)
+SHAPES = [
+    ("small", 8, 2, 40),
+    ("wide", 24, 3, 120),
+    ("skewed", 16, 4, 160),
+    ("large", 40, 6, 300),
+]
+
+DEVICES = {"Reader": [("Reader1", 1)], "Bumblebee": [("Bumblebee1", 2)], "Sealer": [("Sealer1", 1)]}
+TASK_SECONDS = {"Reader.read": 20.0, "Sealer.seal": 30.0}
+
+
+def hitpick_worklist(name: str, num_sources: int, num_destinations: int,
+                     num_transfers: int, seed: int) -> Worklist:
+    """Transfers spread unevenly over the plates, so hit-pick times differ"""
+    rng = random.Random(seed)
+    worklist = Worklist(name)
+    sources = {}
+    destinations = {}
+    for i in range(num_sources):
+        plate = Plate(f"{name}_SRC{i:03d}", "384-well", "384-well")
+        worklist.add_source_plate(plate)
+        sources[plate.barcode] = plate
+    for i in range(num_destinations):
+        plate = Plate(f"{name}_DST{i:03d}", "96-well", "96-well")
+        worklist.add_destination_plate(plate)
+        destinations[plate.barcode] = plate
+    source_list = list(sources.values())
+    weights = [rng.expovariate(1.0) for _ in source_list]
+    transfers = [Transfer(source_list[i], worklist.destination_plates[i % num_destinations], volume=5.0)
+                 for i in range(num_sources)]
+    for _ in range(num_transfers - num_sources):
+        source = rng.choices(source_list, weights)[0]
+        transfers.append(Transfer(source, rng.choice(worklist.destination_plates), volume=5.0))
+    overview = TransferOverview(transfers=transfers, source_plates=sources, destination_plates=destinations)
+    overview.tasks.source_prehitpick_tasks = [PlateTask("Reader", "read")]
+    overview.tasks.source_posthitpick_tasks = [PlateTask("Sealer", "seal")]
+    overview.tasks.destination_prehitpick_tasks = [PlateTask("Reader", "read")]
+    overview.tasks.destination_posthitpick_tasks = [PlateTask("Sealer", "seal")]
+    worklist.transfer_overview = overview
+    return worklist
+
+
+def hitpick_planner(worklists, move_seconds: float) -> MakespanPlanner:
+    """Hit-picks take 10 s plus 4 s per transfer of the plate"""
+    transfer_counts = Counter()
+    for worklist in worklists:
+        for transfer in worklist.transfer_overview.transfers:
+            transfer_counts[transfer.source_plate.barcode] += 1
+            transfer_counts[transfer.destination_plate.barcode] += 1
+
+    def duration(task, active_plate):
+        if task.device_type == "Bumblebee":
+            return 10.0 + 4.0 * transfer_counts[active_plate.barcode]
+        return None
+
+    return MakespanPlanner(DEVICES, TASK_SECONDS, move_seconds=move_seconds, duration_fn=duration)
+
+
+class TimedDevice(AccessibleDeviceInterface):
+    """Device whose jobs take the planner's duration (scaled) once the plate has arrived"""
+
+    def __init__(self, name: str, product_name: str, num_locations: int,
+                 planner: MakespanPlanner, scale: float):
+        super().__init__(name, product_name)
+        self.planner = planner
+        self.scale = scale
+        self._lock = threading.Lock()
+        self._waiting = set()
+        self.locations = []
+        for i in range(num_locations):
+            location = PlateLocation(f"{name}_loc{i}", name)
+            location.places = [PlatePlace(f"{name}_place{i}", location)]
+            self.locations.append(location)
+
+    @property
+    def plate_location_info(self):
+        return self.locations
+
+    def get_available_location(self, active_plate):
+        for location in self.locations:
+            if not location.reserved.is_set():
+                return location
+        return None
+
+    def reserve_location(self, location, active_plate) -> bool:
+        location.reserved.set()
+        return True
+
+    def lock_place(self, place_name: str):
+        pass
+
+    def add_job(self, active_plate):
+        with self._lock:
+            if active_plate.current_location is not active_plate.destination_location:
+                self._waiting.add(active_plate)
+                return
+        self._start(active_plate)
+
+    def plate_arrived(self, active_plate):
+        with self._lock:
+            if active_plate not in self._waiting:
+                return
+            self._waiting.discard(active_plate)
+        self._start(active_plate)
+
+    def _start(self, active_plate):
+        task = active_plate.get_current_todo()
+        seconds = self.planner.task_duration(task, active_plate) * self.scale
+        timer = threading.Timer(seconds, active_plate.mark_job_completed)
+        timer.daemon = True
+        timer.start()
+
+
+class TimedRobot(RobotInterface):
+    def __init__(self, name: str, seconds: float):
+        super().__init__(name)
+        self.seconds = seconds
+
+    def transfer_plate(self, src_device, src_place, dst_device, dst_place, labware_name, barcode):
+        time.sleep(self.seconds)
+
+    def get_transfer_weight(self, src_device, src_location, src_place,
+                           dst_device, dst_location, dst_place) -> float:
+        return float('inf') if src_location is dst_location else 1.0
+
+
+def execute(worklist: Worklist, planner: MakespanPlanner, plan, scale: float) -> float:
+    """Run a worklist through PlateScheduler; returns the makespan in planner seconds"""
+    device_manager = DeviceManager()
+    devices = []
+    for device_type, entries in planner.devices.items():
+        for name, slots in entries:
+            devices.append(TimedDevice(name, device_type, slots, planner, scale))
+            device_manager.register_device(devices[-1])
+    # Several arms, so robot moves overlap as the planner assumes
+    for i in range(4):
+        device_manager.register_robot(TimedRobot(f"Robot{i}", planner.move_seconds * scale))
+
+    robot_scheduler = RobotScheduler(device_manager)
+    for device in devices:
+        robot_scheduler.move_completed_callbacks.append(device.plate_arrived)
+    robot_scheduler.start_scheduler()
+    scheduler = PlateScheduler(robot_scheduler, device_manager)
+    scheduler.idle_recheck_seconds = None
+    worklist.dispatch_plan = plan
+    start = time.perf_counter()
+    scheduler._do_worklist(worklist)
+    elapsed = time.perf_counter() - start
+    robot_scheduler.stop_scheduler()
+    worklist.dispatch_plan = None
+    return elapsed / scale
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline makespan planner report")
+    parser.add_argument("--iterations", type=int, default=300, help="Local search iterations")
+    parser.add_argument("--seed", type=int, default=0, help="Worklist and search seed")
+    parser.add_argument("--move-seconds", type=float, default=8.0, help="Robot move duration")
+    parser.add_argument("--execute", action="store_true",
+                        help="Also execute the smallest worklist (1 planned second = 2 ms)")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    worklists = [hitpick_worklist(name, sources, destinations, transfers, args.seed + i)
+                 for i, (name, sources, destinations, transfers) in enumerate(SHAPES)]
+    planner = hitpick_planner(worklists, args.move_seconds)
+
+    print(f"\n{'='*70}")
+    print(f"Predicted makespan in seconds, greedy vs planned ({args.iterations} search iterations)")
+    print(f"{'='*70}")
+    start = time.perf_counter()
+    comparisons = compare_with_greedy(planner, worklists, iterations=args.iterations, seed=args.seed)
+    print(format_report(comparisons))
+    print(f"  planning time {time.perf_counter() - start:.2f} s")
+
+    if args.execute:
+        scale = 0.002
+        worklist = worklists[0]
+        greedy = planner.greedy(worklist)
+        planned = planner.optimize(worklist, iterations=args.iterations, seed=args.seed)
+        print(f"\n{'='*70}")
+        print(f"Executed makespan of '{worklist.name}' (predicted vs measured, planner seconds)")
+        print(f"{'='*70}")
+        print(f"  greedy   predicted {greedy.makespan:8.1f}  measured {execute(worklist, planner, None, scale):8.1f}")
+        print(f"  planned  predicted {planned.makespan:8.1f}  measured {execute(worklist, planner, planned, scale):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
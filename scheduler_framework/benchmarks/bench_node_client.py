@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+RestNodeClient request-rate benchmark.
+
+Polls a Node (`/health` and `/actions/status/{id}`, as the scheduler does
+while waiting on a job) from several threads. It compares a new
+urllib.request connection per call, which is how RestNodeClient worked
+before the pool, with the pooled keep-alive client. It reports requests/sec,
+latency percentiles and the number of TCP connections opened.
+
+By default it starts an in-process HTTP/1.1 keep-alive stand-in for the
+node template. To run it against the real template instead:
+
+  cd tachyon_nodes/node_template && uvicorn main:app --port 8000
+  python3 benchmarks/bench_node_client.py --url http://127.0.0.1:8000
+
+Usage:
+  python3 benchmarks/bench_node_client.py
+  python3 benchmarks/bench_node_client.py --requests 5000 --threads 1,4,12
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import synthetic_deck  # noqa: F401  (adds the package to sys.path)
+from scheduler import HTTPConnectionPool, RestNodeClient
+from scheduler.node_interface import NodeActionRequest
+
+
+class StandInNodeHandler(BaseHTTPRequestHandler):
+    """The node template's health/submit/status endpoints over keep-alive"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/actions/status/"):
+            self._send({"request_id": "r", "execution_id": self.path.rsplit("/", 1)[1], "status": "running",
+                        "success": True, "result": {}, "error": None})
+        else:
+            self._send({"healthy": True})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._send({"request_id": "r", "execution_id": "EXEC1", "status": "queued", "success": True,
+                    "result": {}, "error": None})
+
+
+def _urlopen_call(base_url: str, path: str):
+    """One request on a new connection (RestNodeClient before the pool)"""
+    with urllib.request.urlopen(urllib.request.Request(base_url + path), timeout=10.0) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def run(label: str, call, requests: int, threads: int, connections=None) -> dict:
+    """`connections()` counts connections opened so far (None: one per request)"""
+    latencies = []
+    lock = threading.Lock()
+    per_thread = max(1, requests // threads)
+    connections_before = connections() if connections is not None else 0
+
+    def worker():
+        local = []
+        for i in range(per_thread):
+            started = time.perf_counter()
+            call(i)
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "label": label,
+        "threads": threads,
+        "rate": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1e3,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e3,
+        "connections": (connections() - connections_before if connections is not None
+                        else len(latencies)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RestNodeClient request-rate benchmark")
+    parser.add_argument("--url", help="Node to poll (default: an in-process stand-in)")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per run")
+    parser.add_argument("--threads", default="1,4,12", help="Comma-separated polling thread counts")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StandInNodeHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    base_url = base_url.rstrip("/")
+
+    pool = HTTPConnectionPool(max_connections_per_host=16)
+    client = RestNodeClient(base_url, pool=pool)
+    execution_id = client.submit_action(NodeActionRequest(action="sleep", args={"seconds": 600})).execution_id
+    paths = ["/health", f"/actions/status/{execution_id}"]
+
+    print(f"\n{'='*70}")
+    print(f"Polling {base_url} ({args.requests} requests per run)")
+    print(f"{'='*70}")
+    print(f"  {'client':<22}{'threads':>8}{'req/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'connections':>13}")
+    for threads in (int(value) for value in args.threads.split(",")):
+        results = [
+            run("urlopen per request", lambda i: _urlopen_call(base_url, paths[i % 2]),
+                args.requests, threads),
+            run("pooled keep-alive",
+                lambda i: client.health() if i % 2 == 0 else client.get_action_status(execution_id),
+                args.requests, threads, lambda: pool.stats.connections_created),
+        ]
+        for result in results:
+            print(f"  {result['label']:<22}{result['threads']:>8}{result['rate']:>10.0f}"
+                  f"{result['p50']:>9.2f}{result['p99']:>9.2f}{result['connections']:>13}")
+        print(f"  speedup: {results[1]['rate'] / results[0]['rate']:.1f}x")
+
+    client.close()
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+PathPlanner benchmarks on a synthetic deck.
+
+Measures:
+- the per-move planning cost the RobotScheduler pays (create_world +
+  plan_path) with and without the world graph cache
+- plan_path latency with a routing table vs a per-call Dijkstra search
+- memory and edge lookup cost of the compact graph vs Node/Connection objects
+- world build time with per-pair vs batched PF400 reach weights
+
+Usage:
+  python3 benchmarks/bench_path_planner.py
+  python3 benchmarks/bench_path_planner.py --places 500 --moves 20
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from synthetic_deck import build_deck, build_pf400_deck, deck_locations
+from scheduler.path_planner import PathPlanner
+
+
+def _random_moves(locations, count, seed):
+    rng = random.Random(seed)
+    return [tuple(rng.sample(locations, 2)) for _ in range(count)]
+
+
+def bench_world_cache(num_places: int, num_moves: int, seed: int = 0):
+    """Per-move planning cost: rebuild every move (old behaviour) vs cached world"""
+    device_manager = build_deck(num_places)
+    locations = deck_locations(device_manager)
+    moves = _random_moves(locations, num_moves, seed)
+    
+    results = {}
+    for label, rebuild_every_move in (("rebuild per move", True), ("cached world", False)):
+        planner = PathPlanner(device_manager)
+        planner.create_world()  # warm-up build, excluded from timing
+        start = time.perf_counter()
+        for src, dst in moves:
+            if rebuild_every_move:
+                planner.invalidate()
+            planner.create_world()
+            planner.plan_path(src, dst)
+        results[label] = (time.perf_counter() - start) / num_moves
+    return results
+
+
+def bench_routing_table(num_places: int, num_moves: int, seed: int = 0):
+    """plan_path latency: per-call Dijkstra vs routing table lookup"""
+    device_manager = build_deck(num_places)
+    locations = deck_locations(device_manager)
+    moves = _random_moves(locations, num_moves, seed)
+    
+    search_planner = PathPlanner(device_manager)
+    search_planner.create_world()
+    table_planner = PathPlanner(device_manager, use_routing_table=True)
+    table_planner.create_world()
+    
+    # Fill the rows this workload needs (lazy precompute), excluded from timing
+    start = time.perf_counter()
+    for src, dst in moves:
+        table_planner.plan_path(src, dst)
+    warmup = time.perf_counter() - start
+    
+    results = {"table warm-up (once)": warmup}
+    for label, planner in (("dijkstra per call", search_planner), ("table lookup", table_planner)):
+        start = time.perf_counter()
+        for src, dst in moves:
+            planner.plan_path(src, dst)
+        results[label] = (time.perf_counter() - start) / num_moves
+    return results
+
+
+def bench_compact_graph(num_places: int, num_lookups: int = 20000, seed: int = 0):
+    """Graph memory (compact arrays vs materialized Node/Connection objects) and edge lookup cost"""
+    device_manager = build_deck(num_places)
+    planner = PathPlanner(device_manager)
+    planner.create_world()
+    graph = planner.graph
+    
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    planner.invalidate()
+    planner.create_world()
+    compact = tracemalloc.get_traced_memory()[0] - before
+    graph = planner.graph
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [graph.node(i) for i in range(graph.num_places)]
+    for node in nodes:
+        node.connections
+    objects = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(num_lookups):
+        u = rng.randrange(graph.num_places)
+        edges = graph.neighbors(u)
+        if edges:
+            pairs.append((nodes[u], nodes[rng.choice(edges)[0]]))
+    
+    start = time.perf_counter()
+    for src, dst in pairs:
+        next(c for c in src.connections if c.node is dst)  # old linear scan
+    scan = (time.perf_counter() - start) / len(pairs)
+    start = time.perf_counter()
+    for src, dst in pairs:
+        planner.find_edge(src, dst)
+    indexed = (time.perf_counter() - start) / len(pairs)
+    
+    return {
+        "edges": graph.num_edges,
+        "compact graph bytes": compact,
+        "node objects bytes": objects,
+        "connection scan": scan,
+        "indexed find_edge": indexed,
+    }
+
+
+def bench_world_build(num_places: int):
+    """create_world time with per-pair get_transfer_weight vs batched get_transfer_weights"""
+    results = {}
+    for label, batched in (("per-pair weights", False), ("batched weights", True)):
+        planner = PathPlanner(build_pf400_deck(num_places, batched=batched))
+        start = time.perf_counter()
+        planner.create_world()
+        results[label] = time.perf_counter() - start
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PathPlanner benchmarks")
+    parser.add_argument("--places", type=int, default=500, help="Number of places on the synthetic deck")
+    parser.add_argument("--moves", type=int, default=20, help="Number of plate moves to plan")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    print(f"\n{'='*70}")
+    print(f"PathPlanner world cache ({args.places} places, {args.moves} moves)")
+    print(f"{'='*70}")
+    results = bench_world_cache(args.places, args.moves, args.seed)
+    for label, per_move in results.items():
+        print(f"  {label:24} {per_move * 1000:10.2f} ms/move")
+    baseline = results["rebuild per move"]
+    cached = results["cached world"]
+    if cached > 0:
+        print(f"  {'speedup':24} {baseline / cached:10.1f}x")
+    
+    print(f"\n{'='*70}")
+    print(f"PathPlanner routing table ({args.places} places, {args.moves} moves)")
+    print(f"{'='*70}")
+    results = bench_routing_table(args.places, args.moves, args.seed)
+    print(f"  {'table warm-up (once)':24} {results['table warm-up (once)'] * 1000:10.2f} ms")
+    for label in ("dijkstra per call", "table lookup"):
+        print(f"  {label:24} {results[label] * 1000:10.3f} ms/plan")
+    if results["table lookup"] > 0:
+        print(f"  {'speedup':24} {results['dijkstra per call'] / results['table lookup']:10.1f}x")
+    
+    print(f"\n{'='*70}")
+    print(f"PathPlanner compact graph ({args.places} places)")
+    print(f"{'='*70}")
+    results = bench_compact_graph(args.places, seed=args.seed)
+    print(f"  {'edges':24} {results['edges']:10d}")
+    print(f"  {'world build (compact)':24} {results['compact graph bytes'] / 1e6:10.2f} MB")
+    print(f"  {'Node/Connection objects':24} {results['node objects bytes'] / 1e6:10.2f} MB")
+    for label in ("connection scan", "indexed find_edge"):
+        print(f"  {label:24} {results[label] * 1e6:10.2f} us/lookup")
+    
+    print(f"\n{'='*70}")
+    print(f"PathPlanner world build, PF400 reach weights ({args.places} places)")
+    print(f"{'='*70}")
+    results = bench_world_build(args.places)
+    for label, seconds in results.items():
+        print(f"  {label:24} {seconds * 1000:10.1f} ms")
+    if results["batched weights"] > 0:
+        print(f"  {'speedup':24} {results['per-pair weights'] / results['batched weights']:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
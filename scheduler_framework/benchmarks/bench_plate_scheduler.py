@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+PlateScheduler latency benchmark.
+
+Measures the scheduling latency from a plate becoming free (its device job
+completed) to its next task being dispatched to a device, and the CPU the
+scheduler burns while every plate is busy on a long job.
+
+Compares the event-driven loop with the old fixed 50 ms polling loop,
+device utilisation when several worklists run back to back vs overlapped,
+and step gaps with and without lookahead reservations.
+
+Usage:
+  python3 benchmarks/bench_plate_scheduler.py
+  python3 benchmarks/bench_plate_scheduler.py --plates 6 --tasks 4
+"""
+
+import argparse
+import logging
+import statistics
+import threading
+import time
+
+import synthetic_deck  # noqa: F401  (adds the package to sys.path)
+from scheduler import (
+    PlateScheduler, RobotScheduler, PlateLocation, PlatePlace, Plate,
+    PlateTask, Worklist, TransferOverview, Transfer
+)
+from scheduler.device_manager import AccessibleDeviceInterface, DeviceManager, RobotInterface
+
+
+class PollingPlateScheduler(PlateScheduler):
+    """The previous loop: a scheduling pass every 50 ms regardless of events"""
+    
+    def _wait_for_state_change(self):
+        time.sleep(0.05)
+
+
+class TimedDevice(AccessibleDeviceInterface):
+    """Device that finishes jobs after `delay` seconds and records timings"""
+    
+    def __init__(self, name: str, product_name: str, num_locations: int, delay: float, log: dict):
+        super().__init__(name, product_name)
+        self.delay = delay
+        self.log = log
+        self.locations = []
+        for i in range(num_locations):
+            location = PlateLocation(f"{name}_loc{i}", name)
+            location.places = [PlatePlace(f"{name}_place{i}", location)]
+            self.locations.append(location)
+    
+    @property
+    def plate_location_info(self):
+        return self.locations
+    
+    def get_available_location(self, active_plate):
+        for location in self.locations:
+            if not location.reserved.is_set():
+                return location
+        return None
+    
+    def reserve_location(self, location, active_plate) -> bool:
+        location.reserved.set()
+        return True
+    
+    def lock_place(self, place_name: str):
+        pass
+    
+    def add_job(self, active_plate):
+        freed = self.log["freed"].pop(active_plate, None)
+        if freed is not None:
+            self.log["latency"].append(time.perf_counter() - freed)
+        timer = threading.Timer(self.delay, self._complete, args=(active_plate,))
+        timer.daemon = True
+        timer.start()
+    
+    def _complete(self, active_plate):
+        self.log["busy"][self.name] = self.log["busy"].get(self.name, 0.0) + self.delay
+        self.log["freed"][active_plate] = time.perf_counter()
+        active_plate.mark_job_completed()
+
+
+class InstantRobot(RobotInterface):
+    def transfer_plate(self, src_device, src_place, dst_device, dst_place, labware_name, barcode):
+        pass
+    
+    def get_transfer_weight(self, src_device, src_location, src_place,
+                           dst_device, dst_location, dst_place) -> float:
+        return float('inf') if src_location is dst_location else 1.0
+
+
+def _new_log() -> dict:
+    return {"freed": {}, "latency": [], "busy": {}}
+
+
+def _worklist(num_plates: int, num_tasks: int, name: str = "LatencyBenchmark") -> Worklist:
+    worklist = Worklist(name)
+    destination = Plate(f"{name}_DST000", "96-well", "96-well")
+    worklist.add_destination_plate(destination)
+    transfers = []
+    sources = {}
+    for i in range(num_plates):
+        source = Plate(f"{name}_SRC{i:03d}", "96-well", "96-well")
+        worklist.add_source_plate(source)
+        sources[source.barcode] = source
+        transfers.append(Transfer(source, destination, volume=10.0))
+    overview = TransferOverview(transfers=transfers, source_plates=sources,
+                                destination_plates={destination.barcode: destination})
+    overview.tasks.source_prehitpick_tasks = [PlateTask("Reader", f"read{t}") for t in range(num_tasks)]
+    worklist.transfer_overview = overview
+    return worklist
+
+
+def run(scheduler_class, num_plates: int, num_tasks: int, job_seconds: float):
+    """Run one worklist to completion; returns (latencies, seconds)"""
+    log = _new_log()
+    device_manager = DeviceManager()
+    device_manager.register_device(TimedDevice("Reader1", "Reader", 4, job_seconds, log))
+    device_manager.register_device(TimedDevice("Bumblebee1", "Bumblebee", 2, job_seconds, log))
+    device_manager.register_robot(InstantRobot("Robot"))
+    
+    robot_scheduler = RobotScheduler(device_manager)
+    robot_scheduler.start_scheduler()
+    scheduler = scheduler_class(robot_scheduler, device_manager)
+    scheduler.idle_recheck_seconds = None
+    
+    start = time.perf_counter()
+    scheduler._do_worklist(_worklist(num_plates, num_tasks))
+    elapsed = time.perf_counter() - start
+    robot_scheduler.stop_scheduler()
+    return log["latency"], elapsed
+
+
+def idle_cpu(scheduler_class, idle_seconds: float = 1.0) -> float:
+    """Process CPU seconds used while the only plate sits on a long job"""
+    log = _new_log()
+    device_manager = DeviceManager()
+    device_manager.register_device(TimedDevice("Reader1", "Reader", 1, idle_seconds * 3, log))
+    device_manager.register_device(TimedDevice("Bumblebee1", "Bumblebee", 1, idle_seconds * 3, log))
+    scheduler = scheduler_class(RobotScheduler(device_manager), device_manager)
+    scheduler.idle_recheck_seconds = None
+    worklist = _worklist(1, 1)
+    worklist.transfer_overview.transfers = worklist.transfer_overview.transfers[:1]
+    
+    worker = threading.Thread(target=scheduler._do_worklist, args=(worklist,), daemon=True)
+    worker.start()
+    time.sleep(0.2)  # let the job get dispatched
+    cpu = time.process_time()
+    time.sleep(idle_seconds)
+    cpu = time.process_time() - cpu
+    scheduler.stop_event.set()
+    scheduler.notify()
+    return cpu / idle_seconds
+
+
+def worklist_utilisation(num_worklists: int, max_concurrent, num_plates: int,
+                         num_tasks: int, job_seconds: float):
+    """Run several worklists through the scheduler thread; returns (makespan, utilisation by device)"""
+    log = _new_log()
+    device_manager = DeviceManager()
+    # Two readers and one Bumblebee: a single worklist cannot keep them all busy
+    devices = [TimedDevice("Reader1", "Reader", 2, job_seconds, log),
+               TimedDevice("Reader2", "Reader", 2, job_seconds, log),
+               TimedDevice("Bumblebee1", "Bumblebee", 2, job_seconds, log)]
+    for device in devices:
+        device_manager.register_device(device)
+    device_manager.register_robot(InstantRobot("Robot"))
+    
+    robot_scheduler = RobotScheduler(device_manager)
+    robot_scheduler.start_scheduler()
+    scheduler = PlateScheduler(robot_scheduler, device_manager,
+                               max_concurrent_worklists=max_concurrent)
+    done = threading.Semaphore(0)
+    start = time.perf_counter()
+    for w in range(num_worklists):
+        worklist = _worklist(num_plates, num_tasks, name=f"WL{w}")
+        worklist.add_completion_callback(lambda *args: done.release())
+        scheduler.enqueue_worklist(worklist)
+    scheduler.start_scheduler()
+    for _ in range(num_worklists):
+        done.acquire()
+    makespan = time.perf_counter() - start
+    scheduler.stop_scheduler()
+    robot_scheduler.stop_scheduler()
+    
+    # Each location can hold a job at a time, so capacity = locations * makespan
+    utilisation = {device.name: log["busy"].get(device.name, 0.0) / (len(device.locations) * makespan)
+                   for device in devices}
+    return makespan, utilisation
+
+
+def lookahead_gaps(lookahead: bool, num_plates: int, num_tasks: int, job_seconds: float):
+    """Plates alternating between busy readers and washers; returns (gaps, makespan)"""
+    log = _new_log()
+    device_manager = DeviceManager()
+    device_manager.register_device(TimedDevice("Reader1", "Reader", 2, job_seconds, log))
+    device_manager.register_device(TimedDevice("Washer1", "Washer", 2, job_seconds, log))
+    device_manager.register_device(TimedDevice("Bumblebee1", "Bumblebee", num_plates + 1, job_seconds, log))
+    device_manager.register_robot(InstantRobot("Robot"))
+    
+    robot_scheduler = RobotScheduler(device_manager)
+    robot_scheduler.start_scheduler()
+    scheduler = PlateScheduler(robot_scheduler, device_manager, lookahead=lookahead)
+    scheduler.idle_recheck_seconds = None
+    worklist = _worklist(num_plates, num_tasks)
+    worklist.transfer_overview.tasks.source_prehitpick_tasks = [
+        PlateTask("Reader" if t % 2 == 0 else "Washer", f"step{t}") for t in range(num_tasks)
+    ]
+    
+    start = time.perf_counter()
+    scheduler._do_worklist(worklist)
+    makespan = time.perf_counter() - start
+    robot_scheduler.stop_scheduler()
+    return log["latency"], makespan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PlateScheduler latency benchmark")
+    parser.add_argument("--plates", type=int, default=6, help="Number of source plates")
+    parser.add_argument("--tasks", type=int, default=4, help="Reader tasks per source plate")
+    parser.add_argument("--job-ms", type=float, default=5.0, help="Device job duration in ms")
+    parser.add_argument("--worklists", type=int, default=3, help="Worklists for the utilisation run")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)  # keep scheduler warnings out of the report
+    
+    print(f"\n{'='*70}")
+    print(f"PlateScheduler latency ({args.plates} plates, {args.tasks} tasks, {args.job_ms} ms jobs)")
+    print(f"{'='*70}")
+    for label, scheduler_class in (("polling (50 ms)", PollingPlateScheduler),
+                                   ("event driven", PlateScheduler)):
+        latencies, elapsed = run(scheduler_class, args.plates, args.tasks, args.job_ms / 1000.0)
+        latencies.sort()
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        print(f"  {label:18} free->dispatch median {statistics.median(latencies) * 1000:7.2f} ms"
+              f"  p95 {p95 * 1000:7.2f} ms  worklist {elapsed:6.2f} s")
+    
+    print(f"\n{'='*70}")
+    print("PlateScheduler idle CPU (one plate on a long job)")
+    print(f"{'='*70}")
+    for label, scheduler_class in (("polling (50 ms)", PollingPlateScheduler),
+                                   ("event driven", PlateScheduler)):
+        print(f"  {label:18} {idle_cpu(scheduler_class) * 100:7.3f} % of a core")
+    
+    print(f"\n{'='*70}")
+    print(f"Device utilisation ({args.worklists} worklists, {args.plates} plates each, 20 ms jobs)")
+    print(f"{'='*70}")
+    for label, max_concurrent in (("one at a time", 1), ("overlapped", None)):
+        makespan, utilisation = worklist_utilisation(args.worklists, max_concurrent,
+                                                     args.plates, args.tasks, 0.02)
+        per_device = "  ".join(f"{name} {value * 100:5.1f}%" for name, value in utilisation.items())
+        print(f"  {label:14} makespan {makespan:6.2f} s  {per_device}")
+    
+    print(f"\n{'='*70}")
+    print(f"Lookahead ({args.plates} plates alternating Reader/Washer, {args.tasks} tasks, 20 ms jobs)")
+    print(f"{'='*70}")
+    for label, lookahead in (("off", False), ("on", True)):
+        gaps, makespan = lookahead_gaps(lookahead, args.plates, args.tasks, 0.02)
+        gaps.sort()
+        p95 = gaps[int(0.95 * (len(gaps) - 1))]
+        print(f"  lookahead {label:4} step gap median {statistics.median(gaps) * 1000:7.2f} ms"
+              f"  p95 {p95 * 1000:7.2f} ms  makespan {makespan:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
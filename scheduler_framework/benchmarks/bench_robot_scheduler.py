@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+RobotScheduler transfer throughput benchmark.
+
+Two-robot cell: each robot serves its own pair of devices and every move
+takes a fixed time. Compares a single worker (the previous serial loop)
+with one worker per robot.
+
+Usage:
+  python3 benchmarks/bench_robot_scheduler.py
+  python3 benchmarks/bench_robot_scheduler.py --moves 40 --move-ms 10
+"""
+
+import argparse
+import logging
+import threading
+import time
+
+import synthetic_deck  # noqa: F401  (adds the package to sys.path)
+from scheduler import RobotScheduler, PlateLocation, PlatePlace, ActiveSourcePlate, Worklist
+from scheduler.device_manager import AccessibleDeviceInterface, DeviceManager, RobotInterface
+
+
+class CellDevice(AccessibleDeviceInterface):
+    def __init__(self, name: str):
+        super().__init__(name, "Cell")
+        location = PlateLocation(f"{name}_loc", name)
+        location.places = [PlatePlace(f"{name}_place", location)]
+        self.locations = [location]
+
+    @property
+    def plate_location_info(self):
+        return self.locations
+
+    def get_available_location(self, active_plate):
+        return self.locations[0]
+
+    def reserve_location(self, location, active_plate) -> bool:
+        return True
+
+    def lock_place(self, place_name: str):
+        pass
+
+    def add_job(self, active_plate):
+        pass
+
+
+class TimedRobot(RobotInterface):
+    """Robot limited to its cell; each transfer takes `seconds`"""
+
+    def __init__(self, name: str, devices, seconds: float):
+        super().__init__(name)
+        self.devices = set(devices)
+        self.seconds = seconds
+
+    def transfer_plate(self, src_device, src_place, dst_device, dst_place, labware_name, barcode):
+        time.sleep(self.seconds)
+
+    def get_transfer_weight(self, src_device, src_location, src_place,
+                           dst_device, dst_location, dst_place) -> float:
+        if src_location is dst_location or not {src_device.name, dst_device.name} <= self.devices:
+            return float('inf')
+        return 1.0
+
+
+def run(max_parallel_moves, num_moves: int, move_seconds: float) -> float:
+    """Execute `num_moves` moves split over both cells; returns moves per second"""
+    device_manager = DeviceManager()
+    devices = {name: CellDevice(name) for name in ("A1", "A2", "B1", "B2")}
+    for device in devices.values():
+        device_manager.register_device(device)
+    device_manager.register_robot(TimedRobot("PF400", ["A1", "A2"], move_seconds))
+    device_manager.register_robot(TimedRobot("Planar", ["B1", "B2"], move_seconds))
+
+    scheduler = RobotScheduler(device_manager, max_parallel_moves=max_parallel_moves)
+    done = threading.Semaphore(0)
+    scheduler.move_completed_callbacks.append(lambda plate: done.release())
+    scheduler.path_planner.create_world()
+    scheduler.start_scheduler()
+
+    worklist = Worklist("RobotBenchmark")
+    start = time.perf_counter()
+    for i in range(num_moves):
+        cell = "A" if i % 2 == 0 else "B"
+        plate = ActiveSourcePlate(worklist, i)
+        plate.current_location = devices[f"{cell}1"].locations[0]
+        plate.destination_location = devices[f"{cell}2"].locations[0]
+        scheduler.add_job(plate)
+    for _ in range(num_moves):
+        done.acquire()
+    elapsed = time.perf_counter() - start
+    scheduler.stop_scheduler()
+    return num_moves / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RobotScheduler throughput benchmark")
+    parser.add_argument("--moves", type=int, default=40, help="Number of moves")
+    parser.add_argument("--move-ms", type=float, default=10.0, help="Transfer duration in ms")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"\n{'='*70}")
+    print(f"RobotScheduler throughput ({args.moves} moves, two robots, {args.move_ms} ms per move)")
+    print(f"{'='*70}")
+    for label, workers in (("single worker", 1), ("worker per robot", None)):
+        rate = run(workers, args.moves, args.move_ms / 1000.0)
+        print(f"  {label:18} {rate:8.1f} moves/s")
+
+
+if __name__ == "__main__":
+    main()
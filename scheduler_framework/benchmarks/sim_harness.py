@@ -0,0 +1,274 @@
+"""
+Simulated cell for scheduler throughput benchmarks.
+
+Runs PlateScheduler and RobotScheduler as a discrete-event simulation (see
+scheduler/simulation.py): scheduling passes, path planning and callbacks are
+the real code, while device jobs, robot moves and waits take simulated time
+drawn from configurable distributions, so a shift of work finishes in
+seconds of wall time.
+
+Devices have a capacity (locations) and a failure rate; a failed job is
+re-run on the same device after `retry_seconds`. Robots are a pool: a move
+starts when a robot is free and the plate arrives when it ends. Plates are
+sourced onto their first device without a move.
+
+Reports plates/hour of simulated time, device and robot utilisation, the
+latency of each scheduling pass and the CPU spent per dispatched task.
+"""
+
+import math
+import random
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import synthetic_deck  # noqa: F401  (adds the package to sys.path)
+from scheduler import (
+    PlateScheduler, RobotScheduler, Plate, PlateTask, WaitTask, Worklist, TransferOverview, Transfer,
+    VirtualClock, Simulation, SimulatedDevice, SimulatedRobot
+)
+from scheduler.device_manager import DeviceManager
+
+
+@dataclass
+class Distribution:
+    """Duration distribution in seconds (`spread` is ± for uniform, the std dev otherwise)"""
+    kind: str = "fixed"
+    mean: float = 1.0
+    spread: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed" or self.mean <= 0:
+            return max(0.0, self.mean)
+        if self.kind == "uniform":
+            return max(0.0, rng.uniform(self.mean - self.spread, self.mean + self.spread))
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(self.mean, self.spread))
+        if self.kind == "lognormal":
+            sigma2 = math.log(1.0 + (self.spread / self.mean) ** 2)
+            return rng.lognormvariate(math.log(self.mean) - sigma2 / 2, math.sqrt(sigma2))
+        if self.kind == "exponential":
+            return rng.expovariate(1.0 / self.mean)
+        raise ValueError(f"Unknown distribution: {self.kind}")
+
+    @classmethod
+    def parse(cls, text: str) -> 'Distribution':
+        """'60', 'uniform:60:10', 'lognormal:60:15', 'exponential:60'"""
+        parts = text.split(":")
+        if len(parts) == 1:
+            return cls("fixed", float(parts[0]))
+        return cls(parts[0], float(parts[1]), float(parts[2]) if len(parts) > 2 else 0.0)
+
+    def __str__(self):
+        if self.kind == "fixed":
+            return f"{self.mean:g}s"
+        return f"{self.kind}({self.mean:g}s, {self.spread:g})"
+
+
+@dataclass
+class DeviceSpec:
+    """`count` devices of one type, each with `capacity` plate locations"""
+    product_name: str
+    duration: Distribution
+    count: int = 1
+    capacity: int = 1
+    failure_rate: float = 0.0
+    retry_seconds: float = 30.0
+
+
+@dataclass
+class RobotSpec:
+    count: int = 1
+    move: Distribution = field(default_factory=lambda: Distribution("uniform", 12.0, 3.0))
+
+
+@dataclass
+class CellSpec:
+    devices: List[DeviceSpec]
+    robots: RobotSpec = field(default_factory=RobotSpec)
+
+
+def default_cell(failure_rate: float = 0.0, robots: int = 1) -> CellSpec:
+    """Two readers, a sealer and a 4-position Bumblebee served by one arm"""
+    return CellSpec(
+        devices=[
+            DeviceSpec("Reader", Distribution("lognormal", 60.0, 15.0), count=2, failure_rate=failure_rate),
+            DeviceSpec("Sealer", Distribution("uniform", 20.0, 5.0), failure_rate=failure_rate),
+            DeviceSpec("Bumblebee", Distribution("normal", 90.0, 10.0), capacity=4, failure_rate=failure_rate),
+        ],
+        robots=RobotSpec(count=robots),
+    )
+
+
+def synthetic_worklists(num_plates: int, sources_per_worklist: int = 4,
+                        source_tasks: Sequence[Tuple[str, str]] = (("Reader", "read"), ("Sealer", "seal")),
+                        destination_tasks: Sequence[Tuple[str, str]] = (("Sealer", "seal"),),
+                        incubate_seconds: float = 0.0) -> List[Worklist]:
+    """
+    Worklists totalling `num_plates` plates.
+
+    Each worklist has one destination plate fed by up to
+    `sources_per_worklist` source plates; sources run `source_tasks` before
+    the hitpick and destinations run `destination_tasks` after it, after an
+    incubation WaitTask if `incubate_seconds` is set.
+    """
+    worklists = []
+    remaining = num_plates
+    while remaining > 0:
+        index = len(worklists)
+        num_sources = max(1, min(sources_per_worklist, remaining - 1))
+        worklist = Worklist(f"WL{index:05d}")
+        destination = Plate(f"WL{index:05d}_DST", "96-well", "96-well")
+        worklist.add_destination_plate(destination)
+        sources = {}
+        transfers = []
+        for i in range(num_sources):
+            source = Plate(f"WL{index:05d}_SRC{i}", "96-well", "96-well")
+            worklist.add_source_plate(source)
+            sources[source.barcode] = source
+            transfers.append(Transfer(source, destination, volume=10.0))
+        overview = TransferOverview(transfers=transfers, source_plates=sources,
+                                    destination_plates={destination.barcode: destination})
+        overview.tasks.source_prehitpick_tasks = [PlateTask(d, c) for d, c in source_tasks]
+        overview.tasks.destination_posthitpick_tasks = [PlateTask(d, c) for d, c in destination_tasks]
+        if incubate_seconds > 0:
+            overview.tasks.destination_posthitpick_tasks.insert(0, WaitTask(incubate_seconds, "incubate"))
+        worklist.transfer_overview = overview
+        worklists.append(worklist)
+        remaining -= num_sources + 1
+    return worklists
+
+
+class SimDevice(SimulatedDevice):
+    """Simulated device with random durations and failures"""
+
+    def __init__(self, name: str, spec: DeviceSpec, clock: VirtualClock, rng: random.Random):
+        super().__init__(name, spec.product_name, clock, num_locations=spec.capacity)
+        self.spec = spec
+        self.rng = rng
+        self.failures = 0
+
+    def job_duration(self, active_plate) -> float:
+        duration = self.spec.duration.sample(self.rng)
+        if self.rng.random() < self.spec.failure_rate:
+            self.failures += 1
+            duration += self.spec.retry_seconds + self.spec.duration.sample(self.rng)
+        return duration
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+@dataclass
+class BenchmarkReport:
+    plates: int
+    worklists: int
+    simulated_seconds: float
+    wall_seconds: float
+    passes: int
+    decisions: int
+    pass_seconds: List[float]
+    pass_cpu_seconds: float
+    move_planning_seconds: List[float]
+    device_utilisation: Dict[str, float]
+    robot_utilisation: float
+    device_failures: int
+
+    @property
+    def plates_per_hour(self) -> float:
+        return self.plates / (self.simulated_seconds / 3600.0) if self.simulated_seconds else 0.0
+
+    @property
+    def cpu_per_decision(self) -> float:
+        return self.pass_cpu_seconds / self.decisions if self.decisions else 0.0
+
+    def format(self) -> str:
+        lines = [
+            f"  plates / worklists:        {self.plates} / {self.worklists}",
+            f"  simulated makespan:        {self.simulated_seconds / 3600.0:.2f} h "
+            f"({self.wall_seconds:.2f} s wall)",
+            f"  throughput:                {self.plates_per_hour:.1f} plates/hour",
+            f"  scheduling passes:         {self.passes} for {self.decisions} dispatched tasks",
+            f"  pass latency:              p50 {statistics.median(self.pass_seconds or [0.0]) * 1e6:.0f} us, "
+            f"p95 {_percentile(self.pass_seconds, 0.95) * 1e6:.0f} us, "
+            f"max {max(self.pass_seconds or [0.0]) * 1e6:.0f} us",
+            f"  CPU per decision:          {self.cpu_per_decision * 1e6:.0f} us",
+            f"  move planning:             p50 {statistics.median(self.move_planning_seconds or [0.0]) * 1e3:.2f} ms",
+            f"  robot utilisation:         {self.robot_utilisation * 100:.1f}%",
+        ]
+        for product_name, utilisation in self.device_utilisation.items():
+            lines.append(f"  {product_name + ' utilisation:':<27}{utilisation * 100:.1f}%")
+        lines.append(f"  device failures (re-run):  {self.device_failures}")
+        return "\n".join(lines)
+
+
+class SimulationHarness:
+    """A simulated cell with a PlateScheduler/RobotScheduler pair on a virtual clock"""
+
+    def __init__(self, cell: CellSpec, seed: int = 0,
+                 max_concurrent_worklists: Optional[int] = 4, lookahead: bool = False):
+        self.cell = cell
+        self.rng = random.Random(seed)
+        self.clock = VirtualClock()
+        self.device_manager = DeviceManager()
+        self.devices: List[SimDevice] = []
+        for spec in cell.devices:
+            for i in range(spec.count):
+                device = SimDevice(f"{spec.product_name}{i + 1}", spec, self.clock, self.rng)
+                self.device_manager.register_device(device)
+                self.devices.append(device)
+        self.robots = [SimulatedRobot(f"Robot{i + 1}") for i in range(cell.robots.count)]
+        for robot in self.robots:
+            self.device_manager.register_robot(robot)
+
+        self.robot_scheduler = RobotScheduler(self.device_manager, clock=self.clock)
+        self.plate_scheduler = PlateScheduler(self.robot_scheduler, self.device_manager,
+                                              max_concurrent_worklists=max_concurrent_worklists,
+                                              lookahead=lookahead)
+        self.simulation = Simulation(self.plate_scheduler,
+                                     move_seconds=lambda plate: cell.robots.move.sample(self.rng))
+        # Path planning and bookkeeping of each move (its wall time, not simulated)
+        self.move_planning_seconds: List[float] = []
+        move_plate = self.robot_scheduler._move_plate
+
+        def timed_move(active_plate):
+            started = time.perf_counter()
+            try:
+                move_plate(active_plate)
+            finally:
+                self.move_planning_seconds.append(time.perf_counter() - started)
+
+        self.robot_scheduler._move_plate = timed_move
+
+    def run(self, worklists: List[Worklist]) -> BenchmarkReport:
+        """Process the worklists to completion; returns the measurements"""
+        wall_started = time.perf_counter()
+        makespan = self.simulation.run_worklists(worklists)
+
+        utilisation: Dict[str, float] = {}
+        for spec in self.cell.devices:
+            devices = [d for d in self.devices if d.spec is spec]
+            capacity = sum(spec.capacity for _ in devices)
+            busy = sum(d.busy_seconds for d in devices)
+            utilisation[spec.product_name] = busy / (capacity * makespan) if makespan else 0.0
+        plates = sum(len(w.source_plates) + len(w.destination_plates) for w in worklists)
+        return BenchmarkReport(
+            plates=plates,
+            worklists=len(worklists),
+            simulated_seconds=makespan,
+            wall_seconds=time.perf_counter() - wall_started,
+            passes=len(self.simulation.pass_seconds),
+            decisions=sum(run.tasks_dispatched for run in self.plate_scheduler.completed_runs),
+            pass_seconds=self.simulation.pass_seconds,
+            pass_cpu_seconds=self.simulation.pass_cpu_seconds,
+            move_planning_seconds=self.move_planning_seconds,
+            device_utilisation=utilisation,
+            robot_utilisation=(self.simulation.robot_busy_seconds / (len(self.robots) * makespan)
+                               if makespan and self.robots else 0.0),
+            device_failures=sum(d.failures for d in self.devices),
+        )
@@ -0,0 +1,180 @@
+"""
+Synthetic deck builder for scheduler benchmarks.
+
+Builds a DeviceManager populated with simple in-memory devices and robots so
+planner/scheduler benchmarks can run without hardware.
+"""
+
+import os
+import sys
+import math
+from typing import Dict, List, Sequence
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from scheduler.active_plate import PlateLocation, PlatePlace
+from scheduler.device_manager import AccessibleDeviceInterface, DeviceManager, RobotInterface
+from scheduler.pf400_reach import PF400ReachRobot, forward_position, within_limits
+
+
+class DeckDevice(AccessibleDeviceInterface):
+    """In-memory device with a fixed set of locations"""
+    
+    def __init__(self, name: str, product_name: str, index: int):
+        super().__init__(name, product_name)
+        self.index = index
+        self.locations: List[PlateLocation] = []
+    
+    @property
+    def plate_location_info(self) -> List[PlateLocation]:
+        return self.locations
+    
+    def get_available_location(self, active_plate):
+        for location in self.locations:
+            if location.available and not location.occupied.is_set() and not location.reserved.is_set():
+                return location
+        return None
+    
+    def reserve_location(self, location: PlateLocation, active_plate) -> bool:
+        if location.reserved.is_set():
+            return False
+        location.reserved.set()
+        return True
+    
+    def lock_place(self, place_name: str):
+        pass
+    
+    def add_job(self, active_plate):
+        active_plate.mark_job_completed()
+
+
+class DeckRobot(RobotInterface):
+    """
+    Robot that can reach a contiguous band of devices on the deck.
+    
+    Transfer weight grows with the distance (in device index) between the
+    two devices, so neighbouring bands overlap and act as handoff points.
+    """
+    
+    def __init__(self, name: str, first_device: int, last_device: int):
+        super().__init__(name)
+        self.first_device = first_device
+        self.last_device = last_device
+        self.transfer_count = 0
+    
+    def can_reach(self, device) -> bool:
+        return self.first_device <= device.index <= self.last_device
+    
+    def transfer_plate(self, src_device: str, src_place: str,
+                      dst_device: str, dst_place: str,
+                      labware_name: str, barcode: str):
+        self.transfer_count += 1
+    
+    def get_transfer_weight(self, src_device, src_location, src_place,
+                           dst_device, dst_location, dst_place) -> float:
+        if src_location is dst_location:
+            return float('inf')
+        if not self.can_reach(src_device) or not self.can_reach(dst_device):
+            return float('inf')
+        return 1.0 + 0.1 * abs(src_device.index - dst_device.index)
+
+
+class DeckPF400(PF400ReachRobot):
+    """PF400 with teachpoints on the synthetic deck (batched reach weights)"""
+    
+    def __init__(self, name: str, teachpoints: Dict[str, Sequence[float]]):
+        super().__init__(name, teachpoints)
+        self.teachpoints = dict(teachpoints)
+        self.transfer_count = 0
+    
+    def transfer_plate(self, src_device: str, src_place: str,
+                      dst_device: str, dst_place: str,
+                      labware_name: str, barcode: str):
+        self.transfer_count += 1
+
+
+class ScalarDeckPF400(DeckPF400):
+    """
+    Same robot evaluated the old way: one get_transfer_weight() call per
+    pair, each doing its own teachpoint lookup and kinematics.
+    """
+    
+    get_transfer_weights = RobotInterface.get_transfer_weights
+    
+    def get_transfer_weight(self, src_device, src_location, src_place,
+                           dst_device, dst_location, dst_place) -> float:
+        if src_location is dst_location:
+            return float('inf')
+        src = self.teachpoints.get(f"{src_location.name}:{src_place.name}")
+        dst = self.teachpoints.get(f"{dst_location.name}:{dst_place.name}")
+        if src is None or dst is None or not within_limits(src) or not within_limits(dst):
+            return float('inf')
+        return self.base_weight + math.dist(forward_position(src), forward_position(dst)) / self.mm_per_weight
+
+
+def build_deck(num_places: int = 500, places_per_device: int = 4,
+               num_robots: int = 2) -> DeviceManager:
+    """
+    Build a synthetic deck with `num_places` places.
+    
+    Devices are laid out in a line; each robot covers an overlapping band of
+    devices so routes between the far ends need several hops.
+    """
+    device_manager = DeviceManager()
+    num_devices = max(1, num_places // places_per_device)
+    
+    for i in range(num_devices):
+        device = DeckDevice(f"Device{i:03d}", f"Product{i % 5}", i)
+        for j in range(places_per_device):
+            location = PlateLocation(f"Device{i:03d}_loc{j}", device.name)
+            location.places = [PlatePlace(f"Device{i:03d}_place{j}", location)]
+            device.locations.append(location)
+        device_manager.register_device(device)
+    
+    band = num_devices // max(1, num_robots)
+    overlap = max(1, band // 10)
+    for r in range(num_robots):
+        first = max(0, r * band - overlap)
+        last = num_devices - 1 if r == num_robots - 1 else (r + 1) * band + overlap
+        device_manager.register_robot(DeckRobot(f"Robot{r}", first, last))
+    
+    return device_manager
+
+
+def build_pf400_deck(num_places: int = 500, places_per_device: int = 4,
+                     num_robots: int = 2, batched: bool = True) -> DeviceManager:
+    """
+    Synthetic deck served by PF400 arms on horizontal rails.
+    
+    Same device layout as build_deck(); each arm has teachpoints only for
+    the devices in its band. With `batched=False` the arms only implement
+    the per-pair get_transfer_weight().
+    """
+    device_manager = build_deck(num_places, places_per_device, num_robots=0)
+    devices = device_manager.get_accessible_devices()
+    num_devices = len(devices)
+    robot_class = DeckPF400 if batched else ScalarDeckPF400
+    
+    band = max(1, num_devices // num_robots)
+    overlap = max(1, band // 10)
+    for r in range(num_robots):
+        first = max(0, r * band - overlap)
+        last = num_devices - 1 if r == num_robots - 1 else min(num_devices - 1, (r + 1) * band + overlap)
+        teachpoints = {}
+        for device in devices[first:last + 1]:
+            # Spread the band along the 2m rail; stack locations vertically
+            rail = -900.0 + 1800.0 * (device.index - first) / max(1, last - first)
+            for j, location in enumerate(device.locations):
+                shoulder = -60.0 + 120.0 * (device.index % 3) / 2
+                joints = [100.0 + 150.0 * j, shoulder, 30.0, 15.0, 80.0, rail]
+                teachpoints[f"{location.name}:{location.places[0].name}"] = joints
+        device_manager.register_robot(robot_class(f"PF400_{r}", teachpoints))
+    
+    return device_manager
+
+
+def deck_locations(device_manager: DeviceManager) -> List[PlateLocation]:
+    """All plate locations on the deck, in device order"""
+    return [location
+            for device in device_manager.get_accessible_devices()
+            for location in device.plate_location_info]
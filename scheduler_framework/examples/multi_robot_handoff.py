@@ -286,7 +286,7 @@ def create_multi_robot_workflow():
             self.still_have_todos = len(self.todo_list) > 0
     
     workflow_plate = HandoffWorkflowPlate(worklist, plate)
-    ActivePlate._active_plates.append(workflow_plate)
+    plate_scheduler.active_plates.add(workflow_plate)
     
     # Start schedulers
     robot_scheduler.start_scheduler()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark runner script for the scheduler framework.
+
+Runs each benchmark in benchmarks/ as its own process, like run_tests.py
+runs test batches. `--quick` uses small sizes for a smoke run.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Benchmarks - "quick" arguments keep each run to a few seconds
+BENCHMARKS = [
+    {
+        "name": "Throughput",
+        "script": "benchmarks/bench_throughput.py",
+        "args": [],
+        "quick": ["--plates", "10,100"],
+        "description": "Plates/hour, utilisation and decision latency on a simulated cell"
+    },
+    {
+        "name": "Plate Scheduler",
+        "script": "benchmarks/bench_plate_scheduler.py",
+        "args": [],
+        "quick": ["--plates", "3", "--tasks", "2"],
+        "description": "Dispatch latency, idle CPU, overlapped worklists and lookahead"
+    },
+    {
+        "name": "Robot Scheduler",
+        "script": "benchmarks/bench_robot_scheduler.py",
+        "args": [],
+        "quick": ["--moves", "10"],
+        "description": "Parallel robot moves"
+    },
+    {
+        "name": "Path Planner",
+        "script": "benchmarks/bench_path_planner.py",
+        "args": [],
+        "quick": ["--places", "100", "--moves", "5"],
+        "description": "World build and path planning on a synthetic deck"
+    },
+    {
+        "name": "Makespan Planner",
+        "script": "benchmarks/bench_makespan_planner.py",
+        "args": [],
+        "quick": ["--iterations", "50"],
+        "description": "Predicted greedy vs planned makespans"
+    },
+    {
+        "name": "Async Scheduler",
+        "script": "benchmarks/bench_async_scheduler.py",
+        "args": [],
+        "quick": ["--devices", "10", "--worklists", "4"],
+        "description": "Threaded vs asyncio scheduler"
+    },
+    {
+        "name": "Node Client",
+        "script": "benchmarks/bench_node_client.py",
+        "args": [],
+        "quick": ["--requests", "200", "--threads", "1,4"],
+        "description": "Pooled keep-alive vs per-request connections to a Node"
+    },
+]
+
+
+def run_benchmark(benchmark, quick=False, timeout_s: float = 600.0):
+    """Run one benchmark script and return the result."""
+    print(f"\n{'='*70}")
+    print(f"Running: {benchmark['name']}")
+    print(f"Description: {benchmark['description']}")
+    print(f"{'='*70}")
+
+    cmd = [sys.executable, benchmark["script"]] + (benchmark["quick"] if quick else benchmark["args"])
+
+    start_time = time.time()
+    try:
+        returncode = subprocess.run(cmd, text=True, timeout=timeout_s).returncode
+    except subprocess.TimeoutExpired:
+        print(f"\n⏱️  Benchmark timed out after {timeout_s:.0f}s", file=sys.stderr)
+        returncode = 124
+
+    return {
+        "name": benchmark["name"],
+        "success": returncode == 0,
+        "returncode": returncode,
+        "elapsed": time.time() - start_time,
+    }
+
+
+def main():
+    """Main benchmark runner."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Run scheduler framework benchmarks",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python3 run_benchmarks.py              # Run all benchmarks
+  python3 run_benchmarks.py --quick      # Small sizes (smoke run)
+  python3 run_benchmarks.py --bench 0    # Run only the first benchmark
+  python3 run_benchmarks.py --list       # List all benchmarks
+        """
+    )
+    parser.add_argument("--quick", action="store_true", help="Run with small sizes")
+    parser.add_argument("--bench", type=int, metavar="N", help="Run only benchmark number N (0-indexed)")
+    parser.add_argument("--list", action="store_true", help="List all benchmarks and exit")
+    parser.add_argument("--timeout", type=float, default=600.0,
+                        help="Timeout (seconds) per benchmark (default: 600)")
+
+    args = parser.parse_args()
+
+    # Change to script directory
+    os.chdir(Path(__file__).parent)
+
+    if args.list:
+        print("Available benchmarks:\n")
+        for i, benchmark in enumerate(BENCHMARKS):
+            print(f"  [{i}] {benchmark['name']}")
+            print(f"      {benchmark['description']}")
+            print(f"      Script: {benchmark['script']}")
+            print()
+        return 0
+
+    if args.bench is not None:
+        if args.bench < 0 or args.bench >= len(BENCHMARKS):
+            print(f"Error: Benchmark number must be between 0 and {len(BENCHMARKS) - 1}")
+            return 1
+        benchmarks = [BENCHMARKS[args.bench]]
+    else:
+        benchmarks = BENCHMARKS
+
+    results = [run_benchmark(benchmark, args.quick, args.timeout) for benchmark in benchmarks]
+
+    print(f"\n{'='*70}")
+    print("BENCHMARK SUMMARY")
+    print(f"{'='*70}\n")
+    for result in results:
+        status = "✅ DONE" if result["success"] else f"❌ FAILED ({result['returncode']})"
+        print(f"  {status:12} {result['name']:40} ({result['elapsed']:.2f}s)")
+
+    return 0 if all(result["success"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
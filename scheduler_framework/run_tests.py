@@ -38,6 +38,41 @@ TEST_BATCHES = [
         "files": ["tests/test_path_planner.py"],
         "description": "Tests for PathPlanner and graph algorithms"
     },
+    {
+        "name": "Routing Table Tests",
+        "files": ["tests/test_routing_table.py"],
+        "description": "Tests for RoutingTable and PathPlanner table lookups"
+    },
+    {
+        "name": "World Graph Tests",
+        "files": ["tests/test_world_graph.py"],
+        "description": "Tests for the compact WorldGraph and PathPlanner edge lookups"
+    },
+    {
+        "name": "PF400 Reach Tests",
+        "files": ["tests/test_pf400_reach.py"],
+        "description": "Tests for reach-based and batched transfer weights"
+    },
+    {
+        "name": "Worklist Policy Tests",
+        "files": ["tests/test_worklist_policy.py"],
+        "description": "Tests for worklist policies and concurrent worklists"
+    },
+    {
+        "name": "Active Plate Registry Tests",
+        "files": ["tests/test_active_plate_registry.py"],
+        "description": "Tests for ActivePlateRegistry indexes and scheduler isolation"
+    },
+    {
+        "name": "Device Policy Tests",
+        "files": ["tests/test_device_policy.py"],
+        "description": "Tests for DeviceManager availability tracking and device policies"
+    },
+    {
+        "name": "Reservation Table Tests",
+        "files": ["tests/test_reservation_table.py"],
+        "description": "Tests for ReservationTable, CooperativePlanner and reservation-aware moves"
+    },
     {
         "name": "Robot Scheduler Tests",
         "files": ["tests/test_robot_scheduler.py"],
@@ -48,6 +83,46 @@ TEST_BATCHES = [
         "files": ["tests/test_plate_scheduler.py"],
         "description": "Tests for PlateScheduler (main orchestrator)"
     },
+    {
+        "name": "Makespan Planner Tests",
+        "files": ["tests/test_makespan_planner.py"],
+        "description": "Tests for MakespanPlanner and dispatch plan execution"
+    },
+    {
+        "name": "Duration Model Tests",
+        "files": ["tests/test_duration_model.py"],
+        "description": "Tests for DurationModel and duration recording"
+    },
+    {
+        "name": "Timer Service Tests",
+        "files": ["tests/test_timer_service.py"],
+        "description": "Tests for TimerService and WaitTask cancel/pause"
+    },
+    {
+        "name": "State Journal Tests",
+        "files": ["tests/test_state_journal.py"],
+        "description": "Tests for StateJournal and PlateScheduler crash recovery"
+    },
+    {
+        "name": "Simulation Tests",
+        "files": ["tests/test_simulation.py"],
+        "description": "Tests for VirtualClock and the discrete-event Simulation"
+    },
+    {
+        "name": "Instrumentation Tests",
+        "files": ["tests/test_instrumentation.py"],
+        "description": "Tests for metrics, tracing and the instrumentation endpoint"
+    },
+    {
+        "name": "Node Client Tests",
+        "files": ["tests/test_node_client.py"],
+        "description": "Tests for RestNodeClient, HTTPConnectionPool, wait_for_completion and batch calls"
+    },
+    {
+        "name": "Async Scheduler Tests",
+        "files": ["tests/test_async_scheduler.py"],
+        "description": "Tests for AsyncPlateScheduler, adapters and AsyncRestNodeClient"
+    },
     {
         "name": "Path Planner Edge Cases",
         "files": ["tests/test_path_planner_edge_cases.py"],
@@ -6,12 +6,14 @@ based on the C# PlateScheduler architecture.
 """
 
 from .plate_scheduler import PlateScheduler
+from .worklist_policy import WorklistPolicy, PriorityPolicy, FairSharePolicy
 from .robot_scheduler import RobotScheduler
 from .path_planner import PathPlanner
 from .active_plate import (
     ActivePlate, ActiveSourcePlate, ActiveDestinationPlate,
     Plate, PlateLocation, PlatePlace, PlateState
 )
+from .active_plate_registry import ActivePlateRegistry
 from .ids import new_ulid_str, is_valid_ulid
 from .tasks import PlateTask, WaitTask
 from .worklist import (
@@ -20,16 +22,35 @@ from .worklist import (
 )
 from .handoff_location import HandoffLocation
 from .device_manager import DeviceManager, DeviceInterface
+from .device_policy import DevicePolicy, LeastLoadedPolicy, RoundRobinPolicy, NearestDevicePolicy
+from .makespan_planner import MakespanPlanner, DispatchPlan, PlannedOperation
+from .duration_model import DurationModel, DurationStats
+from .timer_service import TimerService, TimerHandle
+from .state_journal import StateJournal, JournalState, RecoveryReport
+from .clock import Clock, SystemClock, VirtualClock
+from .simulation import Simulation, SimulatedDevice, SimulatedRobot
+from .metrics import MetricsRegistry, Counter, Gauge, Histogram
+from .tracing import Tracer, Span
+from .instrumentation import Instrumentation, InstrumentationServer
+from .async_scheduler import AsyncPlateScheduler, AsyncRobotScheduler
+from .async_devices import AsyncDeviceInterface, AsyncRobotInterface, SyncDeviceAdapter, SyncRobotAdapter
+from .pf400_reach import PF400ReachRobot
 from .node_interface import NodeClient, NodeDefinition, NodeAction, NodeActionRequest, NodeActionResponse
-from .node_client import RestNodeClient
+from .node_client import RestNodeClient, NodeHTTPError
+from .http_pool import HTTPConnectionPool
+from .async_node_client import AsyncRestNodeClient
 
 __all__ = [
     'PlateScheduler',
+    'WorklistPolicy',
+    'PriorityPolicy',
+    'FairSharePolicy',
     'RobotScheduler',
     'PathPlanner',
     'ActivePlate',
     'ActiveSourcePlate',
     'ActiveDestinationPlate',
+    'ActivePlateRegistry',
     'Plate',
     'PlateLocation',
     'PlatePlace',
@@ -45,6 +66,41 @@ __all__ = [
     'create_worklist_from_transfer_overview',
     'DeviceManager',
     'DeviceInterface',
+    'DevicePolicy',
+    'LeastLoadedPolicy',
+    'RoundRobinPolicy',
+    'NearestDevicePolicy',
+    'MakespanPlanner',
+    'DispatchPlan',
+    'PlannedOperation',
+    'DurationModel',
+    'DurationStats',
+    'TimerService',
+    'TimerHandle',
+    'StateJournal',
+    'JournalState',
+    'RecoveryReport',
+    'Clock',
+    'SystemClock',
+    'VirtualClock',
+    'Simulation',
+    'SimulatedDevice',
+    'SimulatedRobot',
+    'MetricsRegistry',
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'Tracer',
+    'Span',
+    'Instrumentation',
+    'InstrumentationServer',
+    'AsyncPlateScheduler',
+    'AsyncRobotScheduler',
+    'AsyncDeviceInterface',
+    'AsyncRobotInterface',
+    'SyncDeviceAdapter',
+    'SyncRobotAdapter',
+    'PF400ReachRobot',
     'HandoffLocation',
     'NodeClient',
     'NodeDefinition',
@@ -52,5 +108,8 @@ __all__ = [
     'NodeActionRequest',
     'NodeActionResponse',
     'RestNodeClient',
+    'NodeHTTPError',
+    'HTTPConnectionPool',
+    'AsyncRestNodeClient',
 ]
 
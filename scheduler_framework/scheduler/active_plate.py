@@ -11,7 +11,7 @@ Based on the C# ActivePlate class, this tracks:
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Union, TYPE_CHECKING
+from typing import Callable, List, Optional, Union, TYPE_CHECKING
 from enum import Enum
 import threading
 
@@ -50,14 +50,43 @@ class PlatePlace:
         return f"PlatePlace({self.name})"
 
 
+class ObservableEvent(threading.Event):
+    """
+    threading.Event that calls listeners when it changes between set and clear.
+    
+    Listeners are called with the event, outside the event's lock, on the
+    thread that changed it. They must be cheap and must not block.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.listeners: List[Callable[['ObservableEvent'], None]] = []
+    
+    def set(self):
+        was_set = self.is_set()
+        super().set()
+        if not was_set:
+            self._notify()
+    
+    def clear(self):
+        was_set = self.is_set()
+        super().clear()
+        if was_set:
+            self._notify()
+    
+    def _notify(self):
+        for listener in list(self.listeners):
+            listener(self)
+
+
 @dataclass
 class PlateLocation:
     """Represents a location where a plate can be placed"""
     name: str
     device_name: str
     available: bool = True
-    occupied: threading.Event = field(default_factory=lambda: threading.Event())
-    reserved: threading.Event = field(default_factory=lambda: threading.Event())
+    occupied: threading.Event = field(default_factory=ObservableEvent)
+    reserved: threading.Event = field(default_factory=ObservableEvent)
     places: List[PlatePlace] = field(default_factory=list)
     
     def __post_init__(self):
@@ -80,12 +109,12 @@ class ActivePlate:
     - Completion status
     """
     
-    _active_plates: List['ActivePlate'] = []
     _plate_serial_counter = 0
     _lock = threading.Lock()
     
     def __init__(self, worklist: 'Worklist', instance_index: int):
         self.active_plate_id = new_ulid_str()
+        self.worklist = worklist
         self.instance_index = instance_index
         self.plate_is_free = threading.Event()
         self.plate_is_free.set()  # Initially free
@@ -93,7 +122,6 @@ class ActivePlate:
         with ActivePlate._lock:
             ActivePlate._plate_serial_counter += 1
             self.plate_serial_number = ActivePlate._plate_serial_counter
-            ActivePlate._active_plates.append(self)
         
         self.current_location: Optional[PlateLocation] = None
         self.destination_location: Optional[PlateLocation] = None
@@ -106,6 +134,9 @@ class ActivePlate:
         self.current_task_index: int = 0
         self.still_have_todos = False
         
+        # Called with this plate after a job completes (e.g. to wake the scheduler)
+        self.state_changed_callbacks: List[Callable[['ActivePlate'], None]] = []
+        
     @property
     def busy(self) -> bool:
         """Check if plate is currently busy"""
@@ -143,6 +174,9 @@ class ActivePlate:
             self.destination_location.reserved.clear()
         self.current_location = self.destination_location
         self.plate_is_free.set()
+        # Copied: callbacks may unregister themselves from other threads
+        for callback in list(self.state_changed_callbacks):
+            callback(self)
     
     def get_status(self) -> str:
         """Get status string for debugging/monitoring"""
@@ -6,16 +6,19 @@ worklist requirements and concurrency limits.
 """
 
 from abc import ABC, abstractmethod
-from typing import Type, List
+from typing import Optional, Type, List
 from .worklist import Worklist
 from .active_plate import ActivePlate, ActiveSourcePlate, ActiveDestinationPlate
+from .active_plate_registry import ActivePlateRegistry
 
 
 class ActivePlateFactory(ABC):
     """Abstract factory for creating active plates"""
     
-    def __init__(self, worklist: Worklist):
+    def __init__(self, worklist: Worklist, registry: Optional[ActivePlateRegistry] = None):
         self.worklist = worklist
+        # Where created plates are registered (usually the PlateScheduler's registry)
+        self.registry = registry if registry is not None else ActivePlateRegistry()
         self.number_of_plates_to_create = 0
         self.plate_instance_index = 0
         self._set_number_of_plates_to_create()
@@ -36,7 +39,7 @@ class ActivePlateFactory(ABC):
         pass
     
     def create_active_plate(self) -> ActivePlate:
-        """Create a new active plate"""
+        """Create a new active plate and add it to the registry"""
         if self.number_of_plates_to_create <= 0:
             return None
         
@@ -44,6 +47,7 @@ class ActivePlateFactory(ABC):
         plate_type = self.get_active_plate_type()
         active_plate = plate_type(self.worklist, self.plate_instance_index)
         self.plate_instance_index += 1
+        self.registry.add(active_plate)
         return active_plate
     
     def release_active_plate(self) -> bool:
@@ -51,12 +55,10 @@ class ActivePlateFactory(ABC):
         Check if a new active plate can be released.
         
         Returns True if a plate can be released based on concurrency limits.
+        Limits apply per worklist.
         """
-        active_plates_of_type = [
-            ap for ap in ActivePlate._active_plates
-            if isinstance(ap, self.get_active_plate_type())
-        ]
-        return len(active_plates_of_type) < self.number_of_simultaneous_plates()
+        active = self.registry.count(self.get_active_plate_type(), self.worklist)
+        return active < self.number_of_simultaneous_plates()
     
     def try_release_active_plate(self) -> ActivePlate:
         """
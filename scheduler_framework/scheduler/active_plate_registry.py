@@ -0,0 +1,186 @@
+"""
+ActivePlateRegistry - the set of plates a scheduler is currently processing.
+
+Replaces the old class-level `ActivePlate._active_plates` list. Each
+PlateScheduler owns one registry, so several schedulers can run in one
+process. Plates are indexed by:
+- plate type (every ActivePlate subclass in the plate's MRO)
+- worklist
+- current task, keyed by (device_type, command)
+- busy/free state
+
+Membership and counts are O(1). Task and busy/free indexes follow the plate
+as it completes jobs (via ActivePlate.state_changed_callbacks); code that
+changes a plate's state in other ways calls `refresh(plate)`.
+"""
+
+import threading
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple, Type
+
+from .active_plate import ActivePlate
+
+TaskKey = Tuple[Optional[str], Optional[str]]
+
+
+def task_key(task) -> Optional[TaskKey]:
+    """Index key for a task: (device_type, command), ("wait", None) for waits, None for no task"""
+    if task is None:
+        return None
+    if hasattr(task, "device_type"):
+        return (task.device_type, task.command)
+    return ("wait", None)
+
+
+class ActivePlateRegistry:
+    """Indexed set of active plates"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Insertion-ordered sets (dict keys) of plates
+        self._plates: Dict[ActivePlate, None] = {}
+        self._by_type: Dict[type, Dict[ActivePlate, None]] = {}
+        self._by_worklist: Dict[str, Dict[ActivePlate, None]] = {}
+        self._by_worklist_type: Dict[Tuple[str, type], Dict[ActivePlate, None]] = {}
+        self._by_task: Dict[TaskKey, Dict[ActivePlate, None]] = {}
+        self._by_busy: Dict[bool, Dict[ActivePlate, None]] = {True: {}, False: {}}
+        # Keys each plate is currently filed under in the changing indexes
+        self._state_keys: Dict[ActivePlate, Tuple[Optional[TaskKey], bool]] = {}
+
+    @staticmethod
+    def _worklist_id(plate_or_worklist) -> Optional[str]:
+        worklist = getattr(plate_or_worklist, "worklist", plate_or_worklist)
+        return getattr(worklist, "worklist_id", None)
+
+    @staticmethod
+    def _plate_types(plate: ActivePlate) -> List[type]:
+        return [cls for cls in type(plate).__mro__
+                if isinstance(cls, type) and issubclass(cls, ActivePlate)]
+
+    @staticmethod
+    def _file(index: Dict[Hashable, Dict[ActivePlate, None]], key, plate: ActivePlate):
+        index.setdefault(key, {})[plate] = None
+
+    @staticmethod
+    def _unfile(index: Dict[Hashable, Dict[ActivePlate, None]], key, plate: ActivePlate):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(plate, None)
+            if not bucket and key not in (True, False):
+                del index[key]
+
+    def add(self, plate: ActivePlate) -> bool:
+        """Register a plate; returns False if it was already registered"""
+        with self._lock:
+            if plate in self._plates:
+                return False
+            self._plates[plate] = None
+            worklist_id = self._worklist_id(plate)
+            for cls in self._plate_types(plate):
+                self._file(self._by_type, cls, plate)
+                self._file(self._by_worklist_type, (worklist_id, cls), plate)
+            self._file(self._by_worklist, worklist_id, plate)
+            self._file_state(plate)
+        plate.state_changed_callbacks.append(self.refresh)
+        return True
+
+    def remove(self, plate: ActivePlate) -> bool:
+        """Unregister a plate; returns False if it was not registered"""
+        with self._lock:
+            if plate not in self._plates:
+                return False
+            del self._plates[plate]
+            worklist_id = self._worklist_id(plate)
+            for cls in self._plate_types(plate):
+                self._unfile(self._by_type, cls, plate)
+                self._unfile(self._by_worklist_type, (worklist_id, cls), plate)
+            self._unfile(self._by_worklist, worklist_id, plate)
+            self._unfile_state(plate)
+        if self.refresh in plate.state_changed_callbacks:
+            plate.state_changed_callbacks.remove(self.refresh)
+        return True
+
+    def _file_state(self, plate: ActivePlate):
+        key = task_key(plate.get_current_todo())
+        busy = plate.busy
+        self._file(self._by_task, key, plate)
+        self._by_busy[busy][plate] = None
+        self._state_keys[plate] = (key, busy)
+
+    def _unfile_state(self, plate: ActivePlate):
+        key, busy = self._state_keys.pop(plate)
+        self._unfile(self._by_task, key, plate)
+        self._by_busy[busy].pop(plate, None)
+
+    def refresh(self, plate: ActivePlate):
+        """Re-index a plate after its current task or busy state changed"""
+        with self._lock:
+            if plate in self._plates and self._state_keys[plate] != (task_key(plate.get_current_todo()), plate.busy):
+                self._unfile_state(plate)
+                self._file_state(plate)
+
+    def clear(self):
+        with self._lock:
+            for plate in list(self._plates):
+                self.remove(plate)
+
+    def __contains__(self, plate) -> bool:
+        return plate in self._plates
+
+    def __len__(self) -> int:
+        return len(self._plates)
+
+    def __iter__(self) -> Iterator[ActivePlate]:
+        return iter(self.plates())
+
+    def plates(self) -> List[ActivePlate]:
+        """Snapshot of all registered plates, in registration order"""
+        with self._lock:
+            return list(self._plates)
+
+    def count(self, plate_type: Optional[Type[ActivePlate]] = None, worklist=None) -> int:
+        """Number of plates, optionally of a type (including subclasses) and/or worklist"""
+        with self._lock:
+            if plate_type is None and worklist is None:
+                return len(self._plates)
+            return len(self._bucket(plate_type, worklist))
+
+    def _bucket(self, plate_type, worklist) -> Dict[ActivePlate, None]:
+        if worklist is None:
+            return self._by_type.get(plate_type, {})
+        worklist_id = self._worklist_id(worklist)
+        if plate_type is None:
+            return self._by_worklist.get(worklist_id, {})
+        return self._by_worklist_type.get((worklist_id, plate_type), {})
+
+    def select(self, plate_type: Optional[Type[ActivePlate]] = None, worklist=None,
+               busy: Optional[bool] = None) -> List[ActivePlate]:
+        """Plates matching every given filter"""
+        with self._lock:
+            plates = self._plates if plate_type is None and worklist is None else self._bucket(plate_type, worklist)
+            if busy is None:
+                return list(plates)
+            state = self._by_busy[busy]
+            if len(state) < len(plates):
+                return [plate for plate in state if plate in plates]
+            return [plate for plate in plates if plate in state]
+
+    def with_task(self, device_type: Optional[str], command: Optional[str]) -> List[ActivePlate]:
+        """Plates whose current task is (device_type, command)"""
+        with self._lock:
+            return list(self._by_task.get((device_type, command), ()))
+
+    def is_first_for_task(self, plate: ActivePlate) -> bool:
+        """
+        False while a plate with a lower instance index has the same current task.
+
+        Only plates sharing the task's (device_type, command) key are compared.
+        """
+        todo = plate.get_current_todo()
+        key = task_key(todo)
+        if key is None:
+            return True
+        with self._lock:
+            bucket = list(self._by_task.get(key, ()))
+        return not any(other is not plate and other.instance_index < plate.instance_index
+                       and other.get_current_todo() == todo
+                       for other in bucket)
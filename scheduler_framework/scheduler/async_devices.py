@@ -0,0 +1,166 @@
+"""
+Async device and robot interfaces, and adapters for existing sync ones.
+
+AsyncPlateScheduler runs every device job and robot transfer as a coroutine
+on one event loop. Native async devices implement `run_job()`, which returns
+once the job is done; native async robots implement `transfer_plate()` as a
+coroutine. Location queries and transfer weights stay synchronous, since
+they only read scheduler-side state.
+
+Existing sync devices and robots are used through adapters:
+
+- SyncDeviceAdapter calls the device's `add_job()` and waits, without a
+  thread, until the device marks the plate's job completed.
+- SyncRobotAdapter runs the blocking `transfer_plate()` in the loop's
+  default executor, so only robots that are actually moving use a thread.
+
+`as_async_device()` / `as_async_robot()` return native objects unchanged and
+wrap everything else. The bridges also work the other way: the threaded
+schedulers accept async devices and robots, running their coroutines on a
+short-lived loop of their own.
+"""
+
+import asyncio
+from abc import abstractmethod
+import threading
+import logging
+from typing import List, Optional
+from .active_plate import ActivePlate, PlateLocation
+from .device_manager import AccessibleDeviceInterface, DeviceInterface, RobotInterface
+
+logger = logging.getLogger(__name__)
+
+
+def finish_job(active_plate: ActivePlate):
+    """Mark a plate's job completed unless the device already did"""
+    if active_plate.busy:
+        active_plate.mark_job_completed()
+
+
+class AsyncDeviceInterface(AccessibleDeviceInterface):
+    """
+    Device whose jobs are coroutines.
+
+    `run_job()` returns when the plate's job is done. The device may call
+    `active_plate.mark_job_completed()` itself; otherwise the scheduler
+    does once `run_job()` returns.
+    """
+
+    @abstractmethod
+    async def run_job(self, active_plate: ActivePlate):
+        """Process the plate's current task"""
+        pass
+
+    def add_job(self, active_plate: ActivePlate):
+        """Threaded schedulers: run the job on a loop in a worker thread"""
+        def run():
+            try:
+                asyncio.run(self.run_job(active_plate))
+            except Exception as e:
+                logger.error(f"Error in job on {self.name}: {e}", exc_info=True)
+            finish_job(active_plate)
+
+        threading.Thread(target=run, name=f"{self.name}-job", daemon=True).start()
+
+
+class AsyncRobotInterface(RobotInterface):
+    """Robot whose `transfer_plate()` is a coroutine"""
+
+    @abstractmethod
+    async def transfer_plate(self, src_device: str, src_place: str,
+                             dst_device: str, dst_place: str,
+                             labware_name: str, barcode: str):
+        """Transfer a plate from one location to another"""
+        pass
+
+
+class SyncDeviceAdapter(AsyncDeviceInterface):
+    """
+    Runs a sync device under the async scheduler.
+
+    `add_job()` of sync devices queues the job and returns; the device calls
+    `mark_job_completed()` later, from whatever thread it likes. The adapter
+    awaits that call instead of blocking a thread on it.
+    """
+
+    def __init__(self, device: DeviceInterface):
+        super().__init__(device.name, device.product_name)
+        self.device = device
+
+    @property
+    def plate_location_info(self) -> List[PlateLocation]:
+        return getattr(self.device, 'plate_location_info', [])
+
+    def get_available_location(self, active_plate: ActivePlate) -> Optional[PlateLocation]:
+        return self.device.get_available_location(active_plate)
+
+    def reserve_location(self, location: PlateLocation, active_plate: ActivePlate) -> bool:
+        return self.device.reserve_location(location, active_plate)
+
+    def lock_place(self, place_name: str):
+        if hasattr(self.device, 'lock_place'):
+            self.device.lock_place(place_name)
+
+    def add_job(self, active_plate: ActivePlate):
+        self.device.add_job(active_plate)
+
+    async def run_job(self, active_plate: ActivePlate):
+        loop = asyncio.get_running_loop()
+        completed = loop.create_future()
+
+        def resolve():
+            if not completed.done():
+                completed.set_result(None)
+
+        def on_completed(plate: ActivePlate):
+            loop.call_soon_threadsafe(resolve)
+
+        active_plate.state_changed_callbacks.append(on_completed)
+        try:
+            self.device.add_job(active_plate)
+            if active_plate.busy:
+                await completed
+        finally:
+            active_plate.state_changed_callbacks.remove(on_completed)
+
+    def __repr__(self):
+        return f"SyncDeviceAdapter({self.device.name})"
+
+
+class SyncRobotAdapter(AsyncRobotInterface):
+    """Runs a sync robot's blocking transfers in the loop's default executor"""
+
+    def __init__(self, robot: RobotInterface):
+        super().__init__(robot.name)
+        self.robot = robot
+
+    async def transfer_plate(self, src_device: str, src_place: str,
+                             dst_device: str, dst_place: str,
+                             labware_name: str, barcode: str):
+        await asyncio.to_thread(self.robot.transfer_plate, src_device, src_place,
+                                dst_device, dst_place, labware_name, barcode)
+
+    def get_transfer_weight(self, src_device, src_location, src_place,
+                            dst_device, dst_location, dst_place) -> float:
+        return self.robot.get_transfer_weight(src_device, src_location, src_place,
+                                              dst_device, dst_location, dst_place)
+
+    def get_transfer_weights(self, src_places, dst_places):
+        return self.robot.get_transfer_weights(src_places, dst_places)
+
+    def __repr__(self):
+        return f"SyncRobotAdapter({self.robot.name})"
+
+
+def as_async_device(device: DeviceInterface) -> AsyncDeviceInterface:
+    """The device itself if it is async, otherwise a SyncDeviceAdapter for it"""
+    if isinstance(device, AsyncDeviceInterface):
+        return device
+    return SyncDeviceAdapter(device)
+
+
+def as_async_robot(robot: RobotInterface) -> AsyncRobotInterface:
+    """The robot itself if it is async, otherwise a SyncRobotAdapter for it"""
+    if isinstance(robot, AsyncRobotInterface):
+        return robot
+    return SyncRobotAdapter(robot)
@@ -0,0 +1,247 @@
+"""
+Async REST Node client (standard library, asyncio streams).
+
+Same contract and JSON handling as RestNodeClient, but every call is a
+coroutine on the caller's event loop, so one process can talk to many
+Nodes without a thread per request. Requests use HTTP/1.1 over
+`asyncio.open_connection` (https via the default SSL context) and close the
+connection after each response.
+
+AsyncNodeClientAdapter runs the calls of any sync NodeClient in the loop's
+default executor; `as_async_node()` picks the native client where possible.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import ssl
+import time
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .node_client import (
+    BATCH_UNSUPPORTED_STATUSES, NodeHTTPError, RestNodeClient, _batch_from_json, _definition_from_json, _join_url,
+    _response_from_json, _unknown_status
+)
+from .node_interface import (
+    NodeClient, NodeDefinition, NodeActionRequest, NodeActionResponse, TERMINAL_ACTION_STATUSES
+)
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                # Trailers end with an empty line
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+    if "content-length" in headers:
+        return await reader.readexactly(int(headers["content-length"]))
+    return await reader.read()
+
+
+class AsyncRestNodeClient:
+    """Coroutine version of RestNodeClient"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        parts = urlsplit(self.base_url)
+        self._host = parts.hostname or "localhost"
+        self._ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self._port = parts.port or (443 if self._ssl else 80)
+        self._netloc = parts.netloc
+        self._path_prefix = parts.path.rstrip("/")
+
+    async def _exchange(self, method: str, path: str,
+                        payload: Optional[Dict[str, Any]]) -> Tuple[int, bytes]:
+        reader, writer = await asyncio.open_connection(self._host, self._port, ssl=self._ssl)
+        try:
+            body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+            head = [f"{method} {_join_url(self._path_prefix, path)} HTTP/1.1",
+                    f"Host: {self._netloc}",
+                    "Accept: application/json",
+                    "Connection: close"]
+            if payload is not None:
+                head += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+
+            status_line = (await reader.readline()).decode("latin-1").split(None, 2)
+            if len(status_line) < 2:
+                raise ConnectionError("empty response")
+            headers: Dict[str, str] = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            return int(status_line[1]), await _read_body(reader, headers)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def _request_json(self, method: str, path: str, payload: Optional[Dict[str, Any]],
+                            timeout_s: float) -> Dict[str, Any]:
+        url = _join_url(self.base_url, path)
+        try:
+            status, raw = await asyncio.wait_for(self._exchange(method, path, payload), timeout_s)
+        except asyncio.TimeoutError as e:
+            raise RuntimeError(f"{method} {url} failed: timed out after {timeout_s}s") from e
+        except Exception as e:
+            raise RuntimeError(f"{method} {url} failed: {e}") from e
+        body = raw.decode("utf-8")
+        if status >= 400:
+            raise NodeHTTPError(f"{method} {url} failed: {status} {body}", status)
+        try:
+            return json.loads(body) if body else {}
+        except ValueError as e:
+            raise RuntimeError(f"{method} {url} failed: {e}") from e
+
+    async def _get_json(self, path: str, timeout_s: float) -> Dict[str, Any]:
+        return await self._request_json("GET", path, None, timeout_s)
+
+    async def _post_json(self, path: str, payload: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+        return await self._request_json("POST", path, payload, timeout_s)
+
+    async def health(self) -> bool:
+        try:
+            data = await self._get_json("/health", timeout_s=3.0)
+            return bool(data.get("healthy", True))
+        except Exception:
+            return False
+
+    async def get_definition(self) -> NodeDefinition:
+        return _definition_from_json(await self._get_json("/definition", timeout_s=5.0))
+
+    async def get_stats(self, timeout_s: float = 5.0) -> Dict[str, Any]:
+        return await self._get_json("/stats", timeout_s=timeout_s)
+
+    async def call_action(self, req: NodeActionRequest, timeout_s: float = 30.0) -> NodeActionResponse:
+        payload = asdict(req)
+        try:
+            data = await self._post_json(f"/actions/{req.action}", payload=payload, timeout_s=timeout_s)
+        except RuntimeError:
+            # Fallback: /action (single endpoint)
+            data = await self._post_json("/action", payload=payload, timeout_s=timeout_s)
+        return _response_from_json(data, request_id=req.request_id)
+
+    async def submit_action(self, req: NodeActionRequest, timeout_s: float = 10.0) -> NodeActionResponse:
+        data = await self._post_json(f"/actions/{req.action}/submit", payload=asdict(req), timeout_s=timeout_s)
+        return _response_from_json(data, request_id=req.request_id, default_status="queued")
+
+    async def get_action_status(self, execution_id: str, timeout_s: float = 10.0) -> NodeActionResponse:
+        data = await self._get_json(f"/actions/status/{execution_id}", timeout_s=timeout_s)
+        return _response_from_json(data, execution_id=execution_id, default_status="")
+
+    async def submit_actions(self, reqs: List[NodeActionRequest],
+                             timeout_s: float = 10.0) -> List[NodeActionResponse]:
+        if not reqs:
+            return []
+        try:
+            data = await self._post_json("/actions/batch/submit",
+                                         payload={"requests": [asdict(req) for req in reqs]}, timeout_s=timeout_s)
+        except NodeHTTPError as e:
+            if e.status not in BATCH_UNSUPPORTED_STATUSES:
+                raise
+            # Fallback: one submit per request
+            return list(await asyncio.gather(*(self.submit_action(req, timeout_s) for req in reqs)))
+        items = _batch_from_json(data, len(reqs), _join_url(self.base_url, "/actions/batch/submit"))
+        return [_response_from_json(item, request_id=req.request_id, default_status="queued")
+                for item, req in zip(items, reqs)]
+
+    async def get_action_statuses(self, execution_ids: List[str],
+                                  timeout_s: float = 10.0) -> List[NodeActionResponse]:
+        if not execution_ids:
+            return []
+        try:
+            data = await self._post_json("/actions/status:batch", payload={"execution_ids": list(execution_ids)},
+                                         timeout_s=timeout_s)
+        except NodeHTTPError as e:
+            if e.status not in BATCH_UNSUPPORTED_STATUSES:
+                raise
+            # Fallback: one status request per execution
+            return list(await asyncio.gather(*(self._status_or_unknown(execution_id, timeout_s)
+                                               for execution_id in execution_ids)))
+        items = _batch_from_json(data, len(execution_ids), _join_url(self.base_url, "/actions/status:batch"))
+        return [_response_from_json(item, execution_id=execution_id, default_status="")
+                for item, execution_id in zip(items, execution_ids)]
+
+    async def _status_or_unknown(self, execution_id: str, timeout_s: float) -> NodeActionResponse:
+        try:
+            return await self.get_action_status(execution_id, timeout_s)
+        except NodeHTTPError as e:
+            if e.status != 404:
+                raise
+            return _unknown_status(execution_id)
+
+    async def wait_for_completion(self, execution_id: str, timeout_s: Optional[float] = None,
+                                  poll_interval_s: float = 0.5, wait_s: float = 30.0) -> NodeActionResponse:
+        """Long-poll until the action is terminal (see RestNodeClient.wait_for_completion)"""
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+        while True:
+            wait = wait_s if deadline is None else max(0.0, min(wait_s, deadline - time.monotonic()))
+            started = time.monotonic()
+            data = await self._get_json(f"/actions/status/{execution_id}?wait={wait:g}", timeout_s=wait + 10.0)
+            response = _response_from_json(data, execution_id=execution_id, default_status="")
+            if response.status in TERMINAL_ACTION_STATUSES:
+                return response
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                raise TimeoutError(f"Action {execution_id} still {response.status} after {timeout_s}s")
+            if now - started < wait:
+                # Answered early without finishing: the Node does not long-poll
+                await asyncio.sleep(poll_interval_s if deadline is None else min(poll_interval_s, deadline - now))
+
+
+class AsyncNodeClientAdapter:
+    """Coroutine interface over a sync NodeClient (calls run in the default executor)"""
+
+    def __init__(self, node: NodeClient):
+        self.node = node
+
+    async def health(self) -> bool:
+        return await asyncio.to_thread(self.node.health)
+
+    async def get_definition(self) -> NodeDefinition:
+        return await asyncio.to_thread(self.node.get_definition)
+
+    async def call_action(self, req: NodeActionRequest, timeout_s: float = 30.0) -> NodeActionResponse:
+        return await asyncio.to_thread(self.node.call_action, req, timeout_s)
+
+    async def submit_action(self, req: NodeActionRequest, timeout_s: float = 10.0) -> NodeActionResponse:
+        return await asyncio.to_thread(self.node.submit_action, req, timeout_s)
+
+    async def get_action_status(self, execution_id: str, timeout_s: float = 10.0) -> NodeActionResponse:
+        return await asyncio.to_thread(self.node.get_action_status, execution_id, timeout_s)
+
+    async def submit_actions(self, reqs: List[NodeActionRequest],
+                             timeout_s: float = 10.0) -> List[NodeActionResponse]:
+        return await asyncio.to_thread(self.node.submit_actions, reqs, timeout_s)
+
+    async def get_action_statuses(self, execution_ids: List[str],
+                                  timeout_s: float = 10.0) -> List[NodeActionResponse]:
+        return await asyncio.to_thread(self.node.get_action_statuses, execution_ids, timeout_s)
+
+    async def wait_for_completion(self, execution_id: str, timeout_s: Optional[float] = None,
+                                  poll_interval_s: float = 0.5) -> NodeActionResponse:
+        return await asyncio.to_thread(self.node.wait_for_completion, execution_id, timeout_s, poll_interval_s)
+
+
+def as_async_node(node):
+    """AsyncRestNodeClient for a RestNodeClient, the node itself if already async, else an adapter"""
+    if isinstance(node, (AsyncRestNodeClient, AsyncNodeClientAdapter)):
+        return node
+    if type(node) is RestNodeClient:
+        return AsyncRestNodeClient(node.base_url)
+    return AsyncNodeClientAdapter(node)
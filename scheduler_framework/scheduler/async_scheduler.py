@@ -0,0 +1,439 @@
+"""
+AsyncPlateScheduler and AsyncRobotScheduler - the scheduler on one event loop.
+
+The threaded schedulers use a thread per robot worker, a scheduling thread,
+a timer thread for waits and whatever threads the devices start, and they
+hand work between them through queues. Here every worklist, robot move,
+device job and wait is a coroutine on a single asyncio loop:
+
+- One driver coroutine runs scheduling passes, woken by an asyncio.Event
+  whenever a step finishes or a worklist arrives (no polling).
+- Each dispatched device task becomes a step coroutine: the robot move
+  (`await AsyncRobotScheduler.move_plate()`), then the device job
+  (`await device.run_job()`).
+- WaitTasks are `asyncio.sleep()` calls inside their step.
+
+Scheduling follows PlateScheduler: worklists in WorklistPolicy order,
+plates released by the worklists' factories, devices tried in
+DevicePolicy order and plates of the same task kept in instance order.
+Lookahead, dispatch plans and cooperative robot planning are only
+available in the threaded schedulers.
+
+Sync devices and robots are adapted automatically (see async_devices.py).
+Native async devices and robots need no threads at all; adapted robots use
+the loop's default executor for the duration of each transfer.
+
+Code outside the loop runs worklists with `run_worklists_sync()` or, from
+other threads, `submit_worklist()` while the loop is serving.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+from .active_plate import ActivePlate, PlateLocation
+from .active_plate_registry import ActivePlateRegistry
+from .async_devices import AsyncDeviceInterface, AsyncRobotInterface, as_async_device, as_async_robot, finish_job
+from .device_manager import DeviceInterface, DeviceManager, PlateSchedulerDeviceInterface, RobotInterface
+from .device_policy import DevicePolicy
+from .duration_model import DurationModel
+from .path_planner import PathPlanner
+from .resource_locks import location_key, robot_key
+from .tasks import PlateTask, WaitTask
+from .worklist import Worklist
+from .worklist_policy import WorklistPolicy, WorklistRun, PriorityPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRobotScheduler:
+    """
+    Plans and executes plate moves as coroutines.
+
+    A move holds asyncio locks on every location of its path until it is
+    done (acquired in sorted key order), so a plate waiting on a handoff
+    between transfers keeps it, and each transfer also holds its robot's
+    lock. Moves on different robots overlap and conflicting moves take turns.
+    """
+
+    def __init__(self, device_manager: DeviceManager,
+                 duration_model: Optional[DurationModel] = None):
+        self.device_manager = device_manager
+        self.path_planner = PathPlanner(device_manager)
+        self.duration_model = duration_model if duration_model is not None else DurationModel()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._locks_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._robots: Dict[str, Tuple[RobotInterface, AsyncRobotInterface]] = {}
+        self._moves_in_progress = 0
+        # Called with the plate once a move has been handled (moved or not)
+        self.move_completed_callbacks = []
+
+    def _robot(self, robot: RobotInterface) -> AsyncRobotInterface:
+        entry = self._robots.get(robot.name)
+        if entry is None or entry[0] is not robot:
+            entry = self._robots[robot.name] = (robot, as_async_robot(robot))
+        return entry[1]
+
+    def _lock(self, key: str) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._locks_loop is not loop:
+            # asyncio locks belong to one loop
+            self._locks = {}
+            self._locks_loop = loop
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    @asynccontextmanager
+    async def _hold(self, keys: Iterable[str]) -> AsyncIterator[None]:
+        """Hold the locks of all keys (acquired in sorted order) for the duration of the block"""
+        acquired = []
+        try:
+            for lock in [self._lock(key) for key in sorted(set(keys))]:
+                await lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    async def move_plate(self, active_plate: ActivePlate) -> bool:
+        """Move a plate to its destination location; returns True if it got there"""
+        self._moves_in_progress += 1
+        try:
+            return await self._move_plate(active_plate)
+        finally:
+            self._moves_in_progress -= 1
+            for callback in self.move_completed_callbacks:
+                callback(active_plate)
+
+    async def _move_plate(self, active_plate: ActivePlate) -> bool:
+        if not active_plate.current_location or not active_plate.destination_location:
+            logger.warning(f"Cannot move {active_plate}: missing location info")
+            return False
+
+        if active_plate.current_location == active_plate.destination_location:
+            return True
+
+        # Planning is CPU-only and short: it runs on the loop
+        with self.path_planner.lock:
+            self.path_planner.create_world()
+            path = self.path_planner.plan_path(active_plate.current_location,
+                                               active_plate.destination_location)
+        if not path:
+            logger.warning(f"No path found for {active_plate} from "
+                           f"{active_plate.current_location.name} to "
+                           f"{active_plate.destination_location.name}")
+            return False
+
+        if not await self._execute_path(active_plate, path):
+            return False
+
+        active_plate.current_location.occupied.clear()
+        active_plate.destination_location.occupied.set()
+        active_plate.current_location = active_plate.destination_location
+        return True
+
+    async def _execute_path(self, active_plate: ActivePlate, path: list) -> bool:
+        # Every location on the path stays locked until the move is done (location locks are
+        # always taken before robot locks, so moves can't deadlock)
+        infos = [self.path_planner.place_info(node) for node in path]
+        async with self._hold(location_key(info[1]) for info in infos if info):
+            return await self._execute_steps(active_plate, path)
+
+    async def _execute_steps(self, active_plate: ActivePlate, path: list) -> bool:
+        for current_node, next_node in zip(path, path[1:]):
+            edge = self.path_planner.find_edge(current_node, next_node)
+            current_info = self.path_planner.place_info(current_node)
+            next_info = self.path_planner.place_info(next_node)
+            if not edge or not edge[0] or not current_info or not next_info:
+                logger.error(f"Cannot execute path step for {active_plate}")
+                return False
+
+            robot = self._robot(edge[0])
+            current_device, current_location, current_place = current_info
+            next_device, next_location, next_place = next_info
+            async with self._hold([robot_key(robot)]):
+                if current_location != next_location:
+                    for device, place in ((current_device, current_place), (next_device, next_place)):
+                        if hasattr(device, 'lock_place'):
+                            device.lock_place(place.name)
+                started = time.monotonic()
+                try:
+                    await robot.transfer_plate(current_device.name, current_place.name,
+                                               next_device.name, next_place.name,
+                                               active_plate.labware_name, active_plate.barcode)
+                    self.duration_model.record_transfer(robot.name, current_place.name, next_place.name,
+                                                        time.monotonic() - started)
+                except Exception as e:
+                    logger.error(f"Error during transfer: {e}", exc_info=True)
+        return True
+
+    def get_status(self) -> str:
+        """Get status string for monitoring"""
+        if self._moves_in_progress:
+            return f"AsyncRobotScheduler has {self._moves_in_progress} moves in progress"
+        return "AsyncRobotScheduler has no moves in progress"
+
+
+class AsyncPlateScheduler:
+    """
+    PlateScheduler on an event loop.
+
+    `await run_worklist(worklist)` processes a worklist to completion; several
+    calls (e.g. with asyncio.gather) are scheduled together by one driver.
+    """
+
+    def __init__(self, device_manager: DeviceManager,
+                 robot_scheduler: Optional[AsyncRobotScheduler] = None,
+                 worklist_policy: Optional[WorklistPolicy] = None,
+                 max_concurrent_worklists: Optional[int] = None,
+                 device_policy: Optional[DevicePolicy] = None,
+                 duration_model: Optional[DurationModel] = None):
+        self.device_manager = device_manager
+        if robot_scheduler is None:
+            robot_scheduler = AsyncRobotScheduler(device_manager, duration_model)
+        self.robot_scheduler = robot_scheduler
+        self.duration_model = duration_model if duration_model is not None else robot_scheduler.duration_model
+        self.active_plates = ActivePlateRegistry()
+
+        self.worklist_policy: WorklistPolicy = worklist_policy or PriorityPolicy()
+        self.max_concurrent_worklists = max_concurrent_worklists
+        self.device_policy = device_policy
+        self.worklist_runs: List[WorklistRun] = []
+        self.completed_runs: List[WorklistRun] = []
+        self._queued: List[Worklist] = []
+        self._completions: Dict[Worklist, asyncio.Future] = {}
+        self._run_sequence = 0
+
+        # Step coroutines in flight (device tasks and waits)
+        self._steps: Set[asyncio.Task] = set()
+        self._driver: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._devices: Dict[str, Tuple[DeviceInterface, AsyncDeviceInterface]] = {}
+
+    async def run_worklist(self, worklist: Worklist, priority: Optional[int] = None) -> WorklistRun:
+        """Process a worklist to completion, alongside any others running"""
+        if priority is not None:
+            worklist.priority = priority
+        self._bind_loop()
+        completion = self._loop.create_future()
+        self._completions[worklist] = completion
+        self._queued.append(worklist)
+        logger.info(f"Enqueued worklist: {worklist.name}")
+        self.notify()
+        if self._driver is None or self._driver.done():
+            self._driver = self._loop.create_task(self._drive(), name="AsyncPlateScheduler")
+        return await completion
+
+    async def run_worklists(self, worklists: Iterable[Worklist]) -> List[WorklistRun]:
+        """Process several worklists together; returns their runs in the given order"""
+        return list(await asyncio.gather(*(self.run_worklist(worklist) for worklist in worklists)))
+
+    def run_worklists_sync(self, worklists: Iterable[Worklist]) -> List[WorklistRun]:
+        """Blocking entry point for sync callers: runs the worklists on a new loop"""
+        return asyncio.run(self.run_worklists(list(worklists)))
+
+    def submit_worklist(self, worklist: Worklist, loop: Optional[asyncio.AbstractEventLoop] = None,
+                        priority: Optional[int] = None) -> concurrent.futures.Future:
+        """
+        From another thread: run a worklist on `loop` (default: the loop the
+        scheduler last ran on). Returns a concurrent future of the WorklistRun.
+        """
+        loop = loop or self._loop
+        if loop is None or loop.is_closed():
+            raise RuntimeError("AsyncPlateScheduler has no event loop to run on")
+        return asyncio.run_coroutine_threadsafe(self.run_worklist(worklist, priority), loop)
+
+    def notify(self):
+        """Wake the driver (safe to call from any thread)"""
+        if self._wakeup is None or self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wakeup.set()
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def stop(self):
+        """Cancel the driver and every step in flight"""
+        tasks = list(self._steps)
+        if self._driver is not None:
+            tasks.append(self._driver)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for completion in self._completions.values():
+            if not completion.done():
+                completion.cancel()
+        self._completions.clear()
+        logger.info("AsyncPlateScheduler stopped")
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+
+    async def _drive(self):
+        """Scheduling passes until no worklist is queued or running"""
+        while self._queued or self.worklist_runs:
+            self._wakeup.clear()
+            try:
+                self._admit_worklists()
+                self._scheduling_pass()
+            except Exception as e:
+                logger.error(f"Error in async plate scheduler: {e}", exc_info=True)
+            if self._queued or self.worklist_runs:
+                await self._wakeup.wait()
+
+    def _admit_worklists(self):
+        """Start queued worklists, up to `max_concurrent_worklists`"""
+        while self._queued and (self.max_concurrent_worklists is None
+                                or len(self.worklist_runs) < self.max_concurrent_worklists):
+            worklist = self._queued.pop(0)
+            logger.info(f"Processing worklist: {worklist.name}")
+            self.worklist_runs.append(WorklistRun(worklist, self._run_sequence, self.active_plates))
+            self._run_sequence += 1
+
+    def _scheduling_pass(self):
+        """One pass over every running worklist, in policy order"""
+        for run in self.worklist_policy.order(list(self.worklist_runs)):
+            for plate in run.active_plates:
+                if plate.is_finished():
+                    logger.info(f"Removed finished plate: {plate}")
+                    self.active_plates.remove(plate)
+
+            if run.plates_to_create == 0 and self.active_plates.count(worklist=run.worklist) == 0:
+                self._complete_worklist(run)
+                continue
+
+            for factory in run.factories:
+                active_plate = factory.try_release_active_plate()
+                if active_plate:
+                    logger.debug(f"Released new active plate: {active_plate}")
+                    # Factories release one plate per pass; run another pass
+                    self.notify()
+
+            free_plates = self.active_plates.select(worklist=run.worklist, busy=False)
+            for active_plate in sorted(free_plates, key=lambda ap: ap.instance_index):
+                self._advance_plate(run, active_plate)
+
+    def _advance_plate(self, run: WorklistRun, active_plate: ActivePlate):
+        """Start the current task of a free plate, if it can run now"""
+        if active_plate.busy:
+            return
+        current_task = active_plate.get_current_todo()
+        if not current_task or not self.active_plates.is_first_for_task(active_plate):
+            return
+
+        if isinstance(current_task, WaitTask):
+            if current_task.completed:
+                return
+            active_plate.plate_is_free.clear()
+            self._start_step(self._run_wait(active_plate, current_task), active_plate)
+            return
+
+        found = self._reserve_location(active_plate, current_task)
+        if found is None:
+            logger.debug(f"Could not schedule task {current_task} for {active_plate}")
+            return
+        device, location = found
+        active_plate.plate_is_free.clear()
+        if active_plate.current_location is None:
+            # First time sourcing the plate
+            active_plate.current_location = location
+        active_plate.destination_location = location
+        run.tasks_dispatched += 1
+        self._start_step(self._run_task(active_plate, current_task, device), active_plate)
+
+    def _start_step(self, coroutine, active_plate: ActivePlate):
+        self.active_plates.refresh(active_plate)
+        task = self._loop.create_task(coroutine, name=f"Step-{active_plate.plate_serial_number}")
+        self._steps.add(task)
+        task.add_done_callback(self._steps.discard)
+
+    def _device(self, device: DeviceInterface) -> AsyncDeviceInterface:
+        entry = self._devices.get(device.name)
+        if entry is None or entry[0] is not device:
+            entry = self._devices[device.name] = (device, as_async_device(device))
+        return entry[1]
+
+    def _reserve_location(self, active_plate: ActivePlate,
+                          task: PlateTask) -> Optional[Tuple[DeviceInterface, PlateLocation]]:
+        """Find and reserve a location for a task; returns (device, location) or None"""
+        candidates = self.device_manager.candidate_devices(task.device_type, active_plate, self.device_policy)
+        if not candidates:
+            logger.error(f"No devices of type {task.device_type} available")
+            return None
+        for device in candidates:
+            if not isinstance(device, PlateSchedulerDeviceInterface):
+                logger.error(f"Device {device.name} is not plate scheduler compliant")
+                continue
+            location = device.get_available_location(active_plate)
+            if location and device.reserve_location(location, active_plate):
+                logger.debug(f"Reserved location {location.name} on {device.name} for {active_plate}")
+                return device, location
+        return None
+
+    async def _run_task(self, active_plate: ActivePlate, task: PlateTask, device: DeviceInterface):
+        """Move the plate to its reserved location, then run the device job"""
+        try:
+            await self.robot_scheduler.move_plate(active_plate)
+            started = time.monotonic()
+            await self._device(device).run_job(active_plate)
+            self.duration_model.record_task(device.name, task.command,
+                                            time.monotonic() - started, device.product_name)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The plate moves on, as with a device that reports completion after an error
+            logger.error(f"Error running {task} on {device.name} for {active_plate}: {e}", exc_info=True)
+        self._finish_step(active_plate)
+
+    async def _run_wait(self, active_plate: ActivePlate, wait_task: WaitTask):
+        logger.info(f"Starting wait task: {wait_task.duration_seconds}s for {active_plate}")
+        await asyncio.sleep(wait_task.duration_seconds)
+        wait_task.completed = True
+        logger.info(f"Wait task completed for {active_plate}")
+        self._finish_step(active_plate)
+
+    def _finish_step(self, active_plate: ActivePlate):
+        finish_job(active_plate)
+        self.active_plates.refresh(active_plate)
+        self.notify()
+
+    def _complete_worklist(self, run: WorklistRun):
+        run.finished_at = time.monotonic()
+        self.worklist_runs.remove(run)
+        self.completed_runs.append(run)
+        logger.info(f"Worklist {run.worklist.name} completed")
+        run.worklist.on_worklist_complete()
+        completion = self._completions.pop(run.worklist, None)
+        if completion is not None and not completion.done():
+            completion.set_result(run)
+        # A slot may have opened for a queued worklist
+        self.notify()
+
+    def get_status(self) -> str:
+        """Get status string for monitoring"""
+        status = [self.robot_scheduler.get_status()]
+        runs = self.worklist_policy.order(list(self.worklist_runs))
+        status.append(f"\tRunning worklists: {len(runs)}, queued: {len(self._queued)}, "
+                      f"steps in flight: {len(self._steps)}")
+        for run in runs:
+            status.append(f"\t\t{run.worklist.name}: priority {run.priority}, "
+                          f"{len(run.active_plates)} active plates, "
+                          f"{run.plates_to_create} to create, "
+                          f"{run.tasks_dispatched} tasks dispatched")
+        status.append("\tActive plates:")
+        for plate in self.active_plates:
+            status.append(plate.get_status())
+        return "\n".join(status)
@@ -0,0 +1,187 @@
+"""
+Clock - the schedulers' source of time.
+
+PlateScheduler and RobotScheduler read time, sleep and start WaitTask
+timers through a Clock instead of the `time` module. SystemClock is the
+real one (the default). VirtualClock keeps simulated time that only moves
+when its events run: callbacks are kept in a heap and `run_next()` jumps
+straight to the earliest, so hours of cell time pass in milliseconds. Its
+`timer_service()` is a TimerService whose timers are clock events rather
+than a thread.
+
+See simulation.py for the discrete-event driver built on VirtualClock.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from .timer_service import TimerService
+
+logger = logging.getLogger(__name__)
+
+
+class Clock:
+    """Time source used by the schedulers"""
+
+    def monotonic(self) -> float:
+        raise NotImplementedError
+
+    def time(self) -> float:
+        """Wall-clock seconds since the epoch"""
+        raise NotImplementedError
+
+    def sleep(self, seconds: float):
+        raise NotImplementedError
+
+    def timer_service(self, name: str = "TimerService") -> TimerService:
+        """A TimerService running on this clock"""
+        raise NotImplementedError
+
+
+class SystemClock(Clock):
+    """Real time"""
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+    def timer_service(self, name: str = "TimerService") -> TimerService:
+        return TimerService(clock=time.monotonic, name=name)
+
+
+SYSTEM_CLOCK = SystemClock()
+
+
+class ClockEvent:
+    """A callback scheduled on a VirtualClock"""
+
+    def __init__(self, when: float, callback: Callable[[], None]):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def __repr__(self):
+        return f"ClockEvent({self.when:.3f}{', cancelled' if self.cancelled else ''})"
+
+
+class VirtualClock(Clock):
+    """
+    Simulated time, advanced by running scheduled events.
+
+    `now` starts at `start`; `time()` is `epoch + now`. Events run on the
+    thread that calls `run_next()` / `run_until()`, in time order (ties in
+    the order they were scheduled).
+    """
+
+    def __init__(self, start: float = 0.0, epoch: Optional[float] = None):
+        self.now = start
+        self.epoch = time.time() - start if epoch is None else epoch
+        self._events: List[Tuple[float, int, ClockEvent]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.epoch + self.now
+
+    def sleep(self, seconds: float):
+        """Run the events due in the next `seconds` and end up `seconds` later"""
+        self.run_until(self.now + max(seconds, 0.0))
+
+    def timer_service(self, name: str = "TimerService") -> TimerService:
+        return VirtualTimerService(self, name)
+
+    def call_at(self, when: float, callback: Callable[[], None]) -> ClockEvent:
+        """Run `callback` at time `when` (now, if that has passed)"""
+        event = ClockEvent(max(when, self.now), callback)
+        with self._lock:
+            heapq.heappush(self._events, (event.when, next(self._sequence), event))
+        return event
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> ClockEvent:
+        return self.call_at(self.now + max(delay, 0.0), callback)
+
+    def next_event_time(self) -> Optional[float]:
+        """Time of the earliest pending event (None if there is none)"""
+        with self._lock:
+            while self._events and self._events[0][2].cancelled:
+                heapq.heappop(self._events)
+            return self._events[0][0] if self._events else None
+
+    def run_next(self) -> bool:
+        """Advance to the earliest pending event and run it; False if there is none"""
+        with self._lock:
+            while self._events and self._events[0][2].cancelled:
+                heapq.heappop(self._events)
+            if not self._events:
+                return False
+            when, _, event = heapq.heappop(self._events)
+            self.now = max(self.now, when)
+        event.callback()
+        return True
+
+    def run_until(self, when: float):
+        """Run every event due by `when`, then set the time to `when`"""
+        while True:
+            next_time = self.next_event_time()
+            if next_time is None or next_time > when:
+                break
+            self.run_next()
+        self.now = max(self.now, when)
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(not event.cancelled for _, _, event in self._events)
+
+
+class VirtualTimerService(TimerService):
+    """TimerService whose timers fire as VirtualClock events instead of on a thread"""
+
+    def __init__(self, clock: VirtualClock, name: str = "TimerService"):
+        super().__init__(clock=clock.monotonic, name=name)
+        self.virtual_clock = clock
+
+    def _ensure_thread(self):
+        # Called with the condition held whenever a timer is scheduled
+        self._wake_for_earliest()
+
+    def resume(self):
+        super().resume()
+        with self._condition:
+            self._wake_for_earliest()
+
+    def _wake_for_earliest(self):
+        if self._heap and self._paused_at is None:
+            self.virtual_clock.call_at(self._heap[0][0], self._fire_due)
+
+    def _fire_due(self):
+        """Fire every timer whose deadline has come (stale wake-ups find nothing)"""
+        while True:
+            with self._condition:
+                while self._heap and not self._heap[0][2].pending:
+                    heapq.heappop(self._heap)
+                if not self._heap or self._paused_at is not None:
+                    return
+                if self._heap[0][0] > self.clock():
+                    self._wake_for_earliest()
+                    return
+                _, _, handle = heapq.heappop(self._heap)
+                handle.fired = True
+            try:
+                handle.callback()
+            except Exception as e:
+                logger.error(f"Error in timer callback {handle}: {e}", exc_info=True)
@@ -3,13 +3,31 @@ DeviceManager and DeviceInterface abstractions.
 
 Devices represent lab equipment (robots, readers, washers, etc.)
 that can perform operations on plates.
+
+DeviceManager indexes devices by product name and tracks which devices
+have a free location (not occupied and not reserved), following the
+locations' `occupied`/`reserved` events. PlateScheduler asks it for the
+candidate devices of a type instead of scanning every device, and wakes its
+scheduling loop from `availability_callbacks`, which run whenever a tracked
+location becomes free or a device, robot or location is (re)registered.
+
+`register_metrics()` adds gauges of free locations per device and ready
+devices per type to a MetricsRegistry (see metrics.py).
 """
 
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
-from .active_plate import ActivePlate, PlateLocation
+from typing import Any, Callable, List, Dict, Optional, Sequence, Tuple, TYPE_CHECKING
+from .active_plate import ActivePlate, ObservableEvent, PlateLocation
 from .node_interface import NodeClient
 
+if TYPE_CHECKING:
+    from .device_policy import DevicePolicy
+    from .metrics import MetricsRegistry
+
+# (device, location, place) triple describing one plate place
+PlaceInfo = Tuple[Any, PlateLocation, Any]
+
 
 class DeviceInterface(ABC):
     """Base interface for all devices"""
@@ -77,6 +95,35 @@ class RobotInterface(ABC):
         Returns positive infinity if transfer is not possible.
         """
         pass
+    
+    def get_transfer_weights(self, src_places: Sequence[PlaceInfo],
+                             dst_places: Sequence[PlaceInfo]) -> List[List[float]]:
+        """
+        Get the weights for every (src, dst) pair in one call.
+        
+        Robots that can evaluate many pairs at once (e.g. from precomputed
+        geometry) should override this; PathPlanner uses it when building
+        the world. The default falls back to get_transfer_weight() per pair.
+        
+        Args:
+            src_places: (device, location, place) for each source place
+            dst_places: (device, location, place) for each destination place
+        
+        Returns:
+            Matrix with one row per source place; positive infinity where the
+            transfer is not possible.
+        """
+        weights = []
+        for src_device, src_location, src_place in src_places:
+            row = []
+            for dst_device, dst_location, dst_place in dst_places:
+                try:
+                    row.append(self.get_transfer_weight(src_device, src_location, src_place,
+                                                        dst_device, dst_location, dst_place))
+                except Exception:
+                    row.append(float('inf'))
+            weights.append(row)
+        return weights
 
 
 class DeviceManager:
@@ -86,14 +133,152 @@ class DeviceManager:
         self.devices: Dict[str, DeviceInterface] = {}
         self.robots: Dict[str, RobotInterface] = {}
         self.nodes: Dict[str, NodeClient] = {}
+        # Bumped whenever the physical layout (devices, robots, locations) changes.
+        # Consumers such as PathPlanner cache derived state keyed by this value.
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+        
+        # Product-name index and free-location tracking (guarded by _index_lock)
+        self._index_lock = threading.RLock()
+        self._devices_by_type: Dict[str, Dict[str, DeviceInterface]] = {}
+        # Devices of each type with at least one free location, in registration order
+        self._ready_by_type: Dict[str, Dict[str, DeviceInterface]] = {}
+        self._free_counts: Dict[str, int] = {}
+        self._location_counts: Dict[str, int] = {}
+        # Devices with locations whose events cannot be observed; always treated as ready
+        self._untracked: Dict[str, None] = {}
+        # (device name, id(location)) -> (location, is free)
+        self._tracked_locations: Dict[Tuple[str, int], Tuple[PlateLocation, bool]] = {}
+        self._device_locations: Dict[str, List[Tuple[str, int]]] = {}
+        # id(occupied/reserved event) -> keys of the tracked locations it belongs to
+        self._event_locations: Dict[int, Dict[Tuple[str, int], None]] = {}
+        
+        # Called (no arguments) when a location becomes free or the layout changes
+        self.availability_callbacks: List[Callable[[], None]] = []
+    
+    @property
+    def generation(self) -> int:
+        """Layout generation counter (changes whenever devices/robots/locations change)"""
+        return self._generation
+    
+    def _bump_generation(self):
+        with self._generation_lock:
+            self._generation += 1
+        self._availability_changed()
+    
+    def _availability_changed(self):
+        for callback in list(self.availability_callbacks):
+            callback()
     
     def register_device(self, device: DeviceInterface):
         """Register a device"""
-        self.devices[device.name] = device
+        with self._index_lock:
+            previous = self.devices.get(device.name)
+            if previous is not None:
+                self._unindex_device(previous)
+            self.devices[device.name] = device
+            self._devices_by_type.setdefault(device.product_name, {})[device.name] = device
+            self._track_locations(device)
+        self._bump_generation()
     
     def register_robot(self, robot: RobotInterface):
         """Register a robot"""
         self.robots[robot.name] = robot
+        self._bump_generation()
+    
+    def notify_locations_changed(self):
+        """
+        Signal that plate locations/places changed on a registered device.
+
+        Devices (or whoever mutates `plate_location_info`) must call this so
+        cached world graphs are rebuilt on the next planning request.
+        It also re-reads every device's locations for availability tracking.
+        """
+        with self._index_lock:
+            for device in self.devices.values():
+                self._track_locations(device)
+        self._bump_generation()
+    
+    def _unindex_device(self, device: DeviceInterface):
+        self._untrack_locations(device.name)
+        self._ready_by_type.get(device.product_name, {}).pop(device.name, None)
+        by_type = self._devices_by_type.get(device.product_name, {})
+        by_type.pop(device.name, None)
+        if not by_type:
+            self._devices_by_type.pop(device.product_name, None)
+    
+    def _untrack_locations(self, device_name: str):
+        for key in self._device_locations.pop(device_name, []):
+            location, _ = self._tracked_locations.pop(key)
+            for event in (location.occupied, location.reserved):
+                keys = self._event_locations.get(id(event), {})
+                keys.pop(key, None)
+                if not keys:
+                    self._event_locations.pop(id(event), None)
+                    if self._on_location_event in event.listeners:
+                        event.listeners.remove(self._on_location_event)
+        self._free_counts.pop(device_name, None)
+        self._location_counts.pop(device_name, None)
+        self._untracked.pop(device_name, None)
+    
+    def _track_locations(self, device: DeviceInterface):
+        """(Re)subscribe to a device's location events and recount its free locations"""
+        self._untrack_locations(device.name)
+        locations = getattr(device, "plate_location_info", None) or []
+        free = 0
+        keys = self._device_locations[device.name] = []
+        for location in locations:
+            events = (location.occupied, location.reserved)
+            if not all(isinstance(event, ObservableEvent) for event in events):
+                self._untracked[device.name] = None
+                continue
+            key = (device.name, id(location))
+            if key in self._tracked_locations:
+                continue
+            is_free = self._is_free(location)
+            self._tracked_locations[key] = (location, is_free)
+            keys.append(key)
+            free += is_free
+            for event in events:
+                # Locations can be shared between devices (e.g. handoff locations)
+                if id(event) not in self._event_locations:
+                    event.listeners.append(self._on_location_event)
+                self._event_locations.setdefault(id(event), {})[key] = None
+        self._free_counts[device.name] = free
+        self._location_counts[device.name] = len(keys)
+        self._update_ready(device)
+    
+    @staticmethod
+    def _is_free(location: PlateLocation) -> bool:
+        return not location.occupied.is_set() and not location.reserved.is_set()
+    
+    def _on_location_event(self, event: ObservableEvent):
+        freed = False
+        with self._index_lock:
+            for key in list(self._event_locations.get(id(event), ())):
+                location, was_free = self._tracked_locations[key]
+                is_free = self._is_free(location)
+                if is_free == was_free:
+                    continue
+                self._tracked_locations[key] = (location, is_free)
+                device_name = key[0]
+                self._free_counts[device_name] += 1 if is_free else -1
+                self._update_ready(self.devices[device_name])
+                freed = freed or is_free
+        if freed:
+            self._availability_changed()
+    
+    def _update_ready(self, device: DeviceInterface):
+        ready = self._ready_by_type.setdefault(device.product_name, {})
+        if device.name in self._untracked or self._free_counts.get(device.name, 0) > 0:
+            if device.name not in ready:
+                # Keep registration order so the default pick is deterministic
+                ordered = {name: dev for name, dev in self._devices_by_type[device.product_name].items()
+                           if name in ready or name == device.name}
+                ready.clear()
+                ready.update(ordered)
+        else:
+            ready.pop(device.name, None)
 
     def register_node(self, name: str, node: NodeClient):
         """
@@ -119,8 +304,44 @@ class DeviceManager:
     
     def get_devices_by_type(self, product_name: str) -> Dict[str, DeviceInterface]:
         """Get all devices of a specific product type"""
-        return {name: device for name, device in self.devices.items() 
-                if device.product_name == product_name}
+        with self._index_lock:
+            return dict(self._devices_by_type.get(product_name, {}))
+    
+    def get_ready_devices(self, product_name: str) -> List[DeviceInterface]:
+        """Devices of a type with at least one free (not occupied, not reserved) location"""
+        with self._index_lock:
+            return list(self._ready_by_type.get(product_name, {}).values())
+    
+    def free_location_count(self, device_name: str) -> int:
+        """Number of free locations on a device (0 if unknown)"""
+        with self._index_lock:
+            return self._free_counts.get(device_name, 0)
+    
+    def device_load(self, device_name: str) -> float:
+        """Fraction of a device's locations that are occupied or reserved"""
+        with self._index_lock:
+            total = self._location_counts.get(device_name, 0)
+            if not total or device_name in self._untracked:
+                return 0.0
+            return 1.0 - self._free_counts.get(device_name, 0) / total
+    
+    def candidate_devices(self, product_name: str, active_plate: Optional[ActivePlate] = None,
+                          policy: Optional['DevicePolicy'] = None) -> List[DeviceInterface]:
+        """
+        Devices of a type in the order they should be tried for a plate.
+        
+        Ready devices come first, ordered by `policy` (registration order if
+        None), followed by the remaining devices of the type. The device still
+        decides in get_available_location(), so devices that manage
+        availability in their own way are never skipped.
+        """
+        with self._index_lock:
+            ready = list(self._ready_by_type.get(product_name, {}).values())
+            rest = [device for name, device in self._devices_by_type.get(product_name, {}).items()
+                    if name not in self._ready_by_type.get(product_name, {})]
+        if policy is not None and len(ready) > 1:
+            ready = policy.order(ready, active_plate, self)
+        return ready + rest
     
     def get_accessible_devices(self) -> List[AccessibleDeviceInterface]:
         """Get all accessible devices"""
@@ -130,6 +351,25 @@ class DeviceManager:
     def get_robots(self) -> List[RobotInterface]:
         """Get all robots"""
         return list(self.robots.values())
+    
+    def register_metrics(self, registry: 'MetricsRegistry'):
+        """Report location and device availability whenever `registry` is read"""
+        registry.add_collector(self._collect_metrics)
+    
+    def _collect_metrics(self, registry: 'MetricsRegistry'):
+        free = registry.gauge("scheduler_device_free_locations",
+                              "Locations neither occupied nor reserved, per device")
+        total = registry.gauge("scheduler_device_locations", "Plate locations per device")
+        ready = registry.gauge("scheduler_devices_ready", "Devices with a free location, per device type")
+        registry.gauge("scheduler_layout_generation", "DeviceManager layout generation").set(self.generation)
+        with self._index_lock:
+            for device_name, count in self._location_counts.items():
+                if device_name in self._untracked:
+                    continue
+                free.set(self._free_counts.get(device_name, 0), device=device_name)
+                total.set(count, device=device_name)
+            for product_name in self._devices_by_type:
+                ready.set(len(self._ready_by_type.get(product_name, {})), device_type=product_name)
 
 
 
@@ -0,0 +1,84 @@
+"""
+Device policies - which device of a type a plate is sent to.
+
+DeviceManager keeps, per product name, the devices that currently have a
+free location. When several are ready, PlateScheduler asks its policy to
+order them; the first device that accepts the plate gets the job.
+"""
+
+from abc import ABC, abstractmethod
+import itertools
+import math
+import threading
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from .active_plate import ActivePlate
+from .device_manager import DeviceInterface
+
+if TYPE_CHECKING:
+    from .device_manager import DeviceManager
+    from .path_planner import PathPlanner
+
+
+class DevicePolicy(ABC):
+    """Orders the ready devices of one type for a plate"""
+
+    @abstractmethod
+    def order(self, devices: List[DeviceInterface], active_plate: Optional[ActivePlate],
+              device_manager: 'DeviceManager') -> List[DeviceInterface]:
+        """Return the devices in the order they should be tried"""
+        pass
+
+
+class LeastLoadedPolicy(DevicePolicy):
+    """Device with the smallest fraction of occupied/reserved locations first"""
+
+    def order(self, devices: List[DeviceInterface], active_plate: Optional[ActivePlate],
+              device_manager: 'DeviceManager') -> List[DeviceInterface]:
+        return sorted(devices, key=lambda device: device_manager.device_load(device.name))
+
+
+class RoundRobinPolicy(DevicePolicy):
+    """Rotate the first choice through the ready devices of each type"""
+
+    def __init__(self):
+        self._counters: Dict[str, itertools.count] = {}
+        self._lock = threading.Lock()
+
+    def order(self, devices: List[DeviceInterface], active_plate: Optional[ActivePlate],
+              device_manager: 'DeviceManager') -> List[DeviceInterface]:
+        with self._lock:
+            counter = self._counters.setdefault(devices[0].product_name, itertools.count())
+            start = next(counter) % len(devices)
+        return devices[start:] + devices[:start]
+
+
+class NearestDevicePolicy(DevicePolicy):
+    """
+    Device closest to the plate's current location by robot path cost.
+
+    Costs come from PathPlanner.path_cost(), so they follow the same
+    transfer weights the RobotScheduler uses. The planner's lock is held
+    while ordering, so a concurrent world rebuild by a robot worker can't
+    mix two worlds into one ordering. Plates that have not been sourced yet
+    keep the ready order.
+    """
+
+    def __init__(self, path_planner: 'PathPlanner'):
+        self.path_planner = path_planner
+
+    def _cost(self, device: DeviceInterface, active_plate: ActivePlate) -> float:
+        current = active_plate.current_location
+        costs = [0.0 if location is current else self.path_planner.path_cost(current, location)
+                 for location in getattr(device, "plate_location_info", None) or []
+                 if location.available and not location.occupied.is_set()
+                 and not location.reserved.is_set()]
+        return min(costs, default=math.inf)
+
+    def order(self, devices: List[DeviceInterface], active_plate: Optional[ActivePlate],
+              device_manager: 'DeviceManager') -> List[DeviceInterface]:
+        if active_plate is None or active_plate.current_location is None:
+            return list(devices)
+        with self.path_planner.lock:
+            self.path_planner.create_world()
+            return sorted(devices, key=lambda device: self._cost(device, active_plate))
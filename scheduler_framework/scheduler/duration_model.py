@@ -0,0 +1,200 @@
+"""
+DurationModel - how long device tasks and robot transfers actually take.
+
+PlateScheduler records every device task per (device, command) and per
+(device type, command); RobotScheduler records every transfer per (robot,
+source place, destination place). Each key keeps a bounded window of recent
+samples (mean and percentiles) and an exponentially decayed mean that
+follows drift without being thrown by one outlier.
+
+Planners query the model through adapters: `task_duration_fn()` plugs into
+MakespanPlanner and `transfer_duration_fn()` into CooperativePlanner. Both
+return None for keys without samples, so the planners fall back to their
+static durations. The model can be saved to and loaded from JSON to carry
+history across runs.
+"""
+
+from collections import deque
+import json
+import math
+import threading
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+TASK = "task"
+TASK_TYPE = "task_type"
+TRANSFER = "transfer"
+
+DurationKey = Tuple[str, ...]
+
+
+class DurationStats:
+    """Recent samples of one duration and their exponentially decayed mean"""
+
+    def __init__(self, window: int = 200, alpha: float = 0.2):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.alpha = alpha
+        self.count = 0
+        self.decayed_mean: Optional[float] = None
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+        if self.decayed_mean is None:
+            self.decayed_mean = seconds
+        else:
+            self.decayed_mean += self.alpha * (seconds - self.decayed_mean)
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Mean of the samples in the window"""
+        if not self.samples:
+            return None
+        return sum(self.samples) / len(self.samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """p-th percentile (0-100) of the window, linearly interpolated"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        rank = (len(ordered) - 1) * min(max(p, 0.0), 100.0) / 100.0
+        low = math.floor(rank)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+    def estimate(self, percentile: Optional[float] = None) -> Optional[float]:
+        """Decayed mean, or a window percentile when `percentile` is given"""
+        if percentile is not None:
+            return self.percentile(percentile)
+        return self.decayed_mean
+
+    def to_dict(self) -> dict:
+        return {"samples": list(self.samples), "count": self.count, "decayed_mean": self.decayed_mean}
+
+    @classmethod
+    def from_dict(cls, data: dict, window: int, alpha: float) -> 'DurationStats':
+        stats = cls(window, alpha)
+        stats.samples.extend(data.get("samples", []))
+        stats.count = data.get("count", len(stats.samples))
+        stats.decayed_mean = data.get("decayed_mean", stats.mean)
+        return stats
+
+    def __repr__(self):
+        return f"DurationStats(n={self.count}, mean={self.mean}, decayed={self.decayed_mean})"
+
+
+class DurationModel:
+    """
+    Rolling duration statistics keyed by device task and robot transfer.
+
+    `window` bounds the samples kept per key (memory stays constant however
+    long the cell runs); `alpha` is the weight of the newest sample in the
+    decayed mean.
+    """
+
+    def __init__(self, window: int = 200, alpha: float = 0.2):
+        self.window = window
+        self.alpha = alpha
+        self._stats: Dict[DurationKey, DurationStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: DurationKey, seconds: float):
+        """Add one measured duration"""
+        if seconds < 0 or math.isnan(seconds):
+            return
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = DurationStats(self.window, self.alpha)
+            stats.add(seconds)
+
+    def record_task(self, device_name: str, command: str, seconds: float,
+                    device_type: Optional[str] = None):
+        """A device task, also recorded for its device type when given"""
+        self.record((TASK, device_name, command), seconds)
+        if device_type is not None:
+            self.record((TASK_TYPE, device_type, command), seconds)
+
+    def record_transfer(self, robot_name: str, src_place: str, dst_place: str, seconds: float):
+        self.record((TRANSFER, robot_name, src_place, dst_place), seconds)
+
+    def stats(self, key: DurationKey) -> Optional[DurationStats]:
+        with self._lock:
+            return self._stats.get(key)
+
+    def keys(self, kind: Optional[str] = None) -> List[DurationKey]:
+        """Recorded keys, optionally only of one kind (TASK, TASK_TYPE, TRANSFER)"""
+        with self._lock:
+            return [key for key in self._stats if kind is None or key[0] == kind]
+
+    def _estimate(self, key: DurationKey, default: Optional[float],
+                  percentile: Optional[float]) -> Optional[float]:
+        with self._lock:
+            stats = self._stats.get(key)
+            value = stats.estimate(percentile) if stats is not None else None
+        return default if value is None else value
+
+    def task_seconds(self, device_name: str, command: str, default: Optional[float] = None,
+                     percentile: Optional[float] = None) -> Optional[float]:
+        """Expected duration of a command on a device (decayed mean unless `percentile`)"""
+        return self._estimate((TASK, device_name, command), default, percentile)
+
+    def device_type_seconds(self, device_type: str, command: str, default: Optional[float] = None,
+                            percentile: Optional[float] = None) -> Optional[float]:
+        """Expected duration of a command on any device of a type"""
+        return self._estimate((TASK_TYPE, device_type, command), default, percentile)
+
+    def transfer_seconds(self, robot_name: str, src_place: str, dst_place: str,
+                         default: Optional[float] = None,
+                         percentile: Optional[float] = None) -> Optional[float]:
+        """Expected duration of a robot transfer between two places"""
+        return self._estimate((TRANSFER, robot_name, src_place, dst_place), default, percentile)
+
+    def task_duration_fn(self, percentile: Optional[float] = None) -> Callable:
+        """`duration_fn(task, active_plate)` for MakespanPlanner (by device type)"""
+        def duration(task, active_plate):
+            return self.device_type_seconds(task.device_type, task.command, percentile=percentile)
+        return duration
+
+    def transfer_duration_fn(self, percentile: Optional[float] = None) -> Callable:
+        """
+        `duration_fn(robot, src_location, dst_location, weight)` for CooperativePlanner.
+
+        Uses the first recorded pair of places between the two locations.
+        """
+        def duration(robot, src_location, dst_location, weight):
+            for src_place in src_location.places:
+                for dst_place in dst_location.places:
+                    seconds = self.transfer_seconds(robot.name, src_place.name, dst_place.name,
+                                                    percentile=percentile)
+                    if seconds is not None:
+                        return seconds
+            return None
+        return duration
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            entries = [{"key": list(key), **stats.to_dict()} for key, stats in self._stats.items()]
+        return {"window": self.window, "alpha": self.alpha, "entries": entries}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'DurationModel':
+        model = cls(data.get("window", 200), data.get("alpha", 0.2))
+        for entry in data.get("entries", []):
+            model._stats[tuple(entry["key"])] = DurationStats.from_dict(entry, model.window, model.alpha)
+        return model
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> 'DurationModel':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._stats)
+
+    def __repr__(self):
+        return f"DurationModel({len(self)} keys)"
@@ -0,0 +1,218 @@
+"""
+HTTPConnectionPool - keep-alive HTTP connections (standard library).
+
+RestNodeClient used to open a new connection (and TCP handshake) for every
+request. The pool keeps `http.client` connections open per (scheme, host,
+port) and hands them out again, so polling a Node reuses one socket.
+
+- Up to `max_connections_per_host` idle connections are kept per host;
+  requests beyond that get a fresh connection, which is closed after use.
+- Connections idle for longer than `idle_timeout` are closed instead of
+  reused. The default (4s) is below common server keep-alive timeouts
+  (uvicorn closes idle connections after 5s), so ordinary reuse rarely
+  meets a socket the server has already dropped.
+- A reused connection that turns out to be closed by the server (reset,
+  broken pipe, or disconnected before any response) is retried once on a
+  fresh connection if the request could not have reached the server (it
+  failed while sending) or is safe to repeat: idempotent methods (GET,
+  PUT, DELETE, ...) or requests sent with `idempotent=True`, such as Node
+  submits deduplicated on their request_id. Anything else (e.g. a
+  synchronous Node action POST) may already have run, so the error is
+  raised instead.
+- Responses that ask to close the connection (`Connection: close`, HTTP/1.0)
+  are not pooled.
+"""
+
+import http.client
+import logging
+import ssl
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+HostKey = Tuple[str, str, int]
+
+# Errors that mean a kept-alive connection was closed by the server
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+
+# Methods that may be repeated without changing the outcome (RFC 9110)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "TRACE", "PUT", "DELETE"})
+
+
+@dataclass
+class PoolStats:
+    """Connection counts since the pool was created"""
+    requests: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+    stale_retries: int = 0
+    idle_evicted: int = 0
+    discarded: int = 0
+
+
+@dataclass
+class HTTPResponse:
+    status: int
+    reason: str
+    headers: Dict[str, str]
+    body: bytes
+
+
+class _PooledConnection:
+    def __init__(self, connection: http.client.HTTPConnection, last_used: float):
+        self.connection = connection
+        self.last_used = last_used
+
+
+class HTTPConnectionPool:
+    """Per-host pools of keep-alive http.client connections"""
+
+    def __init__(self, max_connections_per_host: int = 4, idle_timeout: float = 4.0,
+                 max_retries: int = 1, clock: Callable[[], float] = time.monotonic,
+                 ssl_context: Optional[ssl.SSLContext] = None):
+        self.max_connections_per_host = max_connections_per_host
+        self.idle_timeout = idle_timeout
+        self.max_retries = max_retries
+        self.clock = clock
+        self.ssl_context = ssl_context
+        self.stats = PoolStats()
+        self._idle: Dict[HostKey, List[_PooledConnection]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_key(url: str) -> HostKey:
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        return scheme, parts.hostname or "localhost", parts.port or (443 if scheme == "https" else 80)
+
+    def request(self, method: str, url: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+                idempotent: Optional[bool] = None) -> HTTPResponse:
+        """
+        Send a request and read the whole response.
+
+        `idempotent` says whether the request may be sent twice (None: by
+        method, see IDEMPOTENT_METHODS); it decides whether a request that
+        reached a stale connection is retried.
+
+        Raises OSError / http.client.HTTPException if the request cannot be
+        completed; HTTP error statuses are returned, not raised.
+        """
+        repeatable = method.upper() in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        key = self.host_key(url)
+        parts = urlsplit(url)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        request_headers = {"Host": parts.netloc, "Connection": "keep-alive"}
+        request_headers.update(headers or {})
+        with self._lock:
+            self.stats.requests += 1
+
+        attempt = 0
+        while True:
+            connection, reused = self._acquire(key, timeout)
+            sent = False
+            try:
+                connection.request(method, target, body=body, headers=request_headers)
+                sent = True
+                response = connection.getresponse()
+                data = response.read()
+            except STALE_CONNECTION_ERRORS as e:
+                connection.close()
+                # Once sent, the server may have acted on the request before dropping the connection
+                if not reused or attempt >= self.max_retries or (sent and not repeatable):
+                    raise
+                attempt += 1
+                with self._lock:
+                    self.stats.stale_retries += 1
+                logger.debug(f"Stale connection to {key[1]}:{key[2]} ({e!r}); retrying on a new one")
+                continue
+            except BaseException:
+                connection.close()
+                raise
+            result = HTTPResponse(response.status, response.reason,
+                                  {name.lower(): value for name, value in response.getheaders()}, data)
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(key, connection)
+            return result
+
+    def _acquire(self, key: HostKey, timeout: Optional[float]) -> Tuple[http.client.HTTPConnection, bool]:
+        """An idle connection for the host (most recently used first), or a new one"""
+        now = self.clock()
+        expired = []
+        pooled = None
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate = idle.pop()
+                if now - candidate.last_used > self.idle_timeout:
+                    expired.append(candidate)
+                    self.stats.idle_evicted += 1
+                    continue
+                pooled = candidate
+                self.stats.connections_reused += 1
+                break
+            if pooled is None:
+                self.stats.connections_created += 1
+        for candidate in expired:
+            candidate.connection.close()
+        if pooled is not None:
+            connection = pooled.connection
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+            return connection, True
+        scheme, host, port = key
+        if scheme == "https":
+            context = self.ssl_context or ssl.create_default_context()
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=context), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def _release(self, key: HostKey, connection: http.client.HTTPConnection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_connections_per_host:
+                idle.append(_PooledConnection(connection, self.clock()))
+                return
+            self.stats.discarded += 1
+        connection.close()
+
+    def evict_idle(self) -> int:
+        """Close connections idle for longer than `idle_timeout`; returns how many"""
+        now = self.clock()
+        expired = []
+        with self._lock:
+            for key, idle in self._idle.items():
+                keep = [pooled for pooled in idle if now - pooled.last_used <= self.idle_timeout]
+                expired.extend(pooled for pooled in idle if now - pooled.last_used > self.idle_timeout)
+                self._idle[key] = keep
+            self.stats.idle_evicted += len(expired)
+        for pooled in expired:
+            pooled.connection.close()
+        return len(expired)
+
+    def idle_connections(self, url: Optional[str] = None) -> int:
+        """Pooled connections (for one host, if `url` is given)"""
+        with self._lock:
+            if url is not None:
+                return len(self._idle.get(self.host_key(url), []))
+            return sum(len(idle) for idle in self._idle.values())
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._lock:
+            pooled = [p for idle in self._idle.values() for p in idle]
+            self._idle.clear()
+        for p in pooled:
+            p.connection.close()
@@ -0,0 +1,118 @@
+"""
+Instrumentation - metrics and traces shared by a cell's schedulers.
+
+An Instrumentation bundles a MetricsRegistry (see metrics.py) and a Tracer
+(see tracing.py). RobotScheduler creates one unless given one and hands it
+to its PathPlanner and DeviceManager; PlateScheduler uses its
+RobotScheduler's, so one object covers the whole cell.
+
+InstrumentationServer exposes it over HTTP from a daemon thread:
+
+    GET /metrics       Prometheus text exposition
+    GET /metrics.json  the same numbers as JSON
+    GET /trace         Chrome trace-event JSON (chrome://tracing, Perfetto)
+"""
+
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from .clock import Clock, SYSTEM_CLOCK
+from .metrics import MetricsRegistry
+from .tracing import Tracer
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Instrumentation:
+    """A metrics registry and a tracer timed by the cell's clock"""
+
+    def __init__(self, clock: Optional[Clock] = None, metrics: Optional[MetricsRegistry] = None,
+                 tracer: Optional[Tracer] = None, max_spans: int = 100_000):
+        clock = clock if clock is not None else SYSTEM_CLOCK
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.tracer = tracer if tracer is not None else Tracer(clock.monotonic, max_spans)
+
+    def render_prometheus(self) -> str:
+        return self.metrics.render_prometheus()
+
+    def chrome_trace(self) -> dict:
+        return self.tracer.chrome_trace()
+
+    def save_chrome_trace(self, path: str):
+        self.tracer.save_chrome_trace(path)
+
+    def serve(self, host: str = "127.0.0.1", port: int = 9464) -> 'InstrumentationServer':
+        """Start an InstrumentationServer (port 0 picks a free port)"""
+        server = InstrumentationServer(self, host, port)
+        server.start()
+        return server
+
+
+class InstrumentationServer:
+    """HTTP endpoint for an Instrumentation's metrics and trace"""
+
+    def __init__(self, instrumentation: Instrumentation, host: str = "127.0.0.1", port: int = 9464):
+        self.instrumentation = instrumentation
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="InstrumentationServer",
+                                       daemon=True)
+        self.thread.start()
+        logger.info(f"Serving metrics at {self.url}/metrics")
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+
+    def _handler_class(self):
+        instrumentation = self.instrumentation
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                try:
+                    if path == "/metrics":
+                        body, content_type = instrumentation.render_prometheus(), PROMETHEUS_CONTENT_TYPE
+                    elif path == "/metrics.json":
+                        body, content_type = json.dumps(instrumentation.metrics.snapshot()), "application/json"
+                    elif path == "/trace":
+                        body, content_type = json.dumps(instrumentation.chrome_trace()), "application/json"
+                    else:
+                        self.send_error(404)
+                        return
+                except Exception as e:
+                    logger.error(f"Error serving {path}: {e}", exc_info=True)
+                    self.send_error(500)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
@@ -0,0 +1,414 @@
+"""
+MakespanPlanner - offline dispatch plans for whole worklists.
+
+PlateScheduler dispatches greedily: the free plate with the lowest instance
+index takes the first free device. For large hit-picking worklists a plan
+computed ahead of time can finish sooner. The planner treats a worklist as a
+flexible job shop:
+
+- every plate the factories will create is a job and its todo list the
+  operations (plates are built by the factories' own plate classes, so the
+  plan matches what will execute)
+- every device is a machine with one slot per plate location; a task may run
+  on any device of its type
+- a task takes `task_seconds` (or `duration_fn`); every device task after a
+  plate's first also pays `move_seconds` for its robot move, during which the
+  device location is already reserved
+- plates are released the way the factories release them: in instance order,
+  at most `number_of_simultaneous_plates()` of a kind at once
+
+Robots are not modelled as shared resources, and a plate is assumed to leave
+its device when its task ends.
+
+`greedy()` predicts today's behaviour (non-delay list scheduling in instance
+order). `optimize()` builds active schedules (Giffler-Thompson) with several
+priority rules and then improves the best plate order with a seeded local
+search. Set `worklist.dispatch_plan` to have PlateScheduler execute a plan:
+each task then goes to its planned device, and each device receives its tasks
+in planned order.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+import random
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .active_plate import ActivePlate, ActiveSourcePlate
+from .active_plate_factory import ActiveSourcePlateFactory, ActiveDestinationPlateFactory
+from .tasks import PlateTask, WaitTask
+from .worklist import Worklist
+
+SOURCE = "source"
+DESTINATION = "destination"
+
+# (plate kind, instance index, task index)
+OperationKey = Tuple[str, int, int]
+
+_EPSILON = 1e-9
+
+
+def plate_kind(active_plate: ActivePlate) -> str:
+    """"source" or "destination" """
+    return SOURCE if isinstance(active_plate, ActiveSourcePlate) else DESTINATION
+
+
+@dataclass
+class PlannedOperation:
+    """One task of one plate, placed on a device and in time"""
+    kind: str
+    instance_index: int
+    task_index: int
+    task: Union[PlateTask, WaitTask]
+    device_name: Optional[str]  # None for wait tasks
+    start: float
+    end: float
+
+    @property
+    def key(self) -> OperationKey:
+        return (self.kind, self.instance_index, self.task_index)
+
+
+class DispatchPlan:
+    """Where and in which order every task of a worklist runs"""
+
+    def __init__(self, operations: Iterable[PlannedOperation], rule: str = ""):
+        self.rule = rule
+        self.operations = sorted(operations, key=lambda op: (op.start, op.end, op.key))
+        self.makespan = max((op.end for op in self.operations), default=0.0)
+        self._by_key: Dict[OperationKey, PlannedOperation] = {}
+        self._by_device: Dict[str, List[PlannedOperation]] = {}
+        self._positions: Dict[OperationKey, int] = {}
+        for op in self.operations:
+            self._by_key[op.key] = op
+            if op.device_name is not None:
+                sequence = self._by_device.setdefault(op.device_name, [])
+                self._positions[op.key] = len(sequence)
+                sequence.append(op)
+
+    def operation(self, kind: str, instance_index: int, task_index: int) -> Optional[PlannedOperation]:
+        return self._by_key.get((kind, instance_index, task_index))
+
+    def operation_for(self, active_plate: ActivePlate, task_index: int) -> Optional[PlannedOperation]:
+        """The planned operation for a plate's task (None if the plan does not cover it)"""
+        return self._by_key.get((plate_kind(active_plate), active_plate.instance_index, task_index))
+
+    def device_sequence(self, device_name: str) -> List[PlannedOperation]:
+        """Operations on a device in the order they are dispatched"""
+        return list(self._by_device.get(device_name, []))
+
+    def position(self, operation: PlannedOperation) -> int:
+        """Index of a device operation in its device's sequence"""
+        return self._positions[operation.key]
+
+    def device_names(self) -> List[str]:
+        return list(self._by_device)
+
+    @property
+    def device_task_count(self) -> int:
+        """Number of operations that run on a device (all but wait tasks)"""
+        return len(self._positions)
+
+    def __len__(self):
+        return len(self.operations)
+
+    def __repr__(self):
+        return f"DispatchPlan({self.rule}, {len(self.operations)} operations, makespan={self.makespan:.1f})"
+
+
+class _Job:
+    """Static description of one plate for the list scheduler"""
+
+    def __init__(self, kind: str, kind_order: int, instance_index: int,
+                 tasks: Sequence[Union[PlateTask, WaitTask]], seconds: List[float]):
+        self.kind = kind
+        self.kind_order = kind_order
+        self.instance_index = instance_index
+        self.tasks = list(tasks)
+        self.seconds = seconds
+        # Work left from each task on, for the MWKR rule
+        self.remaining = [sum(seconds[i:]) for i in range(len(seconds) + 1)]
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        return (self.kind, self.instance_index)
+
+
+class MakespanPlanner:
+    """
+    Computes dispatch plans for worklists on a fixed set of devices.
+
+    `devices` maps a device type to its devices as (name, slots) pairs, in
+    the order PlateScheduler would try them. `task_seconds` is keyed by
+    "DeviceType.command" or "DeviceType"; `duration_fn(task, active_plate)`
+    overrides it when it returns a number (e.g. hit-picks that take longer
+    for plates with more transfers).
+    """
+
+    RULES = ("fifo", "spt", "lpt", "mwkr")
+
+    def __init__(self, devices: Dict[str, List[Tuple[str, int]]],
+                 task_seconds: Optional[Dict[str, float]] = None,
+                 move_seconds: float = 0.0,
+                 default_task_seconds: float = 1.0,
+                 duration_fn: Optional[Callable[[PlateTask, ActivePlate], Optional[float]]] = None):
+        self.devices = {device_type: list(entries) for device_type, entries in devices.items()}
+        self.task_seconds = dict(task_seconds or {})
+        self.move_seconds = move_seconds
+        self.default_task_seconds = default_task_seconds
+        self.duration_fn = duration_fn
+
+    @classmethod
+    def from_device_manager(cls, device_manager, **kwargs) -> 'MakespanPlanner':
+        """Planner for the devices registered with a DeviceManager (one slot per location)"""
+        devices: Dict[str, List[Tuple[str, int]]] = {}
+        for device in device_manager.devices.values():
+            slots = max(1, len(getattr(device, 'plate_location_info', None) or ()))
+            devices.setdefault(device.product_name, []).append((device.name, slots))
+        return cls(devices, **kwargs)
+
+    def task_duration(self, task: Union[PlateTask, WaitTask], active_plate: Optional[ActivePlate] = None) -> float:
+        """Seconds a task keeps its device busy (excluding the robot move)"""
+        if isinstance(task, WaitTask):
+            return task.duration_seconds
+        if self.duration_fn is not None:
+            seconds = self.duration_fn(task, active_plate)
+            if seconds is not None:
+                return seconds
+        seconds = self.task_seconds.get(f"{task.device_type}.{task.command}")
+        if seconds is None:
+            seconds = self.task_seconds.get(task.device_type, self.default_task_seconds)
+        return seconds
+
+    def greedy(self, worklist: Worklist) -> DispatchPlan:
+        """Predicted schedule of the greedy PlateScheduler"""
+        jobs, limits = self._jobs(worklist)
+        return self._schedule(jobs, limits, self._rule_key("fifo"), delay=False, rule="greedy")
+
+    def list_schedule(self, worklist: Worklist, rule: str = "fifo") -> DispatchPlan:
+        """Active schedule built with one priority rule (see RULES)"""
+        if rule not in self.RULES:
+            raise ValueError(f"Unknown priority rule: {rule}")
+        jobs, limits = self._jobs(worklist)
+        return self._schedule(jobs, limits, self._rule_key(rule), delay=True, rule=rule)
+
+    def optimize(self, worklist: Worklist, iterations: int = 200, seed: int = 0) -> DispatchPlan:
+        """
+        Best plan found by the priority rules and a local search.
+
+        The search reorders plates (an insertion move per iteration), keeps
+        equal-or-better orders and returns the best plan seen, so the result
+        is never worse than greedy().
+        """
+        jobs, limits = self._jobs(worklist)
+        best = self._schedule(jobs, limits, self._rule_key("fifo"), delay=False, rule="greedy")
+        for rule in self.RULES:
+            plan = self._schedule(jobs, limits, self._rule_key(rule), delay=True, rule=rule)
+            if plan.makespan < best.makespan - _EPSILON:
+                best = plan
+        if len(jobs) < 2 or iterations <= 0:
+            return best
+
+        # Start from the plate order of the best plan so far
+        first_start = {}
+        for op in best.operations:
+            first_start.setdefault((op.kind, op.instance_index), op.start)
+        order = sorted((job.key for job in jobs), key=lambda key: (first_start.get(key, 0.0), key))
+        current = best.makespan
+        rng = random.Random(seed)
+        for _ in range(iterations):
+            candidate = list(order)
+            i, j = rng.sample(range(len(candidate)), 2)
+            candidate.insert(j, candidate.pop(i))
+            plan = self._schedule(jobs, limits, self._order_key(candidate), delay=True, rule="local search")
+            if plan.makespan <= current + _EPSILON:
+                order, current = candidate, plan.makespan
+                if plan.makespan < best.makespan - _EPSILON:
+                    best = plan
+        return best
+
+    def _jobs(self, worklist: Worklist) -> Tuple[List[_Job], Dict[str, int]]:
+        jobs = []
+        limits = {}
+        factories = (ActiveSourcePlateFactory(worklist), ActiveDestinationPlateFactory(worklist))
+        for kind_order, (kind, factory) in enumerate(zip((SOURCE, DESTINATION), factories)):
+            limits[kind] = factory.number_of_simultaneous_plates()
+            plate_type = factory.get_active_plate_type()
+            for instance_index in range(factory.number_of_plates_to_create):
+                plate = plate_type(worklist, instance_index)
+                seconds = []
+                moved = False
+                for task in plate.todo_list:
+                    duration = self.task_duration(task, plate)
+                    if isinstance(task, PlateTask):
+                        # The first device task sources the plate in place
+                        if moved:
+                            duration += self.move_seconds
+                        moved = True
+                    seconds.append(duration)
+                jobs.append(_Job(kind, kind_order, instance_index, plate.todo_list, seconds))
+        return jobs, limits
+
+    @staticmethod
+    def _fifo(job: _Job) -> Tuple[int, int]:
+        return (job.instance_index, job.kind_order)
+
+    def _rule_key(self, rule: str) -> Callable[[_Job, int], tuple]:
+        fifo = self._fifo
+        if rule == "spt":
+            return lambda job, index: (job.seconds[index], fifo(job))
+        if rule == "lpt":
+            return lambda job, index: (-job.seconds[index], fifo(job))
+        if rule == "mwkr":
+            return lambda job, index: (-job.remaining[index], fifo(job))
+        return lambda job, index: fifo(job)
+
+    def _order_key(self, order: List[Tuple[str, int]]) -> Callable[[_Job, int], tuple]:
+        rank = {key: position for position, key in enumerate(order)}
+        return lambda job, index: (rank[job.key],)
+
+    def _earliest(self, job: _Job, index: int, ready: float,
+                  slots: Dict[str, List[float]]) -> Tuple[float, Optional[str], int]:
+        """Earliest start of a job's task, with the device and slot it would use"""
+        task = job.tasks[index]
+        if isinstance(task, WaitTask):
+            return ready, None, 0
+        entries = self.devices.get(task.device_type)
+        if not entries:
+            raise ValueError(f"No devices of type {task.device_type} to plan {task}")
+        best = None
+        for name, _ in entries:
+            free = slots[name]
+            slot = min(range(len(free)), key=free.__getitem__)
+            start = max(ready, free[slot])
+            if best is None or start < best[0] - _EPSILON:
+                best = (start, name, slot)
+        return best
+
+    def _schedule(self, jobs: List[_Job], limits: Dict[str, int],
+                  priority: Callable[[_Job, int], tuple], delay: bool, rule: str) -> DispatchPlan:
+        """
+        List scheduling.
+
+        Non-delay (delay=False): among the tasks that can start earliest,
+        the highest priority goes first, as in PlateScheduler. Active
+        (delay=True, Giffler-Thompson): every task of the device type that
+        would finish first and could start before that finish competes, so
+        a device may wait for a more urgent plate.
+        """
+        slots = {name: [0.0] * count for entries in self.devices.values() for name, count in entries}
+        pending = {kind: deque(sorted((job for job in jobs if job.kind == kind),
+                                      key=lambda job: job.instance_index))
+                   for kind in limits}
+        released = {kind: 0 for kind in limits}
+        finishes: Dict[str, List[float]] = {kind: [] for kind in limits}
+        next_task: Dict[Tuple[str, int], int] = {}
+        ready: Dict[Tuple[str, int], float] = {}
+        active: List[_Job] = []
+        operations: List[PlannedOperation] = []
+
+        def finish(job: _Job, at: float):
+            finishes[job.kind].append(at)
+            finishes[job.kind].sort()
+
+        def release():
+            for kind, queue in pending.items():
+                while queue:
+                    count = released[kind]
+                    if count < limits[kind]:
+                        at = 0.0
+                    elif len(finishes[kind]) > count - limits[kind]:
+                        at = finishes[kind][count - limits[kind]]
+                    else:
+                        break
+                    job = queue.popleft()
+                    released[kind] += 1
+                    if job.tasks:
+                        next_task[job.key] = 0
+                        ready[job.key] = at
+                        active.append(job)
+                    else:
+                        finish(job, at)
+
+        release()
+        while active:
+            candidates = []
+            for job in active:
+                index = next_task[job.key]
+                start, device_name, slot = self._earliest(job, index, ready[job.key], slots)
+                candidates.append((job, index, start, device_name, slot))
+
+            if delay:
+                job, index, start, device_name, slot = min(
+                    candidates, key=lambda c: (c[2] + c[0].seconds[c[1]], priority(c[0], c[1])))
+                completion = start + job.seconds[index]
+                if device_name is not None:
+                    device_type = job.tasks[index].device_type
+                    conflict = [c for c in candidates
+                                if c[3] is not None and c[0].tasks[c[1]].device_type == device_type
+                                and (c[2] < completion - _EPSILON or c[0] is job)]
+                    job, index, start, device_name, slot = min(conflict, key=lambda c: priority(c[0], c[1]))
+            else:
+                earliest = min(c[2] for c in candidates)
+                conflict = [c for c in candidates if c[2] <= earliest + _EPSILON]
+                job, index, start, device_name, slot = min(conflict, key=lambda c: priority(c[0], c[1]))
+
+            end = start + job.seconds[index]
+            if device_name is not None:
+                slots[device_name][slot] = end
+            operations.append(PlannedOperation(job.kind, job.instance_index, index,
+                                               job.tasks[index], device_name, start, end))
+            ready[job.key] = end
+            next_task[job.key] = index + 1
+            if index + 1 == len(job.tasks):
+                active.remove(job)
+                finish(job, end)
+                release()
+        return DispatchPlan(operations, rule)
+
+
+@dataclass
+class MakespanComparison:
+    """Predicted makespan of one worklist, greedy vs planned"""
+    worklist_name: str
+    plates: int
+    operations: int
+    greedy_makespan: float
+    planned_makespan: float
+    rule: str
+
+    @property
+    def improvement(self) -> float:
+        """Fraction of the greedy makespan saved by the plan"""
+        if self.greedy_makespan <= 0:
+            return 0.0
+        return 1.0 - self.planned_makespan / self.greedy_makespan
+
+
+def compare_with_greedy(planner: MakespanPlanner, worklists: Iterable[Worklist],
+                        iterations: int = 200, seed: int = 0) -> List[MakespanComparison]:
+    """Plan each worklist and compare the result with the greedy prediction"""
+    comparisons = []
+    for worklist in worklists:
+        greedy = planner.greedy(worklist)
+        planned = planner.optimize(worklist, iterations=iterations, seed=seed)
+        plates = len({(op.kind, op.instance_index) for op in planned.operations})
+        comparisons.append(MakespanComparison(worklist.name, plates, len(planned),
+                                              greedy.makespan, planned.makespan, planned.rule))
+    return comparisons
+
+
+def format_report(comparisons: Sequence[MakespanComparison]) -> str:
+    """Plain-text table of makespan comparisons"""
+    lines = [f"{'Worklist':24} {'Plates':>6} {'Tasks':>6} {'Greedy':>10} {'Planned':>10} {'Saved':>7}  Rule",
+             "-" * 78]
+    for row in comparisons:
+        lines.append(f"{row.worklist_name[:24]:24} {row.plates:6d} {row.operations:6d} "
+                     f"{row.greedy_makespan:10.1f} {row.planned_makespan:10.1f} "
+                     f"{row.improvement * 100:6.1f}%  {row.rule}")
+    if comparisons:
+        greedy = sum(row.greedy_makespan for row in comparisons)
+        planned = sum(row.planned_makespan for row in comparisons)
+        saved = 1.0 - planned / greedy if greedy > 0 else 0.0
+        lines.append("-" * 78)
+        lines.append(f"{'Total':24} {'':6} {'':6} {greedy:10.1f} {planned:10.1f} {saved * 100:6.1f}%")
+    return "\n".join(lines)
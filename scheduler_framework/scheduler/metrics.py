@@ -0,0 +1,289 @@
+"""
+Metrics - counters, gauges and histograms with Prometheus text output.
+
+A MetricsRegistry holds named metrics; each keeps one value (or set of
+histogram buckets) per combination of label values. Asking the registry for
+a metric that already exists returns it, so components sharing a registry
+can each declare what they use. Collectors are called with the registry just
+before it is read and set gauges from live state (queue depths, free
+locations), so nothing has to be kept up to date between scrapes.
+
+`render_prometheus()` produces the Prometheus text exposition format (0.0.4)
+and `snapshot()` the same numbers as a dict. Standard library only.
+"""
+
+import bisect
+import logging
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[Tuple[str, str], ...]
+
+# Seconds: sub-millisecond scheduling work up to 10 s
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+# Seconds: robot moves, device jobs and waits
+DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0, 7200.0, 14400.0)
+
+
+def _label_values(labels: Dict[str, object]) -> LabelValues:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: LabelValues) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) or abs(value) >= 1e15 else str(int(value))
+
+
+class Metric:
+    """Base class: a named metric with one series per set of label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        """(sample name, labels, value) for every series"""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing total"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str = ""):
+        super().__init__(name, help)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = _label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_values(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, labels, value) for labels, value in self._values.items()]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Metric):
+    """Value that goes up and down"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str = ""):
+        super().__init__(name, help)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_values(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_values(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, labels, value) for labels, value in self._values.items()]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class HistogramSeries:
+    """Bucket counts, sum and count of one histogram series"""
+
+    def __init__(self, num_buckets: int):
+        self.bucket_counts = [0] * num_buckets
+        self.count = 0
+        self.sum = 0.0
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets (upper bounds, +Inf implied)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets if not math.isinf(bound)))
+        self._series: Dict[LabelValues, HistogramSeries] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_values(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = HistogramSeries(len(self.buckets) + 1)
+            series.bucket_counts[index] += 1
+            series.count += 1
+            series.sum += value
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._series.get(_label_values(labels))
+            return series.count if series is not None else 0
+
+    def sum(self, **labels) -> float:
+        with self._lock:
+            series = self._series.get(_label_values(labels))
+            return series.sum if series is not None else 0.0
+
+    def samples(self):
+        result = []
+        with self._lock:
+            for labels, series in self._series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), series.bucket_counts):
+                    cumulative += count
+                    result.append((f"{self.name}_bucket", labels + (("le", _format_value(bound)),),
+                                   cumulative))
+                result.append((f"{self.name}_sum", labels, series.sum))
+                result.append((f"{self.name}_count", labels, series.count))
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """Named metrics and the collectors that refresh gauges before each read"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[['MetricsRegistry'], None]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help: str, **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help)
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, buckets=buckets)
+
+    def get(self, name: str) -> Optional[Metric]:
+        with self._lock:
+            return self._metrics.get(name)
+
+    def metrics(self) -> List[Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def add_collector(self, collector: Callable[['MetricsRegistry'], None]):
+        """Call `collector(registry)` before every read (adding the same one twice has no effect)"""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[['MetricsRegistry'], None]):
+        with self._lock:
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+
+    def collect(self):
+        """Run the collectors (errors are logged, not raised)"""
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                collector(self)
+            except Exception as e:
+                logger.error(f"Metrics collector {collector} failed: {e}", exc_info=True)
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        self.collect()
+        lines = []
+        for metric in sorted(self.metrics(), key=lambda m: m.name):
+            if metric.help:
+                help_text = metric.help.replace("\\", "\\\\").replace("\n", "\\n")
+                lines.append(f"# HELP {metric.name} {help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample_name, labels, value in metric.samples():
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Current values: metric name -> {"type", "help", "series"}; each series
+        has its labels and either a `value` or a histogram's `count`, `sum`
+        and cumulative `buckets`.
+        """
+        self.collect()
+        result = {}
+        for metric in sorted(self.metrics(), key=lambda m: m.name):
+            series = []
+            if isinstance(metric, Histogram):
+                with metric._lock:
+                    items = [(labels, s.count, s.sum, list(s.bucket_counts))
+                             for labels, s in metric._series.items()]
+                for labels, count, total, counts in items:
+                    cumulative, buckets = 0, {}
+                    for bound, bucket_count in zip(metric.buckets + (math.inf,), counts):
+                        cumulative += bucket_count
+                        buckets[_format_value(bound)] = cumulative
+                    series.append({"labels": dict(labels), "count": count, "sum": total, "buckets": buckets})
+            else:
+                series = [{"labels": dict(labels), "value": value} for _, labels, value in metric.samples()]
+            result[metric.name] = {"type": metric.kind, "help": metric.help, "series": series}
+        return result
+
+    def clear(self):
+        """Reset every metric's values (metrics and collectors stay registered)"""
+        for metric in self.metrics():
+            metric.clear()
@@ -5,17 +5,27 @@ Expected Node endpoints (proposed contract):
 - GET  /health -> {"healthy": true}
 - GET  /definition -> NodeDefinition-like JSON
 - POST /actions/{action} -> executes action, returns NodeActionResponse-like JSON
+- POST /actions/{action}/submit -> queues action, returns an execution_id
+- POST /actions/batch/submit, POST /actions/status:batch -> the same for
+  several jobs in one request
+- GET  /stats -> job queue depth, running jobs and queue wait times
+- GET  /actions/status/{execution_id}?wait=N -> status; with `wait`, the Node
+  holds the request until the action finishes or N seconds pass (long-poll)
 
 This is a Tachyon-owned contract; devices can implement it in FastAPI.
+
+Requests go through an HTTPConnectionPool (see http_pool.py), so repeated
+calls to a Node reuse a keep-alive connection. Clients can share a pool.
 """
 
 from __future__ import annotations
 
 import json
-import urllib.request
-import urllib.error
+import time
 from dataclasses import asdict
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+
+from .http_pool import HTTPConnectionPool
 
 from .node_interface import (
     NodeClient,
@@ -23,50 +33,122 @@ from .node_interface import (
     NodeAction,
     NodeActionRequest,
     NodeActionResponse,
+    TERMINAL_ACTION_STATUSES,
 )
 
 
+# A Node without the batch routes. Nodes from before them match the batch paths
+# against /actions/{action} and reject the batch body as 422.
+BATCH_UNSUPPORTED_STATUSES = (404, 405, 422)
+
+
+class NodeHTTPError(RuntimeError):
+    """A Node answered with an HTTP error status (`status`)"""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+def _unknown_status(execution_id: str) -> NodeActionResponse:
+    """What status:batch answers for an execution the Node doesn't know"""
+    return NodeActionResponse(execution_id=execution_id, status="unknown", success=False,
+                              error="Unknown execution_id")
+
+
 def _join_url(base_url: str, path: str) -> str:
     base = base_url.rstrip("/")
     p = path if path.startswith("/") else f"/{path}"
     return base + p
 
 
+def _definition_from_json(data: Dict[str, Any]) -> NodeDefinition:
+    actions = []
+    for a in data.get("actions", []) or []:
+        if isinstance(a, dict) and "name" in a:
+            actions.append(
+                NodeAction(
+                    name=str(a.get("name", "")),
+                    description=str(a.get("description", "")),
+                    args_schema=a.get("args_schema") or {},
+                )
+            )
+
+    return NodeDefinition(
+        node_id=str(data.get("node_id") or data.get("id") or ""),
+        name=str(data.get("name") or ""),
+        kind=str(data.get("kind") or ""),
+        version=str(data.get("version") or ""),
+        actions=actions,
+    )
+
+
+def _response_from_json(
+    data: Dict[str, Any],
+    request_id: str = "",
+    execution_id: str = "",
+    default_status: Optional[str] = None,
+) -> NodeActionResponse:
+    """NodeActionResponse from a Node's JSON (default_status None: derived from success)"""
+    status = data.get("status")
+    if not status:
+        status = default_status if default_status is not None else (
+            "succeeded" if data.get("success", True) else "failed")
+    return NodeActionResponse(
+        request_id=str(data.get("request_id") or request_id),
+        execution_id=str(data.get("execution_id") or data.get("job_id") or execution_id),
+        status=str(status),
+        success=bool(data.get("success", True)),
+        result=(data.get("result") or {}) if isinstance(data.get("result") or {}, dict) else {},
+        error=data.get("error"),
+    )
+
+
+def _batch_from_json(data: Dict[str, Any], expected: int, url: str) -> List[Dict[str, Any]]:
+    """The per-item responses of a batch endpoint, checked against the number sent"""
+    items = data.get("responses")
+    if not isinstance(items, list) or len(items) != expected:
+        raise RuntimeError(f"POST {url} failed: expected {expected} responses, got {data!r:.200}")
+    return [item if isinstance(item, dict) else {} for item in items]
+
+
 class RestNodeClient(NodeClient):
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, pool: Optional[HTTPConnectionPool] = None):
         self.base_url = base_url.rstrip("/")
+        self.pool = pool if pool is not None else HTTPConnectionPool()
 
-    def _get_json(self, path: str, timeout_s: float) -> Dict[str, Any]:
+    def _request_json(self, method: str, path: str, payload: Optional[Dict[str, Any]],
+                      timeout_s: float, idempotent: Optional[bool] = None) -> Dict[str, Any]:
         url = _join_url(self.base_url, path)
-        req = urllib.request.Request(url, method="GET")
+        headers = {"Accept": "application/json"}
+        data = None
+        if payload is not None:
+            data = json.dumps(payload).encode("utf-8")
+            headers["Content-Type"] = "application/json"
         try:
-            with urllib.request.urlopen(req, timeout=timeout_s) as resp:
-                body = resp.read().decode("utf-8")
-                return json.loads(body) if body else {}
-        except urllib.error.HTTPError as e:
-            body = e.read().decode("utf-8") if hasattr(e, "read") else str(e)
-            raise RuntimeError(f"GET {url} failed: {e.code} {body}") from e
+            resp = self.pool.request(method, url, body=data, headers=headers, timeout=timeout_s,
+                                     idempotent=idempotent)
         except Exception as e:
-            raise RuntimeError(f"GET {url} failed: {e}") from e
-
-    def _post_json(self, path: str, payload: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
-        url = _join_url(self.base_url, path)
-        data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(
-            url,
-            data=data,
-            method="POST",
-            headers={"Content-Type": "application/json"},
-        )
+            raise RuntimeError(f"{method} {url} failed: {e}") from e
+        body = resp.body.decode("utf-8")
+        if resp.status >= 400:
+            raise NodeHTTPError(f"{method} {url} failed: {resp.status} {body}", resp.status)
         try:
-            with urllib.request.urlopen(req, timeout=timeout_s) as resp:
-                body = resp.read().decode("utf-8")
-                return json.loads(body) if body else {}
-        except urllib.error.HTTPError as e:
-            body = e.read().decode("utf-8") if hasattr(e, "read") else str(e)
-            raise RuntimeError(f"POST {url} failed: {e.code} {body}") from e
-        except Exception as e:
-            raise RuntimeError(f"POST {url} failed: {e}") from e
+            return json.loads(body) if body else {}
+        except ValueError as e:
+            raise RuntimeError(f"{method} {url} failed: {e}") from e
+
+    def _get_json(self, path: str, timeout_s: float) -> Dict[str, Any]:
+        return self._request_json("GET", path, None, timeout_s)
+
+    def _post_json(self, path: str, payload: Dict[str, Any], timeout_s: float,
+                   idempotent: bool = False) -> Dict[str, Any]:
+        """`idempotent`: the Node dedupes the POST (e.g. on request_id), so the pool may resend it"""
+        return self._request_json("POST", path, payload, timeout_s, idempotent=idempotent)
+
+    def close(self):
+        """Close the pooled connections"""
+        self.pool.close()
 
     def health(self) -> bool:
         try:
@@ -77,25 +159,11 @@ class RestNodeClient(NodeClient):
 
     def get_definition(self) -> NodeDefinition:
         data = self._get_json("/definition", timeout_s=5.0)
+        return _definition_from_json(data)
 
-        actions = []
-        for a in data.get("actions", []) or []:
-            if isinstance(a, dict) and "name" in a:
-                actions.append(
-                    NodeAction(
-                        name=str(a.get("name", "")),
-                        description=str(a.get("description", "")),
-                        args_schema=a.get("args_schema") or {},
-                    )
-                )
-
-        return NodeDefinition(
-            node_id=str(data.get("node_id") or data.get("id") or ""),
-            name=str(data.get("name") or ""),
-            kind=str(data.get("kind") or ""),
-            version=str(data.get("version") or ""),
-            actions=actions,
-        )
+    def get_stats(self, timeout_s: float = 5.0) -> Dict[str, Any]:
+        """The Node's job queue statistics (GET /stats)"""
+        return self._get_json("/stats", timeout_s=timeout_s)
 
     def call_action(self, req: NodeActionRequest, timeout_s: float = 30.0) -> NodeActionResponse:
         payload = asdict(req)
@@ -108,37 +176,84 @@ class RestNodeClient(NodeClient):
             # Fallback: /action (single endpoint)
             data = self._post_json("/action", payload=payload, timeout_s=timeout_s)
 
-        return NodeActionResponse(
-            request_id=str(data.get("request_id") or req.request_id),
-            execution_id=str(data.get("execution_id") or data.get("job_id") or ""),
-            status=str(data.get("status") or ("succeeded" if data.get("success", True) else "failed")),
-            success=bool(data.get("success", True)),
-            result=(data.get("result") or {}) if isinstance(data.get("result") or {}, dict) else {},
-            error=data.get("error"),
-        )
+        return _response_from_json(data, request_id=req.request_id)
 
     def submit_action(self, req: NodeActionRequest, timeout_s: float = 10.0) -> NodeActionResponse:
         payload = asdict(req)
         action = req.action
-        data = self._post_json(f"/actions/{action}/submit", payload=payload, timeout_s=timeout_s)
-        return NodeActionResponse(
-            request_id=str(data.get("request_id") or req.request_id),
-            execution_id=str(data.get("execution_id") or data.get("job_id") or ""),
-            status=str(data.get("status") or "queued"),
-            success=bool(data.get("success", True)),
-            result=(data.get("result") or {}) if isinstance(data.get("result") or {}, dict) else {},
-            error=data.get("error"),
-        )
+        data = self._post_json(f"/actions/{action}/submit", payload=payload, timeout_s=timeout_s, idempotent=True)
+        return _response_from_json(data, request_id=req.request_id, default_status="queued")
 
     def get_action_status(self, execution_id: str, timeout_s: float = 10.0) -> NodeActionResponse:
         data = self._get_json(f"/actions/status/{execution_id}", timeout_s=timeout_s)
-        return NodeActionResponse(
-            request_id=str(data.get("request_id") or ""),
-            execution_id=str(data.get("execution_id") or execution_id),
-            status=str(data.get("status") or ""),
-            success=bool(data.get("success", True)),
-            result=(data.get("result") or {}) if isinstance(data.get("result") or {}, dict) else {},
-            error=data.get("error"),
-        )
+        return _response_from_json(data, execution_id=execution_id, default_status="")
+
+    def submit_actions(self, reqs: List[NodeActionRequest], timeout_s: float = 10.0) -> List[NodeActionResponse]:
+        """Submit several actions in one request (POST /actions/batch/submit)"""
+        if not reqs:
+            return []
+        try:
+            data = self._post_json("/actions/batch/submit", payload={"requests": [asdict(req) for req in reqs]},
+                                   timeout_s=timeout_s, idempotent=True)
+        except NodeHTTPError as e:
+            if e.status not in BATCH_UNSUPPORTED_STATUSES:
+                raise
+            # Fallback: one submit per request
+            return super().submit_actions(reqs, timeout_s=timeout_s)
+        items = _batch_from_json(data, len(reqs), _join_url(self.base_url, "/actions/batch/submit"))
+        return [_response_from_json(item, request_id=req.request_id, default_status="queued")
+                for item, req in zip(items, reqs)]
+
+    def get_action_statuses(self, execution_ids: List[str], timeout_s: float = 10.0) -> List[NodeActionResponse]:
+        """
+        Status of several executions in one request (POST /actions/status:batch).
+        Executions the Node doesn't know come back with status "unknown".
+
+        Only a Node without the batch route gets one status request per
+        execution instead; other failures (timeouts, 5xx) are raised.
+        """
+        if not execution_ids:
+            return []
+        try:
+            data = self._post_json("/actions/status:batch", payload={"execution_ids": list(execution_ids)},
+                                   timeout_s=timeout_s, idempotent=True)
+        except NodeHTTPError as e:
+            if e.status not in BATCH_UNSUPPORTED_STATUSES:
+                raise
+            return [self._status_or_unknown(execution_id, timeout_s) for execution_id in execution_ids]
+        items = _batch_from_json(data, len(execution_ids), _join_url(self.base_url, "/actions/status:batch"))
+        return [_response_from_json(item, execution_id=execution_id, default_status="")
+                for item, execution_id in zip(items, execution_ids)]
+
+    def _status_or_unknown(self, execution_id: str, timeout_s: float) -> NodeActionResponse:
+        try:
+            return self.get_action_status(execution_id, timeout_s=timeout_s)
+        except NodeHTTPError as e:
+            if e.status != 404:
+                raise
+            return _unknown_status(execution_id)
 
+    def wait_for_completion(self, execution_id: str, timeout_s: Optional[float] = None,
+                            poll_interval_s: float = 0.5, wait_s: float = 30.0) -> NodeActionResponse:
+        """
+        Long-poll the action's status until it is terminal and return it.
 
+        Each request asks the Node to hold it for up to `wait_s` seconds, so the
+        call returns as soon as the action finishes. A Node that ignores `wait`
+        answers at once; it is then polled every `poll_interval_s`. Raises
+        TimeoutError if `timeout_s` passes first.
+        """
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+        while True:
+            wait = wait_s if deadline is None else max(0.0, min(wait_s, deadline - time.monotonic()))
+            started = time.monotonic()
+            data = self._get_json(f"/actions/status/{execution_id}?wait={wait:g}", timeout_s=wait + 10.0)
+            response = _response_from_json(data, execution_id=execution_id, default_status="")
+            if response.status in TERMINAL_ACTION_STATUSES:
+                return response
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                raise TimeoutError(f"Action {execution_id} still {response.status} after {timeout_s}s")
+            if now - started < wait:
+                # Answered early without finishing: the Node does not long-poll
+                time.sleep(poll_interval_s if deadline is None else min(poll_interval_s, deadline - now))
@@ -11,6 +11,7 @@ FastAPI services can implement this contract using their own Pydantic models.
 
 from __future__ import annotations
 
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
@@ -49,6 +50,8 @@ class NodeActionRequest:
     args: Dict[str, Any] = field(default_factory=dict)
     # Optional: locations passed in (already translated for this node)
     locations: Dict[str, Any] = field(default_factory=dict)
+    # Queue order on the Node for submitted actions: higher runs first
+    priority: int = 0
 
 
 @dataclass
@@ -71,6 +74,11 @@ class ActionStatus(str, Enum):
     cancelled = "cancelled"
 
 
+# Statuses after which an execution no longer changes
+TERMINAL_ACTION_STATUSES = frozenset({ActionStatus.succeeded.value, ActionStatus.failed.value,
+                                      ActionStatus.cancelled.value})
+
+
 class NodeClient(ABC):
     """Client interface used by Tachyon to talk to a Node microservice."""
 
@@ -101,4 +109,38 @@ class NodeClient(ABC):
         """
         raise NotImplementedError
 
+    def submit_actions(self, reqs: List[NodeActionRequest], timeout_s: float = 10.0) -> List[NodeActionResponse]:
+        """
+        Submit several actions; returns one response per request, in order.
+        Default implementation calls submit_action() for each.
+        """
+        return [self.submit_action(req, timeout_s=timeout_s) for req in reqs]
+
+    def get_action_statuses(self, execution_ids: List[str], timeout_s: float = 10.0) -> List[NodeActionResponse]:
+        """
+        Status of several executions, in order.
+        Default implementation calls get_action_status() for each.
+        """
+        return [self.get_action_status(execution_id, timeout_s=timeout_s) for execution_id in execution_ids]
+
+    def wait_for_completion(self, execution_id: str, timeout_s: Optional[float] = None,
+                            poll_interval_s: float = 0.5) -> NodeActionResponse:
+        """
+        Block until the action reaches a terminal status and return that status.
+        Default implementation polls get_action_status(); raises TimeoutError if
+        `timeout_s` passes first.
+        """
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+        while True:
+            response = self.get_action_status(execution_id)
+            if response.status in TERMINAL_ACTION_STATUSES:
+                return response
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Action {execution_id} still {response.status} after {timeout_s}s")
+                time.sleep(min(poll_interval_s, remaining))
+            else:
+                time.sleep(poll_interval_s)
+
 
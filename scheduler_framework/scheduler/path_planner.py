@@ -1,38 +1,20 @@
 """
 PathPlanner - Finds optimal paths for robot movements.
 
-Uses graph-based path finding (Dijkstra's algorithm) to determine
+Uses graph-based path finding (heap-based Dijkstra) to determine
 the best route for moving plates between locations.
 """
 
 from typing import Dict, List, Optional, Set, Tuple
-from collections import defaultdict
+import heapq
 import math
+import threading
+import time
 from .device_manager import DeviceManager, AccessibleDeviceInterface, RobotInterface
 from .active_plate import PlateLocation, PlatePlace
-
-
-class Node:
-    """Node in the path finding graph"""
-    
-    def __init__(self, key):
-        self.key = key
-        self.connections: List['Connection'] = []
-        self.distance = math.inf
-        self.previous: Optional['Node'] = None
-        self.visited = False
-    
-    def __repr__(self):
-        return f"Node({self.key})"
-
-
-class Connection:
-    """Connection between nodes in the graph"""
-    
-    def __init__(self, node: Node, cost: float, extra_info=None):
-        self.node = node
-        self.cost = cost
-        self.extra_info = extra_info  # Usually the robot that can make this transfer
+from .routing_table import RoutingTable
+from .world_graph import Node, Connection, WorldGraph
+from .instrumentation import Instrumentation
 
 
 class PathPlanner:
@@ -41,174 +23,461 @@ class PathPlanner:
     
     Builds a graph of all plate locations and finds optimal paths
     between them based on robot capabilities and transfer weights.
+    
+    The graph is a compact WorldGraph (interned place ids, CSR edge arrays).
+    With `use_routing_table=True`, shortest routes are kept in a
+    RoutingTable indexed by place id and plan_path becomes a table lookup.
+    
+    World builds and plan_path calls are timed into the `instrumentation`
+    metrics (see instrumentation.py).
+    
+    The planner is shared between threads (RobotScheduler workers, and the
+    PlateScheduler through NearestDevicePolicy). `lock` serialises world
+    builds, edge updates and queries of the routing table; hold it to make
+    several calls against one world.
     """
     
-    def __init__(self, device_manager: DeviceManager):
+    def __init__(self, device_manager: DeviceManager, use_routing_table: bool = False,
+                 instrumentation: Optional[Instrumentation] = None):
         self.device_manager = device_manager
-        self.world_locations: Dict[str, AccessibleDeviceInterface] = {}  # location name -> device
-        self.world_location_objects: Dict[str, PlateLocation] = {}  # location name -> PlateLocation
-        self.world_places: Dict[str, PlateLocation] = {}  # place name -> PlateLocation
-        self.world_place_objects: Dict[str, PlatePlace] = {}  # place name -> PlatePlace
-        self.world_nodes: Dict[str, Node] = {}  # place name -> Node
+        self.use_routing_table = use_routing_table
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        metrics = self.instrumentation.metrics
+        self._world_build_seconds = metrics.histogram("scheduler_world_build_seconds",
+                                                      "Time to build the world graph")
+        self._plan_seconds = metrics.histogram("scheduler_path_plan_seconds", "Time per plan_path call")
+        self.graph: WorldGraph = WorldGraph.empty()
+        # DeviceManager generation the current world was built from (None = never built/invalidated)
+        self._world_generation: Optional[int] = None
+        self._routing_table: Optional[RoutingTable] = None
+        # Robots excluded from planning (e.g. offline); survives world rebuilds
+        self._disabled_robots: Set[str] = set()
+        self._legacy_views: Dict[str, dict] = {}
+        # Reentrant so a caller can hold it around create_world() and plan_path()
+        self.lock = threading.RLock()
+    
+    # Name-keyed views of the graph, built on first access for callers that
+    # still look places up by "location:place" strings.
+    
+    def _legacy_view(self, name: str) -> dict:
+        view = self._legacy_views.get(name)
+        if view is None:
+            graph = self.graph
+            if name == "world_locations":
+                view = {location.name: device for location, device in zip(graph.locations, graph.devices)}
+            elif name == "world_location_objects":
+                view = {location.name: location for location in graph.locations}
+            elif name == "world_places":
+                view = dict(zip(graph.place_keys, graph.locations))
+            elif name == "world_place_objects":
+                view = dict(zip(graph.place_keys, graph.places))
+            else:
+                view = {key: graph.node(i) for i, key in enumerate(graph.place_keys)}
+            self._legacy_views[name] = view
+        return view
+    
+    @property
+    def world_locations(self) -> Dict[str, AccessibleDeviceInterface]:
+        """location name -> device"""
+        return self._legacy_view("world_locations")
+    
+    @property
+    def world_location_objects(self) -> Dict[str, PlateLocation]:
+        """location name -> PlateLocation"""
+        return self._legacy_view("world_location_objects")
+    
+    @property
+    def world_places(self) -> Dict[str, PlateLocation]:
+        """place key -> PlateLocation"""
+        return self._legacy_view("world_places")
+    
+    @property
+    def world_place_objects(self) -> Dict[str, PlatePlace]:
+        """place key -> PlatePlace"""
+        return self._legacy_view("world_place_objects")
+    
+    @property
+    def world_nodes(self) -> Dict[str, Node]:
+        """place key -> Node"""
+        return self._legacy_view("world_nodes")
+    
+    @staticmethod
+    def place_key(location: PlateLocation, place: PlatePlace) -> str:
+        return f"{location.name}:{place.name}"
+    
+    @property
+    def world_is_current(self) -> bool:
+        """True if the built world matches the DeviceManager's current layout generation"""
+        return self._world_generation == self.device_manager.generation
+    
+    def invalidate(self):
+        """Force the next create_world() call to rebuild the graph"""
+        with self.lock:
+            self._world_generation = None
     
-    def create_world(self):
+    def create_world(self, force: bool = False):
         """
         Build the graph of all locations and connections.
         
         This creates nodes for each plate place and edges for
         possible robot transfers.
+        
+        The graph is cached and only rebuilt when the DeviceManager's layout
+        generation changed since the last build (or when `force` is set /
+        `invalidate()` was called).
         """
+        with self.lock:
+            generation = self.device_manager.generation
+            if not force and self._world_generation == generation:
+                return
+            self._build_world(generation)
+    
+    def _build_world(self, generation: int):
+        started = time.perf_counter()
+        
         # Get all accessible devices and robots
         accessible_devices = self.device_manager.get_accessible_devices()
         robots = self.device_manager.get_robots()
         
-        # Build location and place mappings
-        self.world_locations = {}
-        self.world_location_objects = {}
-        self.world_places = {}
-        self.world_place_objects = {}
-        
+        # Intern every place to an integer id
+        place_keys: List[str] = []
+        places: List[PlatePlace] = []
+        locations: List[PlateLocation] = []
+        devices: List[AccessibleDeviceInterface] = []
         for device in accessible_devices:
             for location in device.plate_location_info:
-                # Use location name as key since PlateLocation isn't hashable
-                self.world_locations[location.name] = device
-                self.world_location_objects[location.name] = location
-                # For each place in the location
                 for place in location.places:
-                    # Use place name as key since PlatePlace isn't hashable
-                    place_key = f"{location.name}:{place.name}"
-                    self.world_places[place_key] = location
-                    self.world_place_objects[place_key] = place
-        
-        # Create nodes for all places
-        all_place_keys = list(self.world_places.keys())
-        self.world_nodes = {place_key: Node(place_key) for place_key in all_place_keys}
-        
-        # Build connections between places
-        # Check all pairs of places to see if robots can transfer between them
-        for i, src_place_key in enumerate(all_place_keys):
-            for dst_place_key in all_place_keys[i+1:]:
-                src_location = self.world_places[src_place_key]
-                dst_location = self.world_places[dst_place_key]
-                src_device = self.world_locations[src_location.name]
-                dst_device = self.world_locations[dst_location.name]
-                src_place = self.world_place_objects[src_place_key]
-                dst_place = self.world_place_objects[dst_place_key]
-                
-                # Check each robot to see if it can make this transfer
-                for robot in robots:
-                    try:
-                        weight = robot.get_transfer_weight(
-                            src_device, src_location, src_place,
-                            dst_device, dst_location, dst_place
-                        )
-                        
-                        if weight > 0 and not math.isinf(weight):
-                            # Add bidirectional connection
-                            src_node = self.world_nodes[src_place_key]
-                            dst_node = self.world_nodes[dst_place_key]
-                            src_node.connections.append(
-                                Connection(dst_node, weight, robot)
-                            )
-                            dst_node.connections.append(
-                                Connection(src_node, weight, robot)
-                            )
-                    except Exception:
-                        # Robot cannot make this transfer
-                        pass
+                    place_keys.append(self.place_key(location, place))
+                    places.append(place)
+                    locations.append(location)
+                    devices.append(device)
         
+        # Build connections between places, one robot at a time
+        n = len(place_keys)
+        rows: List[List[Tuple[int, float, int]]] = [[] for _ in range(n)]
+        place_infos = list(zip(devices, locations, places))
+        for r, robot in enumerate(robots):
+            if self._has_batched_weights(robot):
+                try:
+                    weights = robot.get_transfer_weights(place_infos, place_infos)
+                except Exception as e:
+                    print(f"Warning: {robot.name}.get_transfer_weights failed ({e}); "
+                          f"falling back to get_transfer_weight")
+                else:
+                    self._add_matrix_edges(rows, r, weights)
+                    continue
+            self._add_pairwise_edges(rows, r, robot, place_infos)
+        
+        robot_enabled = bytearray(0 if robot.name in self._disabled_robots else 1 for robot in robots)
+        graph = WorldGraph.from_rows(place_keys, places, locations, devices, robots,
+                                     rows, robot_enabled)
+        # Swap in the whole world together; the generation last, so it never
+        # marks a half-installed world as current
+        self.graph = graph
+        self._routing_table = (RoutingTable(n, self._neighbors)
+                               if self.use_routing_table else None)
+        self._legacy_views = {}
+        self._world_generation = generation
         self._check_nodes()
+        self._world_build_seconds.observe(time.perf_counter() - started)
+    
+    @staticmethod
+    def _has_batched_weights(robot) -> bool:
+        """True if the robot overrides RobotInterface.get_transfer_weights"""
+        method = getattr(type(robot), "get_transfer_weights", None)
+        return method is not None and method is not RobotInterface.get_transfer_weights
+    
+    @staticmethod
+    def _add_matrix_edges(rows, r: int, weights):
+        """Add robot r's edges from a get_transfer_weights() matrix"""
+        inf = math.inf
+        for i, row in enumerate(weights):
+            rows[i].extend([(j, weight, r) for j, weight in enumerate(row)
+                            if 0 < weight < inf and j != i])
+    
+    @staticmethod
+    def _add_pairwise_edges(rows, r: int, robot, place_infos):
+        """Add the robot's edges by calling get_transfer_weight() for every pair"""
+        # Check all pairs of places to see if the robot can transfer between them
+        n = len(place_infos)
+        for i in range(n):
+            for j in range(i + 1, n):
+                try:
+                    weight = robot.get_transfer_weight(*place_infos[i], *place_infos[j])
+                    
+                    if weight > 0 and not math.isinf(weight):
+                        # Add bidirectional connection
+                        rows[i].append((j, weight, r))
+                        rows[j].append((i, weight, r))
+                except Exception:
+                    # Robot cannot make this transfer
+                    pass
     
     def _check_nodes(self):
         """Check for disconnected nodes (places with no connections)"""
-        disconnected = [place for place, node in self.world_nodes.items() 
-                       if len(node.connections) == 0]
+        graph = self.graph
+        disconnected = [key for i, key in enumerate(graph.place_keys) if graph.degree(i) == 0]
         if disconnected:
             print(f"Warning: The following places are disconnected: {disconnected}")
     
-    def plan_path(self, src_location: PlateLocation, 
+    def precompute_routes(self):
+        """Fill every row of the routing table up front (enables the table if needed)"""
+        with self.lock:
+            if not self.use_routing_table:
+                self.use_routing_table = True
+                self._routing_table = RoutingTable(self.graph.num_places, self._neighbors)
+            self._routing_table.build()
+    
+    def _is_usable(self, connection: Connection) -> bool:
+        robot = connection.extra_info
+        return robot is None or getattr(robot, "name", None) not in self._disabled_robots
+    
+    def _neighbors(self, index: int):
+        """(neighbor id, cost) pairs for usable edges leaving place `index`"""
+        return self.graph.neighbors(index)
+    
+    def _update_edges(self, pairs: Set[Tuple[int, int]], mutate):
+        """Apply `mutate()` and push the resulting edge cost changes into the routing table"""
+        with self.lock:
+            old_costs = {pair: self.graph.edge_cost(*pair) for pair in pairs}
+            mutate()
+            if self._routing_table is None:
+                return
+            increased, decreased = [], []
+            for (u, v), old_cost in old_costs.items():
+                new_cost = self.graph.edge_cost(u, v)
+                if new_cost > old_cost:
+                    increased.append((u, v, old_cost))
+                elif new_cost < old_cost:
+                    decreased.append((u, v, new_cost))
+            self._routing_table.apply_edge_changes(increased, decreased)
+    
+    def set_transfer_weight(self, src_place_key: str, dst_place_key: str,
+                            robot_name: str, weight: float):
+        """
+        Override the weight of a robot's transfer between two places (both directions).
+        
+        Only the affected routes are recomputed. Overrides last until the
+        next world rebuild.
+        """
+        def mutate():
+            updated = self.graph.set_edge_weight(u, v, robot_name, weight)
+            updated = self.graph.set_edge_weight(v, u, robot_name, weight) or updated
+            r = self.graph.robot_ids.get(robot_name)
+            if not updated and r is not None and weight > 0 and not math.isinf(weight):
+                self.graph = self.graph.with_edges([(u, v, weight, r), (v, u, weight, r)])
+                self._legacy_views = {}
+        
+        with self.lock:
+            u = self.graph.place_ids[src_place_key]
+            v = self.graph.place_ids[dst_place_key]
+            self._update_edges({(u, v), (v, u)}, mutate)
+    
+    def set_robot_online(self, robot_name: str, online: bool):
+        """
+        Include or exclude a robot's edges from planning.
+        
+        Taking a robot offline only recomputes routes that used its edges.
+        """
+        def mutate():
+            if online:
+                self._disabled_robots.discard(robot_name)
+            else:
+                self._disabled_robots.add(robot_name)
+            self.graph.set_robot_enabled(robot_name, online)
+        
+        with self.lock:
+            if online == (robot_name not in self._disabled_robots):
+                return
+            self._update_edges(self.graph.robot_pairs(robot_name), mutate)
+    
+    def find_edge(self, src: Node, dst: Node) -> Optional[Tuple[RobotInterface, float]]:
+        """
+        (robot, cost) of the cheapest usable transfer between two adjacent path nodes.
+        
+        O(1) lookup in the compact graph; None if the nodes are not linked.
+        """
+        if src.index < 0 or dst.index < 0:
+            return None
+        graph = self.graph
+        e = graph.find_edge(src.index, dst.index)
+        if e is None:
+            return None
+        return graph.edge_robot(e), graph.weights[e]
+    
+    def place_info(self, node: Node) -> Optional[Tuple[AccessibleDeviceInterface, PlateLocation, PlatePlace]]:
+        """(device, location, place) for a path node, or None if unknown"""
+        graph = self.graph
+        if not 0 <= node.index < graph.num_places:
+            return None
+        i = node.index
+        return graph.devices[i], graph.locations[i], graph.places[i]
+    
+    def plan_path(self, src_location: PlateLocation,
                   dst_location: PlateLocation) -> Optional[List[Node]]:
         """
         Plan a path from source to destination location.
         
-        Uses Dijkstra's algorithm to find the shortest path.
+        Runs a single multi-source Dijkstra search seeded with every place of
+        the source location and stopping at the first place of the destination
+        location, so the result is the cheapest route over all place pairs.
         Returns a list of nodes representing the path, or None if no path exists.
         """
-        # Get all places in source and destination locations
-        src_places = src_location.places
-        dst_places = dst_location.places
+        started = time.perf_counter()
+        try:
+            with self.lock:
+                return self._plan_path(src_location, dst_location)
+        finally:
+            self._plan_seconds.observe(time.perf_counter() - started)
+    
+    def _plan_path(self, src_location: PlateLocation,
+                   dst_location: PlateLocation) -> Optional[List[Node]]:
+        sources = self._place_ids(src_location)
+        targets = self._place_ids(dst_location)
+        if not sources or not targets:
+            return None
         
-        if not src_places or not dst_places:
+        graph = self.graph
+        ids = None
+        if self._routing_table is not None:
+            source, target, _ = self._routing_table.best_pair(sources, targets)
+            if source is None:
+                return None
+            ids = self._routing_table.path(source, target)
+        if ids is None:
+            ids, _ = self._search(sources, set(targets))
+        if ids is None:
             return None
+        return [graph.node(index) for index in ids]
+    
+    def path_cost(self, src_location: PlateLocation, dst_location: PlateLocation) -> float:
+        """Total weight of the cheapest path between two locations (inf if there is none)"""
+        with self.lock:
+            sources = self._place_ids(src_location)
+            targets = self._place_ids(dst_location)
+            if not sources or not targets:
+                return math.inf
+            if self._routing_table is not None:
+                return self._routing_table.best_pair(sources, targets)[2]
+            return self._search(sources, set(targets))[1]
+    
+    def _place_ids(self, location: PlateLocation) -> List[int]:
+        """World ids of a location's places"""
+        place_ids = self.graph.place_ids
+        return [place_ids[key] for key in
+                (self.place_key(location, place) for place in location.places)
+                if key in place_ids]
+    
+    def _search(self, sources: List[int], targets: Set[int]) -> Tuple[Optional[List[int]], float]:
+        """
+        Heap-based multi-source/multi-target Dijkstra over the compact graph.
         
-        # Reset all nodes
-        for node in self.world_nodes.values():
-            node.distance = math.inf
-            node.previous = None
-            node.visited = False
+        Every source is seeded at distance 0 and the search stops at the first
+        target popped from the heap. All search state lives in local arrays,
+        so concurrent searches over the same world are safe.
         
-        # Find shortest path from any source place to any destination place
-        shortest_distance = math.inf
-        shortest_path = None
+        Returns (place ids, cost), or (None, inf) if no target is reachable.
+        """
+        graph = self.graph
+        offsets, edge_targets, weights = graph.offsets, graph.targets, graph.weights
+        robot_index, enabled = graph.robot_index, graph.robot_enabled
+        n = graph.num_places
+        distance = [math.inf] * n
+        previous = [-1] * n
+        visited = [False] * n
         
-        for src_place in src_places:
-            src_place_key = f"{src_location.name}:{src_place.name}"
-            if src_place_key not in self.world_nodes:
+        heap = []
+        for source in sources:
+            distance[source] = 0.0
+            heap.append((0.0, source))
+        heapq.heapify(heap)
+        
+        while heap:
+            current_distance, u = heapq.heappop(heap)
+            if visited[u]:
                 continue
+            visited[u] = True
             
-            for dst_place in dst_places:
-                dst_place_key = f"{dst_location.name}:{dst_place.name}"
-                if dst_place_key not in self.world_nodes:
+            if u in targets:
+                # Reconstruct path
+                path = []
+                while u != -1:
+                    path.append(u)
+                    u = previous[u]
+                return list(reversed(path)), current_distance
+            
+            # Update distances to neighbors
+            for e in range(offsets[u], offsets[u + 1]):
+                v = edge_targets[e]
+                if visited[v] or not enabled[robot_index[e]]:
                     continue
-                
-                path = self._dijkstra(
-                    self.world_nodes[src_place_key],
-                    self.world_nodes[dst_place_key]
-                )
-                
-                if path and len(path) > 0:
-                    distance = path[-1].distance
-                    if distance < shortest_distance:
-                        shortest_distance = distance
-                        shortest_path = path
+                new_distance = current_distance + weights[e]
+                if new_distance < distance[v]:
+                    distance[v] = new_distance
+                    previous[v] = u
+                    heapq.heappush(heap, (new_distance, v))
         
-        return shortest_path
+        return None, math.inf  # No path found
     
     def _dijkstra(self, start: Node, end: Node) -> Optional[List[Node]]:
         """
-        Dijkstra's algorithm to find shortest path.
+        Dijkstra's algorithm to find shortest path between two Node objects.
         
         Returns list of nodes from start to end, or None if no path exists.
         """
-        start.distance = 0
-        unvisited = {start}
+        path, _ = self._shortest_path([start], {end})
+        return path
+    
+    def _shortest_path(self, sources: List[Node],
+                       targets: Set[Node]) -> Tuple[Optional[List[Node]], float]:
+        """
+        Heap-based multi-source/multi-target Dijkstra over Node objects.
         
-        while unvisited:
-            # Get node with minimum distance
-            current = min(unvisited, key=lambda n: n.distance)
-            unvisited.remove(current)
-            current.visited = True
+        Works on any Node/Connection graph (including hand-built ones); the
+        planner itself searches the compact graph via `_search`.
+        
+        Returns (path, cost), or (None, inf) if no target is reachable.
+        """
+        distance: Dict[Node, float] = {}
+        previous: Dict[Node, Optional[Node]] = {}
+        visited: Set[Node] = set()
+        heap: List[Tuple[float, int, Node]] = []
+        counter = 0  # tie-breaker; Node is not orderable
+        
+        for source in sources:
+            if source not in distance:
+                distance[source] = 0.0
+                previous[source] = None
+                heap.append((0.0, counter, source))
+                counter += 1
+        heapq.heapify(heap)
+        
+        while heap:
+            current_distance, _, current = heapq.heappop(heap)
+            if current in visited:
+                continue
+            visited.add(current)
             
-            if current == end:
+            if current in targets:
                 # Reconstruct path
                 path = []
-                node = end
-                while node:
+                node = current
+                while node is not None:
                     path.append(node)
-                    node = node.previous
-                return list(reversed(path))
+                    node = previous[node]
+                return list(reversed(path)), current_distance
             
             # Update distances to neighbors
             for connection in current.connections:
                 neighbor = connection.node
-                if neighbor.visited:
+                if neighbor in visited or not self._is_usable(connection):
                     continue
                 
-                new_distance = current.distance + connection.cost
-                if new_distance < neighbor.distance:
-                    neighbor.distance = new_distance
-                    neighbor.previous = current
-                    unvisited.add(neighbor)
+                new_distance = current_distance + connection.cost
+                if new_distance < distance.get(neighbor, math.inf):
+                    distance[neighbor] = new_distance
+                    previous[neighbor] = current
+                    heapq.heappush(heap, (new_distance, counter, neighbor))
+                    counter += 1
         
-        return None  # No path found
-
+        return None, math.inf  # No path found
@@ -0,0 +1,138 @@
+"""
+PF400ReachRobot - transfer weights from PF400 reach geometry.
+
+Each place is mapped to a taught joint position. The gripper position of
+every teachpoint is computed once with the PF400 forward kinematics, so
+evaluating all place pairs during world building is just a distance per
+pair instead of a geometry computation per call.
+
+Link lengths and joint limits match `pf400_interface.pf400_kinematics`;
+they are repeated here so the scheduler keeps no third-party dependencies.
+"""
+
+from abc import abstractmethod
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .device_manager import PlaceInfo, RobotInterface
+
+# Arm segment lengths in mm (KINEMATICS.shoulder_length / elbow_length / end_effector_length)
+SHOULDER_LENGTH = 302.0
+ELBOW_LENGTH = 289.0
+END_EFFECTOR_LENGTH = 162.0
+
+# Joint limits: vertical rail (mm), shoulder (deg), horizontal rail (mm)
+VERTICAL_RAIL_RANGE = (0.0, 1500.0)
+SHOULDER_RANGE = (-93.0, 93.0)
+HORIZONTAL_RAIL_RANGE = (-1000.0, 1000.0)
+
+Position = Tuple[float, float, float]
+
+
+def forward_position(joints: Sequence[float]) -> Position:
+    """
+    Gripper (x, y, z) in mm for PF400 joint states.
+
+    Same math as KINEMATICS.forward_kinematics, without the yaw/phi
+    bookkeeping. A missing sixth joint means no horizontal rail.
+    """
+    shoulder = math.radians(joints[1])
+    elbow = shoulder + math.radians(joints[2])
+    wrist = elbow + math.radians(joints[3])
+    rail = joints[5] if len(joints) > 5 else 0.0
+    x = (SHOULDER_LENGTH * math.cos(shoulder)
+         + ELBOW_LENGTH * math.cos(elbow)
+         + END_EFFECTOR_LENGTH * math.cos(wrist)
+         + rail)
+    y = (SHOULDER_LENGTH * math.sin(shoulder)
+         + ELBOW_LENGTH * math.sin(elbow)
+         + END_EFFECTOR_LENGTH * math.sin(wrist))
+    return (x, y, float(joints[0]))
+
+
+def within_limits(joints: Sequence[float]) -> bool:
+    """True if the joint states are inside the PF400's rail and shoulder limits"""
+    if len(joints) < 4:
+        return False
+    if not VERTICAL_RAIL_RANGE[0] <= joints[0] <= VERTICAL_RAIL_RANGE[1]:
+        return False
+    if not SHOULDER_RANGE[0] <= joints[1] <= SHOULDER_RANGE[1]:
+        return False
+    if len(joints) > 5 and not HORIZONTAL_RAIL_RANGE[0] <= joints[5] <= HORIZONTAL_RAIL_RANGE[1]:
+        return False
+    return True
+
+
+class PF400ReachRobot(RobotInterface):
+    """
+    PF400 robot whose transfer weights come from its teachpoints.
+
+    A place is reachable if it has a teachpoint inside the joint limits.
+    The weight of a transfer between two reachable places on different
+    locations is `base_weight + distance_mm / mm_per_weight`.
+
+    Teachpoints are keyed by "location:place" (PathPlanner.place_key) or by
+    location name for single-place locations. After changing teachpoints,
+    call DeviceManager.notify_locations_changed() so the world is rebuilt.
+
+    Subclasses implement transfer_plate().
+    """
+
+    def __init__(self, name: str, teachpoints: Dict[str, Sequence[float]],
+                 base_weight: float = 1.0, mm_per_weight: float = 1000.0):
+        super().__init__(name)
+        self.base_weight = base_weight
+        self.mm_per_weight = mm_per_weight
+        self._positions: Dict[str, Optional[Position]] = {}
+        for key, joints in teachpoints.items():
+            self.set_teachpoint(key, joints)
+
+    def set_teachpoint(self, key: str, joints: Optional[Sequence[float]]):
+        """Add, replace or (with None) remove the teachpoint for a place"""
+        if joints is None:
+            self._positions.pop(key, None)
+        else:
+            self._positions[key] = forward_position(joints) if within_limits(joints) else None
+
+    def position(self, location, place) -> Optional[Position]:
+        """Gripper position for a place, or None if it is not reachable"""
+        position = self._positions.get(f"{location.name}:{place.name}")
+        if position is None:
+            position = self._positions.get(location.name)
+        return position
+
+    @abstractmethod
+    def transfer_plate(self, src_device: str, src_place: str,
+                      dst_device: str, dst_place: str,
+                      labware_name: str, barcode: str):
+        """Transfer a plate from one location to another"""
+        pass
+
+    def get_transfer_weight(self, src_device, src_location, src_place,
+                           dst_device, dst_location, dst_place) -> float:
+        """Calculate transfer weight from the distance between teachpoints"""
+        if src_location is dst_location:
+            return math.inf
+        src = self.position(src_location, src_place)
+        dst = self.position(dst_location, dst_place)
+        if src is None or dst is None:
+            return math.inf
+        return self.base_weight + math.dist(src, dst) / self.mm_per_weight
+
+    def get_transfer_weights(self, src_places: Sequence[PlaceInfo],
+                             dst_places: Sequence[PlaceInfo]) -> List[List[float]]:
+        """Weights for all pairs, looking each place's position up once"""
+        inf = math.inf
+        base = self.base_weight
+        scale = 1.0 / self.mm_per_weight
+        dist = math.dist
+        dst = [(self.position(location, place), location) for _, location, place in dst_places]
+        weights = []
+        for _, src_location, src_place in src_places:
+            p = self.position(src_location, src_place)
+            if p is None:
+                weights.append([inf] * len(dst))
+                continue
+            weights.append([inf if q is None or location is src_location else base + dist(p, q) * scale
+                            for q, location in dst])
+        return weights
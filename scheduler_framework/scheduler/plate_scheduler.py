@@ -2,27 +2,99 @@
 PlateScheduler - Main orchestrator for laboratory automation scheduling.
 
 This is the core scheduler that:
-- Manages worklists
+- Manages worklists (several can run at once, ordered by a WorklistPolicy)
 - Creates and tracks ActivePlates
 - Schedules tasks on available devices
 - Coordinates with RobotScheduler for movements
+
+The scheduling loop is event driven: it sleeps on a condition variable and
+runs a scheduling pass only when something that can unblock a plate has
+happened (job completed, robot move finished, worklist arrived, a device
+location freed or the layout changed in the DeviceManager, a lookahead
+horizon reached, or an explicit `notify()`). It has no periodic wake-up
+unless `idle_recheck_seconds` is set.
+
+With `lookahead=True`, a busy plate's next device task is reserved while the
+current one runs. The staged step is dispatched from the plate's own
+completion callback, so the robot move starts as soon as the plate is free;
+the reservation is released if the plate's plans change first.
+
+A worklist with a `dispatch_plan` (see makespan_planner.py) is executed in
+plan order: each task goes to its planned device, and a device only gets a
+task once every task planned before it on that device was dispatched.
+
+Each device task's duration, from the plate's arrival at the device to the
+job's completion, is recorded in the `duration_model` shared with the
+RobotScheduler. With a `lookahead_horizon`, lookahead only reserves the next
+device of plates whose current task is expected to end within the horizon.
+
+WaitTasks run on one TimerService thread rather than a thread per wait.
+`cancel_wait()` cancels a plate's wait, and `pause()` / `resume()` hold the
+whole cell: no new dispatches and wait timers stand still.
+
+With a `journal` (see state_journal.py), every state transition is
+recorded, and `recover()` rebuilds queued and running worklists and their
+plates in a new scheduler after a crash.
+
+Time comes from a `clock` (see clock.py), shared with the RobotScheduler by
+default; with a VirtualClock the scheduler can be driven as a discrete-event
+simulation (see simulation.py).
+
+Queue depths, scheduling-pass time, device busy time, task durations and the
+time free plates wait for their next task are reported to the
+`instrumentation` shared with the RobotScheduler (see instrumentation.py),
+and every device task, robot move and wait becomes a trace span on its
+plate's track.
 """
 
 import threading
-import time
 import logging
-from queue import Queue
-from typing import List, Dict, Optional
+import time
+from dataclasses import dataclass
+from queue import Empty, Queue
+from typing import List, Dict, Optional, Tuple
 from .worklist import Worklist
 from .tasks import WaitTask
 from .active_plate import ActivePlate, ActiveSourcePlate, ActiveDestinationPlate, PlateLocation
+from .tasks import PlateTask
 from .device_manager import DeviceManager, DeviceInterface, PlateSchedulerDeviceInterface
 from .robot_scheduler import RobotScheduler
-from .active_plate_factory import ActivePlateFactory, ActiveSourcePlateFactory, ActiveDestinationPlateFactory
+from .active_plate_registry import ActivePlateRegistry
+from .worklist_policy import WorklistPolicy, WorklistRun, PriorityPolicy
+from .device_policy import DevicePolicy
+from .duration_model import DurationModel
+from .timer_service import TimerHandle
+from .clock import Clock, SYSTEM_CLOCK
+from .instrumentation import Instrumentation
+from .metrics import DURATION_BUCKETS, MetricsRegistry
+from .makespan_planner import PlannedOperation
+from . import state_journal as sj
+from .state_journal import StateJournal, RecoveryReport, location_ref, worklist_from_dict, worklist_to_dict
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class StagedStep:
+    """A reserved location for a plate's next task (lookahead mode)"""
+    run: WorklistRun
+    task: PlateTask
+    task_index: int
+    device: DeviceInterface
+    location: PlateLocation
+    planned: Optional[PlannedOperation] = None
+
+
+@dataclass
+class TaskTiming:
+    """Start of a dispatched device task, for the duration model"""
+    device_name: str
+    device_type: str
+    command: str
+    dispatched_at: float
+    arrived_at: Optional[float] = None
+
+
 class PlateScheduler:
     """
     Main scheduler for laboratory automation.
@@ -32,14 +104,118 @@ class PlateScheduler:
     """
     
     def __init__(self, robot_scheduler: RobotScheduler, 
-                 device_manager: DeviceManager):
+                 device_manager: DeviceManager,
+                 worklist_policy: Optional[WorklistPolicy] = None,
+                 max_concurrent_worklists: Optional[int] = None,
+                 device_policy: Optional[DevicePolicy] = None,
+                 lookahead: bool = False,
+                 lookahead_horizon: Optional[float] = None,
+                 duration_model: Optional[DurationModel] = None,
+                 journal: Optional[StateJournal] = None,
+                 clock: Optional[Clock] = None,
+                 instrumentation: Optional[Instrumentation] = None):
         self.robot_scheduler = robot_scheduler
         self.device_manager = device_manager
+        # Source of time (the RobotScheduler's by default)
+        if clock is None:
+            clock = getattr(robot_scheduler, 'clock', None) or SYSTEM_CLOCK
+        self.clock = clock
         self.worklist_queue: Queue[Worklist] = Queue()
         self.scheduler_thread: Optional[threading.Thread] = None
         self.stop_event = threading.Event()
         self.destination_worklist_map: Dict[ActivePlate, str] = {}
         self._lock = threading.Lock()
+        # Plates this scheduler is processing, across all worklists
+        self.active_plates = ActivePlateRegistry()
+        
+        # Worklists being processed together (None = no limit)
+        self.worklist_policy: WorklistPolicy = worklist_policy or PriorityPolicy()
+        self.max_concurrent_worklists = max_concurrent_worklists
+        self.worklist_runs: List[WorklistRun] = []
+        self.completed_runs: List[WorklistRun] = []
+        self._run_sequence = 0
+        
+        # Orders the ready devices of a type (None = registration order)
+        self.device_policy = device_policy
+        
+        # Lookahead: next-task reservations of busy plates. `_dispatch_lock`
+        # makes dispatching a plate atomic between the scheduling loop and
+        # the completion callbacks that fire staged steps.
+        self.lookahead = lookahead
+        self.staged_steps: Dict[ActivePlate, StagedStep] = {}
+        self._dispatch_lock = threading.RLock()
+        # Only stage plates expected to be free within this many seconds (None = always)
+        self.lookahead_horizon = lookahead_horizon
+        
+        # Measured task durations (shared with the RobotScheduler by default)
+        if duration_model is None:
+            duration_model = getattr(robot_scheduler, 'duration_model', None)
+        self.duration_model = duration_model if duration_model is not None else DurationModel()
+        self._task_timings: Dict[ActivePlate, TaskTiming] = {}
+        self._timings_lock = threading.Lock()
+        
+        # Pending WaitTasks, fired by one timer thread
+        self.timer_service = self.clock.timer_service("PlateScheduler-waits")
+        self._wait_timers: Dict[ActivePlate, Tuple[WaitTask, TimerHandle]] = {}
+        self._waits_lock = threading.Lock()
+        # Set by pause(): scheduling passes and staged steps hold off
+        self.paused = False
+        
+        # Wake-ups for the scheduling loop. `_state_changed` is set by notify()
+        # and cleared by the loop before each pass, so no event is lost.
+        self._wakeup = threading.Condition()
+        self._state_changed = True
+        # Optional periodic re-check on top of notifications (None = notifications only)
+        self.idle_recheck_seconds: Optional[float] = None
+        # Wakes the loop when a busy plate enters the lookahead horizon
+        self._horizon_timer: Optional[TimerHandle] = None
+        
+        # Crash-recovery journal of state transitions (None = not recorded)
+        self.journal = journal
+        
+        # Metrics and trace spans (the RobotScheduler's by default)
+        if instrumentation is None:
+            instrumentation = getattr(robot_scheduler, 'instrumentation', None)
+        self.instrumentation = (instrumentation if instrumentation is not None
+                                else Instrumentation(self.clock))
+        self._init_metrics()
+        # When each free plate started waiting for its next task, and when each wait began
+        self._ready_since: Dict[ActivePlate, float] = {}
+        self._wait_started: Dict[ActivePlate, float] = {}
+        
+        self.robot_scheduler.move_completed_callbacks.append(self._on_move_completed)
+        availability_callbacks = getattr(device_manager, 'availability_callbacks', None)
+        if availability_callbacks is not None:
+            availability_callbacks.append(self.notify)
+    
+    def _init_metrics(self):
+        metrics = self.instrumentation.metrics
+        self._worklists_enqueued = metrics.counter("scheduler_worklists_enqueued_total", "Worklists enqueued")
+        self._worklists_completed = metrics.counter("scheduler_worklists_completed_total", "Worklists completed")
+        self._worklist_seconds = metrics.histogram("scheduler_worklist_seconds",
+                                                   "Time from a worklist's start to its completion",
+                                                   DURATION_BUCKETS)
+        self._tasks_dispatched = metrics.counter("scheduler_tasks_dispatched_total",
+                                                 "Device tasks dispatched, per device type")
+        self._pass_seconds = metrics.histogram("scheduler_pass_seconds", "Time per scheduling pass")
+        self._task_seconds = metrics.histogram("scheduler_task_seconds",
+                                               "Device task duration from plate arrival to job completion",
+                                               DURATION_BUCKETS)
+        self._device_busy_seconds = metrics.counter("scheduler_device_busy_seconds_total",
+                                                    "Time spent on device tasks, per device")
+        self._plate_wait_seconds = metrics.histogram("scheduler_plate_wait_seconds",
+                                                     "Time a free plate waited for its next task to start",
+                                                     DURATION_BUCKETS)
+        metrics.add_collector(self._collect_metrics)
+    
+    def _collect_metrics(self, registry: MetricsRegistry):
+        registry.gauge("scheduler_worklist_queue_depth", "Worklists waiting to be admitted").set(
+            self.worklist_queue.qsize())
+        registry.gauge("scheduler_worklists_running", "Worklists being processed").set(len(self.worklist_runs))
+        registry.gauge("scheduler_active_plates", "Plates being processed").set(len(self.active_plates))
+        registry.gauge("scheduler_pending_waits", "WaitTasks in progress").set(len(self._wait_timers))
+        registry.gauge("scheduler_staged_steps", "Lookahead reservations").set(len(self.staged_steps))
+        registry.gauge("scheduler_paused", "1 while the cell is paused").set(1 if self.paused else 0)
     
     def start_scheduler(self):
         """Start the plate scheduler thread"""
@@ -58,171 +234,655 @@ class PlateScheduler:
     def stop_scheduler(self):
         """Stop the plate scheduler thread"""
         self.stop_event.set()
+        self.notify()
+        self.release_staged_steps()
+        if self._horizon_timer is not None:
+            self.timer_service.cancel(self._horizon_timer)
         if self.scheduler_thread and self.scheduler_thread.is_alive():
             self.scheduler_thread.join(timeout=1.0)
             if self.scheduler_thread.is_alive():
                 logger.warning("PlateScheduler thread did not stop within timeout")
         logger.info("PlateScheduler stopped")
     
-    def enqueue_worklist(self, worklist: Worklist):
-        """Add a worklist to the processing queue"""
+    def enqueue_worklist(self, worklist: Worklist, priority: Optional[int] = None):
+        """Add a worklist to the processing queue (optionally setting its priority)"""
+        if priority is not None:
+            worklist.priority = priority
+        self._record(sj.WORKLIST_ENQUEUED, worklist.worklist_id, {"worklist": worklist_to_dict(worklist)})
         self.worklist_queue.put(worklist)
+        self._worklists_enqueued.inc()
         logger.info(f"Enqueued worklist: {worklist.name}")
+        self.notify()
+    
+    def notify(self):
+        """
+        Wake the scheduling loop.
+        
+        Job completions, robot moves, freed device locations and DeviceManager
+        registrations notify automatically. Call this when a device becomes
+        usable for any other reason (e.g. a location's `available` flag, or a
+        device whose location events are not ObservableEvents).
+        """
+        with self._wakeup:
+            self._state_changed = True
+            self._wakeup.notify_all()
+    
+    def _record(self, kind: str, entity_id: str, data: Optional[dict] = None):
+        """Append a state transition to the journal, if there is one"""
+        if self.journal is None:
+            return
+        try:
+            self.journal.record(kind, entity_id, data)
+        except Exception as e:
+            logger.error(f"Could not journal {kind} for {entity_id}: {e}")
+    
+    def _on_move_completed(self, active_plate: ActivePlate):
+        if active_plate.current_location is active_plate.destination_location:
+            self._record(sj.PLATE_MOVED, active_plate.active_plate_id,
+                         {"current_location": location_ref(active_plate.current_location)})
+        with self._timings_lock:
+            timing = self._task_timings.get(active_plate)
+            if timing is not None and timing.arrived_at is None:
+                timing.arrived_at = self.clock.monotonic()
+        self._on_plate_event(active_plate)
+    
+    def _on_job_completed(self, active_plate: ActivePlate):
+        self._record(sj.TASK_COMPLETED, active_plate.active_plate_id,
+                     {"task_index": active_plate.current_task_index,
+                      "current_location": location_ref(active_plate.current_location)})
+        now = self.clock.monotonic()
+        with self._timings_lock:
+            timing = self._task_timings.pop(active_plate, None)
+            self._ready_since[active_plate] = now
+        if timing is not None:
+            started = timing.arrived_at if timing.arrived_at is not None else timing.dispatched_at
+            self.duration_model.record_task(timing.device_name, timing.command,
+                                            now - started, timing.device_type)
+            self._record_task_metrics(active_plate, timing, started, now)
+        self._on_plate_event(active_plate)
+    
+    def _record_task_metrics(self, active_plate: ActivePlate, timing: TaskTiming, started: float, now: float):
+        """Device busy time, task duration and the move/task trace spans of a completed task"""
+        self._task_seconds.observe(now - started, device_type=timing.device_type, command=timing.command)
+        self._device_busy_seconds.inc(max(0.0, now - started), device=timing.device_name)
+        tracer = self.instrumentation.tracer
+        args = {"worklist": active_plate.worklist.name, "device": timing.device_name, "command": timing.command}
+        if started > timing.dispatched_at:
+            tracer.record(f"move to {timing.device_name}", "move", active_plate.barcode,
+                          timing.dispatched_at, started, process="Plates", args=args)
+        tracer.record(f"{timing.command} on {timing.device_name}", "task", active_plate.barcode,
+                      started, now, process="Plates", args=args)
+    
+    def _plate_started(self, active_plate: ActivePlate):
+        """A free plate's next task has started: record how long it waited"""
+        with self._timings_lock:
+            ready_since = self._ready_since.pop(active_plate, None)
+        if ready_since is not None:
+            self._plate_wait_seconds.observe(self.clock.monotonic() - ready_since)
+    
+    def expected_remaining(self, active_plate: ActivePlate) -> Optional[float]:
+        """Expected seconds until a plate's current task ends (None if unknown)"""
+        remaining = self.wait_remaining(active_plate)
+        if remaining is not None:
+            return remaining
+        with self._timings_lock:
+            timing = self._task_timings.get(active_plate)
+            if timing is None:
+                return None
+            started = timing.arrived_at if timing.arrived_at is not None else timing.dispatched_at
+        expected = self.duration_model.task_seconds(timing.device_name, timing.command)
+        if expected is None:
+            return None
+        return max(0.0, expected - (self.clock.monotonic() - started))
+    
+    def _on_plate_event(self, active_plate: ActivePlate):
+        if active_plate in self.staged_steps and not self.paused:
+            self._fire_staged_step(active_plate)
+        self.notify()
+    
+    def _wait_for_state_change(self):
+        """Block until notify() was called since the last pass (or `idle_recheck_seconds` passes, if set)"""
+        with self._wakeup:
+            if not self._state_changed and not self.stop_event.is_set():
+                self._wakeup.wait(self.idle_recheck_seconds)
+            self._state_changed = False
     
     def _scheduler_thread_runner(self):
-        """Main scheduler loop - processes worklists"""
+        """Main scheduler loop - processes all admitted worklists together"""
         while not self.stop_event.is_set():
             try:
-                # Try to get a worklist
-                try:
-                    worklist = self.worklist_queue.get(timeout=0.1)
-                except:
-                    continue
-                
-                # Process the worklist
-                self._do_worklist(worklist)
+                self._wait_for_state_change()
+                if self.stop_event.is_set():
+                    break
+                self._admit_worklists()
+                if self.worklist_runs:
+                    self._scheduling_pass()
                 
             except Exception as e:
                 logger.error(f"Error in plate scheduler: {e}", exc_info=True)
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
+                # The failed pass may have left work undone; run another
+                self.notify()
+    
+    def _admit_worklists(self):
+        """Start queued worklists, up to `max_concurrent_worklists`"""
+        while (self.max_concurrent_worklists is None
+               or len(self.worklist_runs) < self.max_concurrent_worklists):
+            try:
+                worklist = self.worklist_queue.get_nowait()
+            except Empty:
+                return
+            if worklist is not None:
+                self._start_worklist(worklist)
+    
+    def _start_worklist(self, worklist: Worklist) -> WorklistRun:
+        logger.info(f"Processing worklist: {worklist.name}")
+        data = {}
+        if self.journal is not None and worklist.worklist_id not in self.journal.state.worklists:
+            data["worklist"] = worklist_to_dict(worklist)
+        self._record(sj.WORKLIST_STARTED, worklist.worklist_id, data)
+        run = WorklistRun(worklist, self._run_sequence, self.active_plates)
+        run.started_at = self.clock.monotonic()
+        self._run_sequence += 1
+        with self._lock:
+            self.worklist_runs.append(run)
+        self.notify()
+        return run
     
     def _do_worklist(self, worklist: Worklist):
         """
-        Process a worklist.
+        Process a worklist to completion on the calling thread.
         
         Creates ActivePlates from the worklist and schedules
-        their tasks on available devices.
+        their tasks on available devices. Other admitted worklists are
+        scheduled in the same passes.
         """
-        logger.info(f"Processing worklist: {worklist.name}")
+        run = self._start_worklist(worklist)
+        while run in self.worklist_runs:
+            self._wait_for_state_change()
+            if self.stop_event.is_set():
+                logger.info(f"Scheduler stopped while processing worklist {worklist.name}")
+                return
+            self._scheduling_pass()
+    
+    def _scheduling_pass(self):
+        """
+        One pass over every running worklist, in policy order.
         
-        # Create factories for active plates
-        active_plate_factories: List[ActivePlateFactory] = [
-            ActiveSourcePlateFactory(worklist),
-            ActiveDestinationPlateFactory(worklist)
-        ]
+        Removes finished plates, completes drained worklists, releases new
+        plates from each worklist's factories and starts the current task of
+        every plate that can advance.
+        """
+        if self.paused:
+            return
+        started = time.perf_counter()
+        try:
+            self._advance_runs()
+        finally:
+            self._pass_seconds.observe(time.perf_counter() - started)
+    
+    def _advance_runs(self):
+        """The body of a scheduling pass"""
+        with self._lock:
+            runs = self.worklist_policy.order(list(self.worklist_runs))
         
-        # Main processing loop
-        while True:
-            # Check if we're done
-            plates_to_create = sum(factory.number_of_plates_to_create 
-                                 for factory in active_plate_factories)
-            active_plates_count = len(ActivePlate._active_plates)
-            
-            if plates_to_create == 0 and active_plates_count == 0:
-                break
-            
-            time.sleep(0.05)  # Small delay to prevent CPU spinning
-            
+        for run in runs:
             # Remove finished plates
-            with self._lock:
-                finished_plates = [ap for ap in ActivePlate._active_plates 
-                                 if ap.is_finished()]
-                for plate in finished_plates:
+            for plate in run.active_plates:
+                if plate.is_finished():
                     logger.info(f"Removed finished plate: {plate}")
-                    ActivePlate._active_plates.remove(plate)
+                    self.active_plates.remove(plate)
+                    with self._timings_lock:
+                        self._ready_since.pop(plate, None)
+                    self._record(sj.PLATE_REMOVED, plate.active_plate_id)
             
-            # Release new active plates from factories
-            with self._lock:
-                for factory in active_plate_factories:
-                    active_plate = factory.try_release_active_plate()
-                    if active_plate:
-                        ActivePlate._active_plates.append(active_plate)
-                        logger.debug(f"Released new active plate: {active_plate}")
-                        
-                        # Track destination plates
-                        if isinstance(active_plate, ActiveDestinationPlate):
-                            self.destination_worklist_map[active_plate] = worklist.name
+            # Check if we're done
+            if run.plates_to_create == 0 and self.active_plates.count(worklist=run.worklist) == 0:
+                self._complete_worklist(run)
+                continue
             
-            # Advance active plates
-            with self._lock:
-                active_plates = list(ActivePlate._active_plates)
+            # Release new active plates from factories (they register themselves)
+            for factory in run.factories:
+                active_plate = factory.try_release_active_plate()
+                if active_plate:
+                    self._record(sj.PLATE_RELEASED, active_plate.active_plate_id,
+                                 {"worklist_id": run.worklist.worklist_id,
+                                  "kind": "destination" if isinstance(active_plate, ActiveDestinationPlate)
+                                  else "source",
+                                  "instance_index": active_plate.instance_index})
+                    active_plate.state_changed_callbacks.append(self._on_job_completed)
+                    with self._timings_lock:
+                        self._ready_since[active_plate] = self.clock.monotonic()
+                    logger.debug(f"Released new active plate: {active_plate}")
+                    
+                    # Track destination plates
+                    if isinstance(active_plate, ActiveDestinationPlate):
+                        with self._lock:
+                            self.destination_worklist_map[active_plate] = run.worklist.name
+                    
+                    # Factories release one plate per pass; run another pass
+                    self.notify()
             
-            for active_plate in active_plates:
-                # Skip if there's a plate with same task and lower instance index
-                same_task_plates = [ap for ap in active_plates 
-                                  if ap != active_plate and 
-                                  ap.get_current_todo() == active_plate.get_current_todo() and
-                                  ap.instance_index < active_plate.instance_index]
-                if same_task_plates:
+            # Advance free plates, lowest instance index first
+            free_plates = self.active_plates.select(worklist=run.worklist, busy=False)
+            for active_plate in sorted(free_plates, key=lambda ap: ap.instance_index):
+                with self._dispatch_lock:
+                    self._advance_plate(run, active_plate)
+        
+        # Reserve next steps only after every free plate had its chance
+        if self.lookahead:
+            for run in runs:
+                if run in self.worklist_runs:
+                    self._stage_lookahead(run)
+    
+    def _advance_plate(self, run: WorklistRun, active_plate: ActivePlate):
+        """Start the current task of a free plate, if it can run now"""
+        # A staged step for this task fires (or is released) first
+        if active_plate in self.staged_steps and self._fire_staged_step(active_plate):
+            return
+        
+        # Skip if busy
+        if active_plate.busy:
+            return
+        
+        # Get current task
+        current_task = active_plate.get_current_todo()
+        if not current_task:
+            return
+        
+        # A dispatch plan fixes the order on each device; otherwise skip if
+        # there's a plate with same task and lower instance index
+        planned = self._planned_operation(run, active_plate, active_plate.current_task_index)
+        if planned is not None:
+            if not self._is_planned_next(run, planned):
+                return
+        elif not self.active_plates.is_first_for_task(active_plate):
+            return
+        
+        # Handle WaitTask specially (no device needed)
+        if isinstance(current_task, WaitTask):
+            # Start wait task
+            self._handle_wait_task(active_plate, current_task)
+            self.active_plates.refresh(active_plate)
+            return
+        
+        # Find available device for this task
+        device_name = planned.device_name if planned is not None else None
+        device_scheduled = self._schedule_task(active_plate, current_task, device_name)
+        
+        if device_scheduled:
+            run.tasks_dispatched += 1
+            self._record_planned(run, planned)
+            self.active_plates.refresh(active_plate)
+        else:
+            logger.debug(f"Could not schedule task {current_task} for {active_plate}")
+    
+    def _stage_lookahead(self, run: WorklistRun):
+        """Reserve the next device task of each busy plate in a run"""
+        busy_plates = self.active_plates.select(worklist=run.worklist, busy=True)
+        for active_plate in sorted(busy_plates, key=lambda ap: ap.instance_index):
+            with self._dispatch_lock:
+                if active_plate in self.staged_steps or not active_plate.busy:
                     continue
-                
-                # Skip if busy
-                if active_plate.busy:
+                task_index = active_plate.current_task_index + 1
+                if task_index >= len(active_plate.todo_list):
                     continue
-                
-                # Get current task
-                current_task = active_plate.get_current_todo()
-                if not current_task:
+                task = active_plate.todo_list[task_index]
+                if not isinstance(task, PlateTask):
                     continue
-                
-                # Handle WaitTask specially (no device needed)
-                if isinstance(current_task, WaitTask):
-                    if not active_plate.busy:
-                        # Start wait task
-                        self._handle_wait_task(active_plate, current_task)
+                if self.lookahead_horizon is not None:
+                    remaining = self.expected_remaining(active_plate)
+                    if remaining is not None and remaining > self.lookahead_horizon:
+                        self._wake_in(remaining - self.lookahead_horizon)
+                        continue
+                planned = self._planned_operation(run, active_plate, task_index)
+                if planned is not None:
+                    if not self._is_planned_next(run, planned):
+                        continue
+                elif not self._is_first_for_next_task(active_plate, task):
                     continue
-                
-                # Find available device for this task
-                device_scheduled = self._schedule_task(active_plate, current_task)
-                
-                if not device_scheduled:
-                    logger.debug(f"Could not schedule task {current_task} for {active_plate}")
+                # The plate's own locations are still in use by the current task
+                exclude = (active_plate.current_location, active_plate.destination_location)
+                device_name = planned.device_name if planned is not None else None
+                found = self._reserve_location(active_plate, task, exclude, device_name)
+                if found is None:
+                    continue
+                device, location = found
+                self.staged_steps[active_plate] = StagedStep(run, task, task_index, device, location, planned)
+                self._record(sj.STEP_STAGED, active_plate.active_plate_id, {"location": location_ref(location)})
+                logger.debug(f"Staged {task.command} on {device.name} for {active_plate}")
+            # The plate may have completed while we were reserving
+            self._fire_staged_step(active_plate)
+    
+    def _wake_in(self, seconds: float):
+        """Run a scheduling pass in `seconds`, unless one is already due sooner"""
+        timer = self._horizon_timer
+        if timer is not None and timer.pending:
+            if self.timer_service.remaining(timer) <= seconds:
+                return
+            self.timer_service.cancel(timer)
+        self._horizon_timer = self.timer_service.schedule(seconds, self.notify, key="lookahead-horizon")
+    
+    def _is_first_for_next_task(self, active_plate: ActivePlate, task: PlateTask) -> bool:
+        """Keep the instance order of plates waiting for the same task"""
+        return not any(other.instance_index < active_plate.instance_index
+                       and other.get_current_todo() == task
+                       for other in self.active_plates.with_task(task.device_type, task.command))
+    
+    def _fire_staged_step(self, active_plate: ActivePlate) -> bool:
+        """
+        Dispatch a plate's staged step once the plate is free.
         
-        logger.info(f"Worklist {worklist.name} completed")
-        worklist.on_worklist_complete()
+        Releases the reservation instead if the plate is no longer about to
+        run the staged task. Returns True if the step was dispatched.
+        """
+        with self._dispatch_lock:
+            step = self.staged_steps.get(active_plate)
+            if step is None or active_plate.busy:
+                return False
+            del self.staged_steps[active_plate]
+            if (active_plate.current_task_index != step.task_index
+                    or active_plate.get_current_todo() is not step.task
+                    or active_plate not in self.active_plates
+                    or not step.location.available):
+                self._release_step(active_plate, step)
+                return False
+            logger.debug(f"Firing staged {step.task.command} on {step.device.name} for {active_plate}")
+            self._dispatch(active_plate, step.task, step.device, step.location)
+            step.run.tasks_dispatched += 1
+            self._record_planned(step.run, step.planned)
+            self.active_plates.refresh(active_plate)
+            return True
+    
+    def _planned_operation(self, run: WorklistRun, active_plate: ActivePlate,
+                           task_index: int) -> Optional[PlannedOperation]:
+        """The run's planned device operation for a plate's task, if it follows a plan"""
+        plan = run.dispatch_plan
+        if plan is None:
+            return None
+        planned = plan.operation_for(active_plate, task_index)
+        if planned is None or planned.device_name is None:
+            return None
+        return planned
+    
+    def _is_planned_next(self, run: WorklistRun, planned: PlannedOperation) -> bool:
+        """Whether every operation planned earlier on the device has been dispatched"""
+        return run.plan_progress.get(planned.device_name, 0) == run.dispatch_plan.position(planned)
+    
+    def _record_planned(self, run: WorklistRun, planned: Optional[PlannedOperation]):
+        if planned is not None:
+            run.plan_progress[planned.device_name] = run.plan_progress.get(planned.device_name, 0) + 1
+    
+    def _release_step(self, active_plate: ActivePlate, step: StagedStep):
+        logger.debug(f"Releasing staged {step.task.command} on {step.device.name} for {active_plate}")
+        step.location.reserved.clear()
+        self._record(sj.STEP_RELEASED, active_plate.active_plate_id, {"location": location_ref(step.location)})
+        self.notify()
+    
+    def release_staged_steps(self):
+        """Drop every lookahead reservation (e.g. before changing plans externally)"""
+        with self._dispatch_lock:
+            steps = list(self.staged_steps.items())
+            self.staged_steps.clear()
+            for active_plate, step in steps:
+                self._release_step(active_plate, step)
+    
+    def _complete_worklist(self, run: WorklistRun):
+        run.finished_at = self.clock.monotonic()
+        self._record(sj.WORKLIST_COMPLETED, run.worklist.worklist_id)
+        self._worklists_completed.inc()
+        self._worklist_seconds.observe(run.finished_at - run.started_at)
+        with self._lock:
+            self.worklist_runs.remove(run)
+            self.completed_runs.append(run)
+        logger.info(f"Worklist {run.worklist.name} completed")
+        run.worklist.on_worklist_complete()
+        # A slot may have opened for a queued worklist
+        self.notify()
     
     def _handle_wait_task(self, active_plate: ActivePlate, wait_task: WaitTask):
         """
-        Handle a wait task by waiting for the specified duration.
+        Start a wait task; the timer service completes it at the deadline.
         
-        This runs in a separate thread to avoid blocking the scheduler.
+        The plate stays busy until then.
         """
         if wait_task.completed:
             return
         
         logger.info(f"Starting wait task: {wait_task.duration_seconds}s for {active_plate}")
+        self._record(sj.WAIT_STARTED, active_plate.active_plate_id,
+                     {"task_index": active_plate.current_task_index,
+                      "duration_seconds": wait_task.duration_seconds, "started_at": self.clock.time()})
+        self._start_wait(active_plate, wait_task, wait_task.duration_seconds)
+    
+    def _start_wait(self, active_plate: ActivePlate, wait_task: WaitTask, seconds: float):
         active_plate.plate_is_free.clear()  # Mark as busy
+        self._plate_started(active_plate)
+        
+        with self._waits_lock:
+            self._wait_started[active_plate] = self.clock.monotonic()
+            handle = self.timer_service.schedule(
+                seconds,
+                lambda: self._complete_wait(active_plate, wait_task),
+                key=active_plate
+            )
+            self._wait_timers[active_plate] = (wait_task, handle)
+    
+    def _complete_wait(self, active_plate: ActivePlate, wait_task: WaitTask):
+        with self._waits_lock:
+            entry = self._wait_timers.get(active_plate)
+            if entry is None or entry[0] is not wait_task:
+                return
+            del self._wait_timers[active_plate]
+        self._record_wait_span(active_plate, wait_task)
+        wait_task.completed = True
+        logger.info(f"Wait task completed for {active_plate}")
+        active_plate.mark_job_completed()
+    
+    def cancel_wait(self, active_plate: ActivePlate, complete: bool = False) -> bool:
+        """
+        Cancel a plate's pending wait.
         
-        def wait_and_complete():
-            import time
-            time.sleep(wait_task.duration_seconds)
+        With `complete=True` the wait counts as done and the plate moves on;
+        otherwise the plate is freed with the wait still to do, and it starts
+        over the next time the plate is scheduled. Returns False if the plate
+        has no pending wait.
+        """
+        with self._waits_lock:
+            entry = self._wait_timers.get(active_plate)
+            if entry is None or not self.timer_service.cancel(entry[1]):
+                return False
+            del self._wait_timers[active_plate]
+        wait_task, _ = entry
+        self._record_wait_span(active_plate, wait_task, cancelled=True)
+        logger.info(f"Wait task cancelled for {active_plate}")
+        if complete:
             wait_task.completed = True
-            logger.info(f"Wait task completed for {active_plate}")
             active_plate.mark_job_completed()
+        else:
+            self._record(sj.WAIT_CANCELLED, active_plate.active_plate_id)
+            with self._timings_lock:
+                self._ready_since[active_plate] = self.clock.monotonic()
+            active_plate.plate_is_free.set()
+            self.active_plates.refresh(active_plate)
+            self.notify()
+        return True
+    
+    def _record_wait_span(self, active_plate: ActivePlate, wait_task: WaitTask, cancelled: bool = False):
+        with self._waits_lock:
+            started = self._wait_started.pop(active_plate, None)
+        if started is None:
+            return
+        args = {"worklist": active_plate.worklist.name, "seconds": wait_task.duration_seconds}
+        if cancelled:
+            args["cancelled"] = True
+        self.instrumentation.tracer.record(f"wait {wait_task.duration_seconds:g}s", "wait", active_plate.barcode,
+                                           started, process="Plates", args=args)
+    
+    def wait_remaining(self, active_plate: ActivePlate) -> Optional[float]:
+        """Seconds left on a plate's pending wait (None if it is not waiting)"""
+        with self._waits_lock:
+            entry = self._wait_timers.get(active_plate)
+        if entry is None:
+            return None
+        return self.timer_service.remaining(entry[1])
+    
+    def pause(self):
+        """
+        Pause the cell: no new tasks are dispatched and wait timers stand still.
         
-        # Run wait in background thread
-        wait_thread = threading.Thread(
-            target=wait_and_complete,
-            name=f"WaitTask-{active_plate.plate_serial_number}",
-            daemon=True
-        )
-        wait_thread.start()
+        Device jobs and robot moves already started run to completion.
+        """
+        self.paused = True
+        self.timer_service.pause()
+        logger.info("PlateScheduler paused")
+    
+    def resume(self):
+        """Resume after pause(); pending waits keep their remaining time"""
+        self.paused = False
+        self.timer_service.resume()
+        logger.info("PlateScheduler resumed")
+        self.notify()
+    
+    def recover(self, journal: Optional[StateJournal] = None) -> RecoveryReport:
+        """
+        Rebuild worklists and plates from the journal after a crash.
+        
+        Call on a fresh scheduler (with the same devices registered) before
+        start_scheduler(). Queued worklists are enqueued again and running
+        worklists resume with their plates at the task they had reached. A
+        plate whose device job or robot move was cut off is freed at that
+        task and runs it again (listed in `interrupted`); pending waits
+        restart with the time they had left.
+        """
+        if journal is not None:
+            self.journal = journal
+        if self.journal is None:
+            raise ValueError("PlateScheduler has no journal to recover from")
+        state = self.journal.load_state()
+        report = RecoveryReport()
+        
+        worklists: Dict[str, Worklist] = {}
+        for worklist_id, entry in state.worklists.items():
+            if entry.get("data") is None:
+                logger.warning(f"Journal has no definition for worklist {worklist_id}; skipping it")
+                continue
+            worklist = worklist_from_dict(entry["data"])
+            if entry["status"] == sj.QUEUED:
+                self.worklist_queue.put(worklist)
+                report.queued_worklists.append(worklist)
+                continue
+            worklists[worklist_id] = worklist
+            run = WorklistRun(worklist, self._run_sequence, self.active_plates)
+            run.started_at = self.clock.monotonic()
+            self._run_sequence += 1
+            # Factories carry on after the plates already released
+            for factory in run.factories:
+                kind = "destination" if factory.get_active_plate_type() is ActiveDestinationPlate else "source"
+                released = entry["released"].get(kind, 0)
+                factory.number_of_plates_to_create = max(0, factory.number_of_plates_to_create - released)
+                factory.plate_instance_index = released
+            with self._lock:
+                self.worklist_runs.append(run)
+            report.running_worklists.append(worklist)
+        
+        for plate_id, entry in state.plates.items():
+            worklist = worklists.get(entry["worklist_id"])
+            if worklist is None:
+                continue
+            plate_type = ActiveDestinationPlate if entry["kind"] == "destination" else ActiveSourcePlate
+            active_plate = plate_type(worklist, entry["instance_index"])
+            active_plate.active_plate_id = plate_id
+            active_plate.current_task_index = entry["task_index"]
+            active_plate.still_have_todos = entry["task_index"] < len(active_plate.todo_list)
+            if entry["current_location"] is not None:
+                location = self._journaled_location(entry["current_location"])
+                if location is None:
+                    report.unresolved_locations.append(
+                        f"{entry['current_location']['device']}/{entry['current_location']['location']}")
+                else:
+                    location.occupied.set()
+                active_plate.current_location = location
+                active_plate.destination_location = location
+            active_plate.state_changed_callbacks.append(self._on_job_completed)
+            
+            wait = entry.get("wait")
+            task = active_plate.get_current_todo()
+            if wait is not None and isinstance(task, WaitTask):
+                remaining = max(0.0, wait["duration_seconds"] - (self.clock.time() - wait["started_at"]))
+                self._start_wait(active_plate, task, remaining)
+                report.resumed_waits.append(active_plate)
+            elif entry["busy"]:
+                logger.warning(f"{active_plate} of {worklist.name} was interrupted at task "
+                               f"{entry['task_index']}; it will run again")
+                report.interrupted.append(active_plate)
+            
+            self.active_plates.add(active_plate)
+            if isinstance(active_plate, ActiveDestinationPlate):
+                with self._lock:
+                    self.destination_worklist_map[active_plate] = worklist.name
+            report.plates.append(active_plate)
+        
+        logger.info(f"Recovered {len(report.running_worklists)} running and "
+                    f"{len(report.queued_worklists)} queued worklists, {len(report.plates)} plates "
+                    f"({len(report.interrupted)} interrupted)")
+        self.notify()
+        return report
+    
+    def _journaled_location(self, ref: Dict[str, str]) -> Optional[PlateLocation]:
+        """The registered PlateLocation a journal location refers to"""
+        device = self.device_manager.get_device(ref["device"])
+        # Shared locations (e.g. handoffs) may be listed by another device
+        devices = ([device] if device is not None else []) + list(self.device_manager.devices.values())
+        for device in devices:
+            for location in getattr(device, "plate_location_info", None) or []:
+                if location.name == ref["location"] and location.device_name == ref["device"]:
+                    return location
+        return None
     
     def _schedule_task(self, active_plate: ActivePlate, 
-                      task) -> bool:
+                      task, device_name: Optional[str] = None) -> bool:
         """
-        Schedule a task on an available device.
+        Schedule a task on an available device (only `device_name` if given).
         
         Returns True if task was scheduled, False otherwise.
         """
+        found = self._reserve_location(active_plate, task, device_name=device_name)
+        if found is None:
+            return False
+        device, location = found
+        self._dispatch(active_plate, task, device, location)
+        return True
+    
+    def _reserve_location(self, active_plate: ActivePlate, task,
+                          exclude: Tuple[Optional[PlateLocation], ...] = (),
+                          device_name: Optional[str] = None
+                          ) -> Optional[Tuple[DeviceInterface, PlateLocation]]:
+        """Find and reserve a location for a task; returns (device, location) or None"""
         device_type = task.device_type
         
-        # Get devices of the required type
-        devices_of_type = self.device_manager.get_devices_by_type(device_type)
+        if device_name is not None:
+            # Planned device only
+            device = self.device_manager.get_device(device_name)
+            candidates = [device] if device is not None else []
+        else:
+            # Devices of the required type, ready ones first in policy order
+            candidates = self.device_manager.candidate_devices(device_type, active_plate, self.device_policy)
         
-        if not devices_of_type:
+        if not candidates:
             logger.error(f"No devices of type {device_type} available")
-            return False
+            return None
         
         # Try each device to find an available location
-        for device_name, device in devices_of_type.items():
+        for device in candidates:
+            device_name = device.name
             if not isinstance(device, PlateSchedulerDeviceInterface):
                 logger.error(f"Device {device_name} is not plate scheduler compliant")
                 continue
             
             # Get available location
             location = device.get_available_location(active_plate)
-            if not location:
+            if not location or any(location is other for other in exclude):
                 continue
             
             # Try to reserve location
@@ -230,28 +890,40 @@ class PlateScheduler:
                 continue
             
             logger.debug(f"Reserved location {location.name} on {device_name} for {active_plate}")
-            
-            # Commit the plate to this job
-            active_plate.plate_is_free.clear()
-            
-            if active_plate.current_location is None:
-                # First time sourcing the plate
-                logger.debug(f"Sourcing plate {active_plate} at device {device_name}")
-                active_plate.current_location = location
-                active_plate.destination_location = location
-            else:
-                # Moving plate to new location
-                logger.debug(f"Queueing robot job to move {active_plate} to {device_name}")
-                active_plate.destination_location = location
-                self.robot_scheduler.add_job(active_plate)
-            
-            # Queue device job
-            logger.debug(f"Queueing device job {task.command} on {active_plate}")
-            device.add_job(active_plate)
-            
-            return True
+            return device, location
         
-        return False
+        return None
+    
+    def _dispatch(self, active_plate: ActivePlate, task, device: DeviceInterface,
+                  location: PlateLocation):
+        """Commit a plate to a reserved location: queue the robot move and the device job"""
+        device_name = device.name
+        active_plate.plate_is_free.clear()
+        self._plate_started(active_plate)
+        self._tasks_dispatched.inc(device_type=device.product_name)
+        timing = TaskTiming(device_name, device.product_name, task.command, self.clock.monotonic())
+        with self._timings_lock:
+            self._task_timings[active_plate] = timing
+        self._record(sj.TASK_DISPATCHED, active_plate.active_plate_id,
+                     {"task_index": active_plate.current_task_index, "device": device_name,
+                      "current_location": location_ref(active_plate.current_location or location),
+                      "destination_location": location_ref(location)})
+        
+        if active_plate.current_location is None:
+            # First time sourcing the plate
+            logger.debug(f"Sourcing plate {active_plate} at device {device_name}")
+            active_plate.current_location = location
+            active_plate.destination_location = location
+            timing.arrived_at = timing.dispatched_at
+        else:
+            # Moving plate to new location
+            logger.debug(f"Queueing robot job to move {active_plate} to {device_name}")
+            active_plate.destination_location = location
+            self.robot_scheduler.add_job(active_plate)
+        
+        # Queue device job
+        logger.debug(f"Queueing device job {task.command} on {active_plate}")
+        device.add_job(active_plate)
     
     def get_status(self) -> str:
         """Get status string for monitoring"""
@@ -260,11 +932,40 @@ class PlateScheduler:
         # Robot scheduler status
         status.append(self.robot_scheduler.get_status())
         
+        # Worklists status
+        with self._lock:
+            runs = self.worklist_policy.order(list(self.worklist_runs))
+        status.append(f"\tRunning worklists: {len(runs)}")
+        for run in runs:
+            status.append(f"\t\t{run.worklist.name}: priority {run.priority}, "
+                          f"{len(run.active_plates)} active plates, "
+                          f"{run.plates_to_create} to create, "
+                          f"{run.tasks_dispatched} tasks dispatched")
+            if run.dispatch_plan is not None:
+                plan = run.dispatch_plan
+                status.append(f"\t\t\tfollowing {plan.rule} plan: "
+                              f"{sum(run.plan_progress.values())}/{plan.device_task_count} "
+                              f"device tasks, predicted makespan {plan.makespan:.1f} s")
+        
+        if self.lookahead:
+            with self._dispatch_lock:
+                steps = list(self.staged_steps.items())
+            status.append(f"\tLookahead reservations: {len(steps)}")
+            for plate, step in steps:
+                status.append(f"\t\t{plate}: {step.task.command} on {step.device.name} "
+                              f"at {step.location.name}")
+        
+        if self.paused:
+            status.append("\tPaused")
+        
         # Active plates status
         status.append("\tActive plates:")
-        with self._lock:
-            for plate in ActivePlate._active_plates:
-                status.append(plate.get_status())
+        for plate in self.active_plates:
+            plate_status = plate.get_status()
+            remaining = self.wait_remaining(plate)
+            if remaining is not None:
+                plate_status += f"\tWait remaining: {remaining:.1f}s\n"
+            status.append(plate_status)
         
         return "\n".join(status)
 
@@ -0,0 +1,357 @@
+"""
+Reservation table and cooperative planning for multi-robot moves.
+
+PathPlanner routes each plate on its own, with no notion of time. The
+ReservationTable records, per resource (robot or plate location), the time
+intervals other plates have claimed. CooperativePlanner searches the world
+graph in time (cooperative A*): a transfer may only start when its robot
+and target location are free for the transfer's expected duration, and a
+plate may only wait at an intermediate location (e.g. a HandoffLocation)
+while nobody else has claimed it. The resulting timed plan is reserved
+atomically, so plates planned later route around it.
+
+Executors follow the plan's order rather than its clock: before a transfer
+they wait (`wait_turn`) until every earlier claim on the same robot and
+target location has been completed (`complete`). Because claims on a
+resource never overlap, this order has no cycles, and a transfer that runs
+late delays the plates behind it instead of colliding with them.
+
+Resource keys are the same as for ResourceLocks (`robot_key`, `location_key`).
+"""
+
+import bisect
+from dataclasses import dataclass, field
+import heapq
+import math
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Tuple, TYPE_CHECKING
+
+from .active_plate import PlateLocation
+from .resource_locks import location_key, robot_key
+
+if TYPE_CHECKING:
+    from .path_planner import PathPlanner
+
+# (start, end, owner) - a half-open claim [start, end) on one resource
+Interval = Tuple[float, float, Hashable]
+
+
+class ReservationTable:
+    """Time-indexed claims on robots and locations"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        # Per resource key: intervals sorted by start
+        self._intervals: Dict[str, List[Interval]] = {}
+        self._by_owner: Dict[Hashable, List[Tuple[str, float, float]]] = {}
+
+    def reservations(self, key: str) -> List[Interval]:
+        """Claims on a resource, sorted by start"""
+        with self._lock:
+            return list(self._intervals.get(key, ()))
+
+    def owners(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._by_owner)
+
+    def _others(self, key: str, owner: Hashable) -> List[Interval]:
+        return [interval for interval in self._intervals.get(key, ()) if interval[2] != owner]
+
+    def is_free(self, key: str, start: float, end: float, owner: Hashable = None) -> bool:
+        """True if no other owner claims any part of [start, end)"""
+        with self._lock:
+            return all(e <= start or s >= end for s, e, _ in self._others(key, owner))
+
+    def next_free(self, key: str, start: float, duration: float, owner: Hashable = None) -> float:
+        """Earliest t >= start such that [t, t + duration) is free"""
+        with self._lock:
+            t = start
+            for s, e, _ in self._others(key, owner):
+                if e <= t:
+                    continue
+                if s >= t + duration:
+                    break
+                t = e
+            return t
+
+    def free_until(self, key: str, start: float, owner: Hashable = None) -> float:
+        """End of the free gap that contains `start` (start itself if it is claimed)"""
+        with self._lock:
+            for s, e, _ in self._others(key, owner):
+                if e <= start:
+                    continue
+                return start if s <= start else s
+            return math.inf
+
+    def free_gaps(self, key: str, after: float, owner: Hashable = None) -> List[Tuple[float, float]]:
+        """Free (start, end) gaps of a resource that end after `after`, in time order"""
+        with self._lock:
+            gaps = []
+            gap_start = -math.inf
+            for s, e, _ in self._others(key, owner):
+                if s > gap_start and s > after:
+                    gaps.append((gap_start, s))
+                gap_start = max(gap_start, e)
+            gaps.append((gap_start, math.inf))
+            return gaps
+
+    def reserve(self, key: str, start: float, end: float, owner: Hashable):
+        with self._lock:
+            intervals = self._intervals.setdefault(key, [])
+            bisect.insort(intervals, (start, end, owner), key=lambda interval: interval[0])
+            self._by_owner.setdefault(owner, []).append((key, start, end))
+
+    def _remove(self, key: str, interval: Interval):
+        intervals = self._intervals.get(key)
+        if intervals is not None and interval in intervals:
+            intervals.remove(interval)
+            if not intervals:
+                del self._intervals[key]
+
+    def release(self, owner: Hashable):
+        """Drop every claim of an owner"""
+        with self._lock:
+            for key, start, end in self._by_owner.pop(owner, ()):
+                self._remove(key, (start, end, owner))
+            self._changed.notify_all()
+
+    def complete(self, owner: Hashable, key: str):
+        """Drop an owner's earliest claim on a resource (it is done with it)"""
+        with self._lock:
+            claims = self._by_owner.get(owner, [])
+            mine = [claim for claim in claims if claim[0] == key]
+            if not mine:
+                return
+            claim = min(mine, key=lambda c: c[1])
+            claims.remove(claim)
+            if not claims:
+                del self._by_owner[owner]
+            self._remove(key, (claim[1], claim[2], owner))
+            self._changed.notify_all()
+
+    def wait_turn(self, owner: Hashable, key: str, start: float,
+                  stop_event: Optional[threading.Event] = None) -> bool:
+        """
+        Block until no other owner has an uncompleted claim on `key` starting before `start`.
+
+        Returns False if `stop_event` was set while waiting.
+        """
+        with self._lock:
+            while any(s < start for s, _, _ in self._others(key, owner)):
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                self._changed.wait(0.1)
+            return True
+
+    def prune(self, before: float):
+        """Forget claims that ended before `before` (completed or not)"""
+        with self._lock:
+            for key in list(self._intervals):
+                kept = [interval for interval in self._intervals[key] if interval[1] > before]
+                if kept:
+                    self._intervals[key] = kept
+                else:
+                    del self._intervals[key]
+            for owner in list(self._by_owner):
+                kept = [claim for claim in self._by_owner[owner] if claim[2] > before]
+                if kept:
+                    self._by_owner[owner] = kept
+                else:
+                    del self._by_owner[owner]
+
+
+@dataclass
+class TimedStep:
+    """One transfer of a timed plan"""
+    src: int  # place id
+    dst: int  # place id
+    robot: object
+    start: float
+    end: float
+
+
+@dataclass
+class TimedPlan:
+    owner: Hashable
+    start: float
+    steps: List[TimedStep] = field(default_factory=list)
+
+    @property
+    def end(self) -> float:
+        return self.steps[-1].end if self.steps else self.start
+
+    @property
+    def place_ids(self) -> List[int]:
+        return [self.steps[0].src] + [step.dst for step in self.steps] if self.steps else []
+
+
+class CooperativePlanner:
+    """
+    Plans moves that avoid the claims of previously planned moves.
+
+    Transfer durations come from `duration_fn(robot, src_location,
+    dst_location, weight)` (e.g. DurationModel.transfer_duration_fn()) and
+    default to `edge weight * seconds_per_weight` where it returns None. The
+    search is a safe-interval A* over places, with a heuristic from the
+    fastest possible remaining transfers.
+    """
+
+    def __init__(self, path_planner: 'PathPlanner', table: Optional[ReservationTable] = None,
+                 duration_fn: Optional[Callable[[object, PlateLocation, PlateLocation, float], float]] = None,
+                 seconds_per_weight: float = 1.0):
+        self.path_planner = path_planner
+        self.table = table if table is not None else ReservationTable()
+        self.duration_fn = duration_fn
+        self.seconds_per_weight = seconds_per_weight
+        self._lock = threading.Lock()
+
+    def duration(self, robot, src_location: PlateLocation, dst_location: PlateLocation,
+                 weight: float) -> float:
+        if self.duration_fn is not None:
+            seconds = self.duration_fn(robot, src_location, dst_location, weight)
+            if seconds is not None:
+                return seconds
+        return weight * self.seconds_per_weight
+
+    def plan(self, owner: Hashable, src_location: PlateLocation, dst_location: PlateLocation,
+             start: Optional[float] = None) -> Optional[TimedPlan]:
+        """Plan and reserve a move; None if the destination cannot be reached"""
+        with self._lock:
+            start = self.table.clock() if start is None else start
+            plan = self._search(owner, src_location, dst_location, start)
+            if plan is not None:
+                self._reserve(plan, src_location)
+            return plan
+
+    def _edge_durations(self, graph) -> List[float]:
+        locations, weights, robots, robot_index = graph.locations, graph.weights, graph.robots, graph.robot_index
+        durations = []
+        for u in range(graph.num_places):
+            for e in range(graph.offsets[u], graph.offsets[u + 1]):
+                durations.append(self.duration(robots[robot_index[e]], locations[u],
+                                               locations[graph.targets[e]], weights[e]))
+        return durations
+
+    @staticmethod
+    def _heuristic(graph, durations: List[float], targets: List[int]) -> List[float]:
+        """Lower bound on the remaining time from each place (reverse Dijkstra)"""
+        reverse: List[List[Tuple[int, float]]] = [[] for _ in range(graph.num_places)]
+        enabled, robot_index = graph.robot_enabled, graph.robot_index
+        for u in range(graph.num_places):
+            for e in range(graph.offsets[u], graph.offsets[u + 1]):
+                if enabled[robot_index[e]]:
+                    reverse[graph.targets[e]].append((u, durations[e]))
+        h = [math.inf] * graph.num_places
+        heap = [(0.0, t) for t in targets]
+        for t in targets:
+            h[t] = 0.0
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > h[v]:
+                continue
+            for u, w in reverse[v]:
+                if d + w < h[u]:
+                    h[u] = d + w
+                    heapq.heappush(heap, (d + w, u))
+        return h
+
+    def _search(self, owner, src_location: PlateLocation, dst_location: PlateLocation,
+                start: float) -> Optional[TimedPlan]:
+        """
+        Safe-interval search: a state is a place plus the free gap of its
+        location the plate occupies it in, so arriving later (after waiting
+        at the source) is explored when arriving early leads nowhere.
+        """
+        planner = self.path_planner
+        graph = planner.graph
+        sources = planner._place_ids(src_location)
+        targets = planner._place_ids(dst_location)
+        if not sources or not targets:
+            return None
+        durations = self._edge_durations(graph)
+        h = self._heuristic(graph, durations, targets)
+        table = self.table
+        target_set = set(targets)
+        location_keys = [location_key(location) for location in graph.locations]
+        robot_keys = [robot_key(robot) for robot in graph.robots]
+        src_key = location_keys[sources[0]]
+
+        # State (place, gap end) -> earliest arrival; the plate must leave before the gap ends
+        arrival: Dict[Tuple[int, float], float] = {}
+        previous: Dict[Tuple[int, float], Tuple[Tuple[int, float], int, float]] = {}
+        heap = []
+        for s in sources:
+            state = (s, math.inf)  # the plate owns its source location
+            arrival[state] = start
+            if h[s] < math.inf:
+                heapq.heappush(heap, (start + h[s], start, state))
+        closed = set()
+        while heap:
+            _, t, state = heapq.heappop(heap)
+            if state in closed:
+                continue
+            closed.add(state)
+            u, leave_by = state
+            if u in target_set:
+                return self._build_plan(owner, start, state, previous, durations, graph)
+            u_key = location_keys[u]
+            for e in range(graph.offsets[u], graph.offsets[u + 1]):
+                if not graph.robot_enabled[graph.robot_index[e]]:
+                    continue
+                v = graph.targets[e]
+                d = durations[e]
+                if math.isinf(d) or t + d > leave_by:
+                    continue
+                v_key = location_keys[v]
+                if v not in target_set and v_key != src_key:
+                    # Do not route through a location holding (or promised to) another plate
+                    via = graph.locations[v]
+                    if via.occupied.is_set() or via.reserved.is_set():
+                        continue
+                r_key = robot_keys[graph.robot_index[e]]
+                gaps = [(t, leave_by)] if v_key == u_key else table.free_gaps(v_key, t, owner)
+                for gap_start, gap_end in gaps:
+                    departure = max(t, gap_start)
+                    departure = table.next_free(r_key, departure, d, owner)
+                    if departure + d > min(gap_end, leave_by):
+                        if departure + d > leave_by:
+                            break  # later gaps only get later
+                        continue
+                    next_state = (v, gap_end)
+                    if next_state in closed or departure + d >= arrival.get(next_state, math.inf):
+                        continue
+                    arrival[next_state] = departure + d
+                    previous[next_state] = (state, e, departure)
+                    heapq.heappush(heap, (departure + d + h[v], departure + d, next_state))
+        return None
+
+    @staticmethod
+    def _build_plan(owner, start: float, state, previous, durations, graph) -> TimedPlan:
+        steps = []
+        while state in previous:
+            prior, e, departure = previous[state]
+            steps.append(TimedStep(prior[0], state[0], graph.robots[graph.robot_index[e]],
+                                   departure, departure + durations[e]))
+            state = prior
+        steps.reverse()
+        return TimedPlan(owner, start, steps)
+
+    def _reserve(self, plan: TimedPlan, src_location: PlateLocation):
+        table = self.table
+        graph = self.path_planner.graph
+        held_since = plan.start
+        for step in plan.steps:
+            table.reserve(robot_key(step.robot), step.start, step.end, plan.owner)
+            # The plate holds a location from when it starts entering until it has left
+            table.reserve(location_key(graph.locations[step.src]), held_since, step.end, plan.owner)
+            held_since = step.start
+        if plan.steps:
+            last = plan.steps[-1]
+            table.reserve(location_key(graph.locations[last.dst]), last.start, last.end, plan.owner)
+
+    def release(self, owner: Hashable):
+        """Drop an owner's claims (after its move finished or was abandoned)"""
+        self.table.release(owner)
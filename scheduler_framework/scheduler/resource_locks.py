@@ -0,0 +1,64 @@
+"""
+ResourceLocks - named locks for robots, locations and handoff locations.
+
+RobotScheduler runs several moves at once. A move holds the locks of all
+the locations on its path until it is done, and each of its transfers holds
+its robot's lock, so moves that share hardware still serialize while
+independent moves run in parallel. Locks in one hold are acquired in sorted
+key order, and a move takes its location locks before any robot lock (a
+robot's holder already has all its locations), so moves can never deadlock
+on each other.
+"""
+
+from contextlib import contextmanager
+import threading
+from typing import Dict, Iterable, Iterator
+
+
+def robot_key(robot) -> str:
+    """Lock key for a robot"""
+    return f"robot:{robot.name}"
+
+
+def location_key(location) -> str:
+    """Lock key for a plate location (handoff locations are shared objects, so one key)"""
+    return f"location:{location.device_name}:{location.name}"
+
+
+class ResourceLocks:
+    """Registry of per-resource locks created on first use"""
+
+    def __init__(self):
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+        # Acquisitions that had to wait for another holder
+        self.contended = 0
+
+    def lock(self, key: str) -> threading.Lock:
+        """The lock for a resource key"""
+        with self._registry_lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def is_held(self, key: str) -> bool:
+        with self._registry_lock:
+            lock = self._locks.get(key)
+        return lock is not None and lock.locked()
+
+    @contextmanager
+    def hold(self, keys: Iterable[str]) -> Iterator[None]:
+        """Hold the locks of all keys (duplicates allowed) for the duration of the block"""
+        locks = [self.lock(key) for key in sorted(set(keys))]
+        acquired = []
+        try:
+            for lock in locks:
+                if not lock.acquire(blocking=False):
+                    self.contended += 1
+                    lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
@@ -3,16 +3,52 @@ RobotScheduler - Manages robot movement jobs.
 
 Handles the queue of plate movements and executes them using
 the PathPlanner to find optimal routes.
+
+Moves are executed by a pool of worker threads (one per robot by default).
+A move holds the locks of every location on its path from start to finish,
+so a plate parked on a handoff between two transfers keeps it, and each
+transfer also holds its robot's lock. Moves on different robots run in
+parallel while conflicting moves serialize.
+
+With `use_reservations=True`, moves are planned in time by a
+CooperativePlanner against a shared ReservationTable. Plans never claim a
+robot or location another plate has claimed, and workers execute transfers
+in the planned order, so a plate never waits on a handoff occupied by
+another plate and the locks stay uncontended.
+
+Every transfer's duration is recorded in `duration_model` per (robot,
+source place, destination place). To plan with the measurements, set the
+cooperative planner's `duration_fn` to `duration_model.transfer_duration_fn()`
+(with `seconds_per_weight` calibrated to real seconds, since unmeasured
+transfers still use the weights).
+
+Time comes from a `clock` (see clock.py). Under a simulation (see
+simulation.py) move durations are simulated, so `record_transfer_durations`
+is switched off there.
+
+Moves, planning time and transfer durations go to the `instrumentation`
+(see instrumentation.py), which the PathPlanner, the DeviceManager's
+availability gauges and the PlateScheduler share; each transfer is also a
+trace span on its robot's track.
 """
 
+import asyncio
+import inspect
 import threading
-import time
 import logging
-from queue import Queue
-from typing import Optional
+import time
+from contextlib import nullcontext
+from queue import Empty, Queue
+from typing import List, Optional
 from .active_plate import ActivePlate
+from .clock import Clock, SYSTEM_CLOCK
 from .device_manager import DeviceManager
+from .duration_model import DurationModel
+from .instrumentation import Instrumentation
+from .metrics import DURATION_BUCKETS, MetricsRegistry
 from .path_planner import PathPlanner
+from .resource_locks import ResourceLocks, location_key, robot_key
+from .reservation_table import CooperativePlanner, ReservationTable, TimedPlan
 
 logger = logging.getLogger(__name__)
 
@@ -25,38 +61,87 @@ class RobotScheduler:
     movement jobs and processes them using path planning.
     """
     
-    def __init__(self, device_manager: DeviceManager):
+    def __init__(self, device_manager: DeviceManager,
+                 max_parallel_moves: Optional[int] = None,
+                 use_reservations: bool = False,
+                 duration_model: Optional[DurationModel] = None,
+                 clock: Optional[Clock] = None,
+                 instrumentation: Optional[Instrumentation] = None):
         self.device_manager = device_manager
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
         self.pending_jobs: Queue[ActivePlate] = Queue()
         self.scheduler_thread: Optional[threading.Thread] = None
+        self.worker_threads: List[threading.Thread] = []
         self.stop_event = threading.Event()
-        self.path_planner = PathPlanner(device_manager)
+        
+        # Metrics and trace spans (shared with the PlateScheduler)
+        self.instrumentation = (instrumentation if instrumentation is not None
+                                else Instrumentation(self.clock))
+        metrics = self.instrumentation.metrics
+        self._moves_total = metrics.counter("scheduler_robot_moves_total", "Move jobs handled, by result")
+        self._move_planning_seconds = metrics.histogram("scheduler_move_planning_seconds",
+                                                        "World check and path planning per move")
+        self._transfer_seconds = metrics.histogram("scheduler_robot_transfer_seconds",
+                                                   "Duration of each robot transfer", DURATION_BUCKETS)
+        self._transfer_errors = metrics.counter("scheduler_robot_transfer_errors_total",
+                                                "Transfers that raised, per robot")
+        metrics.add_collector(self._collect_metrics)
+        device_manager.register_metrics(metrics)
+        self.path_planner = PathPlanner(device_manager, instrumentation=self.instrumentation)
+        
+        # Concurrent moves (None = one worker per registered robot)
+        self.max_parallel_moves = max_parallel_moves
+        self.resource_locks = ResourceLocks()
+        # World (re)builds and path planning are done one at a time; the
+        # planner's own lock is also held, so other planner users see one world
+        self._planning_lock = threading.Lock()
+        self._moves_in_progress = 0
+        self._moves_lock = threading.Lock()
+        
+        # Measured transfer durations (shared with the PlateScheduler)
+        self.duration_model = duration_model if duration_model is not None else DurationModel()
+        self.record_transfer_durations = True
+        
+        # Time-aware planning (None = plan each move on its own)
+        self.cooperative_planner: Optional[CooperativePlanner] = (
+            CooperativePlanner(self.path_planner, ReservationTable(self.clock.monotonic))
+            if use_reservations else None
+        )
         
         # Events for move plate operations
         self.entering_move_plate_callbacks = []
         self.exiting_move_plate_callbacks = []
+        # Called with the plate once a move job has been handled (moved or not)
+        self.move_completed_callbacks = []
     
     def start_scheduler(self):
-        """Start the robot scheduler thread"""
+        """Start the robot scheduler worker threads"""
         if self.scheduler_thread and self.scheduler_thread.is_alive():
             return
         
         self.stop_event.clear()
-        self.scheduler_thread = threading.Thread(
-            target=self._scheduler_thread_runner,
-            name="RobotScheduler",
-            daemon=True
-        )
-        self.scheduler_thread.start()
-        logger.info("RobotScheduler started")
+        workers = self.max_parallel_moves or max(1, len(self.device_manager.robots))
+        self.worker_threads = [
+            threading.Thread(
+                target=self._scheduler_thread_runner,
+                name="RobotScheduler" if i == 0 else f"RobotScheduler-{i}",
+                daemon=True
+            )
+            for i in range(workers)
+        ]
+        self.scheduler_thread = self.worker_threads[0]
+        for thread in self.worker_threads:
+            thread.start()
+        logger.info(f"RobotScheduler started with {workers} worker(s)")
     
     def stop_scheduler(self):
-        """Stop the robot scheduler thread"""
+        """Stop the robot scheduler worker threads"""
         self.stop_event.set()
-        if self.scheduler_thread and self.scheduler_thread.is_alive():
-            self.scheduler_thread.join(timeout=1.0)
-            if self.scheduler_thread.is_alive():
-                logger.warning("RobotScheduler thread did not stop within timeout")
+        for thread in self.worker_threads:
+            if thread.is_alive():
+                thread.join(timeout=1.0)
+                if thread.is_alive():
+                    logger.warning(f"{thread.name} thread did not stop within timeout")
         logger.info("RobotScheduler stopped")
     
     def add_job(self, active_plate: ActivePlate):
@@ -65,21 +150,29 @@ class RobotScheduler:
         logger.debug(f"Added robot job for {active_plate}")
     
     def _scheduler_thread_runner(self):
-        """Main scheduler loop - processes movement jobs"""
+        """Worker loop - processes movement jobs (several workers share the queue)"""
         while not self.stop_event.is_set():
             try:
                 # Try to get a job (with timeout to allow checking stop_event)
                 try:
                     active_plate = self.pending_jobs.get(timeout=0.1)
-                except:
+                except Empty:
                     continue
                 
                 # Plan and execute the move
-                self._move_plate(active_plate)
+                with self._moves_lock:
+                    self._moves_in_progress += 1
+                try:
+                    self._move_plate(active_plate)
+                finally:
+                    with self._moves_lock:
+                        self._moves_in_progress -= 1
+                    for callback in self.move_completed_callbacks:
+                        callback(active_plate)
                 
             except Exception as e:
                 logger.error(f"Error in robot scheduler: {e}", exc_info=True)
-                time.sleep(0.1)
+                self.clock.sleep(0.1)
     
     def _move_plate(self, active_plate: ActivePlate):
         """
@@ -90,89 +183,127 @@ class RobotScheduler:
         """
         if not active_plate.current_location or not active_plate.destination_location:
             logger.warning(f"Cannot move {active_plate}: missing location info")
+            self._moves_total.inc(result="skipped")
             return
         
         if active_plate.current_location == active_plate.destination_location:
             logger.warning(f"Plate {active_plate} is already at destination")
+            self._moves_total.inc(result="skipped")
             return
         
         logger.debug(f"Moving {active_plate} from {active_plate.current_location.name} "
                     f"to {active_plate.destination_location.name}")
         
-        # Rebuild world (in case devices/locations changed)
-        self.path_planner.create_world()
-        
-        # Plan path
-        path = self.path_planner.plan_path(
-            active_plate.current_location,
-            active_plate.destination_location
-        )
+        plan: Optional[TimedPlan] = None
+        with self._planning_lock, self.path_planner.lock:
+            planning_started = time.perf_counter()
+            # Rebuild world only if devices/locations changed since the last build
+            self.path_planner.create_world()
+            
+            # Plan path
+            if self.cooperative_planner is not None:
+                plan = self.cooperative_planner.plan(
+                    active_plate,
+                    active_plate.current_location,
+                    active_plate.destination_location
+                )
+                path = ([self.path_planner.graph.node(index) for index in plan.place_ids]
+                        if plan is not None else None)
+            else:
+                path = self.path_planner.plan_path(
+                    active_plate.current_location,
+                    active_plate.destination_location
+                )
+            self._move_planning_seconds.observe(time.perf_counter() - planning_started)
         
         if not path:
             logger.warning(f"No path found for {active_plate} from "
                           f"{active_plate.current_location.name} to "
                           f"{active_plate.destination_location.name}")
+            self._moves_total.inc(result="no_path")
             return
         
         # Execute the path
-        self._execute_path(active_plate, path)
+        try:
+            self._execute_path(active_plate, path, plan)
+        finally:
+            if plan is not None:
+                self.cooperative_planner.release(active_plate)
         
         # Update plate location
         active_plate.current_location.occupied.clear()
         active_plate.destination_location.occupied.set()
         active_plate.current_location = active_plate.destination_location
+        self._moves_total.inc(result="moved")
     
-    def _execute_path(self, active_plate: ActivePlate, path: list):
+    def _execute_path(self, active_plate: ActivePlate, path: list,
+                      plan: Optional[TimedPlan] = None):
         """
         Execute a planned path by performing transfers between nodes.
         
         Each step in the path represents a transfer that needs to be
-        performed by a robot.
+        performed by a robot. With a timed plan, each transfer uses the
+        robot the plan reserved and waits for its turn on that robot and
+        on the target location.
+        
+        Without a plan, every location on the path is locked for the whole
+        move (in sorted key order, like any other hold), so nobody can put a
+        second plate on a handoff this plate is waiting on. A timed plan
+        already claims each location from arrival to departure, and taking
+        the locks up front would block plates the plan lets go first.
         """
         if len(path) < 2:
             return
         
+        path_locks = nullcontext()
+        if plan is None:
+            infos = [self.path_planner.place_info(node) for node in path]
+            path_locks = self.resource_locks.hold(location_key(info[1]) for info in infos if info)
+        with path_locks:
+            self._execute_steps(active_plate, path, plan)
+    
+    def _execute_steps(self, active_plate: ActivePlate, path: list, plan: Optional[TimedPlan]):
         current_node = path[0]
         
-        for next_node in path[1:]:
-            # Find the connection and robot
-            connection = None
-            for conn in next_node.connections:
-                if conn.node == current_node:
-                    connection = conn
-                    break
-            
-            if not connection:
+        for step_index, next_node in enumerate(path[1:]):
+            # Find the edge and robot (O(1) lookup in the compact graph)
+            edge = self.path_planner.find_edge(current_node, next_node)
+            if not edge:
                 logger.error(f"No connection found between nodes")
                 return
             
-            robot = connection.extra_info
+            robot, _ = edge
+            step = plan.steps[step_index] if plan is not None else None
+            if step is not None:
+                robot = step.robot
             if not robot:
                 logger.error(f"No robot found for connection")
                 return
             
-                # Get locations and devices
-                # current_node.key is now a place key string like "location:place"
-                current_place_key = current_node.key
-                next_place_key = next_node.key
-                
-                current_location = self.path_planner.world_places.get(current_place_key)
-                next_location = self.path_planner.world_places.get(next_place_key)
-                current_place = self.path_planner.world_place_objects.get(current_place_key)
-                next_place = self.path_planner.world_place_objects.get(next_place_key)
-                
-                if not current_location or not next_location or not current_place or not next_place:
-                    logger.error(f"Missing location info for places")
-                    return
-                
-                # Use location name as key since world_locations now uses names
-                current_device = self.path_planner.world_locations.get(current_location.name)
-                next_device = self.path_planner.world_locations.get(next_location.name)
-                
-                if not current_device or not next_device:
-                    logger.error(f"Missing device info for locations")
+            # Get locations and devices
+            current_info = self.path_planner.place_info(current_node)
+            next_info = self.path_planner.place_info(next_node)
+            
+            if not current_info or not next_info:
+                logger.error(f"Missing location info for places")
+                return
+            
+            current_device, current_location, current_place = current_info
+            next_device, next_location, next_place = next_info
+            
+            if not current_device or not next_device:
+                logger.error(f"Missing device info for locations")
+                return
+            
+            # The robot and both locations are busy for the whole transfer
+            resources = (robot_key(robot), location_key(current_location), location_key(next_location))
+            if step is not None:
+                table = self.cooperative_planner.table
+                if not all(table.wait_turn(active_plate, key, step.start, self.stop_event)
+                           for key in (resources[0], resources[2])):
                     return
-                
+            # Without a plan the path's locations are already held (see _execute_path)
+            with self.resource_locks.hold(resources if step is not None else resources[:1]):
                 # Only transfer if locations are different
                 if current_location != next_location:
                     # Lock places
@@ -187,7 +318,8 @@ class RobotScheduler:
                 
                 # Perform transfer
                 try:
-                    robot.transfer_plate(
+                    started = self.clock.monotonic()
+                    result = robot.transfer_plate(
                         current_device.name,
                         current_place.name,
                         next_device.name,
@@ -195,21 +327,47 @@ class RobotScheduler:
                         active_plate.labware_name,
                         active_plate.barcode
                     )
+                    if inspect.iscoroutine(result):
+                        # Async robot (see async_devices.py)
+                        asyncio.run(result)
+                    if self.record_transfer_durations:
+                        seconds = self.clock.monotonic() - started
+                        self.duration_model.record_transfer(robot.name, current_place.name, next_place.name,
+                                                            seconds)
+                        self._transfer_seconds.observe(seconds, robot=robot.name)
+                        self.instrumentation.tracer.record(
+                            f"{active_plate.barcode} {current_place.name} -> {next_place.name}", "transfer",
+                            robot.name, started, started + seconds, process="Robots",
+                            args={"plate": active_plate.barcode, "from": current_location.name,
+                                  "to": next_location.name})
                 except Exception as e:
                     logger.error(f"Error during transfer: {e}", exc_info=True)
+                    self._transfer_errors.inc(robot=robot.name)
                 
                 # Notify callbacks
                 for callback in self.exiting_move_plate_callbacks:
                     callback()
             
+            if step is not None:
+                # Done with the robot and with the location the plate just left
+                table.complete(active_plate, resources[0])
+                table.complete(active_plate, resources[1])
+            
             current_node = next_node
     
+    def _collect_metrics(self, registry: MetricsRegistry):
+        registry.gauge("scheduler_robot_queue_depth", "Move jobs waiting for a robot worker").set(
+            self.pending_jobs.qsize())
+        registry.gauge("scheduler_robot_moves_in_progress", "Moves being planned or executed").set(
+            self._moves_in_progress)
+    
     def get_status(self) -> str:
         """Get status string for monitoring"""
+        moving = f", {self._moves_in_progress} moves in progress" if self._moves_in_progress else ""
         if self.pending_jobs.empty():
-            return "RobotScheduler has no pending jobs"
+            return f"RobotScheduler has no pending jobs{moving}"
         
-        status = f"RobotScheduler has {self.pending_jobs.qsize()} pending jobs:\n"
+        status = f"RobotScheduler has {self.pending_jobs.qsize()} pending jobs{moving}:\n"
         # Note: We can't easily iterate Queue without consuming items
         # In production, you might want a separate list for status
         return status
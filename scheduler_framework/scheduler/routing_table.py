@@ -0,0 +1,182 @@
+"""
+RoutingTable - precomputed shortest paths between places.
+
+For a fixed cell layout the set of place-to-place routes is small and static,
+so instead of running Dijkstra for every move the PathPlanner can keep a
+routing table of distances and next hops indexed by integer place ids.
+
+Rows (one per source place) are filled by single-source Dijkstra, either all
+at once via `build()` or lazily on first lookup. Edge weight changes are
+applied incrementally:
+- weight increases (e.g. a robot going offline) recompute only the rows whose
+  shortest-path tree may use the changed edge
+- weight decreases are relaxed in place through the changed edge
+
+Uses `array` rows (standard library only) for compact storage.
+"""
+
+from array import array
+import heapq
+import math
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+NO_HOP = -1
+
+# Above this many decreased edges in one update, rows are dropped and
+# recomputed on demand instead of being relaxed edge by edge.
+MAX_INCREMENTAL_DECREASES = 16
+
+Neighbors = Callable[[int], Iterable[Tuple[int, float]]]
+
+
+class RoutingTable:
+    """
+    All-pairs distance and next-hop matrices over integer place ids.
+
+    `neighbors(u)` must yield `(v, cost)` for every usable edge u -> v; it is
+    called again whenever rows are (re)computed, so it should reflect the
+    current graph.
+    """
+
+    def __init__(self, num_nodes: int, neighbors: Neighbors):
+        self.num_nodes = num_nodes
+        self._neighbors = neighbors
+        # Rows are None until computed
+        self.distance: List[Optional[array]] = [None] * num_nodes
+        self.next_hop: List[Optional[array]] = [None] * num_nodes
+
+    def build(self):
+        """Compute every row (eager precompute)"""
+        for source in range(self.num_nodes):
+            self._compute_row(source)
+
+    def invalidate(self):
+        """Drop all rows; they will be recomputed on demand"""
+        self.distance = [None] * self.num_nodes
+        self.next_hop = [None] * self.num_nodes
+
+    @property
+    def computed_rows(self) -> int:
+        return sum(1 for row in self.distance if row is not None)
+
+    def _row(self, source: int) -> Tuple[array, array]:
+        if self.distance[source] is None:
+            self._compute_row(source)
+        return self.distance[source], self.next_hop[source]
+
+    def _compute_row(self, source: int):
+        """Single-source Dijkstra recording the first hop toward every node"""
+        n = self.num_nodes
+        dist = [math.inf] * n
+        first = [NO_HOP] * n
+        done = [False] * n
+        dist[source] = 0.0
+        first[source] = source
+        heap = [(0.0, source)]
+        neighbors = self._neighbors
+
+        while heap:
+            d, u = heapq.heappop(heap)
+            if done[u]:
+                continue
+            done[u] = True
+            hop = first[u]
+            for v, cost in neighbors(u):
+                nd = d + cost
+                if nd < dist[v]:
+                    dist[v] = nd
+                    first[v] = v if u == source else hop
+                    heapq.heappush(heap, (nd, v))
+
+        self.distance[source] = array('d', dist)
+        self.next_hop[source] = array('i', first)
+
+    def lookup(self, source: int, target: int) -> float:
+        """Shortest distance from source to target (inf if unreachable)"""
+        return self._row(source)[0][target]
+
+    def best_pair(self, sources: Sequence[int],
+                  targets: Sequence[int]) -> Tuple[Optional[int], Optional[int], float]:
+        """Cheapest (source, target) pair over all combinations"""
+        best = (None, None, math.inf)
+        for source in sources:
+            dist = self._row(source)[0]
+            for target in targets:
+                if dist[target] < best[2]:
+                    best = (source, target, dist[target])
+        return best
+
+    def path(self, source: int, target: int) -> Optional[List[int]]:
+        """Node ids from source to target following next hops, or None"""
+        if self._row(source)[1][target] == NO_HOP:
+            return None
+        path = [source]
+        node = source
+        while node != target:
+            node = self._row(node)[1][target]
+            if node == NO_HOP or len(path) > self.num_nodes:
+                return None  # inconsistent table; caller falls back to search
+            path.append(node)
+        return path
+
+    def apply_edge_changes(self, increased: Sequence[Tuple[int, int, float]],
+                           decreased: Sequence[Tuple[int, int, float]]):
+        """
+        Update the table after edge weights changed in the underlying graph.
+
+        Args:
+            increased: (u, v, old_cost) for directed edges whose cost went up
+                (or that disappeared). Must be called before the table is
+                used against the new graph, since affected rows are found
+                from the old distances.
+            decreased: (u, v, new_cost) for directed edges whose cost went
+                down (or that appeared).
+        """
+        if increased and decreased:
+            # Mixed batches are rare; keep the incremental paths simple
+            self.invalidate()
+            return
+
+        if increased:
+            affected = set()
+            for source, dist in enumerate(self.distance):
+                if dist is None:
+                    continue
+                for u, v, old_cost in increased:
+                    # Edge is tight (on some shortest path from source)
+                    if dist[u] != math.inf and dist[u] + old_cost <= dist[v] + 1e-9:
+                        affected.add(source)
+                        break
+            for source in affected:
+                self._compute_row(source)
+
+        if decreased:
+            if len(decreased) > MAX_INCREMENTAL_DECREASES:
+                # Cheaper to recompute rows lazily than to relax through every edge
+                self.invalidate()
+                return
+            computed = [s for s, row in enumerate(self.distance) if row is not None]
+            # Rows of the edge heads are recomputed exactly so that relaxing
+            # other rows through (u, v) sees final distances beyond v.
+            heads = {v for _, v, _ in decreased}
+            for head in heads:
+                self._compute_row(head)
+            n = self.num_nodes
+            for u, v, cost in decreased:
+                dist_v = self.distance[v]
+                for source in computed:
+                    if source in heads:
+                        continue
+                    dist_s = self.distance[source]
+                    hops_s = self.next_hop[source]
+                    if dist_s[u] == math.inf:
+                        continue
+                    via = dist_s[u] + cost
+                    if via >= dist_s[v]:
+                        continue
+                    hop = v if source == u else hops_s[u]
+                    for target in range(n):
+                        candidate = via + dist_v[target]
+                        if candidate < dist_s[target]:
+                            dist_s[target] = candidate
+                            hops_s[target] = hop
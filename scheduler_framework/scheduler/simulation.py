@@ -0,0 +1,235 @@
+"""
+Discrete-event simulation of a cell.
+
+Simulation steps a PlateScheduler and its RobotScheduler on a VirtualClock
+(see clock.py) without starting their threads: it runs scheduling passes
+until nothing changes, then jumps the clock to the next event (a device job
+or robot move finishing, or a WaitTask deadline). An 8-hour run takes
+seconds, and the same seed gives the same schedule.
+
+Robot moves are timed by the simulation: a move starts when one of the cell's
+robots is free and takes `move_seconds` (a number or a function of the
+plate); the plate's location changes and move callbacks run when it ends.
+Each move is recorded in the instrumentation as a transfer on its robot.
+SimulatedDevice starts each job when its plate has arrived and completes it
+`job_seconds` later. Cooperative planning (`use_reservations`) waits on
+other threads, so it is not supported here.
+"""
+
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+from .active_plate import ActivePlate, PlateLocation, PlatePlace
+from .clock import VirtualClock
+from .device_manager import AccessibleDeviceInterface, RobotInterface
+from .plate_scheduler import PlateScheduler
+from .worklist import Worklist
+
+logger = logging.getLogger(__name__)
+
+Seconds = Union[float, Callable[[ActivePlate], float]]
+
+
+class SimulatedDevice(AccessibleDeviceInterface):
+    """
+    Device whose jobs take `job_seconds` of simulated time.
+
+    Locations are handed out while not reserved. Override `job_duration()`
+    for per-plate or random durations.
+    """
+
+    def __init__(self, name: str, product_name: str, clock: VirtualClock,
+                 job_seconds: Seconds = 60.0, num_locations: int = 1):
+        super().__init__(name, product_name)
+        self.clock = clock
+        self.job_seconds = job_seconds
+        self.locations: List[PlateLocation] = []
+        for i in range(num_locations):
+            location = PlateLocation(f"{name}_loc{i}", name)
+            location.places = [PlatePlace(f"{name}_place{i}", location)]
+            self.locations.append(location)
+        # Plates whose job waits for their robot move
+        self._awaiting: List[ActivePlate] = []
+        self.jobs = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def plate_location_info(self) -> List[PlateLocation]:
+        return self.locations
+
+    def get_available_location(self, active_plate):
+        for location in self.locations:
+            if location.available and not location.reserved.is_set():
+                return location
+        return None
+
+    def reserve_location(self, location, active_plate) -> bool:
+        location.reserved.set()
+        return True
+
+    def lock_place(self, place_name: str):
+        pass
+
+    def job_duration(self, active_plate: ActivePlate) -> float:
+        return self.job_seconds(active_plate) if callable(self.job_seconds) else self.job_seconds
+
+    def add_job(self, active_plate: ActivePlate):
+        if active_plate.current_location is active_plate.destination_location:
+            self._start(active_plate)
+        else:
+            self._awaiting.append(active_plate)
+
+    def plate_arrived(self, active_plate: ActivePlate):
+        """Called by the simulation when a move to this device ends"""
+        if active_plate in self._awaiting:
+            self._awaiting.remove(active_plate)
+            self._start(active_plate)
+
+    def _start(self, active_plate: ActivePlate):
+        duration = max(0.0, self.job_duration(active_plate))
+        self.jobs += 1
+        self.busy_seconds += duration
+        self.clock.call_later(duration, active_plate.mark_job_completed)
+
+
+class SimulatedRobot(RobotInterface):
+    """Robot that reaches every location; transfers cost nothing in the simulation"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.transfers = 0
+
+    def transfer_plate(self, src_device, src_place, dst_device, dst_place, labware_name, barcode):
+        self.transfers += 1
+
+    def get_transfer_weight(self, src_device, src_location, src_place,
+                            dst_device, dst_location, dst_place) -> float:
+        return float('inf') if src_location is dst_location else 1.0
+
+
+class Simulation:
+    """Discrete-event driver for a PlateScheduler on a VirtualClock"""
+
+    def __init__(self, plate_scheduler: PlateScheduler, move_seconds: Seconds = 10.0):
+        if not isinstance(plate_scheduler.clock, VirtualClock):
+            raise ValueError("Simulation needs a PlateScheduler with a VirtualClock")
+        if plate_scheduler.robot_scheduler.cooperative_planner is not None:
+            raise ValueError("Cooperative planning is not supported in simulation")
+        self.plate_scheduler = plate_scheduler
+        self.robot_scheduler = plate_scheduler.robot_scheduler
+        self.device_manager = plate_scheduler.device_manager
+        self.clock: VirtualClock = plate_scheduler.clock
+        self.move_seconds = move_seconds
+        # Move durations are simulated, not measured
+        self.robot_scheduler.record_transfer_durations = False
+        self._robot_free_at: List[float] = []
+        self.robot_busy_seconds = 0.0
+        self.moves = 0
+        # Wall time and CPU spent in each scheduling pass
+        self.pass_seconds: List[float] = []
+        self.pass_cpu_seconds = 0.0
+
+    def move_duration(self, active_plate: ActivePlate) -> float:
+        return self.move_seconds(active_plate) if callable(self.move_seconds) else self.move_seconds
+
+    @property
+    def idle(self) -> bool:
+        """No worklist queued or running"""
+        return self.plate_scheduler.worklist_queue.empty() and not self.plate_scheduler.worklist_runs
+
+    def settle(self):
+        """Run scheduling passes and start robot moves until nothing changes at this instant"""
+        scheduler = self.plate_scheduler
+        while True:
+            with scheduler._wakeup:
+                changed = scheduler._state_changed
+                scheduler._state_changed = False
+            if changed:
+                started, cpu_started = time.perf_counter(), time.thread_time()
+                scheduler._admit_worklists()
+                if scheduler.worklist_runs:
+                    scheduler._scheduling_pass()
+                self.pass_seconds.append(time.perf_counter() - started)
+                self.pass_cpu_seconds += time.thread_time() - cpu_started
+            moved = self._start_moves()
+            if not (changed or moved):
+                return
+
+    def _start_moves(self) -> bool:
+        robots = max(1, len(self.device_manager.robots))
+        if len(self._robot_free_at) != robots:
+            self._robot_free_at = (self._robot_free_at + [self.clock.now] * robots)[:robots]
+        started = False
+        while not self.robot_scheduler.pending_jobs.empty():
+            active_plate = self.robot_scheduler.pending_jobs.get_nowait()
+            robot = min(range(robots), key=self._robot_free_at.__getitem__)
+            start = max(self.clock.now, self._robot_free_at[robot])
+            duration = max(0.0, self.move_duration(active_plate))
+            self._robot_free_at[robot] = start + duration
+            self.robot_busy_seconds += duration
+            self.moves += 1
+            self.clock.call_at(start + duration,
+                               lambda plate=active_plate, robot=robot, start=start:
+                               self._finish_move(plate, robot, start))
+            started = True
+        return started
+
+    def _finish_move(self, active_plate: ActivePlate, robot: int, start: float):
+        self._record_move(active_plate, robot, start)
+        try:
+            self.robot_scheduler._move_plate(active_plate)
+        finally:
+            location = active_plate.destination_location
+            device = self.device_manager.get_device(location.device_name) if location else None
+            if hasattr(device, "plate_arrived"):
+                device.plate_arrived(active_plate)
+            for callback in self.robot_scheduler.move_completed_callbacks:
+                callback(active_plate)
+
+    def _record_move(self, active_plate: ActivePlate, robot: int, start: float):
+        robots = list(self.device_manager.robots)
+        robot_name = robots[robot] if robot < len(robots) else f"Robot{robot + 1}"
+        instrumentation = self.robot_scheduler.instrumentation
+        instrumentation.metrics.histogram("scheduler_robot_transfer_seconds").observe(
+            self.clock.now - start, robot=robot_name)
+        source = active_plate.current_location
+        destination = active_plate.destination_location
+        instrumentation.tracer.record(
+            f"{active_plate.barcode} {source.name if source else '?'} -> "
+            f"{destination.name if destination else '?'}", "transfer", robot_name, start, self.clock.now,
+            process="Robots", args={"plate": active_plate.barcode})
+
+    def run(self, until: Optional[float] = None) -> float:
+        """
+        Run until every enqueued worklist has completed (or the clock reaches
+        `until`); returns the simulated time.
+
+        Raises RuntimeError if work remains but nothing is left to happen.
+        """
+        while True:
+            self.settle()
+            if self.idle:
+                break
+            next_time = self.clock.next_event_time()
+            if until is not None and (next_time is None or next_time > until):
+                self.clock.now = max(self.clock.now, until)
+                break
+            if next_time is None:
+                raise RuntimeError("Simulation stalled:\n" + self.plate_scheduler.get_status())
+            self.clock.run_next()
+        return self.clock.now
+
+    def run_worklists(self, worklists: List[Worklist]) -> float:
+        """Enqueue the worklists and run them to completion; returns the simulated makespan"""
+        started = self.clock.now
+        for worklist in worklists:
+            self.plate_scheduler.enqueue_worklist(worklist)
+        return self.run() - started
+
+    def device_utilisation(self) -> Dict[str, float]:
+        """Busy fraction of each SimulatedDevice's locations so far"""
+        elapsed = self.clock.now
+        return {device.name: device.busy_seconds / (len(device.locations) * elapsed) if elapsed else 0.0
+                for device in self.device_manager.devices.values()
+                if isinstance(device, SimulatedDevice) and device.locations}
@@ -0,0 +1,357 @@
+"""
+StateJournal - crash-recoverable record of the scheduler's state.
+
+Every state transition (worklist queued/started/completed, plate released,
+task dispatched, plate moved, job completed, wait started, lookahead
+reservation staged/released, plate removed) is appended to a SQLite
+database in WAL mode, each with its own ULID. The journal folds the same
+events into a JournalState as they are recorded and writes it as a
+snapshot every `snapshot_every` events or `snapshot_interval` seconds.
+
+After a crash, `load_state()` reads the latest snapshot and replays only
+the events recorded after it, so recovery time is bounded by the snapshot
+period rather than by how long the cell has been running.
+PlateScheduler.recover() turns the state back into worklists and
+ActivePlates (see plate_scheduler.py).
+
+Worklists are stored in full (plates, transfers and task lists) so queued
+worklists can be rebuilt; dispatch plans and completion callbacks are not
+stored.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .active_plate import Plate
+from .ids import new_ulid_str
+from .tasks import PlateTask, WaitTask
+from .worklist import Transfer, TransferOverview, TransferTasks, Worklist
+
+logger = logging.getLogger(__name__)
+
+# Event kinds
+WORKLIST_ENQUEUED = "worklist_enqueued"
+WORKLIST_STARTED = "worklist_started"
+WORKLIST_COMPLETED = "worklist_completed"
+PLATE_RELEASED = "plate_released"
+PLATE_REMOVED = "plate_removed"
+TASK_DISPATCHED = "task_dispatched"
+PLATE_MOVED = "plate_moved"
+TASK_COMPLETED = "task_completed"
+WAIT_STARTED = "wait_started"
+WAIT_CANCELLED = "wait_cancelled"
+STEP_STAGED = "step_staged"
+STEP_RELEASED = "step_released"
+
+# Worklist statuses in JournalState
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+
+LocationRef = Optional[Dict[str, str]]
+
+
+def location_ref(location) -> LocationRef:
+    """Journal form of a PlateLocation"""
+    if location is None:
+        return None
+    return {"device": location.device_name, "location": location.name}
+
+
+def _task_to_dict(task) -> Dict[str, Any]:
+    if isinstance(task, WaitTask):
+        return {"type": "wait", "duration_seconds": task.duration_seconds,
+                "description": task.description, "task_id": task.task_id}
+    return {"type": "plate", "device_type": task.device_type, "command": task.command,
+            "parameters": task.parameters, "task_id": task.task_id}
+
+
+def _task_from_dict(data: Dict[str, Any]):
+    if data["type"] == "wait":
+        return WaitTask(data["duration_seconds"], data.get("description", ""), task_id=data["task_id"])
+    return PlateTask(data["device_type"], data["command"], dict(data.get("parameters") or {}),
+                     task_id=data["task_id"])
+
+
+def _plate_to_dict(plate: Plate) -> Dict[str, Any]:
+    return {"barcode": plate.barcode, "labware_name": plate.labware_name,
+            "labware_format": plate.labware_format, "currently_lidded": plate.currently_lidded,
+            "plate_id": plate.plate_id}
+
+
+def worklist_to_dict(worklist: Worklist) -> Dict[str, Any]:
+    """Everything needed to rebuild a worklist (except its plan and callbacks)"""
+    plates: Dict[str, Dict[str, Any]] = {}
+
+    def ref(plate: Plate) -> str:
+        plates.setdefault(plate.plate_id, _plate_to_dict(plate))
+        return plate.plate_id
+
+    data: Dict[str, Any] = {
+        "worklist_id": worklist.worklist_id,
+        "name": worklist.name,
+        "priority": worklist.priority,
+        "share": worklist.share,
+        "source_plates": [ref(plate) for plate in worklist.source_plates],
+        "destination_plates": [ref(plate) for plate in worklist.destination_plates],
+        "transfer_overview": None,
+    }
+    overview = worklist.transfer_overview
+    if overview is not None:
+        data["transfer_overview"] = {
+            "transfers": [{"source": ref(t.source_plate), "destination": ref(t.destination_plate),
+                           "source_well": t.source_well, "destination_well": t.destination_well,
+                           "volume": t.volume} for t in overview.transfers],
+            "source_plates": {key: ref(plate) for key, plate in overview.source_plates.items()},
+            "destination_plates": {key: ref(plate) for key, plate in overview.destination_plates.items()},
+            "tasks": {name: [_task_to_dict(task) for task in getattr(overview.tasks, name)]
+                      for name in TransferTasks.__dataclass_fields__},
+        }
+    data["plates"] = plates
+    return data
+
+
+def worklist_from_dict(data: Dict[str, Any]) -> Worklist:
+    """Inverse of worklist_to_dict()"""
+    plates = {plate_id: Plate(**fields) for plate_id, fields in data["plates"].items()}
+    worklist = Worklist(data["name"])
+    worklist.worklist_id = data["worklist_id"]
+    worklist.priority = data.get("priority", 0)
+    worklist.share = data.get("share", 1.0)
+    worklist.source_plates = [plates[plate_id] for plate_id in data["source_plates"]]
+    worklist.destination_plates = [plates[plate_id] for plate_id in data["destination_plates"]]
+    overview = data.get("transfer_overview")
+    if overview is not None:
+        worklist.transfer_overview = TransferOverview(
+            transfers=[Transfer(plates[t["source"]], plates[t["destination"]], t.get("source_well"),
+                                t.get("destination_well"), t.get("volume"))
+                       for t in overview["transfers"]],
+            source_plates={key: plates[plate_id] for key, plate_id in overview["source_plates"].items()},
+            destination_plates={key: plates[plate_id]
+                                for key, plate_id in overview["destination_plates"].items()},
+            tasks=TransferTasks(**{name: [_task_from_dict(task) for task in tasks]
+                                   for name, tasks in overview["tasks"].items()}),
+        )
+    return worklist
+
+
+class JournalState:
+    """
+    Scheduler state rebuilt from journal events.
+
+    `worklists` maps worklist_id to {"data", "status", "released"} and
+    `plates` maps active_plate_id to the plate's worklist, kind, instance
+    index, task index, busy flag, locations and in-progress wait.
+    `reservations` maps "device/location" to the plate holding it.
+    """
+
+    def __init__(self):
+        self.worklists: Dict[str, Dict[str, Any]] = {}
+        self.plates: Dict[str, Dict[str, Any]] = {}
+        self.reservations: Dict[str, str] = {}
+        # Sequence number of the last event folded in
+        self.last_seq = 0
+
+    @staticmethod
+    def _key(ref: LocationRef) -> Optional[str]:
+        return f"{ref['device']}/{ref['location']}" if ref else None
+
+    def _release_reservations(self, plate_id: str):
+        for key in [key for key, holder in self.reservations.items() if holder == plate_id]:
+            del self.reservations[key]
+
+    def apply(self, seq: int, kind: str, entity_id: str, data: Dict[str, Any]):
+        """Fold one event into the state"""
+        self.last_seq = seq
+        if kind in (WORKLIST_ENQUEUED, WORKLIST_STARTED):
+            entry = self.worklists.setdefault(entity_id, {"data": data.get("worklist"), "released": {}})
+            if data.get("worklist") is not None:
+                entry["data"] = data["worklist"]
+            entry["status"] = QUEUED if kind == WORKLIST_ENQUEUED else RUNNING
+        elif kind == WORKLIST_COMPLETED:
+            self.worklists.pop(entity_id, None)
+        elif kind == PLATE_RELEASED:
+            worklist = self.worklists.get(data["worklist_id"])
+            if worklist is not None:
+                released = worklist["released"]
+                released[data["kind"]] = released.get(data["kind"], 0) + 1
+            self.plates[entity_id] = {
+                "worklist_id": data["worklist_id"], "kind": data["kind"],
+                "instance_index": data["instance_index"], "task_index": 0, "busy": False,
+                "current_location": None, "destination_location": None, "wait": None,
+            }
+        elif kind == PLATE_REMOVED:
+            self.plates.pop(entity_id, None)
+            self._release_reservations(entity_id)
+        elif entity_id in self.plates:
+            self._apply_plate(self.plates[entity_id], kind, entity_id, data)
+
+    def _apply_plate(self, plate: Dict[str, Any], kind: str, plate_id: str, data: Dict[str, Any]):
+        if kind == TASK_DISPATCHED:
+            self._release_reservations(plate_id)
+            plate.update(busy=True, task_index=data["task_index"], device=data["device"],
+                         current_location=data["current_location"],
+                         destination_location=data["destination_location"])
+            self.reservations[self._key(data["destination_location"])] = plate_id
+        elif kind == PLATE_MOVED:
+            plate["current_location"] = data["current_location"]
+        elif kind == TASK_COMPLETED:
+            self._release_reservations(plate_id)
+            plate.update(busy=False, task_index=data["task_index"], wait=None,
+                         current_location=data["current_location"])
+        elif kind == WAIT_STARTED:
+            plate.update(busy=True, task_index=data["task_index"],
+                         wait={"duration_seconds": data["duration_seconds"], "started_at": data["started_at"]})
+        elif kind == WAIT_CANCELLED:
+            plate.update(busy=False, wait=None)
+        elif kind == STEP_STAGED:
+            self.reservations[self._key(data["location"])] = plate_id
+        elif kind == STEP_RELEASED:
+            self.reservations.pop(self._key(data["location"]), None)
+
+    def worklists_with_status(self, status: str) -> List[Tuple[str, Dict[str, Any]]]:
+        return [(worklist_id, entry) for worklist_id, entry in self.worklists.items()
+                if entry["status"] == status]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"worklists": self.worklists, "plates": self.plates,
+                "reservations": self.reservations, "last_seq": self.last_seq}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'JournalState':
+        state = cls()
+        state.worklists = data.get("worklists", {})
+        state.plates = data.get("plates", {})
+        state.reservations = data.get("reservations", {})
+        state.last_seq = data.get("last_seq", 0)
+        return state
+
+
+@dataclass
+class RecoveryReport:
+    """What PlateScheduler.recover() restored"""
+    queued_worklists: List[Worklist] = field(default_factory=list)
+    running_worklists: List[Worklist] = field(default_factory=list)
+    plates: list = field(default_factory=list)
+    # Plates whose device job or robot move was cut off; they run the task again
+    interrupted: list = field(default_factory=list)
+    # Plates whose wait was restarted with the time it had left
+    resumed_waits: list = field(default_factory=list)
+    # Journaled locations no registered device has
+    unresolved_locations: List[str] = field(default_factory=list)
+
+
+class StateJournal:
+    """
+    Append-only SQLite journal of scheduler events with periodic snapshots.
+
+    Opening an existing journal loads its state, so recording continues
+    where the previous process left off.
+    """
+
+    def __init__(self, path: str, snapshot_every: int = 1000,
+                 snapshot_interval: Optional[float] = 60.0, keep_snapshots: int = 2):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.snapshot_interval = snapshot_interval
+        self.keep_snapshots = keep_snapshots
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Durable across process crashes; a power loss may drop the last transactions
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            data TEXT NOT NULL,
+            recorded_at REAL NOT NULL)""")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS snapshots (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_seq INTEGER NOT NULL,
+            state TEXT NOT NULL,
+            recorded_at REAL NOT NULL)""")
+        self.state, self.replayed_events = self._load()
+        self._events_since_snapshot = self.replayed_events
+        self._last_snapshot_at = time.monotonic()
+
+    def _load(self) -> Tuple[JournalState, int]:
+        row = self._conn.execute("SELECT event_seq, state FROM snapshots ORDER BY seq DESC LIMIT 1").fetchone()
+        state = JournalState.from_dict(json.loads(row[1])) if row else JournalState()
+        replayed = 0
+        for seq, kind, entity_id, data in self._conn.execute(
+                "SELECT seq, kind, entity_id, data FROM events WHERE seq > ? ORDER BY seq", (state.last_seq,)):
+            state.apply(seq, kind, entity_id, json.loads(data))
+            replayed += 1
+        return state, replayed
+
+    def load_state(self) -> JournalState:
+        """State from the latest snapshot plus the events recorded after it"""
+        with self._lock:
+            state, _ = self._load()
+        return state
+
+    def record(self, kind: str, entity_id: str, data: Optional[Dict[str, Any]] = None) -> str:
+        """Append an event; returns its ULID"""
+        event_id = new_ulid_str()
+        data = data or {}
+        encoded = json.dumps(data)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO events (event_id, kind, entity_id, data, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                (event_id, kind, entity_id, encoded, time.time()))
+            self.state.apply(cursor.lastrowid, kind, entity_id, data)
+            self._events_since_snapshot += 1
+            if (self._events_since_snapshot >= self.snapshot_every
+                    or (self.snapshot_interval is not None
+                        and time.monotonic() - self._last_snapshot_at >= self.snapshot_interval)):
+                self._snapshot()
+        return event_id
+
+    def snapshot(self):
+        """Write a snapshot of the current state now"""
+        with self._lock:
+            self._snapshot()
+
+    def _snapshot(self):
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.execute("INSERT INTO snapshots (event_seq, state, recorded_at) VALUES (?, ?, ?)",
+                               (self.state.last_seq, json.dumps(self.state.to_dict()), time.time()))
+            self._conn.execute("DELETE FROM snapshots WHERE seq NOT IN "
+                               "(SELECT seq FROM snapshots ORDER BY seq DESC LIMIT ?)",
+                               (max(1, self.keep_snapshots),))
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._events_since_snapshot = 0
+        self._last_snapshot_at = time.monotonic()
+
+    def compact(self) -> int:
+        """Delete events already covered by the oldest kept snapshot; returns the number deleted"""
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(event_seq) FROM snapshots").fetchone()
+            if not row or row[0] is None:
+                return 0
+            return self._conn.execute("DELETE FROM events WHERE seq <= ?", (row[0],)).rowcount
+
+    def events(self, since_seq: int = 0) -> List[Tuple[int, str, str, str, Dict[str, Any]]]:
+        """(seq, event_id, kind, entity_id, data) of the events after `since_seq`"""
+        with self._lock:
+            rows = self._conn.execute("SELECT seq, event_id, kind, entity_id, data FROM events "
+                                      "WHERE seq > ? ORDER BY seq", (since_seq,)).fetchall()
+        return [(seq, event_id, kind, entity_id, json.loads(data)) for seq, event_id, kind, entity_id, data in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __repr__(self):
+        return f"StateJournal({self.path}, {len(self.state.plates)} plates)"
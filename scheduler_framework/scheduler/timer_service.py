@@ -0,0 +1,145 @@
+"""
+TimerService - one thread for all pending timers.
+
+PlateScheduler used to start a sleeping thread per WaitTask. The service
+keeps every pending timer in a heap ordered by deadline and fires callbacks
+from a single thread, which only runs while timers are pending. Timers can
+be cancelled, and the whole service can be paused: while paused nothing
+fires and remaining times stand still; on resume every deadline moves back
+by the length of the pause.
+
+Callbacks run on the service thread and must not block for long, since
+later timers wait for them.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    """A scheduled callback; use TimerService.cancel() / remaining()"""
+
+    def __init__(self, deadline: float, callback: Callable[[], None], key: Hashable = None):
+        self.deadline = deadline
+        self.callback = callback
+        self.key = key
+        self.cancelled = False
+        self.fired = False
+
+    @property
+    def pending(self) -> bool:
+        return not self.cancelled and not self.fired
+
+    def __repr__(self):
+        state = "cancelled" if self.cancelled else "fired" if self.fired else "pending"
+        return f"TimerHandle({self.key}, {state})"
+
+
+class TimerService:
+    """Heap of deadlines served by one on-demand thread"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, name: str = "TimerService"):
+        self.clock = clock
+        self.name = name
+        self._heap: List[Tuple[float, int, TimerHandle]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._paused_at: Optional[float] = None
+
+    def schedule(self, delay: float, callback: Callable[[], None], key: Hashable = None) -> TimerHandle:
+        """Call `callback` after `delay` seconds (of unpaused time)"""
+        with self._condition:
+            now = self._paused_at if self._paused_at is not None else self.clock()
+            handle = TimerHandle(now + max(delay, 0.0), callback, key)
+            heapq.heappush(self._heap, (handle.deadline, next(self._sequence), handle))
+            self._ensure_thread()
+            self._condition.notify_all()
+        return handle
+
+    def cancel(self, handle: TimerHandle) -> bool:
+        """Cancel a pending timer; False if it already fired or was cancelled"""
+        with self._condition:
+            if not handle.pending:
+                return False
+            handle.cancelled = True
+            # Left in the heap and skipped when it comes up
+            self._condition.notify_all()
+            return True
+
+    def remaining(self, handle: TimerHandle) -> float:
+        """Seconds until a pending timer fires (0 once fired or cancelled)"""
+        with self._condition:
+            if not handle.pending:
+                return 0.0
+            now = self._paused_at if self._paused_at is not None else self.clock()
+            return max(0.0, handle.deadline - now)
+
+    @property
+    def paused(self) -> bool:
+        return self._paused_at is not None
+
+    def pause(self):
+        """Stop the clock for every pending timer"""
+        with self._condition:
+            if self._paused_at is None:
+                self._paused_at = self.clock()
+                self._condition.notify_all()
+
+    def resume(self):
+        """Restart the clock; deadlines move back by the length of the pause"""
+        with self._condition:
+            if self._paused_at is None:
+                return
+            shift = self.clock() - self._paused_at
+            self._paused_at = None
+            entries = []
+            for deadline, sequence, handle in self._heap:
+                handle.deadline = deadline + shift
+                entries.append((handle.deadline, sequence, handle))
+            heapq.heapify(entries)
+            self._heap = entries
+            self._condition.notify_all()
+
+    def pending(self) -> List[TimerHandle]:
+        """Pending timers, earliest first"""
+        with self._condition:
+            return [handle for _, _, handle in sorted(self._heap) if handle.pending]
+
+    def __len__(self):
+        return len(self.pending())
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    while self._heap and not self._heap[0][2].pending:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        # Nothing pending: the thread ends and is restarted on demand
+                        self._thread = None
+                        return
+                    if self._paused_at is not None:
+                        self._condition.wait()
+                        continue
+                    wait = self._heap[0][0] - self.clock()
+                    if wait <= 0:
+                        break
+                    self._condition.wait(wait)
+                _, _, handle = heapq.heappop(self._heap)
+                handle.fired = True
+            try:
+                handle.callback()
+            except Exception as e:
+                logger.error(f"Error in timer callback {handle}: {e}", exc_info=True)
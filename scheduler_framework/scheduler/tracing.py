@@ -0,0 +1,129 @@
+"""
+Tracing - span events for plate tasks, robot transfers and waits.
+
+A Tracer keeps finished spans (name, category, start, end) in a bounded
+buffer, oldest dropped first. Each span belongs to a track (a plate barcode,
+a robot name) within a process ("Plates", "Robots"). Times come from the
+tracer's clock, so under a VirtualClock spans are in simulated seconds.
+
+`chrome_trace()` exports the spans in the Chrome trace-event format, which
+chrome://tracing and ui.perfetto.dev show as one timeline row per track.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+@dataclass
+class Span:
+    """A finished span; times in the tracer clock's seconds"""
+    name: str
+    category: str
+    track: str
+    start: float
+    end: float
+    process: str = "Scheduler"
+    args: Dict[str, object] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class Tracer:
+    """Bounded buffer of spans with Chrome trace-event export"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, max_spans: int = 100_000,
+                 enabled: bool = True):
+        self.clock = clock
+        self.enabled = enabled
+        self._spans: deque = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        # Spans pushed out of the full buffer
+        self.dropped = 0
+
+    def record(self, name: str, category: str, track: str, start: float, end: Optional[float] = None,
+               process: str = "Scheduler", args: Optional[Dict[str, object]] = None) -> Optional[Span]:
+        """Add a finished span (`end` defaults to now); None while disabled"""
+        if not self.enabled:
+            return None
+        span = Span(name, category, str(track), start, self.clock() if end is None else end,
+                    process, dict(args) if args else {})
+        with self._lock:
+            if len(self._spans) == self._spans.maxlen:
+                self.dropped += 1
+            self._spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, category: str, track: str, process: str = "Scheduler",
+             args: Optional[Dict[str, object]] = None) -> Iterator[Dict[str, object]]:
+        """Record the enclosed block as a span; the yielded dict becomes its args"""
+        span_args = dict(args) if args else {}
+        start = self.clock()
+        try:
+            yield span_args
+        finally:
+            self.record(name, category, track, start, process=process, args=span_args)
+
+    def spans(self, category: Optional[str] = None, track: Optional[str] = None) -> List[Span]:
+        """Buffered spans in the order they finished, optionally filtered"""
+        with self._lock:
+            spans = list(self._spans)
+        return [span for span in spans
+                if (category is None or span.category == category)
+                and (track is None or span.track == track)]
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self.dropped = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._spans)
+
+    def chrome_trace(self) -> dict:
+        """
+        The spans as a Chrome trace-event document: one complete ("X") event
+        per span, in microseconds from the earliest span, with process and
+        thread names taken from each span's process and track.
+        """
+        spans = sorted(self.spans(), key=lambda span: span.start)
+        origin = spans[0].start if spans else 0.0
+        pids: Dict[str, int] = {}
+        tids: Dict[tuple, int] = {}
+        events = []
+        for span in spans:
+            pid = pids.get(span.process)
+            if pid is None:
+                pid = pids[span.process] = len(pids) + 1
+                events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                               "args": {"name": span.process}})
+            tid = tids.get((span.process, span.track))
+            if tid is None:
+                tid = tids[(span.process, span.track)] = len(tids) + 1
+                events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                               "args": {"name": span.track}})
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round((span.start - origin) * 1e6, 3),
+                "dur": round(max(0.0, span.duration) * 1e6, 3),
+                "pid": pid,
+                "tid": tid,
+                "args": {key: value if isinstance(value, (int, float, bool)) or value is None else str(value)
+                         for key, value in span.args.items()},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, path: str):
+        """Write chrome_trace() as JSON"""
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
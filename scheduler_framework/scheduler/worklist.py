@@ -56,6 +56,11 @@ class Worklist:
         self.source_plates: List[Plate] = []
         self.destination_plates: List[Plate] = []
         self.transfer_overview: Optional[TransferOverview] = None
+        # Used when several worklists run at once (see worklist_policy.py)
+        self.priority = 0
+        self.share = 1.0
+        # Offline schedule PlateScheduler follows (see makespan_planner.py)
+        self.dispatch_plan = None
         self._worklist_complete_callbacks = []
     
     def add_source_plate(self, plate: Plate):
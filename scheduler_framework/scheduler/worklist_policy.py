@@ -0,0 +1,89 @@
+"""
+Worklist policies - which worklist is served first.
+
+When several worklists run at the same time, each scheduling pass walks them
+in the order given by the PlateScheduler's policy. Plates of earlier
+worklists get the first pick of free devices.
+"""
+
+from abc import ABC, abstractmethod
+import time
+from typing import Dict, List, Optional
+
+from .active_plate import ActivePlate
+from .active_plate_factory import ActivePlateFactory, ActiveSourcePlateFactory, ActiveDestinationPlateFactory
+from .active_plate_registry import ActivePlateRegistry
+from .worklist import Worklist
+
+
+class WorklistRun:
+    """A worklist being processed, with its own factories and plates"""
+
+    def __init__(self, worklist: Worklist, sequence: int,
+                 registry: Optional[ActivePlateRegistry] = None):
+        self.worklist = worklist
+        self.sequence = sequence  # admission order
+        self.registry = registry if registry is not None else ActivePlateRegistry()
+        self.factories: List[ActivePlateFactory] = [
+            ActiveSourcePlateFactory(worklist, self.registry),
+            ActiveDestinationPlateFactory(worklist, self.registry)
+        ]
+        self.tasks_dispatched = 0
+        # Dispatched operations per device, when following a dispatch plan
+        self.plan_progress: Dict[str, int] = {}
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def priority(self) -> int:
+        return self.worklist.priority
+
+    @property
+    def share(self) -> float:
+        return self.worklist.share
+
+    @property
+    def dispatch_plan(self):
+        return self.worklist.dispatch_plan
+
+    @property
+    def active_plates(self) -> List[ActivePlate]:
+        """This worklist's plates in the registry"""
+        return self.registry.select(worklist=self.worklist)
+
+    @property
+    def plates_to_create(self) -> int:
+        return sum(factory.number_of_plates_to_create for factory in self.factories)
+
+    def __repr__(self):
+        return f"WorklistRun({self.worklist.name}, priority={self.priority})"
+
+
+class WorklistPolicy(ABC):
+    """Orders the running worklists for a scheduling pass"""
+
+    @abstractmethod
+    def order(self, runs: List[WorklistRun]) -> List[WorklistRun]:
+        """Return the runs in the order their plates should be scheduled"""
+        pass
+
+
+class PriorityPolicy(WorklistPolicy):
+    """Highest `Worklist.priority` first; first come, first served within a priority"""
+
+    def order(self, runs: List[WorklistRun]) -> List[WorklistRun]:
+        return sorted(runs, key=lambda run: (-run.priority, run.sequence))
+
+
+class FairSharePolicy(WorklistPolicy):
+    """
+    Serve the worklist that has received the least of its share so far.
+
+    Each worklist's dispatched task count is divided by its `Worklist.share`,
+    so a worklist with share 2.0 gets about twice the device dispatches of
+    one with share 1.0 while both are waiting for the same devices.
+    """
+
+    def order(self, runs: List[WorklistRun]) -> List[WorklistRun]:
+        return sorted(runs, key=lambda run: (run.tasks_dispatched / max(run.share, 1e-9),
+                                             -run.priority, run.sequence))
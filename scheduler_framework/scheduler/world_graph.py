@@ -0,0 +1,236 @@
+"""
+WorldGraph - compact, integer-indexed graph of plate places.
+
+Places are interned to integer ids and edges are stored in CSR form
+(compressed sparse rows):
+- offsets[u] .. offsets[u + 1] is the slice of edges leaving place u
+- targets[e], weights[e], robot_index[e] describe edge e
+
+Edges within a row are sorted by target, so parallel edges (several robots
+linking the same pair of places) are contiguous. An index keyed by
+`u * num_places + v` gives O(1) lookup of the first edge of each pair.
+
+Node/Connection objects are only created on demand, for callers that still
+walk the graph object-by-object.
+
+Uses `array` (standard library only) for compact storage.
+"""
+
+from array import array
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .active_plate import PlateLocation, PlatePlace
+
+
+class Node:
+    """Node in the path finding graph"""
+
+    def __init__(self, key, index: int = -1, graph: Optional['WorldGraph'] = None):
+        self.key = key
+        self.index = index  # integer place id in the owning WorldGraph
+        self._graph = graph
+        self._connections: Optional[List['Connection']] = None
+        # Legacy per-search fields. PathPlanner keeps search state local to
+        # each search and never mutates these.
+        self.distance = math.inf
+        self.previous: Optional['Node'] = None
+        self.visited = False
+
+    @property
+    def connections(self) -> List['Connection']:
+        """Outgoing connections, materialized from the owning graph on first access"""
+        if self._connections is None:
+            self._connections = (self._graph.connections_of(self.index)
+                                 if self._graph is not None else [])
+        return self._connections
+
+    @connections.setter
+    def connections(self, value: List['Connection']):
+        self._connections = value
+
+    def __repr__(self):
+        return f"Node({self.key})"
+
+
+class Connection:
+    """Connection between nodes in the graph"""
+
+    def __init__(self, node: Node, cost: float, extra_info=None):
+        self.node = node
+        self.cost = cost
+        self.extra_info = extra_info  # Usually the robot that can make this transfer
+
+
+class WorldGraph:
+    """
+    CSR graph over interned place ids.
+
+    Per-place metadata lives in lists indexed by place id:
+    `place_keys`, `places`, `locations` and `devices`.
+    """
+
+    def __init__(self, place_keys: List[str], places: List[PlatePlace],
+                 locations: List[PlateLocation], devices: list, robots: list,
+                 offsets: array, targets: array, weights: array, robot_index: array,
+                 robot_enabled: Optional[bytearray] = None):
+        self.place_keys = place_keys
+        self.places = places
+        self.locations = locations
+        self.devices = devices
+        self.robots = robots
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.robot_index = robot_index
+        self.robot_enabled = robot_enabled if robot_enabled is not None else bytearray([1] * len(robots))
+        self.place_ids: Dict[str, int] = {key: i for i, key in enumerate(place_keys)}
+        self.robot_ids: Dict[str, int] = {robot.name: i for i, robot in enumerate(robots)}
+        self._pair_index: Dict[int, int] = {}
+        n = len(place_keys)
+        for u in range(n):
+            previous = -1
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                if v != previous:
+                    self._pair_index[u * n + v] = e
+                    previous = v
+        self._nodes: List[Optional[Node]] = [None] * n
+
+    @classmethod
+    def empty(cls) -> 'WorldGraph':
+        return cls([], [], [], [], [], array('l', [0]), array('l'), array('d'), array('l'))
+
+    @classmethod
+    def from_rows(cls, place_keys: List[str], places: List[PlatePlace],
+                  locations: List[PlateLocation], devices: list, robots: list,
+                  rows: Sequence[Iterable[Tuple[int, float, int]]],
+                  robot_enabled: Optional[bytearray] = None) -> 'WorldGraph':
+        """Build from per-place edge lists of (target, weight, robot index)"""
+        offsets = array('l', [0])
+        targets = array('l')
+        weights = array('d')
+        robot_index = array('l')
+        for row in rows:
+            if row:
+                row_targets, row_weights, row_robots = zip(*sorted(row))
+                targets.extend(row_targets)
+                weights.extend(row_weights)
+                robot_index.extend(row_robots)
+            offsets.append(len(targets))
+        return cls(place_keys, places, locations, devices, robots,
+                   offsets, targets, weights, robot_index, robot_enabled)
+
+    @property
+    def num_places(self) -> int:
+        return len(self.place_keys)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    def node(self, index: int) -> Node:
+        """Node object for a place id (created on demand)"""
+        node = self._nodes[index]
+        if node is None:
+            node = self._nodes[index] = Node(self.place_keys[index], index, self)
+        return node
+
+    def connections_of(self, u: int) -> List[Connection]:
+        """Materialize Connection objects for the edges leaving place u"""
+        return [Connection(self.node(self.targets[e]), self.weights[e], self.robots[self.robot_index[e]])
+                for e in range(self.offsets[u], self.offsets[u + 1])]
+
+    def neighbors(self, u: int) -> List[Tuple[int, float]]:
+        """(target, weight) for usable edges leaving place u"""
+        targets, weights, robot_index, enabled = self.targets, self.weights, self.robot_index, self.robot_enabled
+        return [(targets[e], weights[e])
+                for e in range(self.offsets[u], self.offsets[u + 1])
+                if enabled[robot_index[e]]]
+
+    def degree(self, u: int) -> int:
+        return self.offsets[u + 1] - self.offsets[u]
+
+    def _pair_edges(self, u: int, v: int) -> range:
+        first = self._pair_index.get(u * self.num_places + v)
+        if first is None:
+            return range(0)
+        last = first
+        end = self.offsets[u + 1]
+        while last < end and self.targets[last] == v:
+            last += 1
+        return range(first, last)
+
+    def find_edge(self, u: int, v: int) -> Optional[int]:
+        """Cheapest usable edge u -> v, or None"""
+        if not (0 <= u < self.num_places and 0 <= v < self.num_places):
+            return None
+        best = None
+        for e in self._pair_edges(u, v):
+            if self.robot_enabled[self.robot_index[e]] and (best is None or self.weights[e] < self.weights[best]):
+                best = e
+        return best
+
+    def edge_cost(self, u: int, v: int) -> float:
+        """Cost of the cheapest usable edge u -> v (inf if none)"""
+        e = self.find_edge(u, v)
+        return math.inf if e is None else self.weights[e]
+
+    def edge_robot(self, e: int):
+        return self.robots[self.robot_index[e]]
+
+    def set_edge_weight(self, u: int, v: int, robot_name: str, weight: float) -> bool:
+        """Set the weight of a robot's edge u -> v; False if the edge does not exist"""
+        r = self.robot_ids.get(robot_name)
+        for e in self._pair_edges(u, v):
+            if self.robot_index[e] == r:
+                self.weights[e] = weight
+                self._invalidate_connections(u)
+                return True
+        return False
+
+    def with_edges(self, edges: Iterable[Tuple[int, int, float, int]]) -> 'WorldGraph':
+        """New graph with extra (u, v, weight, robot index) edges added"""
+        rows: List[List[Tuple[int, float, int]]] = [
+            [(self.targets[e], self.weights[e], self.robot_index[e])
+             for e in range(self.offsets[u], self.offsets[u + 1])]
+            for u in range(self.num_places)
+        ]
+        for u, v, w, r in edges:
+            rows[u].append((v, w, r))
+        return WorldGraph.from_rows(self.place_keys, self.places, self.locations, self.devices,
+                                    self.robots, rows, bytearray(self.robot_enabled))
+
+    def robot_pairs(self, robot_name: str) -> Set[Tuple[int, int]]:
+        """All (u, v) place pairs linked by the given robot"""
+        r = self.robot_ids.get(robot_name)
+        if r is None:
+            return set()
+        return {(u, self.targets[e])
+                for u in range(self.num_places)
+                for e in range(self.offsets[u], self.offsets[u + 1])
+                if self.robot_index[e] == r}
+
+    def set_robot_enabled(self, robot_name: str, enabled: bool):
+        r = self.robot_ids.get(robot_name)
+        if r is not None:
+            self.robot_enabled[r] = 1 if enabled else 0
+
+    def _invalidate_connections(self, u: int):
+        node = self._nodes[u]
+        if node is not None:
+            node._connections = None
+
+    def snapshot(self) -> 'WorldGraph':
+        """
+        Copy of the graph whose weights/robot availability can change independently.
+
+        The structural arrays are shared (they are never mutated in place);
+        only the weights and the robot mask are copied.
+        """
+        graph = WorldGraph.__new__(WorldGraph)
+        graph.__dict__.update(self.__dict__)
+        graph.weights = array('d', self.weights)
+        graph.robot_enabled = bytearray(self.robot_enabled)
+        graph._nodes = [None] * self.num_places
+        return graph
@@ -58,6 +58,20 @@ class MockDevice(AccessibleDeviceInterface):
         active_plate.mark_job_completed()
 
 
+class AsyncMockDevice(MockDevice):
+    """MockDevice that completes jobs on a background thread"""
+    
+    def __init__(self, name: str, product_name: str, delay: float = 0.01):
+        super().__init__(name, product_name)
+        self.delay = delay
+    
+    def add_job(self, active_plate):
+        self.job_queue.append(active_plate)
+        timer = threading.Timer(self.delay, active_plate.mark_job_completed)
+        timer.daemon = True
+        timer.start()
+
+
 class MockRobot(RobotInterface):
     """Mock robot for testing"""
     
@@ -156,13 +170,11 @@ def setup_with_devices(device_manager, mock_device, mock_robot):
 
 @pytest.fixture(autouse=True)
 def reset_active_plates():
-    """Reset active plates list before each test"""
+    """Reset the plate serial counter before each test"""
     with ActivePlate._lock:
-        ActivePlate._active_plates.clear()
         ActivePlate._plate_serial_counter = 0
     yield
     with ActivePlate._lock:
-        ActivePlate._active_plates.clear()
         ActivePlate._plate_serial_counter = 0
 
 
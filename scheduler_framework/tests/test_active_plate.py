@@ -217,18 +217,15 @@ class TestActivePlate:
         assert "ActiveSourcePlate" in repr_str
         assert "0" in repr_str
     
-    def test_active_plate_tracking(self, sample_worklist):
-        """Test that active plates are tracked in class variable"""
-        with ActivePlate._lock:
-            initial_count = len(ActivePlate._active_plates)
+    def test_plates_not_registered_globally(self, sample_worklist):
+        """Test that creating a plate does not register it anywhere"""
+        assert not hasattr(ActivePlate, "_active_plates")
         
         plate1 = ActiveSourcePlate(sample_worklist, 0)
         plate2 = ActiveSourcePlate(sample_worklist, 1)
         
-        with ActivePlate._lock:
-            assert len(ActivePlate._active_plates) == initial_count + 2
-            assert plate1 in ActivePlate._active_plates
-            assert plate2 in ActivePlate._active_plates
+        assert plate1.state_changed_callbacks == []
+        assert plate1.plate_serial_number != plate2.plate_serial_number
 
 
 class TestActiveSourcePlate:
@@ -0,0 +1,152 @@
+"""
+Unit tests for active_plate_registry.py
+"""
+
+import pytest
+import threading
+from scheduler import (
+    PlateScheduler, RobotScheduler, ActivePlate, ActiveSourcePlate, ActiveDestinationPlate
+)
+from scheduler.active_plate_registry import ActivePlateRegistry, task_key
+from scheduler.active_plate_factory import ActiveSourcePlateFactory
+from scheduler.worklist import Worklist, PlateTask, WaitTask
+
+
+def _plate(plate_class, worklist, index, tasks=None):
+    plate = plate_class(worklist, index)
+    if tasks is not None:
+        plate.todo_list = tasks
+        plate.current_task_index = 0
+        plate.still_have_todos = len(tasks) > 0
+    return plate
+
+
+class TestActivePlateRegistry:
+    """Tests for ActivePlateRegistry"""
+    
+    def test_add_and_remove(self, sample_worklist):
+        """Test membership and duplicate registration"""
+        registry = ActivePlateRegistry()
+        plate = ActiveSourcePlate(sample_worklist, 0)
+        
+        assert registry.add(plate) is True
+        assert registry.add(plate) is False
+        assert plate in registry
+        assert len(registry) == 1
+        
+        assert registry.remove(plate) is True
+        assert registry.remove(plate) is False
+        assert plate not in registry
+        assert len(registry) == 0
+        assert plate.state_changed_callbacks == []
+    
+    def test_counts_by_type_and_worklist(self, sample_worklist):
+        """Test the type and worklist indexes"""
+        other = Worklist("Other")
+        registry = ActivePlateRegistry()
+        registry.add(ActiveSourcePlate(sample_worklist, 0))
+        registry.add(ActiveSourcePlate(sample_worklist, 1))
+        registry.add(ActiveDestinationPlate(sample_worklist, 0))
+        registry.add(ActiveSourcePlate(other, 0))
+        
+        assert registry.count() == 4
+        assert registry.count(ActivePlate) == 4
+        assert registry.count(ActiveSourcePlate) == 3
+        assert registry.count(ActiveSourcePlate, sample_worklist) == 2
+        assert registry.count(worklist=other) == 1
+        assert registry.count(ActiveDestinationPlate, other) == 0
+    
+    def test_task_index(self, sample_worklist):
+        """Test that plates are indexed by (device_type, command)"""
+        registry = ActivePlateRegistry()
+        read = PlateTask("Reader", "read")
+        plate = _plate(ActiveSourcePlate, sample_worklist, 0, [read, PlateTask("Washer", "wash")])
+        registry.add(plate)
+        
+        assert registry.with_task("Reader", "read") == [plate]
+        
+        plate.mark_job_completed()  # advances the task; registry re-indexes
+        assert registry.with_task("Reader", "read") == []
+        assert registry.with_task("Washer", "wash") == [plate]
+    
+    def test_busy_index(self, sample_worklist):
+        """Test the busy/free index with refresh()"""
+        registry = ActivePlateRegistry()
+        plate = _plate(ActiveSourcePlate, sample_worklist, 0, [PlateTask("Reader", "read")])
+        registry.add(plate)
+        assert registry.select(busy=False) == [plate]
+        
+        plate.plate_is_free.clear()
+        registry.refresh(plate)
+        assert registry.select(busy=True) == [plate]
+        assert registry.select(worklist=sample_worklist, busy=False) == []
+        
+        plate.mark_job_completed()
+        assert registry.select(busy=False) == [plate]
+    
+    def test_is_first_for_task(self, sample_worklist):
+        """Test that only the lowest instance index gets a shared task"""
+        registry = ActivePlateRegistry()
+        shared = PlateTask("Reader", "read")
+        plates = [_plate(ActiveSourcePlate, sample_worklist, i, [shared]) for i in (2, 0, 1)]
+        other = _plate(ActiveDestinationPlate, sample_worklist, 1, [PlateTask("Reader", "read")])
+        for plate in plates + [other]:
+            registry.add(plate)
+        
+        assert [registry.is_first_for_task(plate) for plate in plates] == [False, True, False]
+        assert registry.is_first_for_task(other)
+    
+    def test_task_key(self):
+        """Test task keys for plate tasks, waits and no task"""
+        assert task_key(PlateTask("Reader", "read")) == ("Reader", "read")
+        assert task_key(WaitTask(1.0)) == ("wait", None)
+        assert task_key(None) is None
+    
+    def test_factory_registers_once(self, sample_worklist):
+        """Test that a released plate is registered exactly once"""
+        registry = ActivePlateRegistry()
+        factory = ActiveSourcePlateFactory(sample_worklist, registry)
+        
+        plate = factory.try_release_active_plate()
+        assert registry.plates() == [plate]
+    
+    def test_clear(self, sample_worklist):
+        """Test clearing the registry"""
+        registry = ActivePlateRegistry()
+        registry.add(ActiveSourcePlate(sample_worklist, 0))
+        registry.clear()
+        assert len(registry) == 0
+        assert registry.count(ActiveSourcePlate) == 0
+
+
+class TestSchedulerIsolation:
+    """Tests for several schedulers in one process"""
+    
+    def test_schedulers_have_separate_registries(self, device_manager, sample_worklist):
+        """Test that plates released by one scheduler are invisible to another"""
+        first = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        second = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        
+        run = first._start_worklist(sample_worklist)
+        plate = run.factories[0].try_release_active_plate()
+        
+        assert plate in first.active_plates
+        assert len(second.active_plates) == 0
+        assert "Running worklists: 0" in second.get_status()
+    
+    def test_parallel_worklists_in_separate_schedulers(self, device_manager):
+        """Test that worklists in separate schedulers complete concurrently"""
+        def run(name, results):
+            worklist = Worklist(name)
+            scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+            scheduler._do_worklist(worklist)
+            results.append(name)
+        
+        results = []
+        threads = [threading.Thread(target=run, args=(f"WL{i}", results)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5.0)
+        
+        assert sorted(results) == ["WL0", "WL1", "WL2", "WL3"]
@@ -0,0 +1,441 @@
+"""
+Unit tests for async_scheduler.py, async_devices.py and async_node_client.py
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from scheduler import (
+    AsyncPlateScheduler, AsyncRobotScheduler, AsyncDeviceInterface, AsyncRobotInterface,
+    AsyncRestNodeClient, SyncDeviceAdapter, SyncRobotAdapter, ActiveSourcePlate, PlateLocation,
+    PlatePlace, PlateTask, WaitTask, RobotScheduler, PlateScheduler
+)
+from scheduler.async_devices import as_async_device, as_async_robot
+from scheduler.async_node_client import AsyncNodeClientAdapter, as_async_node
+from scheduler.node_client import RestNodeClient
+from scheduler.node_interface import NodeActionRequest
+from tests.conftest import AsyncMockDevice, MockDevice, MockRobot
+from tests.test_worklist_policy import _worklist
+
+
+def _add_locations(device, count=1):
+    for i in range(count):
+        loc = PlateLocation(f"{device.name}_Loc{i}", device.name)
+        loc.places = [PlatePlace(f"{device.name}_Place{i}", loc)]
+        device.add_location(loc)
+    return device
+
+
+class SleepDevice(AsyncDeviceInterface):
+    """Native async device: each job is an asyncio.sleep"""
+
+    def __init__(self, name: str, product_name: str, delay: float = 0.01, locations: int = 1):
+        super().__init__(name, product_name)
+        self.delay = delay
+        self.locations = []
+        self.jobs = []
+        _add_locations(self, locations)
+
+    def add_location(self, location):
+        self.locations.append(location)
+
+    @property
+    def plate_location_info(self):
+        return self.locations
+
+    def get_available_location(self, active_plate):
+        # Finished plates are taken off the deck, so only reservations count
+        for location in self.locations:
+            if not location.reserved.is_set():
+                return location
+        return None
+
+    def reserve_location(self, location, active_plate):
+        location.reserved.set()
+        return True
+
+    def lock_place(self, place_name: str):
+        pass
+
+    async def run_job(self, active_plate):
+        self.jobs.append((active_plate, active_plate.get_current_todo().command))
+        await asyncio.sleep(self.delay)
+
+
+class SleepRobot(AsyncRobotInterface):
+    """Native async robot"""
+
+    def __init__(self, name: str, delay: float = 0.0):
+        super().__init__(name)
+        self.delay = delay
+        self.transfers = []
+
+    async def transfer_plate(self, src_device, src_place, dst_device, dst_place, labware_name, barcode):
+        self.transfers.append((src_device, dst_device, barcode))
+        await asyncio.sleep(self.delay)
+
+    def get_transfer_weight(self, src_device, src_location, src_place,
+                            dst_device, dst_location, dst_place) -> float:
+        return float('inf') if src_location is dst_location else 1.0
+
+
+class ReachRobot(SleepRobot):
+    """SleepRobot that only reaches some devices"""
+
+    def __init__(self, name: str, reach, delay: float = 0.0):
+        super().__init__(name, delay)
+        self.reach = reach
+
+    def get_transfer_weight(self, src_device, src_location, src_place,
+                            dst_device, dst_location, dst_place) -> float:
+        if src_device.name not in self.reach or dst_device.name not in self.reach:
+            return float('inf')
+        return super().get_transfer_weight(src_device, src_location, src_place,
+                                           dst_device, dst_location, dst_place)
+
+
+class PlateCountingRobot(ReachRobot):
+    """ReachRobot that tracks how many plates sit on each place (`plates_at` shared between robots)"""
+
+    def __init__(self, name: str, reach, plates_at, max_plates_at, delay: float = 0.0):
+        super().__init__(name, reach, delay)
+        self.plates_at = plates_at
+        self.max_plates_at = max_plates_at
+
+    async def transfer_plate(self, src_device, src_place, dst_device, dst_place, labware_name, barcode):
+        self.plates_at[src_place] = self.plates_at.get(src_place, 1) - 1
+        await super().transfer_plate(src_device, src_place, dst_device, dst_place, labware_name, barcode)
+        count = self.plates_at[dst_place] = self.plates_at.get(dst_place, 0) + 1
+        self.max_plates_at[dst_place] = max(self.max_plates_at.get(dst_place, 0), count)
+
+
+def _hitpick_cell(device_manager, sample_worklist, robot):
+    """Reader -> Bumblebee for source and destination plates"""
+    readers = [SleepDevice(f"Reader{i}", "Reader", delay=0.02) for i in range(2)]
+    bumblebee = SleepDevice("Bumblebee1", "Bumblebee", delay=0.02, locations=2)
+    for device in readers + [bumblebee]:
+        device_manager.register_device(device)
+    device_manager.register_robot(robot)
+    tasks = sample_worklist.transfer_overview.tasks
+    tasks.source_prehitpick_tasks = [PlateTask("Reader", "read")]
+    tasks.destination_prehitpick_tasks = [PlateTask("Reader", "read")]
+    return readers, bumblebee
+
+
+class TestAsyncPlateScheduler:
+    """Tests for AsyncPlateScheduler"""
+
+    def test_runs_worklist_with_native_devices(self, device_manager, sample_worklist):
+        robot = SleepRobot("PF400")
+        readers, bumblebee = _hitpick_cell(device_manager, sample_worklist, robot)
+        scheduler = AsyncPlateScheduler(device_manager)
+        completed = []
+        sample_worklist.add_completion_callback(lambda *args: completed.append(True))
+
+        run = asyncio.run(asyncio.wait_for(scheduler.run_worklist(sample_worklist), 5.0))
+
+        assert completed == [True]
+        assert run in scheduler.completed_runs
+        assert run.tasks_dispatched == 4
+        assert sorted(command for _, command in bumblebee.jobs) == ["destination_hitpick", "source_hitpick"]
+        assert sum(len(reader.jobs) for reader in readers) == 2
+        # Each plate moves from its reader to the Bumblebee
+        assert len(robot.transfers) == 2
+        assert len(scheduler.active_plates) == 0
+        assert scheduler.duration_model.stats(("task_type", "Reader", "read")).count == 2
+
+    def test_no_threads_for_native_devices(self, device_manager, sample_worklist):
+        _hitpick_cell(device_manager, sample_worklist, SleepRobot("PF400", delay=0.01))
+        scheduler = AsyncPlateScheduler(device_manager)
+
+        async def run():
+            before = threading.active_count()
+            peak = before
+            task = asyncio.ensure_future(scheduler.run_worklist(sample_worklist))
+            while not task.done():
+                peak = max(peak, threading.active_count())
+                await asyncio.sleep(0.002)
+            await task
+            return peak - before
+
+        assert asyncio.run(asyncio.wait_for(run(), 5.0)) == 0
+
+    def test_sync_devices_and_robots_through_adapters(self, device_manager, sample_worklist):
+        device_manager.register_device(_add_locations(AsyncMockDevice("Reader1", "Reader", delay=0.02)))
+        device_manager.register_device(_add_locations(MockDevice("Bumblebee1", "Bumblebee"), 2))
+        robot = MockRobot("PF400")
+        device_manager.register_robot(robot)
+        sample_worklist.transfer_overview.tasks.source_prehitpick_tasks = [PlateTask("Reader", "read")]
+        scheduler = AsyncPlateScheduler(device_manager)
+
+        runs = scheduler.run_worklists_sync([sample_worklist])
+
+        assert runs[0].worklist is sample_worklist
+        assert len(device_manager.get_device("Bumblebee1").job_queue) == 2
+        assert [t['src_device'] for t in robot.transfer_history] == ["Reader1"]
+
+    def test_wait_tasks_are_coroutines(self, device_manager, sample_worklist):
+        _hitpick_cell(device_manager, sample_worklist, SleepRobot("PF400"))
+        wait = WaitTask(0.1)
+        sample_worklist.transfer_overview.tasks.source_posthitpick_tasks = [wait]
+        scheduler = AsyncPlateScheduler(device_manager)
+
+        start = time.monotonic()
+        asyncio.run(asyncio.wait_for(scheduler.run_worklist(sample_worklist), 5.0))
+        assert time.monotonic() - start >= 0.1
+        assert wait.completed
+
+    def test_worklists_run_together(self, device_manager, sample_worklist):
+        _hitpick_cell(device_manager, sample_worklist, SleepRobot("PF400"))
+        other = _worklist("Other", num_sources=2)
+        scheduler = AsyncPlateScheduler(device_manager, max_concurrent_worklists=1)
+
+        runs = asyncio.run(asyncio.wait_for(scheduler.run_worklists([sample_worklist, other]), 5.0))
+
+        assert [run.worklist for run in runs] == [sample_worklist, other]
+        assert runs[0].finished_at <= runs[1].started_at
+
+    def test_submit_worklist_from_another_thread(self, device_manager, sample_worklist):
+        _hitpick_cell(device_manager, sample_worklist, SleepRobot("PF400"))
+        scheduler = AsyncPlateScheduler(device_manager)
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            with pytest.raises(RuntimeError):
+                scheduler.submit_worklist(sample_worklist)
+            run = scheduler.submit_worklist(sample_worklist, loop).result(timeout=5.0)
+            assert run.worklist is sample_worklist
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=1.0)
+            loop.close()
+
+    def test_stop_cancels_steps(self, device_manager, sample_worklist):
+        _hitpick_cell(device_manager, sample_worklist, SleepRobot("PF400"))
+        device_manager.get_device("Reader0").delay = 10.0
+        device_manager.get_device("Reader1").delay = 10.0
+        scheduler = AsyncPlateScheduler(device_manager)
+
+        async def run():
+            task = asyncio.ensure_future(scheduler.run_worklist(sample_worklist))
+            await asyncio.sleep(0.05)
+            assert "steps in flight: 2" in scheduler.get_status()
+            await scheduler.stop()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(asyncio.wait_for(run(), 5.0))
+
+
+class TestAsyncRobotScheduler:
+    """Tests for AsyncRobotScheduler"""
+
+    def _plate(self, sample_worklist, src, dst):
+        plate = ActiveSourcePlate(sample_worklist, 0)
+        plate.current_location = src.locations[0]
+        plate.destination_location = dst.locations[0]
+        return plate
+
+    def _timed_moves(self, device_manager, sample_worklist, devices):
+        scheduler = AsyncRobotScheduler(device_manager)
+        first = self._plate(sample_worklist, devices[0], devices[1])
+        second = self._plate(sample_worklist, devices[2], devices[3])
+
+        async def run():
+            start = time.monotonic()
+            await asyncio.gather(scheduler.move_plate(first), scheduler.move_plate(second))
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(run())
+        assert first.current_location is devices[1].locations[0]
+        assert devices[3].locations[0].occupied.is_set()
+        return elapsed
+
+    def test_moves_on_one_robot_take_turns(self, device_manager, sample_worklist):
+        devices = [SleepDevice(f"Device{i}", "Product") for i in range(4)]
+        for device in devices:
+            device_manager.register_device(device)
+        device_manager.register_robot(SleepRobot("PF400", delay=0.1))
+
+        assert self._timed_moves(device_manager, sample_worklist, devices) >= 0.2
+
+    def test_moves_on_different_robots_overlap(self, device_manager, sample_worklist):
+        devices = [SleepDevice(f"Device{i}", "Product") for i in range(4)]
+        for device in devices:
+            device_manager.register_device(device)
+        device_manager.register_robot(ReachRobot("RobotA", {"Device0", "Device1"}, delay=0.1))
+        device_manager.register_robot(ReachRobot("RobotB", {"Device2", "Device3"}, delay=0.1))
+
+        assert self._timed_moves(device_manager, sample_worklist, devices) < 0.18
+
+    def test_plate_on_handoff_keeps_it_between_transfers(self, device_manager, sample_worklist):
+        names = ["A1", "A2", "Handoff", "B1", "B2"]
+        devices = {name: SleepDevice(name, "Product") for name in names}
+        for device in devices.values():
+            device_manager.register_device(device)
+        plates_at, max_plates_at = {}, {}
+        device_manager.register_robot(PlateCountingRobot("RobotA", {"A1", "A2", "Handoff"}, plates_at,
+                                                         max_plates_at, delay=0.02))
+        device_manager.register_robot(PlateCountingRobot("RobotB", {"B1", "B2", "Handoff"}, plates_at,
+                                                         max_plates_at, delay=0.02))
+        scheduler = AsyncRobotScheduler(device_manager)
+        first = self._plate(sample_worklist, devices["A1"], devices["B1"])
+        second = self._plate(sample_worklist, devices["A2"], devices["B2"])
+
+        async def run():
+            return await asyncio.gather(scheduler.move_plate(first), scheduler.move_plate(second))
+
+        assert asyncio.run(run()) == [True, True]
+        # The second plate can't be put down on the handoff until the first has left it
+        assert max_plates_at["Handoff_Place0"] == 1
+        assert plates_at["Handoff_Place0"] == 0
+        assert first.current_location is devices["B1"].locations[0]
+        assert second.current_location is devices["B2"].locations[0]
+
+    def test_records_transfer_durations(self, device_manager, sample_worklist):
+        src, dst = SleepDevice("Src", "Product"), SleepDevice("Dst", "Product")
+        device_manager.register_device(src)
+        device_manager.register_device(dst)
+        device_manager.register_robot(SleepRobot("PF400", delay=0.02))
+        scheduler = AsyncRobotScheduler(device_manager)
+        completed = []
+        scheduler.move_completed_callbacks.append(completed.append)
+        plate = self._plate(sample_worklist, src, dst)
+
+        assert asyncio.run(scheduler.move_plate(plate))
+        assert completed == [plate]
+        assert scheduler.duration_model.transfer_seconds("PF400", "Src_Place0", "Dst_Place0") >= 0.02
+
+
+class TestAdapters:
+    """Sync/async bridges"""
+
+    def test_as_async_returns_native_objects(self):
+        device = SleepDevice("D", "P")
+        robot = SleepRobot("R")
+        assert as_async_device(device) is device
+        assert as_async_robot(robot) is robot
+        assert isinstance(as_async_device(MockDevice("M", "P")), SyncDeviceAdapter)
+        assert isinstance(as_async_robot(MockRobot("M")), SyncRobotAdapter)
+
+    def test_sync_device_adapter_waits_for_completion(self, sample_worklist):
+        device = _add_locations(AsyncMockDevice("Reader1", "Reader", delay=0.05))
+        adapter = SyncDeviceAdapter(device)
+        plate = ActiveSourcePlate(sample_worklist, 0)
+        plate.plate_is_free.clear()
+
+        asyncio.run(asyncio.wait_for(adapter.run_job(plate), 2.0))
+        assert not plate.busy
+        assert plate.state_changed_callbacks == []
+        assert adapter.plate_location_info == device.locations
+
+    def test_threaded_robot_scheduler_runs_async_robot(self, device_manager, sample_worklist):
+        src, dst = SleepDevice("Src", "Product"), SleepDevice("Dst", "Product")
+        device_manager.register_device(src)
+        device_manager.register_device(dst)
+        robot = SleepRobot("PF400")
+        device_manager.register_robot(robot)
+        plate = ActiveSourcePlate(sample_worklist, 0)
+        plate.current_location = src.locations[0]
+        plate.destination_location = dst.locations[0]
+
+        RobotScheduler(device_manager)._move_plate(plate)
+        assert robot.transfers == [("Src", "Dst", plate.barcode)]
+        assert plate.current_location is dst.locations[0]
+
+    def test_threaded_plate_scheduler_runs_async_device(self, device_manager, sample_worklist):
+        device = SleepDevice("Bumblebee1", "Bumblebee", locations=2)
+        device_manager.register_device(device)
+        robot_scheduler = RobotScheduler(device_manager)
+        scheduler = PlateScheduler(robot_scheduler, device_manager)
+        scheduler.idle_recheck_seconds = None
+        completed = threading.Event()
+        sample_worklist.add_completion_callback(lambda *args: completed.set())
+        worker = threading.Thread(target=scheduler._do_worklist, args=(sample_worklist,), daemon=True)
+        worker.start()
+        try:
+            assert completed.wait(timeout=5.0)
+        finally:
+            scheduler.stop_scheduler()
+        assert len(device.jobs) == 2
+
+
+class _NodeHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"healthy": True})
+        elif self.path == "/definition":
+            self._send(200, {"node_id": "n1", "name": "pf400", "actions": [{"name": "pick"}]})
+        elif self.path.startswith("/actions/status/"):
+            self._send(200, {"execution_id": self.path.rsplit("/", 1)[1], "status": "running"})
+        else:
+            self._send(404, {"detail": "not found"})
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path == "/actions/pick":
+            self._send(200, {"status": "succeeded", "result": {"args": payload["args"]}})
+        elif self.path == "/actions/pick/submit":
+            self._send(200, {"job_id": "job-1"})
+        else:
+            self._send(500, {"detail": "boom"})
+
+
+@pytest.fixture
+def node_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _NodeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestAsyncRestNodeClient:
+    """Tests for AsyncRestNodeClient"""
+
+    def test_calls(self, node_server):
+        client = AsyncRestNodeClient(node_server)
+
+        async def run():
+            request = NodeActionRequest(action="pick", args={"slot": 3})
+            return await asyncio.gather(
+                client.health(),
+                client.get_definition(),
+                client.call_action(request),
+                client.submit_action(NodeActionRequest(action="pick")),
+                client.get_action_status("job-1"),
+            )
+
+        healthy, definition, called, submitted, status = asyncio.run(run())
+        assert healthy
+        assert definition.node_id == "n1" and [a.name for a in definition.actions] == ["pick"]
+        assert called.status == "succeeded" and called.result == {"args": {"slot": 3}}
+        assert submitted.execution_id == "job-1" and submitted.status == "queued"
+        assert status.status == "running"
+
+    def test_errors(self, node_server):
+        client = AsyncRestNodeClient(node_server)
+        with pytest.raises(RuntimeError, match="500"):
+            asyncio.run(client.call_action(NodeActionRequest(action="place")))
+        assert not asyncio.run(AsyncRestNodeClient("http://127.0.0.1:1").health())
+
+    def test_as_async_node(self, node_server):
+        assert isinstance(as_async_node(RestNodeClient(node_server)), AsyncRestNodeClient)
+        adapter = AsyncNodeClientAdapter(RestNodeClient(node_server))
+        assert asyncio.run(adapter.health())
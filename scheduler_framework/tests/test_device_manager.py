@@ -150,6 +150,32 @@ class TestDeviceManager:
         assert len(robots) == 2
         assert robot1 in robots
         assert robot2 in robots
+    
+    def test_generation_bumps_on_layout_changes(self, device_manager, mock_device, mock_robot):
+        """Test that registering devices/robots and location changes bump the generation"""
+        generation = device_manager.generation
+        
+        device_manager.register_device(mock_device)
+        assert device_manager.generation > generation
+        generation = device_manager.generation
+        
+        device_manager.register_robot(mock_robot)
+        assert device_manager.generation > generation
+        generation = device_manager.generation
+        
+        device_manager.notify_locations_changed()
+        assert device_manager.generation > generation
+    
+    def test_generation_unchanged_by_lookups(self, setup_with_devices):
+        """Test that read-only queries leave the generation alone"""
+        device_manager, mock_device, mock_robot = setup_with_devices
+        generation = device_manager.generation
+        
+        device_manager.get_device("TestDevice")
+        device_manager.get_accessible_devices()
+        device_manager.get_robots()
+        
+        assert device_manager.generation == generation
 
 
 class TestMockDevice:
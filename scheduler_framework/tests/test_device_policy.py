@@ -0,0 +1,253 @@
+"""
+Unit tests for DeviceManager availability tracking and device_policy.py
+"""
+
+import pytest
+import threading
+from scheduler import (
+    PlateScheduler, RobotScheduler, PathPlanner, PlateLocation,
+    ActiveSourcePlate, LeastLoadedPolicy, RoundRobinPolicy, NearestDevicePolicy
+)
+from scheduler.active_plate import ObservableEvent
+from scheduler.device_manager import DeviceManager
+from scheduler.worklist import PlateTask
+from tests.conftest import MockDevice, MockRobot
+
+
+def _device(name, product="Reader", num_locations=2):
+    device = MockDevice(name, product)
+    for i in range(num_locations):
+        device.add_location(PlateLocation(f"{name}_Loc{i}", name))
+    return device
+
+
+class PositionRobot(MockRobot):
+    """Transfer weight is the distance between device positions on a line"""
+
+    def __init__(self, name, positions):
+        super().__init__(name)
+        self.positions = positions
+
+    def get_transfer_weight(self, src_device, src_location, src_place,
+                           dst_device, dst_location, dst_place) -> float:
+        if src_location is dst_location:
+            return float('inf')
+        return 1.0 + abs(self.positions[src_device.name] - self.positions[dst_device.name])
+
+
+class TestObservableEvent:
+    """Tests for ObservableEvent"""
+
+    def test_listeners_called_on_state_change_only(self):
+        event = ObservableEvent()
+        calls = []
+        event.listeners.append(calls.append)
+        event.set()
+        event.set()
+        event.clear()
+        event.clear()
+        assert calls == [event, event]
+
+    def test_plate_location_events_are_observable(self):
+        location = PlateLocation("Loc", "Device")
+        assert isinstance(location.occupied, ObservableEvent)
+        assert isinstance(location.reserved, ObservableEvent)
+        assert isinstance(location.occupied, threading.Event)
+
+
+class TestDeviceIndex:
+    """Tests for the product-name index and ready tracking in DeviceManager"""
+
+    def test_ready_devices_follow_location_events(self, device_manager):
+        reader1 = _device("Reader1", num_locations=1)
+        reader2 = _device("Reader2", num_locations=1)
+        device_manager.register_device(reader1)
+        device_manager.register_device(reader2)
+        assert device_manager.get_ready_devices("Reader") == [reader1, reader2]
+
+        reader1.locations[0].reserved.set()
+        assert device_manager.get_ready_devices("Reader") == [reader2]
+        assert device_manager.free_location_count("Reader1") == 0
+
+        reader1.locations[0].reserved.clear()
+        reader1.locations[0].occupied.set()
+        assert device_manager.get_ready_devices("Reader") == [reader2]
+
+        reader1.locations[0].occupied.clear()
+        # Registration order is kept when a device becomes ready again
+        assert device_manager.get_ready_devices("Reader") == [reader1, reader2]
+
+    def test_device_load(self, device_manager):
+        reader = _device("Reader1", num_locations=4)
+        device_manager.register_device(reader)
+        assert device_manager.device_load("Reader1") == 0.0
+        reader.locations[0].occupied.set()
+        reader.locations[1].reserved.set()
+        assert device_manager.free_location_count("Reader1") == 2
+        assert device_manager.device_load("Reader1") == pytest.approx(0.5)
+
+    def test_candidates_list_busy_devices_last(self, device_manager):
+        reader1 = _device("Reader1", num_locations=1)
+        reader2 = _device("Reader2", num_locations=1)
+        device_manager.register_device(reader1)
+        device_manager.register_device(reader2)
+        device_manager.register_device(_device("Washer1", product="Washer"))
+        reader1.locations[0].occupied.set()
+
+        assert device_manager.candidate_devices("Reader") == [reader2, reader1]
+        assert device_manager.candidate_devices("Unknown") == []
+
+    def test_locations_added_after_registration(self, device_manager):
+        reader = MockDevice("Reader1", "Reader")
+        device_manager.register_device(reader)
+        assert device_manager.get_ready_devices("Reader") == []
+
+        reader.add_location(PlateLocation("Loc", reader.name))
+        device_manager.notify_locations_changed()
+        assert device_manager.get_ready_devices("Reader") == [reader]
+
+        reader.locations[0].occupied.set()
+        assert device_manager.get_ready_devices("Reader") == []
+
+    def test_reregistering_device_replaces_tracking(self, device_manager):
+        old = _device("Reader1", num_locations=1)
+        device_manager.register_device(old)
+        new = _device("Reader1", product="Washer", num_locations=1)
+        device_manager.register_device(new)
+
+        assert device_manager.get_devices_by_type("Reader") == {}
+        assert device_manager.get_ready_devices("Washer") == [new]
+        # Events of the old device's locations no longer affect the index
+        old.locations[0].occupied.set()
+        assert old.locations[0].occupied.listeners == []
+        assert device_manager.free_location_count("Reader1") == 1
+
+    def test_shared_location_counts_for_each_device(self, device_manager):
+        shared = PlateLocation("Handoff", "Reader1")
+        reader1 = MockDevice("Reader1", "Reader")
+        reader2 = MockDevice("Reader2", "Reader")
+        reader1.add_location(shared)
+        reader2.add_location(shared)
+        device_manager.register_device(reader1)
+        device_manager.register_device(reader2)
+
+        shared.reserved.set()
+        assert device_manager.get_ready_devices("Reader") == []
+        shared.reserved.clear()
+        assert device_manager.get_ready_devices("Reader") == [reader1, reader2]
+
+    def test_plain_events_are_treated_as_always_ready(self, device_manager):
+        reader = MockDevice("Reader1", "Reader")
+        reader.add_location(PlateLocation("Loc", reader.name,
+                                          occupied=threading.Event(), reserved=threading.Event()))
+        device_manager.register_device(reader)
+        reader.locations[0].occupied.set()
+        assert device_manager.get_ready_devices("Reader") == [reader]
+
+
+class TestDevicePolicies:
+    """Tests for the device choice policies"""
+
+    def test_least_loaded(self, device_manager):
+        reader1 = _device("Reader1", num_locations=2)
+        reader2 = _device("Reader2", num_locations=2)
+        device_manager.register_device(reader1)
+        device_manager.register_device(reader2)
+        reader1.locations[0].occupied.set()
+
+        order = device_manager.candidate_devices("Reader", policy=LeastLoadedPolicy())
+        assert order == [reader2, reader1]
+
+    def test_round_robin(self, device_manager):
+        readers = [_device(f"Reader{i}") for i in range(3)]
+        for reader in readers:
+            device_manager.register_device(reader)
+        policy = RoundRobinPolicy()
+
+        firsts = [device_manager.candidate_devices("Reader", policy=policy)[0] for _ in range(4)]
+        assert firsts == [readers[0], readers[1], readers[2], readers[0]]
+
+    def test_nearest_by_path_cost(self, device_manager, sample_worklist):
+        positions = {"Hotel": 0, "Reader1": 10, "Reader2": 2}
+        for name, product in [("Hotel", "Hotel"), ("Reader1", "Reader"), ("Reader2", "Reader")]:
+            device_manager.register_device(_device(name, product=product, num_locations=1))
+        device_manager.register_robot(PositionRobot("Robot", positions))
+        policy = NearestDevicePolicy(PathPlanner(device_manager))
+
+        plate = ActiveSourcePlate(sample_worklist, 0)
+        # Not sourced yet: ready order is kept
+        order = device_manager.candidate_devices("Reader", plate, policy)
+        assert [device.name for device in order] == ["Reader1", "Reader2"]
+
+        plate.current_location = device_manager.get_device("Hotel").locations[0]
+        order = device_manager.candidate_devices("Reader", plate, policy)
+        assert [device.name for device in order] == ["Reader2", "Reader1"]
+
+    def _nearest_setup(self, device_manager, sample_worklist, planner):
+        positions = {"Hotel": 0, "Reader1": 10, "Reader2": 2, "Extra": 5}
+        for name, product in [("Hotel", "Hotel"), ("Reader1", "Reader"), ("Reader2", "Reader")]:
+            device_manager.register_device(_device(name, product=product, num_locations=1))
+        device_manager.register_robot(PositionRobot("Robot", positions))
+        plate = ActiveSourcePlate(sample_worklist, 0)
+        plate.current_location = device_manager.get_device("Hotel").locations[0]
+        return NearestDevicePolicy(planner), plate
+
+    def test_nearest_holds_the_planner_lock(self, device_manager, sample_worklist):
+        planner = PathPlanner(device_manager)
+        policy, plate = self._nearest_setup(device_manager, sample_worklist, planner)
+        ordered = threading.Event()
+
+        def order():
+            device_manager.candidate_devices("Reader", plate, policy)
+            ordered.set()
+
+        with planner.lock:
+            threading.Thread(target=order, daemon=True).start()
+            assert not ordered.wait(0.1)
+        assert ordered.wait(2.0)
+
+    def test_nearest_waits_for_a_world_rebuild(self, device_manager, sample_worklist, monkeypatch):
+        import scheduler.path_planner as path_planner_module
+        planner = PathPlanner(device_manager, use_routing_table=True)
+        policy, plate = self._nearest_setup(device_manager, sample_worklist, planner)
+        planner.create_world()
+        building, gate, ordered = threading.Event(), threading.Event(), threading.Event()
+        result = []
+
+        class PausingRoutingTable(path_planner_module.RoutingTable):
+            """Holds a robot worker's rebuild halfway through installing the new world"""
+            def __init__(self, *args):
+                super().__init__(*args)
+                building.set()
+                gate.wait(2.0)
+
+        def rebuild():
+            device_manager.register_device(_device("Extra", product="Extra", num_locations=3))
+            planner.create_world()
+
+        def order():
+            result.append([device.name for device in device_manager.candidate_devices("Reader", plate, policy)])
+            ordered.set()
+
+        monkeypatch.setattr(path_planner_module, "RoutingTable", PausingRoutingTable)
+        threading.Thread(target=rebuild, daemon=True).start()
+        assert building.wait(2.0)
+        threading.Thread(target=order, daemon=True).start()
+        assert not ordered.wait(0.1)
+        gate.set()
+        assert ordered.wait(2.0)
+        assert result == [["Reader2", "Reader1"]]
+
+    def test_scheduler_uses_policy(self, device_manager, sample_worklist):
+        reader1 = _device("Reader1", num_locations=2)
+        reader2 = _device("Reader2", num_locations=2)
+        device_manager.register_device(reader1)
+        device_manager.register_device(reader2)
+        reader1.locations[0].occupied.set()
+        robot_scheduler = RobotScheduler(device_manager)
+        scheduler = PlateScheduler(robot_scheduler, device_manager, device_policy=LeastLoadedPolicy())
+
+        plate = ActiveSourcePlate(sample_worklist, 0)
+        assert scheduler._schedule_task(plate, PlateTask("Reader", "read"))
+        assert reader2.job_queue == [plate]
+        assert reader1.job_queue == []
@@ -0,0 +1,200 @@
+"""
+Unit tests for duration_model.py and duration recording in the schedulers
+"""
+
+import threading
+import time
+import pytest
+from scheduler import (
+    PlateScheduler, RobotScheduler, PathPlanner, PlateLocation, PlatePlace, PlateTask,
+    ActiveSourcePlate, DurationModel, DurationStats, MakespanPlanner
+)
+from scheduler.duration_model import TASK, TASK_TYPE, TRANSFER
+from scheduler.reservation_table import CooperativePlanner
+from tests.conftest import AsyncMockDevice, MockDevice, MockRobot
+
+
+class TestDurationStats:
+    """Tests for DurationStats"""
+
+    def test_mean_and_percentiles(self):
+        stats = DurationStats()
+        for seconds in [1.0, 2.0, 3.0, 4.0, 10.0]:
+            stats.add(seconds)
+        assert stats.mean == pytest.approx(4.0)
+        assert stats.percentile(50) == pytest.approx(3.0)
+        assert stats.percentile(90) == pytest.approx(7.6)
+        assert stats.percentile(100) == pytest.approx(10.0)
+
+    def test_decayed_mean_follows_recent_samples(self):
+        stats = DurationStats(alpha=0.5)
+        stats.add(10.0)
+        stats.add(20.0)
+        stats.add(20.0)
+        assert stats.decayed_mean == pytest.approx(17.5)
+        assert stats.estimate() == stats.decayed_mean
+        assert stats.estimate(percentile=0) == pytest.approx(10.0)
+
+    def test_window_is_bounded(self):
+        stats = DurationStats(window=3)
+        for seconds in range(10):
+            stats.add(float(seconds))
+        assert list(stats.samples) == [7.0, 8.0, 9.0]
+        assert stats.count == 10
+
+    def test_empty(self):
+        stats = DurationStats()
+        assert stats.mean is None
+        assert stats.percentile(50) is None
+        assert stats.estimate() is None
+
+
+class TestDurationModel:
+    """Tests for DurationModel"""
+
+    def test_task_recorded_per_device_and_type(self):
+        model = DurationModel(alpha=1.0)
+        model.record_task("Reader1", "read", 4.0, "Reader")
+        model.record_task("Reader2", "read", 6.0, "Reader")
+
+        assert model.task_seconds("Reader1", "read") == 4.0
+        assert model.task_seconds("Reader2", "read") == 6.0
+        assert model.device_type_seconds("Reader", "read", percentile=50) == pytest.approx(5.0)
+        assert model.task_seconds("Reader1", "wash") is None
+        assert model.task_seconds("Reader1", "wash", default=1.5) == 1.5
+        assert sorted(model.keys(TASK)) == [(TASK, "Reader1", "read"), (TASK, "Reader2", "read")]
+        assert model.keys(TASK_TYPE) == [(TASK_TYPE, "Reader", "read")]
+
+    def test_invalid_samples_are_ignored(self):
+        model = DurationModel()
+        model.record_transfer("PF400", "A", "B", -1.0)
+        model.record_transfer("PF400", "A", "B", float('nan'))
+        assert len(model) == 0
+
+    def test_save_and_load(self, tmp_path):
+        model = DurationModel(window=5, alpha=0.3)
+        model.record_task("Reader1", "read", 4.0, "Reader")
+        model.record_transfer("PF400", "A", "B", 2.0)
+        model.record_transfer("PF400", "A", "B", 3.0)
+        path = tmp_path / "durations.json"
+        model.save(str(path))
+
+        loaded = DurationModel.load(str(path))
+        assert (loaded.window, loaded.alpha) == (5, 0.3)
+        assert sorted(loaded.keys()) == sorted(model.keys())
+        assert loaded.transfer_seconds("PF400", "A", "B") == model.transfer_seconds("PF400", "A", "B")
+        assert loaded.stats((TRANSFER, "PF400", "A", "B")).count == 2
+
+    def test_task_duration_fn_for_makespan_planner(self, sample_worklist):
+        model = DurationModel()
+        model.record_task("Bumblebee1", "source_hitpick", 7.0, "Bumblebee")
+        planner = MakespanPlanner({"Bumblebee": [("Bumblebee1", 2)]}, default_task_seconds=1.0,
+                                  duration_fn=model.task_duration_fn())
+
+        plan = planner.greedy(sample_worklist)
+        assert plan.operation("source", 0, 0).end == pytest.approx(7.0)
+        # No samples for the destination hit-pick: the static default applies
+        assert plan.operation("destination", 0, 0).end == pytest.approx(1.0)
+
+    def test_transfer_duration_fn_for_cooperative_planner(self, device_manager):
+        model = DurationModel()
+        src = PlateLocation("Src", "Device1")
+        dst = PlateLocation("Dst", "Device2")
+        model.record_transfer("PF400", src.places[0].name, dst.places[0].name, 12.0)
+        planner = CooperativePlanner(PathPlanner(device_manager), duration_fn=model.transfer_duration_fn(),
+                                     seconds_per_weight=2.0)
+
+        assert planner.duration(MockRobot("PF400"), src, dst, 1.0) == 12.0
+        assert planner.duration(MockRobot("Planar"), src, dst, 1.0) == 2.0
+
+
+def _add_device(device_manager, device, count=1):
+    for i in range(count):
+        loc = PlateLocation(f"{device.name}_Loc{i}", device.name)
+        loc.places = [PlatePlace(f"{device.name}_Place{i}", loc)]
+        device.add_location(loc)
+    device_manager.register_device(device)
+    return device
+
+
+class TimedRobot(MockRobot):
+    def transfer_plate(self, *args):
+        time.sleep(0.02)
+
+
+class HoldingDevice(MockDevice):
+    """MockDevice whose jobs complete only when the test says so"""
+
+    def get_available_location(self, active_plate):
+        for location in self.locations:
+            if not location.occupied.is_set() and not location.reserved.is_set():
+                return location
+        return None
+
+    def add_job(self, active_plate):
+        self.job_queue.append(active_plate)
+
+
+class TestRecording:
+    """Durations recorded by RobotScheduler and PlateScheduler"""
+
+    def test_robot_scheduler_records_transfers(self, device_manager, sample_worklist):
+        src = _add_device(device_manager, MockDevice("Device1", "Product"))
+        dst = _add_device(device_manager, MockDevice("Device2", "Product"))
+        device_manager.register_robot(TimedRobot("PF400"))
+        scheduler = RobotScheduler(device_manager)
+        plate = ActiveSourcePlate(sample_worklist, 0)
+        plate.current_location = src.locations[0]
+        plate.destination_location = dst.locations[0]
+
+        scheduler._move_plate(plate)
+
+        assert scheduler.duration_model.keys(TRANSFER) == [(TRANSFER, "PF400", "Device1_Place0", "Device2_Place0")]
+        assert scheduler.duration_model.transfer_seconds("PF400", "Device1_Place0", "Device2_Place0") >= 0.02
+
+    def test_plate_scheduler_records_tasks(self, device_manager, mock_robot, sample_worklist):
+        _add_device(device_manager, AsyncMockDevice("Reader1", "Reader", delay=0.05))
+        _add_device(device_manager, AsyncMockDevice("Bumblebee1", "Bumblebee", delay=0.05), count=2)
+        device_manager.register_robot(mock_robot)
+        sample_worklist.transfer_overview.tasks.source_prehitpick_tasks = [PlateTask("Reader", "read")]
+        robot_scheduler = RobotScheduler(device_manager)
+        robot_scheduler.start_scheduler()
+        scheduler = PlateScheduler(robot_scheduler, device_manager)
+        scheduler.idle_recheck_seconds = None
+        assert scheduler.duration_model is robot_scheduler.duration_model
+
+        completed = threading.Event()
+        sample_worklist.add_completion_callback(lambda *args: completed.set())
+        worker = threading.Thread(target=scheduler._do_worklist, args=(sample_worklist,), daemon=True)
+        worker.start()
+        try:
+            assert completed.wait(timeout=5.0)
+        finally:
+            scheduler.stop_scheduler()
+            robot_scheduler.stop_scheduler()
+
+        model = scheduler.duration_model
+        assert model.task_seconds("Reader1", "read") == pytest.approx(0.05, abs=0.04)
+        assert model.stats((TASK_TYPE, "Bumblebee", "source_hitpick")).count == 1
+        assert model.stats((TASK_TYPE, "Bumblebee", "destination_hitpick")).count == 1
+        assert model.keys(TRANSFER)
+
+    def test_lookahead_horizon_skips_long_tasks(self, device_manager, sample_worklist):
+        _add_device(device_manager, HoldingDevice("Reader1", "Reader"))
+        _add_device(device_manager, HoldingDevice("Bumblebee1", "Bumblebee"), count=3)
+        sample_worklist.transfer_overview.tasks.source_prehitpick_tasks = [PlateTask("Reader", "read")]
+        model = DurationModel()
+        model.record_task("Reader1", "read", 600.0, "Reader")
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager, lookahead=True,
+                                   lookahead_horizon=60.0, duration_model=model)
+        scheduler._start_worklist(sample_worklist)
+        scheduler._scheduling_pass()
+        source = next(plate for plate in scheduler.active_plates if isinstance(plate, ActiveSourcePlate))
+
+        # A ten-minute read: the hit-pick slot is not held for it yet
+        assert scheduler.expected_remaining(source) == pytest.approx(600.0, abs=1.0)
+        assert source not in scheduler.staged_steps
+
+        scheduler.lookahead_horizon = 3600.0
+        scheduler._scheduling_pass()
+        assert source in scheduler.staged_steps
@@ -0,0 +1,216 @@
+"""
+Unit tests for metrics.py, tracing.py and instrumentation.py, and for the
+metrics and spans the schedulers report
+"""
+
+import json
+import urllib.error
+import urllib.request
+import pytest
+from scheduler import (
+    PlateScheduler, RobotScheduler, PlateLocation, PlatePlace, PlateTask, WaitTask,
+    MetricsRegistry, Tracer, Instrumentation, VirtualClock, Simulation, SimulatedDevice, SimulatedRobot
+)
+from scheduler.active_plate import ActiveSourcePlate
+from scheduler.device_manager import DeviceManager
+from tests.conftest import MockDevice
+from tests.test_simulation import _worklist
+
+
+def _simulation(**kwargs):
+    clock = VirtualClock()
+    device_manager = DeviceManager()
+    device_manager.register_device(SimulatedDevice("Reader1", "Reader", clock, 120.0))
+    device_manager.register_device(SimulatedDevice("Bumblebee1", "Bumblebee", clock, 60.0, num_locations=4))
+    device_manager.register_robot(SimulatedRobot("Robot1"))
+    robot_scheduler = RobotScheduler(device_manager, clock=clock)
+    scheduler = PlateScheduler(robot_scheduler, device_manager, **kwargs)
+    return Simulation(scheduler, move_seconds=15.0)
+
+
+class TestMetricsRegistry:
+    """Counters, gauges, histograms and Prometheus output"""
+
+    def test_counter_and_gauge_series(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("jobs_total", "Jobs")
+        counter.inc(device="A")
+        counter.inc(2, device="A")
+        counter.inc(device="B")
+        gauge = registry.gauge("depth")
+        gauge.set(5)
+        gauge.dec(2)
+
+        assert counter.value(device="A") == 3
+        assert counter.value(device="B") == 1
+        assert gauge.value() == 3
+        with pytest.raises(ValueError):
+            counter.inc(-1)
+
+    def test_same_name_returns_same_metric(self):
+        registry = MetricsRegistry()
+        assert registry.counter("x_total") is registry.counter("x_total")
+        with pytest.raises(ValueError):
+            registry.gauge("x_total")
+
+    def test_prometheus_text(self):
+        registry = MetricsRegistry()
+        registry.counter("moves_total", "Moves by result").inc(result="moved")
+        histogram = registry.histogram("pass_seconds", "Pass time", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value)
+
+        text = registry.render_prometheus()
+        assert "# HELP moves_total Moves by result\n# TYPE moves_total counter\n" in text
+        assert 'moves_total{result="moved"} 1\n' in text
+        assert "# TYPE pass_seconds histogram" in text
+        assert 'pass_seconds_bucket{le="0.1"} 1\n' in text
+        assert 'pass_seconds_bucket{le="1"} 3\n' in text
+        assert 'pass_seconds_bucket{le="+Inf"} 4\n' in text
+        assert "pass_seconds_sum 4.05\n" in text
+        assert "pass_seconds_count 4\n" in text
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.gauge("g").set(1, name='a "b"\\c')
+        assert 'g{name="a \\"b\\"\\\\c"} 1' in registry.render_prometheus()
+
+    def test_collectors_run_before_reads(self):
+        registry = MetricsRegistry()
+        depth = [3]
+
+        def collect(r):
+            r.gauge("queue_depth").set(depth[0])
+
+        registry.add_collector(collect)
+        registry.add_collector(collect)
+        assert "queue_depth 3" in registry.render_prometheus()
+        depth[0] = 7
+        snapshot = registry.snapshot()
+        assert snapshot["queue_depth"]["series"] == [{"labels": {}, "value": 7.0}]
+
+
+class TestTracer:
+    """Span buffer and Chrome trace export"""
+
+    def test_chrome_trace_events(self):
+        now = [10.0]
+        tracer = Tracer(clock=lambda: now[0])
+        tracer.record("read on Reader1", "task", "SRC001", 10.0, 12.5, process="Plates", args={"device": "Reader1"})
+        with tracer.span("SRC001 a -> b", "transfer", "Robot1", process="Robots") as args:
+            args["plate"] = "SRC001"
+            now[0] = 11.0
+
+        trace = tracer.chrome_trace()
+        json.dumps(trace)
+        complete = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        names = {e["args"]["name"] for e in trace["traceEvents"] if e["ph"] == "M"}
+        assert names == {"Plates", "Robots", "SRC001", "Robot1"}
+        assert [(e["name"], e["ts"], e["dur"]) for e in complete] == [
+            ("read on Reader1", 0.0, 2.5e6), ("SRC001 a -> b", 0.0, 1e6)]
+        assert complete[1]["args"] == {"plate": "SRC001"}
+        assert complete[0]["pid"] != complete[1]["pid"]
+
+    def test_buffer_is_bounded(self):
+        tracer = Tracer(max_spans=3)
+        for i in range(5):
+            tracer.record(f"span{i}", "task", "P", i, i + 1)
+        assert [span.name for span in tracer.spans()] == ["span2", "span3", "span4"]
+        assert tracer.dropped == 2
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer(enabled=False)
+        assert tracer.record("span", "task", "P", 0.0, 1.0) is None
+        assert len(tracer) == 0
+
+
+class TestInstrumentationServer:
+    """HTTP endpoints"""
+
+    def test_metrics_and_trace_endpoints(self):
+        instrumentation = Instrumentation()
+        instrumentation.metrics.counter("jobs_total").inc()
+        instrumentation.tracer.record("job", "task", "P1", 0.0, 1.0)
+        server = instrumentation.serve(port=0)
+        try:
+            with urllib.request.urlopen(f"{server.url}/metrics", timeout=5) as response:
+                assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+                assert "jobs_total 1" in response.read().decode()
+            with urllib.request.urlopen(f"{server.url}/trace", timeout=5) as response:
+                assert any(e["name"] == "job" for e in json.load(response)["traceEvents"])
+            with urllib.request.urlopen(f"{server.url}/metrics.json", timeout=5) as response:
+                assert json.load(response)["jobs_total"]["series"][0]["value"] == 1
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"{server.url}/nothing", timeout=5)
+        finally:
+            server.stop()
+
+
+class TestSchedulerInstrumentation:
+    """Metrics and spans from PlateScheduler, RobotScheduler, PathPlanner and DeviceManager"""
+
+    def test_shared_across_components(self, device_manager):
+        robot_scheduler = RobotScheduler(device_manager)
+        scheduler = PlateScheduler(robot_scheduler, device_manager)
+        assert scheduler.instrumentation is robot_scheduler.instrumentation
+        assert robot_scheduler.path_planner.instrumentation is robot_scheduler.instrumentation
+
+    def test_simulated_run(self):
+        simulation = _simulation()
+        simulation.run_worklists([_worklist("WL", 2, [PlateTask("Reader", "read")])])
+        instrumentation = simulation.plate_scheduler.instrumentation
+        metrics = instrumentation.metrics
+
+        assert metrics.counter("scheduler_worklists_completed_total").value() == 1
+        assert metrics.counter("scheduler_tasks_dispatched_total").value(device_type="Reader") == 2
+        assert metrics.counter("scheduler_device_busy_seconds_total").value(device="Reader1") == pytest.approx(240.0)
+        assert metrics.histogram("scheduler_task_seconds").count(device_type="Reader", command="read") == 2
+        assert metrics.histogram("scheduler_plate_wait_seconds").count() >= 2
+        assert metrics.histogram("scheduler_pass_seconds").count() > 0
+        assert metrics.histogram("scheduler_world_build_seconds").count() == 1
+        assert metrics.histogram("scheduler_robot_transfer_seconds").count(robot="Robot1") == simulation.moves
+        assert metrics.counter("scheduler_robot_moves_total").value(result="moved") == simulation.moves
+
+        text = instrumentation.render_prometheus()
+        assert 'scheduler_device_free_locations{device="Reader1"} 1' in text
+        assert 'scheduler_devices_ready{device_type="Bumblebee"} 1' in text
+        assert "scheduler_worklist_queue_depth 0" in text
+        assert "scheduler_robot_queue_depth 0" in text
+
+        # The second source waits for the first read; spans are in simulated seconds
+        reads = instrumentation.tracer.spans(category="task")
+        reads = sorted((span for span in reads if span.name == "read on Reader1"), key=lambda span: span.start)
+        assert [(span.start, span.end) for span in reads] == [(0.0, 120.0), (120.0, 240.0)]
+        moves = instrumentation.tracer.spans(category="move")
+        assert moves and all(span.duration == pytest.approx(15.0) for span in moves)
+        assert instrumentation.tracer.spans(category="transfer", track="Robot1")
+
+    def test_wait_spans(self):
+        simulation = _simulation()
+        simulation.run_worklists([_worklist("WL", 1, [WaitTask(600.0), PlateTask("Reader", "read")])])
+        waits = simulation.plate_scheduler.instrumentation.tracer.spans(category="wait")
+        assert len(waits) == 1
+        assert waits[0].duration == pytest.approx(600.0)
+        assert waits[0].track == "WL_SRC0"
+
+    def test_robot_transfer_metrics(self, setup_with_devices, sample_worklist):
+        device_manager, mock_device, mock_robot = setup_with_devices
+        device2 = MockDevice("Device2", "Product2")
+        location = PlateLocation("Loc2", device2.name)
+        location.places = [PlatePlace("Place2", location)]
+        device2.add_location(location)
+        device_manager.register_device(device2)
+
+        scheduler = RobotScheduler(device_manager)
+        plate = ActiveSourcePlate(sample_worklist, 0)
+        plate.current_location = mock_device.locations[0]
+        plate.destination_location = location
+        scheduler._move_plate(plate)
+
+        metrics = scheduler.instrumentation.metrics
+        assert metrics.histogram("scheduler_robot_transfer_seconds").count(robot="TestRobot") == 1
+        assert metrics.histogram("scheduler_move_planning_seconds").count() == 1
+        assert metrics.histogram("scheduler_path_plan_seconds").count() == 1
+        spans = scheduler.instrumentation.tracer.spans(category="transfer")
+        assert [(span.track, span.process, span.args["plate"]) for span in spans] == [
+            ("TestRobot", "Robots", "SRC001")]
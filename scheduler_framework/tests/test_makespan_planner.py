@@ -0,0 +1,192 @@
+"""
+Unit tests for makespan_planner.py and plan execution in PlateScheduler
+"""
+
+import threading
+import pytest
+from scheduler import (
+    PlateScheduler, RobotScheduler, Plate, PlateLocation, PlatePlace, PlateTask, WaitTask,
+    Worklist, TransferOverview, Transfer, MakespanPlanner, DispatchPlan
+)
+from scheduler.makespan_planner import compare_with_greedy, format_report
+from tests.conftest import AsyncMockDevice
+
+
+def _worklist(num_sources, source_tasks, name="Planned"):
+    """Worklist of `num_sources` source plates feeding one destination plate"""
+    worklist = Worklist(name)
+    destination = Plate("DST000", "96-well", "96-well")
+    worklist.add_destination_plate(destination)
+    sources = {}
+    transfers = []
+    for i in range(num_sources):
+        source = Plate(f"SRC{i:03d}", "96-well", "96-well")
+        worklist.add_source_plate(source)
+        sources[source.barcode] = source
+        transfers.append(Transfer(source, destination, volume=10.0))
+    overview = TransferOverview(transfers=transfers, source_plates=sources,
+                                destination_plates={destination.barcode: destination})
+    overview.tasks.source_prehitpick_tasks = list(source_tasks)
+    worklist.transfer_overview = overview
+    return worklist
+
+
+def _johnson_planner(devices=None):
+    """Read then hit-pick; reads [5, 1, 1] s, hit-picks [1, 5, 5] s"""
+    reads = [5.0, 1.0, 1.0]
+    picks = [1.0, 5.0, 5.0]
+
+    def duration(task, active_plate):
+        if not active_plate.barcode.startswith("SRC"):
+            return None
+        index = int(active_plate.barcode[3:])
+        return reads[index] if task.command == "read" else picks[index]
+
+    devices = devices or {"Reader": [("Reader1", 1)], "Bumblebee": [("Bumblebee1", 1)]}
+    return MakespanPlanner(devices, {"Bumblebee.destination_hitpick": 0.0}, duration_fn=duration)
+
+
+class TestMakespanPlanner:
+    """Tests for MakespanPlanner"""
+
+    def test_greedy_follows_instance_order(self):
+        planner = _johnson_planner()
+        plan = planner.greedy(_worklist(3, [PlateTask("Reader", "read")]))
+
+        assert [op.instance_index for op in plan.device_sequence("Reader1")] == [0, 1, 2]
+        assert plan.makespan == pytest.approx(16.0)
+
+    def test_optimize_beats_greedy(self):
+        planner = _johnson_planner()
+        plan = planner.optimize(_worklist(3, [PlateTask("Reader", "read")]))
+
+        # Johnson's rule: short reads first, the long read last
+        assert plan.makespan == pytest.approx(12.0)
+        assert [op.instance_index for op in plan.device_sequence("Reader1")] == [1, 2, 0]
+
+    def test_plan_is_feasible(self):
+        planner = MakespanPlanner({"Reader": [("Reader1", 2), ("Reader2", 1)],
+                                   "Washer": [("Washer1", 1)], "Bumblebee": [("Bumblebee1", 2)]},
+                                  {"Reader": 2.0, "Washer": 3.0, "Bumblebee": 1.5}, move_seconds=0.5)
+        tasks = [PlateTask("Reader", "read"), WaitTask(1.0), PlateTask("Washer", "wash")]
+        plan = planner.optimize(_worklist(8, tasks), iterations=50)
+
+        # Slots are never over-committed
+        capacity = {"Reader1": 2, "Reader2": 1, "Washer1": 1, "Bumblebee1": 2}
+        for name, slots in capacity.items():
+            for op in plan.device_sequence(name):
+                overlapping = [other for other in plan.device_sequence(name)
+                               if other.start < op.end - 1e-9 and op.start < other.end - 1e-9]
+                assert len(overlapping) <= slots
+        # Tasks of a plate run in order
+        for op in plan.operations:
+            if op.task_index > 0:
+                previous = plan.operation(op.kind, op.instance_index, op.task_index - 1)
+                assert op.start >= previous.end - 1e-9
+
+    def test_release_limit_matches_factories(self):
+        planner = MakespanPlanner({"Reader": [("Reader1", 8)], "Bumblebee": [("Bumblebee1", 8)]},
+                                  {"Reader": 1.0, "Bumblebee": 0.0})
+        plan = planner.greedy(_worklist(5, [PlateTask("Reader", "read")]))
+
+        starts = [plan.operation("source", i, 0).start for i in range(5)]
+        # At most three source plates at once
+        assert starts == [0.0, 0.0, 0.0, 1.0, 1.0]
+
+    def test_moves_and_wait_tasks(self):
+        planner = MakespanPlanner({"Reader": [("Reader1", 1)], "Bumblebee": [("Bumblebee1", 1)]},
+                                  {"Reader": 2.0, "Bumblebee": 1.0}, move_seconds=0.5)
+        plan = planner.greedy(_worklist(1, [WaitTask(3.0), PlateTask("Reader", "read")]))
+
+        wait = plan.operation("source", 0, 0)
+        read = plan.operation("source", 0, 1)
+        pick = plan.operation("source", 0, 2)
+        assert wait.device_name is None and wait.end == pytest.approx(3.0)
+        # The read sources the plate in place; the hit-pick needs a move first
+        assert read.end - read.start == pytest.approx(2.0)
+        assert pick.end - pick.start == pytest.approx(1.5)
+
+    def test_unknown_device_type(self):
+        planner = MakespanPlanner({"Bumblebee": [("Bumblebee1", 1)]})
+        with pytest.raises(ValueError):
+            planner.greedy(_worklist(1, [PlateTask("Reader", "read")]))
+
+    def test_from_device_manager(self, device_manager):
+        reader = AsyncMockDevice("Reader1", "Reader")
+        for i in range(3):
+            reader.add_location(PlateLocation(f"Reader1_Loc{i}", reader.name))
+        device_manager.register_device(reader)
+        device_manager.register_device(AsyncMockDevice("Bumblebee1", "Bumblebee"))
+
+        planner = MakespanPlanner.from_device_manager(device_manager, move_seconds=2.0)
+        assert planner.devices == {"Reader": [("Reader1", 3)], "Bumblebee": [("Bumblebee1", 1)]}
+        assert planner.move_seconds == 2.0
+
+    def test_report(self):
+        planner = _johnson_planner()
+        comparisons = compare_with_greedy(planner, [_worklist(3, [PlateTask("Reader", "read")], "WL1")])
+
+        assert comparisons[0].greedy_makespan == pytest.approx(16.0)
+        assert comparisons[0].improvement == pytest.approx(0.25)
+        report = format_report(comparisons)
+        assert "WL1" in report and "25.0%" in report
+
+
+def _add_device(device_manager, device, count):
+    for i in range(count):
+        loc = PlateLocation(f"{device.name}_Loc{i}", device.name)
+        loc.places = [PlatePlace(f"{device.name}_Place{i}", loc)]
+        device.add_location(loc)
+    device_manager.register_device(device)
+    return device
+
+
+class TestPlanExecution:
+    """PlateScheduler following a dispatch plan"""
+
+    def _run(self, device_manager, mock_robot, worklist, plan: DispatchPlan):
+        device_manager.register_robot(mock_robot)
+        worklist.dispatch_plan = plan
+        robot_scheduler = RobotScheduler(device_manager)
+        robot_scheduler.start_scheduler()
+        scheduler = PlateScheduler(robot_scheduler, device_manager)
+        scheduler.idle_recheck_seconds = None
+        completed = threading.Event()
+        worklist.add_completion_callback(lambda *args: completed.set())
+        worker = threading.Thread(target=scheduler._do_worklist, args=(worklist,), daemon=True)
+        worker.start()
+        try:
+            assert completed.wait(timeout=5.0)
+        finally:
+            scheduler.stop_scheduler()
+            robot_scheduler.stop_scheduler()
+        return scheduler
+
+    def test_devices_receive_tasks_in_plan_order(self, device_manager, mock_robot):
+        reader = _add_device(device_manager, AsyncMockDevice("Reader1", "Reader"), 1)
+        bumblebee = _add_device(device_manager, AsyncMockDevice("Bumblebee1", "Bumblebee"), 4)
+        worklist = _worklist(3, [PlateTask("Reader", "read")])
+        plan = _johnson_planner().optimize(worklist)
+
+        self._run(device_manager, mock_robot, worklist, plan)
+
+        # Greedy would read plate 0 first
+        assert [plate.instance_index for plate in reader.job_queue] == [1, 2, 0]
+        assert ([(type(plate).__name__, plate.instance_index) for plate in bumblebee.job_queue]
+                == [("ActiveSourcePlate" if op.kind == "source" else "ActiveDestinationPlate", op.instance_index)
+                    for op in plan.device_sequence("Bumblebee1")])
+
+    def test_planned_device_is_used(self, device_manager, mock_robot):
+        reader1 = _add_device(device_manager, AsyncMockDevice("Reader1", "Reader"), 2)
+        reader2 = _add_device(device_manager, AsyncMockDevice("Reader2", "Reader"), 2)
+        _add_device(device_manager, AsyncMockDevice("Bumblebee1", "Bumblebee"), 4)
+        worklist = _worklist(2, [PlateTask("Reader", "read")])
+        plan = MakespanPlanner({"Reader": [("Reader2", 1), ("Reader1", 1)],
+                                "Bumblebee": [("Bumblebee1", 4)]}).greedy(worklist)
+
+        scheduler = self._run(device_manager, mock_robot, worklist, plan)
+
+        # Greedy would send both plates to Reader1, which has two free locations
+        assert [plate.instance_index for plate in reader2.job_queue] == [0]
+        assert [plate.instance_index for plate in reader1.job_queue] == [1]
+        assert scheduler.completed_runs[0].plan_progress == {"Reader1": 1, "Reader2": 1, "Bumblebee1": 3}
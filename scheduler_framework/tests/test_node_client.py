@@ -0,0 +1,364 @@
+"""
+Unit tests for RestNodeClient, its keep-alive HTTPConnectionPool (http_pool.py)
+and long-polling wait_for_completion
+"""
+
+import asyncio
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from scheduler import RestNodeClient, HTTPConnectionPool, AsyncRestNodeClient, NodeHTTPError
+from scheduler.node_interface import NodeClient, NodeActionRequest, NodeActionResponse
+from tests.test_async_scheduler import node_server  # noqa: F401  (HTTP/1.0 Node fixture)
+
+
+class _KeepAliveNodeHandler(BaseHTTPRequestHandler):
+    """Node contract over HTTP/1.1 keep-alive; counts the connections it accepts"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def _send(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if self.server.drop_after_response:
+            # Close without telling the client, like a server timing out an idle connection
+            self.close_connection = True
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path == "/health":
+            self._send(200, {"healthy": True})
+        elif parts.path == "/stats":
+            self._send(200, {"workers": 1, "queue_depth": len(self.server.submitted)})
+        elif parts.path == "/actions/status/missing":
+            self._send(404, {"detail": "Unknown execution_id"})
+        elif parts.path.startswith("/actions/status/"):
+            with self.server.lock:
+                self.server.status_requests += 1
+            wait = float(parse_qs(parts.query).get("wait", ["0"])[0])
+            if wait > 0 and self.server.long_poll:
+                self.server.job_done.wait(wait)
+            status = "succeeded" if self.server.job_done.is_set() else "running"
+            self._send(200, {"execution_id": parts.path.rsplit("/", 1)[1], "status": status})
+        else:
+            self._send(404, {"detail": "not found"})
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path == "/actions/pick":
+            with self.server.lock:
+                self.server.picks += 1
+            if self.server.die_after_pick:
+                # The Node received the action, then the connection dies before any response
+                self.close_connection = True
+                return
+            self._send(200, {"status": "succeeded", "result": {"args": payload["args"]}})
+        elif self.path in ("/actions/batch/submit", "/actions/status:batch") and not self.server.batch:
+            self._send(404, {"detail": "not found"})
+        elif self.path in ("/actions/batch/submit", "/actions/status:batch") and self.server.batch_error:
+            self._send(self.server.batch_error, {"detail": "unavailable"})
+        elif self.path == "/actions/batch/submit":
+            responses = []
+            for item in payload["requests"]:
+                if item["request_id"] not in self.server.batch_submitted:
+                    self.server.batch_submitted.append(item["request_id"])
+                responses.append({"request_id": item["request_id"], "status": "queued",
+                                  "execution_id": f"job-{self.server.batch_submitted.index(item['request_id'])}"})
+            self._send(200, {"responses": responses})
+        elif self.path == "/actions/status:batch":
+            self._send(200, {"responses": [{"execution_id": execution_id, "status": "succeeded"}
+                                           for execution_id in payload["execution_ids"]]})
+        elif self.path.endswith("/submit"):
+            self.server.submitted.append(payload)
+            self._send(200, {"execution_id": f"job-{len(self.server.submitted)}", "status": "queued"})
+        else:
+            self._send(500, {"detail": "boom"})
+
+
+@pytest.fixture
+def keepalive_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveNodeHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.drop_after_response = False
+    server.picks = 0
+    server.die_after_pick = False
+    server.status_requests = 0
+    server.long_poll = True
+    server.job_done = threading.Event()
+    server.submitted = []
+    server.batch = True
+    server.batch_error = None
+    server.batch_submitted = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestHTTPConnectionPool:
+    """Connection reuse, eviction and retries"""
+
+    def test_requests_reuse_one_connection(self, keepalive_server):
+        client = RestNodeClient(keepalive_server.url)
+        try:
+            for _ in range(20):
+                assert client.health()
+                assert client.get_action_status("job-1").status == "running"
+            response = client.call_action(NodeActionRequest(action="pick", args={"slot": 2}))
+            assert response.result == {"args": {"slot": 2}}
+        finally:
+            client.close()
+        assert keepalive_server.connections == 1
+        assert client.pool.stats.connections_created == 1
+        assert client.pool.stats.connections_reused == 40
+
+    def test_stale_connection_is_retried(self, keepalive_server):
+        keepalive_server.drop_after_response = True
+        pool = HTTPConnectionPool()
+        client = RestNodeClient(keepalive_server.url, pool=pool)
+        for _ in range(3):
+            assert client.get_action_status("job-1").status == "running"
+        client.close()
+        assert pool.stats.stale_retries == 2
+        assert keepalive_server.connections == 3
+
+    def test_sent_action_is_not_retried(self, keepalive_server):
+        # The sync action POST reached the Node before the connection dropped; it may have run
+        pool = HTTPConnectionPool()
+        client = RestNodeClient(keepalive_server.url, pool=pool)
+        client.call_action(NodeActionRequest(action="pick", args={"slot": 1}))
+        keepalive_server.die_after_pick = True
+        with pytest.raises(RuntimeError):
+            client.call_action(NodeActionRequest(action="pick", args={"slot": 1}))
+        client.close()
+        assert keepalive_server.picks == 2
+        assert pool.stats.stale_retries == 0
+
+    def test_deduplicated_submit_is_retried_on_stale_connection(self, keepalive_server):
+        keepalive_server.drop_after_response = True
+        pool = HTTPConnectionPool()
+        client = RestNodeClient(keepalive_server.url, pool=pool)
+        for _ in range(2):
+            assert client.submit_action(NodeActionRequest(action="pick")).status == "queued"
+        client.close()
+        assert pool.stats.stale_retries == 1
+        assert len(keepalive_server.submitted) == 2
+
+    def test_default_idle_timeout_is_below_server_keepalive(self):
+        # uvicorn closes idle keep-alive connections after 5s
+        assert HTTPConnectionPool().idle_timeout < 5.0
+
+    def test_idle_connections_are_evicted(self, keepalive_server):
+        now = [0.0]
+        pool = HTTPConnectionPool(idle_timeout=10.0, clock=lambda: now[0])
+        client = RestNodeClient(keepalive_server.url, pool=pool)
+        assert client.health()
+        now[0] = 5.0
+        assert client.health()
+        assert pool.stats.connections_reused == 1
+
+        now[0] = 20.0
+        assert pool.evict_idle() == 1
+        assert pool.idle_connections() == 0
+        assert client.health()
+        assert pool.stats.connections_created == 2
+        pool.close()
+
+    def test_pool_size_is_bounded(self, keepalive_server):
+        pool = HTTPConnectionPool(max_connections_per_host=2)
+        barrier = threading.Barrier(6)
+        client = RestNodeClient(keepalive_server.url, pool=pool)
+
+        def call():
+            barrier.wait()
+            for _ in range(5):
+                assert client.health()
+
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert pool.idle_connections(keepalive_server.url) <= 2
+        assert pool.stats.requests == 30
+        pool.close()
+
+    def test_errors(self, keepalive_server):
+        client = RestNodeClient(keepalive_server.url)
+        with pytest.raises(RuntimeError, match="500"):
+            client.call_action(NodeActionRequest(action="place"))
+        with pytest.raises(RuntimeError, match="404"):
+            client.get_definition()
+        # The error responses did not cost the connection
+        assert keepalive_server.connections == 1
+        assert not RestNodeClient("http://127.0.0.1:1").health()
+        client.close()
+
+    def test_submit_priority_and_stats(self, keepalive_server):
+        client = RestNodeClient(keepalive_server.url)
+        response = client.submit_action(NodeActionRequest(action="move", priority=5))
+        assert response.execution_id == "job-1" and response.status == "queued"
+        assert keepalive_server.submitted[0]["priority"] == 5
+        assert client.get_stats() == {"workers": 1, "queue_depth": 1}
+        client.close()
+
+    def test_http10_server_is_not_pooled(self, node_server):
+        client = RestNodeClient(node_server)
+        assert client.health()
+        assert client.health()
+        assert client.pool.idle_connections() == 0
+        assert client.pool.stats.connections_created == 2
+
+
+def _finish_after(server, seconds):
+    timer = threading.Timer(seconds, server.job_done.set)
+    timer.start()
+    return timer
+
+
+class TestWaitForCompletion:
+    """Long-poll completion and the polling fallback"""
+
+    def test_returns_when_job_finishes(self, keepalive_server):
+        client = RestNodeClient(keepalive_server.url)
+        _finish_after(keepalive_server, 0.2)
+        started = time.monotonic()
+        response = client.wait_for_completion("job-1", timeout_s=10.0)
+        assert response.status == "succeeded"
+        assert response.execution_id == "job-1"
+        assert time.monotonic() - started < 2.0
+        # One held request instead of a polling loop
+        assert keepalive_server.status_requests == 1
+        client.close()
+
+    def test_node_without_long_poll_is_polled(self, keepalive_server):
+        keepalive_server.long_poll = False
+        client = RestNodeClient(keepalive_server.url)
+        _finish_after(keepalive_server, 0.3)
+        response = client.wait_for_completion("job-1", timeout_s=10.0, poll_interval_s=0.05)
+        assert response.status == "succeeded"
+        assert keepalive_server.status_requests > 2
+        client.close()
+
+    def test_timeout(self, keepalive_server):
+        client = RestNodeClient(keepalive_server.url)
+        started = time.monotonic()
+        with pytest.raises(TimeoutError, match="job-1 still running"):
+            client.wait_for_completion("job-1", timeout_s=0.3)
+        assert time.monotonic() - started < 2.0
+        client.close()
+
+    def test_base_client_polls(self):
+        class ScriptedNode(NodeClient):
+            def __init__(self, statuses):
+                self.statuses = list(statuses)
+
+            def get_definition(self):
+                raise NotImplementedError
+
+            def health(self):
+                return True
+
+            def call_action(self, req, timeout_s=30.0):
+                raise NotImplementedError
+
+            def get_action_status(self, execution_id, timeout_s=10.0):
+                status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+                return NodeActionResponse(execution_id=execution_id, status=status)
+
+        node = ScriptedNode(["queued", "running", "failed"])
+        assert node.wait_for_completion("job-1", poll_interval_s=0.01).status == "failed"
+        with pytest.raises(TimeoutError):
+            ScriptedNode(["running"]).wait_for_completion("job-1", timeout_s=0.1, poll_interval_s=0.01)
+
+    def test_async_client(self, keepalive_server):
+        client = AsyncRestNodeClient(keepalive_server.url)
+        _finish_after(keepalive_server, 0.2)
+        response = asyncio.run(client.wait_for_completion("job-1", timeout_s=10.0))
+        assert response.status == "succeeded"
+        assert keepalive_server.status_requests == 1
+
+
+class TestBatchActions:
+    """submit_actions / get_action_statuses over the batch endpoints"""
+
+    def test_batch_round_trips(self, keepalive_server):
+        client = RestNodeClient(keepalive_server.url)
+        requests = [NodeActionRequest(action="read", args={"slot": i}) for i in range(3)]
+        submitted = client.submit_actions(requests)
+        assert [r.execution_id for r in submitted] == ["job-0", "job-1", "job-2"]
+        assert [r.request_id for r in submitted] == [r.request_id for r in requests]
+        # Resending is deduplicated on request_id
+        assert [r.execution_id for r in client.submit_actions(requests[1:])] == ["job-1", "job-2"]
+
+        statuses = client.get_action_statuses(["job-0", "job-2"])
+        assert [(r.execution_id, r.status) for r in statuses] == [("job-0", "succeeded"), ("job-2", "succeeded")]
+        assert client.submit_actions([]) == [] and client.get_action_statuses([]) == []
+        assert keepalive_server.connections == 1
+        client.close()
+
+    def test_node_without_batch_endpoints(self, keepalive_server):
+        keepalive_server.batch = False
+        client = RestNodeClient(keepalive_server.url)
+        submitted = client.submit_actions([NodeActionRequest(action="read"), NodeActionRequest(action="read")])
+        assert [r.execution_id for r in submitted] == ["job-1", "job-2"]
+        statuses = client.get_action_statuses(["job-1", "missing", "job-2"])
+        assert [(r.execution_id, r.status) for r in statuses] == [
+            ("job-1", "running"), ("missing", "unknown"), ("job-2", "running")]
+        assert not statuses[1].success
+        client.close()
+
+    def test_batch_errors_are_not_retried_per_item(self, keepalive_server):
+        keepalive_server.batch_error = 503
+        client = RestNodeClient(keepalive_server.url)
+        with pytest.raises(NodeHTTPError) as excinfo:
+            client.get_action_statuses(["job-1", "job-2"])
+        assert excinfo.value.status == 503
+        with pytest.raises(RuntimeError):
+            client.submit_actions([NodeActionRequest(action="read")])
+        client.close()
+        assert keepalive_server.status_requests == 0
+        assert keepalive_server.submitted == []
+
+    def test_async_client_without_batch_endpoints(self, keepalive_server):
+        keepalive_server.batch = False
+        client = AsyncRestNodeClient(keepalive_server.url)
+        statuses = asyncio.run(client.get_action_statuses(["job-1", "missing"]))
+        assert [(r.execution_id, r.status) for r in statuses] == [("job-1", "running"), ("missing", "unknown")]
+
+        keepalive_server.batch, keepalive_server.batch_error = True, 500
+        with pytest.raises(NodeHTTPError):
+            asyncio.run(client.get_action_statuses(["job-1"]))
+        assert keepalive_server.status_requests == 1
+
+    def test_async_client(self, keepalive_server):
+        client = AsyncRestNodeClient(keepalive_server.url)
+
+        async def run():
+            submitted = await client.submit_actions([NodeActionRequest(action="read") for _ in range(2)])
+            return submitted, await client.get_action_statuses([r.execution_id for r in submitted])
+
+        submitted, statuses = asyncio.run(run())
+        assert [r.execution_id for r in submitted] == ["job-0", "job-1"]
+        assert [r.status for r in statuses] == ["succeeded", "succeeded"]
@@ -296,3 +296,194 @@ class TestPathPlanner:
         # Note: This depends on implementation, but we can check that
         # the planning process resets state
 
+
+
+class TestPathPlannerWorldCache:
+    """Tests for the generation-based world graph cache"""
+    
+    def _counting_robot(self):
+        class CountingRobot(MockRobot):
+            def __init__(self, name):
+                super().__init__(name)
+                self.weight_calls = 0
+            
+            def get_transfer_weight(self, src_device, src_location, src_place,
+                                   dst_device, dst_location, dst_place) -> float:
+                self.weight_calls += 1
+                return super().get_transfer_weight(
+                    src_device, src_location, src_place,
+                    dst_device, dst_location, dst_place
+                )
+        return CountingRobot("CountingRobot")
+    
+    def _add_device(self, device_manager, name):
+        device = MockDevice(name, "Product")
+        loc = PlateLocation(f"{name}_loc", device.name)
+        loc.places = [PlatePlace(f"{name}_place", loc)]
+        device.add_location(loc)
+        device_manager.register_device(device)
+        return device
+    
+    def test_create_world_is_cached(self, device_manager):
+        """Test that create_world does not rebuild when nothing changed"""
+        robot = self._counting_robot()
+        device_manager.register_robot(robot)
+        self._add_device(device_manager, "Device1")
+        self._add_device(device_manager, "Device2")
+        
+        planner = PathPlanner(device_manager)
+        planner.create_world()
+        calls = robot.weight_calls
+        assert calls > 0
+        assert planner.world_is_current
+        
+        planner.create_world()
+        assert robot.weight_calls == calls
+    
+    def test_create_world_rebuilds_after_register_device(self, device_manager):
+        """Test that registering a device triggers a rebuild"""
+        device_manager.register_robot(MockRobot("Robot"))
+        self._add_device(device_manager, "Device1")
+        
+        planner = PathPlanner(device_manager)
+        planner.create_world()
+        assert len(planner.world_nodes) == 1
+        
+        self._add_device(device_manager, "Device2")
+        assert not planner.world_is_current
+        
+        planner.create_world()
+        assert len(planner.world_nodes) == 2
+    
+    def test_create_world_rebuilds_after_location_change(self, device_manager):
+        """Test that notify_locations_changed triggers a rebuild"""
+        device_manager.register_robot(MockRobot("Robot"))
+        device = self._add_device(device_manager, "Device1")
+        
+        planner = PathPlanner(device_manager)
+        planner.create_world()
+        
+        loc = PlateLocation("ExtraLoc", device.name)
+        loc.places = [PlatePlace("ExtraPlace", loc)]
+        device.add_location(loc)
+        planner.create_world()
+        assert len(planner.world_nodes) == 1  # change not announced yet
+        
+        device_manager.notify_locations_changed()
+        planner.create_world()
+        assert len(planner.world_nodes) == 2
+    
+    def test_invalidate_forces_rebuild(self, device_manager):
+        """Test that invalidate() forces the next create_world to rebuild"""
+        robot = self._counting_robot()
+        device_manager.register_robot(robot)
+        self._add_device(device_manager, "Device1")
+        self._add_device(device_manager, "Device2")
+        
+        planner = PathPlanner(device_manager)
+        planner.create_world()
+        calls = robot.weight_calls
+        
+        planner.invalidate()
+        assert not planner.world_is_current
+        planner.create_world()
+        assert robot.weight_calls == 2 * calls
+        
+        planner.create_world(force=True)
+        assert robot.weight_calls == 3 * calls
+
+
+class TestShortestPathSearch:
+    """Tests for the heap-based multi-source/multi-target search"""
+    
+    def _chain(self):
+        """a -1- b -1- c, plus a direct a -5- c edge"""
+        a, b, c = Node("a"), Node("b"), Node("c")
+        for u, v, cost in ((a, b, 1.0), (b, c, 1.0), (a, c, 5.0)):
+            u.connections.append(Connection(v, cost))
+            v.connections.append(Connection(u, cost))
+        return a, b, c
+    
+    def test_prefers_cheaper_multi_hop_route(self):
+        """Test that the cheaper two-hop route wins over the direct edge"""
+        a, b, c = self._chain()
+        planner = PathPlanner(DeviceManager())
+        
+        path, cost = planner._shortest_path([a], {c})
+        assert path == [a, b, c]
+        assert cost == 2.0
+    
+    def test_multi_source_multi_target(self):
+        """Test that the search picks the cheapest (source, target) pair"""
+        a, b, c = self._chain()
+        d = Node("d")
+        c.connections.append(Connection(d, 10.0))
+        d.connections.append(Connection(c, 10.0))
+        planner = PathPlanner(DeviceManager())
+        
+        path, cost = planner._shortest_path([a, d], {b})
+        assert path == [a, b]
+        assert cost == 1.0
+    
+    def test_source_is_target(self):
+        """Test a zero-length path when a source is also a target"""
+        a, b, c = self._chain()
+        planner = PathPlanner(DeviceManager())
+        
+        path, cost = planner._shortest_path([a, b], {b})
+        assert path == [b]
+        assert cost == 0.0
+    
+    def test_node_state_is_not_mutated(self):
+        """Test that searches leave Node.distance/visited/previous untouched"""
+        a, b, c = self._chain()
+        planner = PathPlanner(DeviceManager())
+        
+        planner._shortest_path([a], {c})
+        for node in (a, b, c):
+            assert node.distance == math.inf
+            assert node.visited == False
+            assert node.previous is None
+    
+    def test_repeated_searches_are_independent(self):
+        """Test that a previous search does not affect the next one"""
+        a, b, c = self._chain()
+        planner = PathPlanner(DeviceManager())
+        
+        assert planner._dijkstra(a, c) == [a, b, c]
+        assert planner._dijkstra(c, a) == [c, b, a]
+        assert planner._dijkstra(b, a) == [b, a]
+    
+    def test_concurrent_planning(self, device_manager):
+        """Test that concurrent plan_path calls on one planner agree"""
+        import threading
+        
+        robot = MockRobot("Robot")
+        device_manager.register_robot(robot)
+        locations = []
+        for i in range(6):
+            device = MockDevice(f"Device{i}", "Product")
+            loc = PlateLocation(f"Loc{i}", device.name)
+            loc.places = [PlatePlace(f"Place{i}", loc)]
+            device.add_location(loc)
+            device_manager.register_device(device)
+            locations.append(loc)
+        
+        planner = PathPlanner(device_manager)
+        planner.create_world()
+        errors = []
+        
+        def worker():
+            for _ in range(50):
+                for src, dst in zip(locations, reversed(locations)):
+                    path = planner.plan_path(src, dst)
+                    if src is not dst and (path is None or len(path) != 2):
+                        errors.append((src.name, dst.name, path))
+        
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        assert errors == []
@@ -0,0 +1,178 @@
+"""
+Unit tests for pf400_reach.py and batched transfer weights
+"""
+
+import pytest
+import math
+from scheduler import PlateLocation, PlatePlace
+from scheduler.path_planner import PathPlanner
+from scheduler.pf400_reach import (
+    PF400ReachRobot, forward_position, within_limits,
+    SHOULDER_LENGTH, ELBOW_LENGTH, END_EFFECTOR_LENGTH
+)
+from tests.conftest import MockDevice, MockRobot
+
+
+class ReachRobot(PF400ReachRobot):
+    """PF400ReachRobot with a no-op transfer"""
+    
+    def transfer_plate(self, src_device, src_place, dst_device, dst_place,
+                      labware_name, barcode):
+        pass
+
+
+class BatchedRobot(MockRobot):
+    """MockRobot that counts batched and scalar weight calls"""
+    
+    def __init__(self, name, fail=False):
+        super().__init__(name)
+        self.fail = fail
+        self.batched_calls = 0
+        self.scalar_calls = 0
+    
+    def get_transfer_weight(self, *args):
+        self.scalar_calls += 1
+        return super().get_transfer_weight(*args)
+    
+    def get_transfer_weights(self, src_places, dst_places):
+        self.batched_calls += 1
+        if self.fail:
+            raise RuntimeError("no batch support")
+        return [[math.inf if s[1] is d[1] else 2.0 for d in dst_places] for s in src_places]
+
+
+def _deck(device_manager, count=3):
+    locations = []
+    for i in range(count):
+        device = MockDevice(f"Device{i}", "Product")
+        loc = PlateLocation(f"Loc{i}", device.name)
+        loc.places = [PlatePlace(f"Place{i}", loc)]
+        device.add_location(loc)
+        device_manager.register_device(device)
+        locations.append(loc)
+    return locations
+
+
+class TestKinematics:
+    """Tests for the PF400 reach geometry"""
+    
+    def test_forward_position_straight_arm(self):
+        """Test the fully extended arm"""
+        x, y, z = forward_position([500.0, 0.0, 0.0, 0.0, 80.0, 100.0])
+        assert x == pytest.approx(SHOULDER_LENGTH + ELBOW_LENGTH + END_EFFECTOR_LENGTH + 100.0)
+        assert y == pytest.approx(0.0)
+        assert z == 500.0
+    
+    def test_forward_position_without_rail(self):
+        """Test that five joints mean no horizontal rail"""
+        x, y, _ = forward_position([0.0, 90.0, 0.0, 0.0, 80.0])
+        assert x == pytest.approx(0.0, abs=1e-9)
+        assert y == pytest.approx(SHOULDER_LENGTH + ELBOW_LENGTH + END_EFFECTOR_LENGTH)
+    
+    def test_within_limits(self):
+        """Test joint limit checks"""
+        assert within_limits([100.0, 0.0, 30.0, 0.0, 80.0, 0.0])
+        assert not within_limits([2000.0, 0.0, 30.0, 0.0, 80.0, 0.0])
+        assert not within_limits([100.0, 120.0, 30.0, 0.0, 80.0, 0.0])
+        assert not within_limits([100.0, 0.0, 30.0, 0.0, 80.0, 1500.0])
+        assert not within_limits([100.0, 0.0])
+
+
+class TestPF400ReachRobot:
+    """Tests for PF400ReachRobot weights"""
+    
+    def _robot(self):
+        return ReachRobot("PF400", {
+            "Loc0:Place0": [100.0, 0.0, 0.0, 0.0, 80.0, 0.0],
+            "Loc1": [100.0, 0.0, 0.0, 0.0, 80.0, 500.0],
+            "Loc2:Place2": [100.0, 0.0, 0.0, 0.0, 80.0, 5000.0],  # off the rail
+        })
+    
+    def test_weight_from_distance(self, device_manager):
+        """Test weight = base + distance / mm_per_weight"""
+        locations = _deck(device_manager)
+        robot = self._robot()
+        weight = robot.get_transfer_weight(None, locations[0], locations[0].places[0],
+                                           None, locations[1], locations[1].places[0])
+        assert weight == pytest.approx(1.5)
+    
+    def test_unreachable_places(self, device_manager):
+        """Test missing or out-of-limit teachpoints and same-location moves"""
+        locations = _deck(device_manager)
+        robot = self._robot()
+        src = (None, locations[0], locations[0].places[0])
+        assert robot.get_transfer_weight(*src, None, locations[2], locations[2].places[0]) == math.inf
+        assert robot.get_transfer_weight(*src, *src) == math.inf
+        
+        robot.set_teachpoint("Loc0:Place0", None)
+        assert robot.position(locations[0], locations[0].places[0]) is None
+    
+    def test_batched_matches_scalar(self, device_manager):
+        """Test that the matrix agrees with per-pair weights"""
+        locations = _deck(device_manager)
+        robot = self._robot()
+        infos = [(None, loc, loc.places[0]) for loc in locations]
+        
+        matrix = robot.get_transfer_weights(infos, infos)
+        for i, src in enumerate(infos):
+            for j, dst in enumerate(infos):
+                assert matrix[i][j] == robot.get_transfer_weight(*src, *dst)
+    
+    def test_default_matrix_uses_scalar_method(self, device_manager):
+        """Test the RobotInterface fallback implementation"""
+        locations = _deck(device_manager, 2)
+        robot = MockRobot("Robot")
+        infos = [(None, loc, loc.places[0]) for loc in locations]
+        assert robot.get_transfer_weights(infos, infos) == [[math.inf, 1.0], [1.0, math.inf]]
+
+
+class TestBatchedWorldBuild:
+    """Tests for PathPlanner.create_world with batched weights"""
+    
+    def test_uses_batched_weights(self, device_manager):
+        """Test that one batched call replaces the per-pair calls"""
+        _deck(device_manager)
+        robot = BatchedRobot("Robot")
+        device_manager.register_robot(robot)
+        planner = PathPlanner(device_manager)
+        planner.create_world()
+        
+        assert robot.batched_calls == 1
+        assert robot.scalar_calls == 0
+        assert planner.graph.num_edges == 6
+        assert planner.graph.edge_cost(0, 1) == 2.0
+    
+    def test_falls_back_when_batch_fails(self, device_manager):
+        """Test the per-pair fallback when get_transfer_weights raises"""
+        _deck(device_manager)
+        robot = BatchedRobot("Robot", fail=True)
+        device_manager.register_robot(robot)
+        planner = PathPlanner(device_manager)
+        planner.create_world()
+        
+        assert robot.scalar_calls == 3
+        assert planner.graph.edge_cost(0, 1) == 1.0
+    
+    def test_scalar_robots_unchanged(self, device_manager):
+        """Test that robots without a batched method still use pairwise calls"""
+        _deck(device_manager)
+        device_manager.register_robot(MockRobot("Robot"))
+        planner = PathPlanner(device_manager)
+        planner.create_world()
+        
+        assert planner.graph.num_edges == 6
+    
+    def test_reach_robot_world(self, device_manager):
+        """Test planning over a world built from teachpoints"""
+        locations = _deck(device_manager)
+        device_manager.register_robot(ReachRobot("PF400", {
+            "Loc0:Place0": [100.0, 0.0, 0.0, 0.0, 80.0, -500.0],
+            "Loc1:Place1": [100.0, 0.0, 0.0, 0.0, 80.0, 0.0],
+            "Loc2:Place2": [100.0, 0.0, 0.0, 0.0, 80.0, 500.0],
+        }))
+        planner = PathPlanner(device_manager)
+        planner.create_world()
+        
+        path = planner.plan_path(locations[0], locations[2])
+        assert [node.key for node in path] == ["Loc0:Place0", "Loc2:Place2"]
+        assert planner.find_edge(path[0], path[1])[1] == pytest.approx(2.0)
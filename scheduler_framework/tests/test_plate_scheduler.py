@@ -11,7 +11,7 @@ from scheduler import (
 )
 from scheduler.device_manager import DeviceManager
 from scheduler.worklist import Worklist, Plate, PlateTask, TransferOverview, Transfer
-from tests.conftest import MockDevice, MockRobot
+from tests.conftest import MockDevice, MockRobot, AsyncMockDevice
 
 
 class TestPlateScheduler:
@@ -194,23 +194,15 @@ class TestPlateScheduler:
         robot_scheduler = RobotScheduler(device_manager)
         scheduler = PlateScheduler(robot_scheduler, device_manager)
         
-        plate = ActiveSourcePlate(sample_worklist, 0)
+        run = scheduler._start_worklist(sample_worklist)
+        plate = run.factories[0].create_active_plate()
         plate.plate_is_free.set()
         plate.still_have_todos = False
+        assert plate in scheduler.active_plates
         
-        with ActivePlate._lock:
-            ActivePlate._active_plates.append(plate)
-            initial_count = len(ActivePlate._active_plates)
-        
-        # Simulate the removal logic
-        with scheduler._lock:
-            finished_plates = [ap for ap in ActivePlate._active_plates 
-                             if ap.is_finished()]
-            for p in finished_plates:
-                ActivePlate._active_plates.remove(p)
+        scheduler._scheduling_pass()
         
-        with ActivePlate._lock:
-            assert len(ActivePlate._active_plates) < initial_count
+        assert plate not in scheduler.active_plates
     
     def test_release_new_active_plates(self, setup_with_devices, sample_worklist):
         """Test releasing new active plates from factories"""
@@ -218,24 +210,17 @@ class TestPlateScheduler:
         robot_scheduler = RobotScheduler(device_manager)
         scheduler = PlateScheduler(robot_scheduler, device_manager)
         
-        from scheduler.active_plate_factory import (
-            ActiveSourcePlateFactory, ActiveDestinationPlateFactory
-        )
+        from scheduler.active_plate_factory import ActiveSourcePlateFactory
         
-        factory = ActiveSourcePlateFactory(sample_worklist)
+        factory = ActiveSourcePlateFactory(sample_worklist, scheduler.active_plates)
         
         # Initially no active plates
-        with ActivePlate._lock:
-            initial_count = len(ActivePlate._active_plates)
+        assert len(scheduler.active_plates) == 0
         
-        # Try to release a plate
+        # Release a plate; it is registered exactly once
         plate = factory.try_release_active_plate()
-        if plate:
-            with scheduler._lock:
-                ActivePlate._active_plates.append(plate)
-            
-            with ActivePlate._lock:
-                assert len(ActivePlate._active_plates) > initial_count
+        assert plate is not None
+        assert scheduler.active_plates.plates() == [plate]
     
     def test_track_destination_plates(self, device_manager, sample_worklist):
         """Test tracking destination plates"""
@@ -293,3 +278,229 @@ class TestPlateScheduler:
         
         scheduler.stop_scheduler()
 
+
+
+def _add_device(device_manager, device, count=2):
+    for i in range(count):
+        loc = PlateLocation(f"{device.name}_Loc{i}", device.name)
+        loc.places = [PlatePlace(f"{device.name}_Place{i}", loc)]
+        device.add_location(loc)
+    device_manager.register_device(device)
+    return device
+
+
+class TestEventDrivenLoop:
+    """Tests for the notification-driven scheduling loop"""
+    
+    def test_wait_returns_after_notify(self, device_manager):
+        """Test that a pending notification wakes the loop immediately"""
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        scheduler.idle_recheck_seconds = None
+        scheduler._wait_for_state_change()  # consume the initial state
+        
+        threading.Timer(0.05, scheduler.notify).start()
+        start = time.monotonic()
+        scheduler._wait_for_state_change()
+        assert time.monotonic() - start < 1.0
+    
+    def test_notification_is_not_lost(self, device_manager):
+        """Test that a notify() before the wait is remembered"""
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        scheduler.idle_recheck_seconds = None
+        scheduler._wait_for_state_change()
+        
+        scheduler.notify()
+        start = time.monotonic()
+        scheduler._wait_for_state_change()
+        assert time.monotonic() - start < 0.5
+    
+    def test_job_completion_notifies(self, device_manager, sample_worklist):
+        """Test that mark_job_completed fires state callbacks"""
+        plate = ActiveSourcePlate(sample_worklist, 0)
+        events = []
+        plate.state_changed_callbacks.append(events.append)
+        
+        plate.mark_job_completed()
+        assert events == [plate]
+    
+    def test_worklist_completes_without_polling(self, device_manager, mock_robot, sample_worklist):
+        """Test a full worklist with asynchronous device completions"""
+        reader = _add_device(device_manager, AsyncMockDevice("Reader1", "Reader"))
+        _add_device(device_manager, AsyncMockDevice("Bumblebee1", "Bumblebee"))
+        device_manager.register_robot(mock_robot)
+        sample_worklist.transfer_overview.tasks.source_prehitpick_tasks = [
+            PlateTask("Reader", "read")
+        ]
+        robot_scheduler = RobotScheduler(device_manager)
+        robot_scheduler.start_scheduler()
+        scheduler = PlateScheduler(robot_scheduler, device_manager)
+        scheduler.idle_recheck_seconds = None
+        
+        completed = threading.Event()
+        sample_worklist.add_completion_callback(lambda *args: completed.set())
+        worker = threading.Thread(target=scheduler._do_worklist, args=(sample_worklist,), daemon=True)
+        worker.start()
+        
+        try:
+            assert completed.wait(timeout=5.0)
+            assert len(reader.job_queue) == 1
+        finally:
+            scheduler.stop_scheduler()
+            robot_scheduler.stop_scheduler()
+    
+    def test_stop_interrupts_worklist(self, device_manager, sample_worklist):
+        """Test that stop_scheduler() ends a worklist that cannot progress"""
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        scheduler.idle_recheck_seconds = None
+        worker = threading.Thread(target=scheduler._do_worklist, args=(sample_worklist,), daemon=True)
+        worker.start()
+        time.sleep(0.1)
+        
+        scheduler.stop_scheduler()
+        worker.join(timeout=2.0)
+        assert not worker.is_alive()
+    
+    def test_idle_recheck_is_opt_in(self, device_manager):
+        """Test that an idle scheduler has no periodic wake-up by default"""
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        assert scheduler.idle_recheck_seconds is None
+    
+    def test_freed_location_notifies(self, device_manager):
+        """Test that a device location freed outside the scheduler wakes the loop"""
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        device = _add_device(device_manager, AsyncMockDevice("Reader1", "Reader"), count=1)
+        location = device.locations[0]
+        location.reserved.set()
+        scheduler._wait_for_state_change()
+        
+        location.reserved.clear()
+        assert scheduler._state_changed
+    
+    def test_registering_a_device_notifies(self, device_manager):
+        """Test that a new device wakes the loop"""
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        scheduler._wait_for_state_change()
+        
+        _add_device(device_manager, AsyncMockDevice("Reader1", "Reader"))
+        assert scheduler._state_changed
+    
+    def test_wake_in_keeps_the_earliest_wakeup(self, device_manager):
+        """Test that a lookahead horizon wake-up runs a pass without a notify()"""
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        scheduler._wait_for_state_change()
+        
+        scheduler._wake_in(0.05)
+        scheduler._wake_in(30.0)
+        start = time.monotonic()
+        scheduler._wait_for_state_change()
+        assert time.monotonic() - start < 1.0
+        scheduler.stop_scheduler()
+
+
+class HoldingDevice(MockDevice):
+    """MockDevice whose jobs complete only when the test says so"""
+    
+    def get_available_location(self, active_plate):
+        for location in self.locations:
+            if not location.occupied.is_set() and not location.reserved.is_set():
+                return location
+        return None
+    
+    def add_job(self, active_plate):
+        self.job_queue.append(active_plate)
+
+
+class TestLookahead:
+    """Tests for lookahead reservation of a plate's next task"""
+    
+    def _start(self, device_manager, sample_worklist):
+        reader = _add_device(device_manager, HoldingDevice("Reader1", "Reader"))
+        bumblebee = _add_device(device_manager, HoldingDevice("Bumblebee1", "Bumblebee"), count=3)
+        sample_worklist.transfer_overview.tasks.source_prehitpick_tasks = [
+            PlateTask("Reader", "read")
+        ]
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager, lookahead=True)
+        scheduler._start_worklist(sample_worklist)
+        scheduler._scheduling_pass()
+        source = next(plate for plate in scheduler.active_plates
+                      if isinstance(plate, ActiveSourcePlate))
+        return scheduler, reader, bumblebee, source
+    
+    def test_next_task_is_reserved_while_busy(self, device_manager, sample_worklist):
+        """Test that a busy plate's next device task is reserved"""
+        scheduler, reader, bumblebee, source = self._start(device_manager, sample_worklist)
+        
+        assert reader.job_queue == [source]
+        step = scheduler.staged_steps[source]
+        assert step.device is bumblebee
+        assert step.task_index == 1
+        assert step.location.reserved.is_set()
+        assert step.location is not source.current_location
+        assert "Lookahead reservations: 1" in scheduler.get_status()
+    
+    def test_staged_step_fires_on_completion(self, device_manager, sample_worklist):
+        """Test that completing the current job dispatches the staged step at once"""
+        scheduler, reader, bumblebee, source = self._start(device_manager, sample_worklist)
+        step = scheduler.staged_steps[source]
+        
+        source.mark_job_completed()
+        
+        assert source not in scheduler.staged_steps
+        assert source in bumblebee.job_queue
+        assert source.busy
+        assert source.destination_location is step.location
+        assert scheduler.robot_scheduler.pending_jobs.get_nowait() is source
+        assert scheduler.worklist_runs[0].tasks_dispatched == 3
+    
+    def test_reservation_released_when_plans_change(self, device_manager, sample_worklist):
+        """Test that a staged step is dropped if the plate's next task changed"""
+        scheduler, reader, bumblebee, source = self._start(device_manager, sample_worklist)
+        step = scheduler.staged_steps[source]
+        _add_device(device_manager, HoldingDevice("Washer1", "Washer"))
+        source.todo_list[1] = PlateTask("Washer", "wash")
+        
+        source.mark_job_completed()
+        
+        assert not step.location.reserved.is_set()
+        assert source not in bumblebee.job_queue
+        assert source not in scheduler.staged_steps
+        # The changed task is scheduled by the next pass
+        scheduler._scheduling_pass()
+        assert device_manager.get_device("Washer1").job_queue == [source]
+    
+    def test_stop_releases_reservations(self, device_manager, sample_worklist):
+        """Test that stop_scheduler() releases lookahead reservations"""
+        scheduler, reader, bumblebee, source = self._start(device_manager, sample_worklist)
+        step = scheduler.staged_steps[source]
+        
+        scheduler.stop_scheduler()
+        
+        assert scheduler.staged_steps == {}
+        assert not step.location.reserved.is_set()
+    
+    def test_worklist_completes_with_lookahead(self, device_manager, mock_robot, sample_worklist):
+        """Test a full worklist in lookahead mode"""
+        reader = _add_device(device_manager, AsyncMockDevice("Reader1", "Reader"))
+        _add_device(device_manager, AsyncMockDevice("Washer1", "Washer"))
+        _add_device(device_manager, AsyncMockDevice("Bumblebee1", "Bumblebee"), count=4)
+        device_manager.register_robot(mock_robot)
+        sample_worklist.transfer_overview.tasks.source_prehitpick_tasks = [
+            PlateTask("Reader", "read"), PlateTask("Washer", "wash"), PlateTask("Reader", "read2")
+        ]
+        robot_scheduler = RobotScheduler(device_manager)
+        robot_scheduler.start_scheduler()
+        scheduler = PlateScheduler(robot_scheduler, device_manager, lookahead=True)
+        scheduler.idle_recheck_seconds = None
+        
+        completed = threading.Event()
+        sample_worklist.add_completion_callback(lambda *args: completed.set())
+        worker = threading.Thread(target=scheduler._do_worklist, args=(sample_worklist,), daemon=True)
+        worker.start()
+        
+        try:
+            assert completed.wait(timeout=5.0)
+            assert len(reader.job_queue) == 2
+            assert scheduler.staged_steps == {}
+        finally:
+            scheduler.stop_scheduler()
+            robot_scheduler.stop_scheduler()
@@ -140,8 +140,7 @@ class TestPlateSchedulerEdgeCases:
         scheduler = PlateScheduler(robot_scheduler, device_manager)
         
         plate = ActiveSourcePlate(sample_worklist, 0)
-        with ActivePlate._lock:
-            ActivePlate._active_plates.append(plate)
+        scheduler.active_plates.add(plate)
         
         status = scheduler.get_status()
         assert "Active plates" in status
@@ -0,0 +1,242 @@
+"""
+Unit tests for reservation_table.py and reservation-aware robot moves
+"""
+
+import math
+import threading
+import time
+import pytest
+from scheduler import RobotScheduler, PathPlanner, PlateLocation, PlatePlace, ActiveSourcePlate, Worklist
+from scheduler.handoff_location import HandoffLocation
+from scheduler.reservation_table import ReservationTable, CooperativePlanner
+from scheduler.resource_locks import location_key, robot_key
+from tests.conftest import MockDevice, MockRobot
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestReservationTable:
+    """Tests for ReservationTable"""
+
+    def test_next_free_skips_claims(self):
+        table = ReservationTable(FakeClock())
+        table.reserve("robot:A", 1.0, 2.0, "p1")
+        table.reserve("robot:A", 2.5, 3.0, "p2")
+        assert table.next_free("robot:A", 0.0, 1.0) == 0.0
+        assert table.next_free("robot:A", 0.5, 1.0) == 3.0
+        assert table.next_free("robot:A", 0.8, 0.5) == 2.0
+        # An owner never conflicts with itself
+        assert table.next_free("robot:A", 1.0, 1.0, owner="p1") == 1.0
+
+    def test_free_until(self):
+        table = ReservationTable(FakeClock())
+        table.reserve("location:D:L", 5.0, 6.0, "p1")
+        assert table.free_until("location:D:L", 1.0) == 5.0
+        assert table.free_until("location:D:L", 5.5) == 5.5
+        assert table.free_until("location:D:L", 6.0) == math.inf
+
+    def test_release_and_prune(self):
+        table = ReservationTable(FakeClock())
+        table.reserve("robot:A", 0.0, 1.0, "p1")
+        table.reserve("robot:A", 1.0, 2.0, "p2")
+        table.reserve("robot:B", 3.0, 4.0, "p2")
+        table.release("p1")
+        assert table.reservations("robot:A") == [(1.0, 2.0, "p2")]
+        table.prune(2.5)
+        assert table.reservations("robot:A") == []
+        assert table.owners() == ["p2"]
+        assert not table.is_free("robot:B", 3.5, 3.6)
+
+    def test_free_gaps(self):
+        table = ReservationTable(FakeClock())
+        table.reserve("location:D:L", 1.0, 2.0, "p1")
+        table.reserve("location:D:L", 1.5, 2.5, "p2")
+        table.reserve("location:D:L", 4.0, 5.0, "p3")
+        assert table.free_gaps("location:D:L", 0.0) == [(-math.inf, 1.0), (2.5, 4.0), (5.0, math.inf)]
+        assert table.free_gaps("location:D:L", 3.0) == [(2.5, 4.0), (5.0, math.inf)]
+
+    def test_complete_and_wait_turn(self):
+        table = ReservationTable(FakeClock())
+        table.reserve("robot:A", 0.0, 1.0, "p1")
+        table.reserve("robot:A", 1.0, 2.0, "p2")
+        turns = []
+        waiter = threading.Thread(target=lambda: turns.append(table.wait_turn("p2", "robot:A", 1.0)))
+        waiter.start()
+        time.sleep(0.05)
+        assert turns == []
+        table.complete("p1", "robot:A")
+        waiter.join(timeout=2.0)
+        assert turns == [True]
+        stop = threading.Event()
+        stop.set()
+        table.reserve("robot:A", 0.5, 0.8, "p3")
+        assert not table.wait_turn("p2", "robot:A", 1.0, stop)
+
+
+def _device(device_manager, name, num_locations=1):
+    device = MockDevice(name, "Product")
+    for i in range(num_locations):
+        loc = PlateLocation(f"{name}_Loc{i}", name)
+        loc.places = [PlatePlace(f"{name}_Place{i}", loc)]
+        device.add_location(loc)
+    device_manager.register_device(device)
+    return device
+
+
+class CellRobot(MockRobot):
+    def __init__(self, name, devices):
+        super().__init__(name)
+        self.devices = set(devices)
+
+    def get_transfer_weight(self, src_device, src_location, src_place,
+                           dst_device, dst_location, dst_place) -> float:
+        if src_location is dst_location or not {src_device.name, dst_device.name} <= self.devices:
+            return float('inf')
+        return 1.0
+
+
+class HandoffDevice(MockDevice):
+    def __init__(self, name):
+        super().__init__(name, "Handoff")
+        self.add_location(HandoffLocation(f"{name}_handoff", name, ["PF400", "Planar"]))
+
+
+def _cell(device_manager, num_plates):
+    """PF400 serves the hotel, Planar the stations; one handoff joins them"""
+    hotel = _device(device_manager, "Hotel", num_plates)
+    stations = _device(device_manager, "Stations", num_plates)
+    handoff = HandoffDevice("Handoff")
+    device_manager.register_device(handoff)
+    return hotel, stations, handoff
+
+
+class TestCooperativePlanner:
+    """Tests for CooperativePlanner"""
+
+    def _planner(self, device_manager, num_plates=2):
+        hotel, stations, handoff = _cell(device_manager, num_plates)
+        device_manager.register_robot(CellRobot("PF400", ["Hotel", "Handoff"]))
+        device_manager.register_robot(CellRobot("Planar", ["Stations", "Handoff"]))
+        path_planner = PathPlanner(device_manager)
+        path_planner.create_world()
+        return CooperativePlanner(path_planner, ReservationTable(FakeClock())), hotel, stations, handoff
+
+    def test_single_plan_goes_through_handoff(self, device_manager):
+        planner, hotel, stations, handoff = self._planner(device_manager)
+        plan = planner.plan("p1", hotel.locations[0], stations.locations[0])
+
+        assert [step.robot.name for step in plan.steps] == ["PF400", "Planar"]
+        assert [(step.start, step.end) for step in plan.steps] == [(0.0, 1.0), (1.0, 2.0)]
+        # The handoff is held from the drop-off until the pick-up ends
+        key = location_key(handoff.locations[0])
+        assert planner.table.reservations(key) == [(0.0, 2.0, "p1")]
+
+    def test_second_plate_waits_for_handoff(self, device_manager):
+        planner, hotel, stations, handoff = self._planner(device_manager)
+        first = planner.plan("p1", hotel.locations[0], stations.locations[0])
+        second = planner.plan("p2", hotel.locations[1], stations.locations[1])
+
+        # p2 may not drop off at the handoff before p1 has been picked up
+        assert second.steps[0].start >= first.steps[1].end
+        assert second.end == pytest.approx(4.0)
+
+    def test_waits_at_source_for_a_long_enough_gap(self, device_manager):
+        planner, hotel, stations, handoff = self._planner(device_manager)
+        key = location_key(handoff.locations[0])
+        planner.table.reserve(key, 1.5, 3.0, "other")
+
+        plan = planner.plan("p1", hotel.locations[0], stations.locations[0])
+        # Dropping off at 0 would leave too little time before the other claim
+        assert [(step.start, step.end) for step in plan.steps] == [(3.0, 4.0), (4.0, 5.0)]
+
+    def test_reservations_never_overlap(self, device_manager):
+        planner, hotel, stations, handoff = self._planner(device_manager, num_plates=6)
+        for i in range(6):
+            assert planner.plan(f"p{i}", hotel.locations[i], stations.locations[i]) is not None
+        for key in (robot_key(MockRobot("PF400")), robot_key(MockRobot("Planar")),
+                    location_key(handoff.locations[0])):
+            intervals = planner.table.reservations(key)
+            for (s1, e1, o1), (s2, e2, o2) in zip(intervals, intervals[1:]):
+                assert o1 == o2 or e1 <= s2
+
+    def test_occupied_location_is_not_a_waypoint(self, device_manager):
+        planner, hotel, stations, handoff = self._planner(device_manager)
+        handoff.locations[0].occupied.set()
+        assert planner.plan("p1", hotel.locations[0], stations.locations[0]) is None
+
+
+class SimulatedCell:
+    """Records what the robots physically do, to check for collisions"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.plates_at = {}
+        self.max_plates_at = {}
+        self.robot_busy = set()
+        self.robot_collisions = 0
+        self.transfers = 0
+
+
+class SimulatedRobot(CellRobot):
+    def __init__(self, name, devices, cell, seconds):
+        super().__init__(name, devices)
+        self.cell = cell
+        self.seconds = seconds
+
+    def transfer_plate(self, src_device, src_place, dst_device, dst_place, labware_name, barcode):
+        cell = self.cell
+        with cell.lock:
+            if self.name in cell.robot_busy:
+                cell.robot_collisions += 1
+            cell.robot_busy.add(self.name)
+            cell.plates_at[src_place] = cell.plates_at.get(src_place, 1) - 1
+        time.sleep(self.seconds)
+        with cell.lock:
+            count = cell.plates_at[dst_place] = cell.plates_at.get(dst_place, 0) + 1
+            cell.max_plates_at[dst_place] = max(cell.max_plates_at.get(dst_place, 0), count)
+            cell.robot_busy.discard(self.name)
+            cell.transfers += 1
+
+
+class TestReservationAwareMoves:
+    """Simulated two-robot cell with many plates crossing one handoff"""
+
+    def test_many_plates_through_one_handoff(self, device_manager):
+        num_plates = 24
+        hotel, stations, handoff = _cell(device_manager, num_plates)
+        cell = SimulatedCell()
+        device_manager.register_robot(SimulatedRobot("PF400", ["Hotel", "Handoff"], cell, 0.002))
+        device_manager.register_robot(SimulatedRobot("Planar", ["Stations", "Handoff"], cell, 0.002))
+
+        scheduler = RobotScheduler(device_manager, max_parallel_moves=4, use_reservations=True)
+        scheduler.cooperative_planner.seconds_per_weight = 0.005
+        done = threading.Semaphore(0)
+        scheduler.move_completed_callbacks.append(lambda plate: done.release())
+        scheduler.start_scheduler()
+
+        worklist = Worklist("Simulated")
+        plates = []
+        try:
+            for i in range(num_plates):
+                plate = ActiveSourcePlate(worklist, i)
+                plate.current_location = hotel.locations[i]
+                plate.destination_location = stations.locations[i]
+                plates.append(plate)
+                scheduler.add_job(plate)
+            for _ in range(num_plates):
+                assert done.acquire(timeout=10.0)
+        finally:
+            scheduler.stop_scheduler()
+
+        assert cell.transfers == 2 * num_plates
+        assert cell.robot_collisions == 0
+        # Never two plates on the handoff at once
+        assert cell.max_plates_at[handoff.locations[0].places[0].name] == 1
+        assert all(plate.current_location is stations.locations[i] for i, plate in enumerate(plates))
+        assert scheduler.cooperative_planner.table.owners() == []
@@ -234,3 +234,174 @@ class TestRobotScheduler:
         
         scheduler.stop_scheduler()
 
+
+
+class CellRobot(MockRobot):
+    """Robot that reaches only the devices of its cell and takes `delay` per transfer"""
+    
+    def __init__(self, name, devices, delay=0.2):
+        super().__init__(name)
+        self.devices = set(devices)
+        self.delay = delay
+        self.intervals = []
+    
+    def transfer_plate(self, src_device, src_place, dst_device, dst_place, labware_name, barcode):
+        start = time.monotonic()
+        time.sleep(self.delay)
+        self.intervals.append((start, time.monotonic()))
+        super().transfer_plate(src_device, src_place, dst_device, dst_place, labware_name, barcode)
+    
+    def get_transfer_weight(self, src_device, src_location, src_place,
+                           dst_device, dst_location, dst_place) -> float:
+        if src_location is dst_location or not {src_device.name, dst_device.name} <= self.devices:
+            return float('inf')
+        return 1.0
+
+
+class PlateCountingRobot(CellRobot):
+    """CellRobot that tracks how many plates sit on each place (shared `plates_at` between robots)"""
+    
+    def __init__(self, name, devices, plates_at, lock, delay=0.05):
+        super().__init__(name, devices, delay)
+        self.plates_at = plates_at
+        self.lock = lock
+        self.max_plates_at = {}
+    
+    def transfer_plate(self, src_device, src_place, dst_device, dst_place, labware_name, barcode):
+        with self.lock:
+            self.plates_at[src_place] = self.plates_at.get(src_place, 1) - 1
+        super().transfer_plate(src_device, src_place, dst_device, dst_place, labware_name, barcode)
+        with self.lock:
+            count = self.plates_at[dst_place] = self.plates_at.get(dst_place, 0) + 1
+            self.max_plates_at[dst_place] = max(self.max_plates_at.get(dst_place, 0), count)
+
+
+def _cell_device(device_manager, name):
+    device = MockDevice(name, "Product")
+    loc = PlateLocation(f"{name}_Loc", name)
+    loc.places = [PlatePlace(f"{name}_Place", loc)]
+    device.add_location(loc)
+    device_manager.register_device(device)
+    return loc
+
+
+def _overlap(first, second):
+    return first[0] < second[1] and second[0] < first[1]
+
+
+class TestParallelMoves:
+    """Tests for concurrent move execution"""
+    
+    def _run_moves(self, device_manager, sample_worklist, moves, **kwargs):
+        scheduler = RobotScheduler(device_manager, **kwargs)
+        done = threading.Semaphore(0)
+        scheduler.move_completed_callbacks.append(lambda plate: done.release())
+        scheduler.start_scheduler()
+        try:
+            for i, (src, dst) in enumerate(moves):
+                plate = ActiveSourcePlate(sample_worklist, i)
+                plate.current_location = src
+                plate.destination_location = dst
+                scheduler.add_job(plate)
+            for _ in moves:
+                assert done.acquire(timeout=5.0)
+        finally:
+            scheduler.stop_scheduler()
+        return scheduler
+    
+    def test_one_worker_per_robot(self, device_manager):
+        device_manager.register_robot(MockRobot("Robot1"))
+        device_manager.register_robot(MockRobot("Robot2"))
+        scheduler = RobotScheduler(device_manager)
+        scheduler.start_scheduler()
+        try:
+            assert len(scheduler.worker_threads) == 2
+            assert scheduler.scheduler_thread is scheduler.worker_threads[0]
+        finally:
+            scheduler.stop_scheduler()
+    
+    def test_moves_on_different_robots_overlap(self, device_manager, sample_worklist):
+        a1, a2 = _cell_device(device_manager, "A1"), _cell_device(device_manager, "A2")
+        b1, b2 = _cell_device(device_manager, "B1"), _cell_device(device_manager, "B2")
+        robot_a = CellRobot("RobotA", ["A1", "A2"])
+        robot_b = CellRobot("RobotB", ["B1", "B2"])
+        device_manager.register_robot(robot_a)
+        device_manager.register_robot(robot_b)
+        
+        self._run_moves(device_manager, sample_worklist, [(a1, a2), (b1, b2)])
+        
+        assert len(robot_a.intervals) == len(robot_b.intervals) == 1
+        assert _overlap(robot_a.intervals[0], robot_b.intervals[0])
+    
+    def test_moves_on_same_robot_serialize(self, device_manager, sample_worklist):
+        a1, a2 = _cell_device(device_manager, "A1"), _cell_device(device_manager, "A2")
+        b1, b2 = _cell_device(device_manager, "B1"), _cell_device(device_manager, "B2")
+        robot = CellRobot("Robot", ["A1", "A2", "B1", "B2"], delay=0.1)
+        device_manager.register_robot(robot)
+        
+        self._run_moves(device_manager, sample_worklist, [(a1, a2), (b1, b2)], max_parallel_moves=2)
+        
+        assert len(robot.intervals) == 2
+        assert not _overlap(*robot.intervals)
+    
+    def test_moves_through_shared_location_serialize(self, device_manager, sample_worklist):
+        a1, b1 = _cell_device(device_manager, "A1"), _cell_device(device_manager, "B1")
+        handoff = _cell_device(device_manager, "Handoff")
+        robot_a = CellRobot("RobotA", ["A1", "Handoff"], delay=0.1)
+        robot_b = CellRobot("RobotB", ["B1", "Handoff"], delay=0.1)
+        device_manager.register_robot(robot_a)
+        device_manager.register_robot(robot_b)
+        
+        self._run_moves(device_manager, sample_worklist, [(a1, handoff), (handoff, b1)])
+        
+        assert not _overlap(robot_a.intervals[0], robot_b.intervals[0])
+    
+    def test_plate_on_handoff_keeps_it_between_transfers(self, device_manager, sample_worklist):
+        a1, a2 = _cell_device(device_manager, "A1"), _cell_device(device_manager, "A2")
+        b1, b2 = _cell_device(device_manager, "B1"), _cell_device(device_manager, "B2")
+        _cell_device(device_manager, "Handoff")
+        plates_at, lock = {}, threading.Lock()
+        robot_a = PlateCountingRobot("RobotA", ["A1", "A2", "Handoff"], plates_at, lock)
+        robot_b = PlateCountingRobot("RobotB", ["B1", "B2", "Handoff"], plates_at, lock)
+        device_manager.register_robot(robot_a)
+        device_manager.register_robot(robot_b)
+        
+        for _ in range(5):
+            self._run_moves(device_manager, sample_worklist, [(a1, b1), (a2, b2)])
+            # The second plate can't be put down on the handoff until the first has left it
+            assert robot_a.max_plates_at["Handoff_Place"] == 1
+            assert plates_at["Handoff_Place"] == 0
+            assert len(robot_a.intervals) == len(robot_b.intervals)
+            plates_at.clear()
+
+
+class TestResourceLocks:
+    """Tests for ResourceLocks"""
+    
+    def test_hold_releases_locks(self):
+        from scheduler.resource_locks import ResourceLocks
+        locks = ResourceLocks()
+        with locks.hold(["robot:A", "location:D:L", "robot:A"]):
+            assert locks.is_held("robot:A")
+            assert locks.is_held("location:D:L")
+        assert not locks.is_held("robot:A")
+        assert not locks.is_held("location:D:L")
+    
+    def test_opposite_order_does_not_deadlock(self):
+        from scheduler.resource_locks import ResourceLocks
+        locks = ResourceLocks()
+        finished = []
+        
+        def worker(keys):
+            for _ in range(200):
+                with locks.hold(keys):
+                    pass
+            finished.append(keys)
+        
+        threads = [threading.Thread(target=worker, args=(keys,), daemon=True)
+                   for keys in (["x", "y"], ["y", "x"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5.0)
+        assert len(finished) == 2
@@ -0,0 +1,238 @@
+"""
+Unit tests for routing_table.py
+"""
+
+import pytest
+import math
+import random
+from scheduler import PlateLocation, PlatePlace
+from scheduler.path_planner import PathPlanner
+from scheduler.routing_table import RoutingTable, NO_HOP
+from tests.conftest import MockDevice, MockRobot
+
+
+def _graph(edges, n):
+    """Mutable undirected adjacency: {u: {v: cost}}"""
+    adjacency = {u: {} for u in range(n)}
+    for u, v, cost in edges:
+        adjacency[u][v] = cost
+        adjacency[v][u] = cost
+    return adjacency
+
+
+def _reference_distance(adjacency, source, target):
+    """Bellman-Ford style reference (small graphs only)"""
+    n = len(adjacency)
+    dist = [math.inf] * n
+    dist[source] = 0.0
+    for _ in range(n):
+        for u in range(n):
+            for v, cost in adjacency[u].items():
+                if dist[u] + cost < dist[v]:
+                    dist[v] = dist[u] + cost
+    return dist[target]
+
+
+def _path_cost(adjacency, path):
+    return sum(adjacency[a][b] for a, b in zip(path, path[1:]))
+
+
+class TestRoutingTable:
+    """Tests for RoutingTable"""
+    
+    def test_lookup_and_path(self):
+        """Test distances and next-hop path reconstruction"""
+        adjacency = _graph([(0, 1, 1.0), (1, 2, 1.0), (0, 2, 5.0), (2, 3, 1.0)], 4)
+        table = RoutingTable(4, lambda u: adjacency[u].items())
+        
+        assert table.lookup(0, 3) == 3.0
+        assert table.path(0, 3) == [0, 1, 2, 3]
+        assert table.path(3, 0) == [3, 2, 1, 0]
+        assert table.path(2, 2) == [2]
+    
+    def test_rows_are_lazy(self):
+        """Test that rows are only computed when used"""
+        adjacency = _graph([(0, 1, 1.0), (1, 2, 1.0)], 3)
+        table = RoutingTable(3, lambda u: adjacency[u].items())
+        assert table.computed_rows == 0
+        
+        table.lookup(0, 2)
+        assert table.computed_rows == 1
+        
+        table.build()
+        assert table.computed_rows == 3
+    
+    def test_unreachable(self):
+        """Test unreachable targets"""
+        adjacency = _graph([(0, 1, 1.0)], 3)
+        table = RoutingTable(3, lambda u: adjacency[u].items())
+        
+        assert table.lookup(0, 2) == math.inf
+        assert table.next_hop[0][2] == NO_HOP
+        assert table.path(0, 2) is None
+    
+    def test_best_pair(self):
+        """Test picking the cheapest source/target combination"""
+        adjacency = _graph([(0, 1, 4.0), (2, 3, 1.0), (1, 2, 3.0)], 4)
+        table = RoutingTable(4, lambda u: adjacency[u].items())
+        
+        source, target, cost = table.best_pair([0, 2], [1, 3])
+        assert (source, target, cost) == (2, 3, 1.0)
+    
+    def test_edge_increase_recomputes_only_affected_rows(self):
+        """Test that an edge increase only recomputes rows using that edge"""
+        # 0 - 1 - 2 chain, 3 hangs off 2 via a separate edge
+        adjacency = _graph([(0, 1, 1.0), (1, 2, 1.0), (2, 3, 1.0), (0, 3, 10.0)], 4)
+        table = RoutingTable(4, lambda u: adjacency[u].items())
+        table.build()
+        untouched = table.distance[3]
+        
+        # Raise 0-1 to 20: every row routed over 0-1 (including 3->2->1->0) is recomputed
+        adjacency[0][1] = adjacency[1][0] = 20.0
+        table.apply_edge_changes([(0, 1, 1.0), (1, 0, 1.0)], [])
+        
+        assert table.lookup(0, 1) == 12.0
+        assert table.path(0, 1) == [0, 3, 2, 1]
+        assert table.lookup(2, 0) == 11.0
+        assert table.distance[3] is not untouched  # row 3 routed through 1-0
+    
+    def test_edge_increase_leaves_unrelated_rows(self):
+        """Test that rows not using the changed edge are kept as-is"""
+        adjacency = _graph([(0, 1, 1.0), (1, 2, 1.0), (0, 2, 1.5)], 3)
+        table = RoutingTable(3, lambda u: adjacency[u].items())
+        table.build()
+        row_1 = table.distance[1]
+        
+        # 0-2 is not on any shortest path from 1 (1->0 and 1->2 are direct)
+        adjacency[0][2] = adjacency[2][0] = 9.0
+        table.apply_edge_changes([(0, 2, 1.5), (2, 0, 1.5)], [])
+        
+        assert table.distance[1] is row_1
+        assert table.lookup(0, 2) == 2.0
+    
+    def test_edge_decrease_relaxes_in_place(self):
+        """Test that a decreased edge updates distances and next hops"""
+        adjacency = _graph([(0, 1, 1.0), (1, 2, 1.0), (2, 3, 1.0), (0, 3, 10.0)], 4)
+        table = RoutingTable(4, lambda u: adjacency[u].items())
+        table.build()
+        
+        adjacency[0][3] = adjacency[3][0] = 0.5
+        table.apply_edge_changes([], [(0, 3, 0.5), (3, 0, 0.5)])
+        
+        assert table.lookup(0, 3) == 0.5
+        assert table.lookup(1, 3) == 1.5
+        assert table.path(1, 3) == [1, 0, 3]
+    
+    def test_random_changes_match_reference(self):
+        """Test incremental updates against a from-scratch reference"""
+        rng = random.Random(42)
+        n = 12
+        edges = [(u, v, float(rng.randint(1, 9)))
+                 for u in range(n) for v in range(u + 1, n) if rng.random() < 0.3]
+        adjacency = _graph(edges, n)
+        table = RoutingTable(n, lambda u: adjacency[u].items())
+        table.build()
+        
+        for _ in range(40):
+            u, v, _ = rng.choice(edges)
+            old = adjacency[u][v]
+            new = rng.choice([math.inf, float(rng.randint(1, 9))])
+            adjacency[u][v] = adjacency[v][u] = new
+            if new > old:
+                table.apply_edge_changes([(u, v, old), (v, u, old)], [])
+            elif new < old:
+                table.apply_edge_changes([], [(u, v, new), (v, u, new)])
+            
+            for s in range(n):
+                for t in range(n):
+                    expected = _reference_distance(adjacency, s, t)
+                    assert table.lookup(s, t) == pytest.approx(expected)
+                    path = table.path(s, t)
+                    if expected == math.inf:
+                        assert path is None
+                    else:
+                        assert _path_cost(adjacency, path) == pytest.approx(expected)
+
+
+class TestPathPlannerRoutingTable:
+    """Tests for PathPlanner with a routing table"""
+    
+    def _line_deck(self, device_manager, count):
+        """Devices in a line; each robot only links neighbours"""
+        class NeighbourRobot(MockRobot):
+            def get_transfer_weight(self, src_device, src_location, src_place,
+                                   dst_device, dst_location, dst_place) -> float:
+                a = int(src_device.name[6:])
+                b = int(dst_device.name[6:])
+                return 1.0 if abs(a - b) == 1 else float('inf')
+        
+        locations = []
+        for i in range(count):
+            device = MockDevice(f"Device{i}", "Product")
+            loc = PlateLocation(f"Loc{i}", device.name)
+            loc.places = [PlatePlace(f"Place{i}", loc)]
+            device.add_location(loc)
+            device_manager.register_device(device)
+            locations.append(loc)
+        device_manager.register_robot(NeighbourRobot("Arm"))
+        return locations
+    
+    def test_plan_path_uses_table(self, device_manager):
+        """Test that plan_path matches the search result when using the table"""
+        locations = self._line_deck(device_manager, 5)
+        planner = PathPlanner(device_manager, use_routing_table=True)
+        planner.create_world()
+        
+        path = planner.plan_path(locations[0], locations[4])
+        assert [node.key for node in path] == [f"Loc{i}:Place{i}" for i in range(5)]
+        assert planner._routing_table.computed_rows > 0
+    
+    def test_precompute_routes(self, device_manager):
+        """Test eager precompute of all rows"""
+        self._line_deck(device_manager, 4)
+        planner = PathPlanner(device_manager)
+        planner.create_world()
+        
+        planner.precompute_routes()
+        assert planner.use_routing_table
+        assert planner._routing_table.computed_rows == 4
+    
+    def test_robot_offline_updates_routes(self, device_manager):
+        """Test taking a robot offline makes its routes unavailable"""
+        locations = self._line_deck(device_manager, 3)
+        planner = PathPlanner(device_manager, use_routing_table=True)
+        planner.create_world()
+        planner.precompute_routes()
+        
+        assert planner.plan_path(locations[0], locations[2]) is not None
+        
+        planner.set_robot_online("Arm", False)
+        assert planner.plan_path(locations[0], locations[2]) is None
+        
+        planner.set_robot_online("Arm", True)
+        assert len(planner.plan_path(locations[0], locations[2])) == 3
+    
+    def test_set_transfer_weight(self, device_manager):
+        """Test that a weight override reroutes through the cheaper edge"""
+        locations = self._line_deck(device_manager, 4)
+        planner = PathPlanner(device_manager, use_routing_table=True)
+        planner.create_world()
+        planner.precompute_routes()
+        
+        planner.set_transfer_weight("Loc0:Place0", "Loc3:Place3", "Arm", 0.5)
+        path = planner.plan_path(locations[0], locations[3])
+        assert [node.key for node in path] == ["Loc0:Place0", "Loc3:Place3"]
+        
+        planner.set_transfer_weight("Loc0:Place0", "Loc3:Place3", "Arm", float('inf'))
+        path = planner.plan_path(locations[0], locations[3])
+        assert len(path) == 4
+    
+    def test_disabled_robot_survives_rebuild(self, device_manager):
+        """Test that offline robots stay offline across world rebuilds"""
+        locations = self._line_deck(device_manager, 3)
+        planner = PathPlanner(device_manager)
+        planner.create_world()
+        planner.set_robot_online("Arm", False)
+        
+        planner.create_world(force=True)
+        assert planner.plan_path(locations[0], locations[1]) is None
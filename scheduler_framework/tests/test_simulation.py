@@ -0,0 +1,166 @@
+"""
+Unit tests for clock.py and the discrete-event simulation (simulation.py)
+"""
+
+import time
+import pytest
+from scheduler import (
+    PlateScheduler, RobotScheduler, Plate, PlateTask, WaitTask, Worklist, TransferOverview, Transfer,
+    VirtualClock, SystemClock, Simulation, SimulatedDevice, SimulatedRobot
+)
+from scheduler.device_manager import DeviceManager
+from scheduler.timer_service import TimerService
+
+
+def _worklist(name, num_sources, source_tasks):
+    worklist = Worklist(name)
+    destination = Plate(f"{name}_DST", "96-well", "96-well")
+    worklist.add_destination_plate(destination)
+    sources = {}
+    transfers = []
+    for i in range(num_sources):
+        source = Plate(f"{name}_SRC{i}", "96-well", "96-well")
+        worklist.add_source_plate(source)
+        sources[source.barcode] = source
+        transfers.append(Transfer(source, destination, volume=10.0))
+    overview = TransferOverview(transfers=transfers, source_plates=sources,
+                                destination_plates={destination.barcode: destination})
+    overview.tasks.source_prehitpick_tasks = list(source_tasks)
+    worklist.transfer_overview = overview
+    return worklist
+
+
+def _simulation(reader_seconds=600.0, hitpick_seconds=300.0, move_seconds=20.0, robots=1, **kwargs):
+    clock = VirtualClock()
+    device_manager = DeviceManager()
+    device_manager.register_device(SimulatedDevice("Reader1", "Reader", clock, reader_seconds))
+    device_manager.register_device(SimulatedDevice("Bumblebee1", "Bumblebee", clock, hitpick_seconds,
+                                                   num_locations=4))
+    for i in range(robots):
+        device_manager.register_robot(SimulatedRobot(f"Robot{i + 1}"))
+    robot_scheduler = RobotScheduler(device_manager, clock=clock)
+    scheduler = PlateScheduler(robot_scheduler, device_manager, **kwargs)
+    return Simulation(scheduler, move_seconds=move_seconds)
+
+
+class TestVirtualClock:
+    """VirtualClock and its timer service"""
+
+    def test_events_run_in_time_order(self):
+        clock = VirtualClock()
+        order = []
+        clock.call_at(5.0, lambda: order.append(("b", clock.now)))
+        clock.call_later(1.0, lambda: order.append(("a", clock.now)))
+        clock.call_at(5.0, lambda: order.append(("c", clock.now)))
+        cancelled = clock.call_at(3.0, lambda: order.append(("x", clock.now)))
+        cancelled.cancel()
+
+        while clock.run_next():
+            pass
+        assert order == [("a", 1.0), ("b", 5.0), ("c", 5.0)]
+        assert clock.pending() == 0
+
+    def test_sleep_runs_due_events(self):
+        clock = VirtualClock(epoch=1000.0)
+        fired = []
+        clock.call_at(2.0, lambda: fired.append(clock.now))
+        clock.call_at(20.0, lambda: fired.append(clock.now))
+        clock.sleep(10.0)
+        assert fired == [2.0]
+        assert clock.monotonic() == 10.0
+        assert clock.time() == 1010.0
+
+    def test_timer_service_on_virtual_time(self):
+        clock = VirtualClock()
+        service = clock.timer_service()
+        fired = []
+        late = service.schedule(100.0, lambda: fired.append(("late", clock.now)))
+        service.schedule(10.0, lambda: fired.append(("early", clock.now)))
+        dropped = service.schedule(50.0, lambda: fired.append(("dropped", clock.now)))
+        assert service.cancel(dropped)
+
+        clock.run_until(30.0)
+        service.pause()
+        clock.run_until(60.0)
+        assert service.remaining(late) == pytest.approx(70.0)
+        service.resume()
+        while clock.run_next():
+            pass
+        assert fired == [("early", 10.0), ("late", 130.0)]
+
+    def test_system_clock_timer_service(self):
+        service = SystemClock().timer_service("Test")
+        assert type(service) is TimerService
+
+
+class TestSimulation:
+    """Simulation driving PlateScheduler/RobotScheduler"""
+
+    def test_eight_hour_run_takes_seconds(self):
+        simulation = _simulation()
+        worklists = [_worklist(f"WL{i}", 4, [PlateTask("Reader", "read")]) for i in range(12)]
+
+        started = time.perf_counter()
+        makespan = simulation.run_worklists(worklists)
+        assert time.perf_counter() - started < 5.0
+
+        # 48 reads of 10 minutes on one reader
+        assert makespan > 8 * 3600
+        assert len(simulation.plate_scheduler.completed_runs) == 12
+        assert simulation.device_utilisation()["Reader1"] > 0.9
+        assert simulation.moves > 0
+
+    def test_same_inputs_same_schedule(self):
+        def run():
+            simulation = _simulation(max_concurrent_worklists=2)
+            worklists = [_worklist(f"WL{i}", 3, [PlateTask("Reader", "read")]) for i in range(3)]
+            makespan = simulation.run_worklists(worklists)
+            return makespan, [(run.worklist.name, run.finished_at)
+                              for run in simulation.plate_scheduler.completed_runs]
+
+        assert run() == run()
+
+    def test_wait_tasks_use_virtual_time(self):
+        simulation = _simulation(reader_seconds=60.0)
+        worklist = _worklist("Incubate", 1, [WaitTask(4 * 3600.0), PlateTask("Reader", "read")])
+
+        started = time.perf_counter()
+        makespan = simulation.run_worklists([worklist])
+        assert time.perf_counter() - started < 2.0
+        assert makespan >= 4 * 3600.0 + 60.0
+        assert simulation.plate_scheduler.timer_service.pending() == []
+
+    def test_job_waits_for_robot_move(self):
+        simulation = _simulation(reader_seconds=100.0, hitpick_seconds=50.0, move_seconds=30.0)
+        worklist = _worklist("WL", 1, [PlateTask("Reader", "read")])
+        makespan = simulation.run_worklists([worklist])
+
+        # Source: read 100 s, move 30 s, hitpick 50 s (destination hitpicks alongside)
+        assert makespan == pytest.approx(180.0)
+        run = simulation.plate_scheduler.completed_runs[0]
+        assert run.finished_at - run.started_at == pytest.approx(180.0)
+
+    def test_device_durations_recorded_in_simulated_seconds(self):
+        simulation = _simulation(reader_seconds=120.0)
+        simulation.run_worklists([_worklist("WL", 2, [PlateTask("Reader", "read")])])
+        model = simulation.plate_scheduler.duration_model
+        assert model.task_seconds("Reader1", "read") == pytest.approx(120.0)
+        assert model.keys("transfer") == []
+
+    def test_run_until(self):
+        simulation = _simulation()
+        simulation.plate_scheduler.enqueue_worklist(_worklist("WL", 2, [PlateTask("Reader", "read")]))
+        assert simulation.run(until=700.0) == 700.0
+        assert not simulation.idle
+        simulation.run()
+        assert simulation.idle
+
+    def test_requires_virtual_clock(self, device_manager):
+        with pytest.raises(ValueError):
+            Simulation(PlateScheduler(RobotScheduler(device_manager), device_manager))
+
+    def test_scheduler_uses_robot_scheduler_clock(self, device_manager):
+        clock = VirtualClock()
+        scheduler = PlateScheduler(RobotScheduler(device_manager, clock=clock), device_manager)
+        assert scheduler.clock is clock
+        assert scheduler.timer_service.clock() == clock.now
@@ -0,0 +1,262 @@
+"""
+Unit tests for state_journal.py and PlateScheduler crash recovery
+"""
+
+import sqlite3
+import time
+import pytest
+from scheduler import (
+    PlateScheduler, RobotScheduler, Plate, PlateLocation, PlatePlace, PlateTask, WaitTask,
+    Worklist, TransferOverview, Transfer, StateJournal, JournalState
+)
+from scheduler import state_journal as sj
+from scheduler.device_manager import DeviceManager
+from scheduler.state_journal import worklist_from_dict, worklist_to_dict
+from tests.conftest import AsyncMockDevice, MockDevice, MockRobot
+
+
+class HeldDevice(MockDevice):
+    """Takes jobs but never finishes them (the process 'crashes' first)"""
+
+    def add_job(self, active_plate):
+        self.job_queue.append(active_plate)
+
+
+def _worklist(name, num_sources, source_tasks=()):
+    worklist = Worklist(name)
+    destination = Plate(f"{name}_DST", "96-well", "96-well")
+    worklist.add_destination_plate(destination)
+    sources = {}
+    transfers = []
+    for i in range(num_sources):
+        source = Plate(f"{name}_SRC{i}", "96-well", "96-well")
+        worklist.add_source_plate(source)
+        sources[source.barcode] = source
+        transfers.append(Transfer(source, destination, source_well="A1", volume=10.0))
+    overview = TransferOverview(transfers=transfers, source_plates=sources,
+                                destination_plates={destination.barcode: destination})
+    overview.tasks.source_prehitpick_tasks = list(source_tasks)
+    worklist.transfer_overview = overview
+    return worklist
+
+
+def _cell(device_class, readers=2, bumblebees=8):
+    """Device manager with a Reader and a Bumblebee (fresh location objects each call)"""
+    device_manager = DeviceManager()
+    for name, product, count in (("Reader1", "Reader", readers), ("Bumblebee1", "Bumblebee", bumblebees)):
+        device = device_class(name, product)
+        for i in range(count):
+            loc = PlateLocation(f"{name}_Loc{i}", name)
+            loc.places = [PlatePlace(f"{name}_Place{i}", loc)]
+            device.add_location(loc)
+        device_manager.register_device(device)
+    device_manager.register_robot(MockRobot("Robot1"))
+    return device_manager
+
+
+class TestStateJournal:
+    """Recording, snapshots and replay"""
+
+    def test_state_survives_reopen(self, tmp_path):
+        path = str(tmp_path / "journal.db")
+        journal = StateJournal(path)
+        worklist = _worklist("WL", 1)
+        journal.record(sj.WORKLIST_ENQUEUED, worklist.worklist_id, {"worklist": worklist_to_dict(worklist)})
+        journal.record(sj.WORKLIST_STARTED, worklist.worklist_id)
+        journal.record(sj.PLATE_RELEASED, "P1", {"worklist_id": worklist.worklist_id,
+                                                 "kind": "source", "instance_index": 0})
+        location = {"device": "Reader1", "location": "Reader1_Loc0"}
+        journal.record(sj.TASK_DISPATCHED, "P1", {"task_index": 0, "device": "Reader1",
+                                                  "current_location": location,
+                                                  "destination_location": location})
+        journal.close()
+
+        state = StateJournal(path).load_state()
+        assert state.worklists[worklist.worklist_id]["status"] == sj.RUNNING
+        assert state.worklists[worklist.worklist_id]["released"] == {"source": 1}
+        assert state.plates["P1"]["busy"]
+        assert state.reservations == {"Reader1/Reader1_Loc0": "P1"}
+
+        journal = StateJournal(path)
+        journal.record(sj.TASK_COMPLETED, "P1", {"task_index": 1, "current_location": location})
+        journal.record(sj.PLATE_REMOVED, "P1")
+        journal.record(sj.WORKLIST_COMPLETED, worklist.worklist_id)
+        state = journal.load_state()
+        assert state.worklists == {} and state.plates == {} and state.reservations == {}
+
+    def test_events_have_ulids(self, tmp_path):
+        journal = StateJournal(str(tmp_path / "journal.db"))
+        first = journal.record(sj.PLATE_REMOVED, "P1")
+        second = journal.record(sj.PLATE_REMOVED, "P2")
+        # ULIDs sort by their millisecond timestamp; within one millisecond the order is random
+        assert len(first) == 26 and first != second and first[:10] <= second[:10]
+        assert [event[1] for event in journal.events()] == [first, second]
+
+    def test_replay_starts_at_latest_snapshot(self, tmp_path):
+        path = str(tmp_path / "journal.db")
+        journal = StateJournal(path, snapshot_every=10, snapshot_interval=None)
+        for i in range(25):
+            journal.record(sj.PLATE_RELEASED, f"P{i}", {"worklist_id": "WL", "kind": "source",
+                                                        "instance_index": i})
+        journal.close()
+
+        reopened = StateJournal(path)
+        assert reopened.replayed_events == 5
+        assert len(reopened.state.plates) == 25
+        assert reopened.state.last_seq == 25
+        with sqlite3.connect(path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0] == 2
+
+    def test_compact_keeps_state(self, tmp_path):
+        path = str(tmp_path / "journal.db")
+        journal = StateJournal(path, snapshot_every=10, snapshot_interval=None)
+        for i in range(25):
+            journal.record(sj.PLATE_RELEASED, f"P{i}", {"worklist_id": "WL", "kind": "source",
+                                                        "instance_index": i})
+        assert journal.compact() == 10
+        assert len(journal.events()) == 15
+        assert len(journal.load_state().plates) == 25
+
+    def test_worklist_round_trip(self):
+        worklist = _worklist("WL", 2, [PlateTask("Reader", "read", {"mode": "abs"}), WaitTask(5.0, "settle")])
+        worklist.priority = 3
+        copy = worklist_from_dict(worklist_to_dict(worklist))
+
+        assert copy.worklist_id == worklist.worklist_id
+        assert copy.priority == 3
+        assert [p.plate_id for p in copy.source_plates] == [p.plate_id for p in worklist.source_plates]
+        assert copy.transfer_overview.transfers[0].source_plate is copy.source_plates[0]
+        tasks = copy.transfer_overview.tasks.source_prehitpick_tasks
+        assert tasks[0].parameters == {"mode": "abs"}
+        assert isinstance(tasks[1], WaitTask) and tasks[1].duration_seconds == 5.0
+        assert [t.task_id for t in tasks] == [t.task_id for t in
+                                              worklist.transfer_overview.tasks.source_prehitpick_tasks]
+
+    def test_replay_is_fast(self, tmp_path):
+        path = str(tmp_path / "journal.db")
+        journal = StateJournal(path, snapshot_interval=None)
+        location = {"device": "Reader1", "location": "Reader1_Loc0"}
+        for i in range(50):
+            journal.record(sj.PLATE_RELEASED, f"P{i}", {"worklist_id": "WL", "kind": "source",
+                                                        "instance_index": i})
+        for i in range(5000):
+            plate_id = f"P{i % 50}"
+            journal.record(sj.TASK_DISPATCHED, plate_id, {"task_index": i, "device": "Reader1",
+                                                          "current_location": location,
+                                                          "destination_location": location})
+        journal.close()
+
+        start = time.perf_counter()
+        state = StateJournal(path).load_state()
+        assert time.perf_counter() - start < 1.0
+        assert isinstance(state, JournalState)
+        assert state.last_seq == 5050
+        assert state.plates["P49"]["task_index"] == 4999
+
+
+class TestRecovery:
+    """PlateScheduler.recover() after a crash"""
+
+    def _crashed_run(self, path, source_tasks):
+        """Run passes until plates are mid-task, then abandon the scheduler"""
+        device_manager = _cell(HeldDevice)
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager,
+                                   max_concurrent_worklists=1, journal=StateJournal(path))
+        running = _worklist("Running", 3, source_tasks)
+        queued = _worklist("Queued", 2, source_tasks)
+        scheduler.enqueue_worklist(running)
+        scheduler.enqueue_worklist(queued)
+        scheduler._admit_worklists()
+        for _ in range(4):
+            scheduler._scheduling_pass()
+        return scheduler, running, queued
+
+    def test_recover_running_and_queued_worklists(self, tmp_path):
+        path = str(tmp_path / "journal.db")
+        crashed, running, queued = self._crashed_run(path, [PlateTask("Reader", "read")])
+        reader = crashed.device_manager.get_device("Reader1")
+        # One read finishes; the plate is then sent to the Bumblebee (move never happens)
+        reader.job_queue[0].mark_job_completed()
+        crashed._scheduling_pass()
+
+        device_manager = _cell(HeldDevice)
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        report = scheduler.recover(StateJournal(path))
+
+        assert [w.worklist_id for w in report.running_worklists] == [running.worklist_id]
+        assert [w.worklist_id for w in report.queued_worklists] == [queued.worklist_id]
+        assert scheduler.worklist_queue.qsize() == 1
+        assert report.unresolved_locations == []
+
+        live = {plate.active_plate_id: plate for plate in crashed.active_plates}
+        recovered = {plate.active_plate_id: plate for plate in scheduler.active_plates}
+        assert recovered.keys() == live.keys()
+        for plate_id, plate in recovered.items():
+            original = live[plate_id]
+            assert type(plate) is type(original)
+            assert plate.instance_index == original.instance_index
+            assert plate.current_task_index == original.current_task_index
+            assert plate.barcode == original.barcode
+            assert (plate.current_location.name if plate.current_location else None) == \
+                   (original.current_location.name if original.current_location else None)
+            assert not plate.busy
+            # Locations are the new cell's objects
+            if plate.current_location is not None:
+                device = scheduler.device_manager.get_device(plate.current_location.device_name)
+                assert any(plate.current_location is loc for loc in device.plate_location_info)
+        assert {p.active_plate_id for p in report.interrupted} == \
+               {p.active_plate_id for p in crashed.active_plates if p.busy}
+
+        # Factories carry on after the released plates
+        run = scheduler.worklist_runs[0]
+        original_run = crashed.worklist_runs[0]
+        assert [(f.number_of_plates_to_create, f.plate_instance_index) for f in run.factories] == \
+               [(f.number_of_plates_to_create, f.plate_instance_index) for f in original_run.factories]
+
+    def test_recovered_worklists_run_to_completion(self, tmp_path):
+        path = str(tmp_path / "journal.db")
+        self._crashed_run(path, [PlateTask("Reader", "read")])
+
+        device_manager = _cell(AsyncMockDevice)
+        robot_scheduler = RobotScheduler(device_manager)
+        robot_scheduler.start_scheduler()
+        journal = StateJournal(path)
+        scheduler = PlateScheduler(robot_scheduler, device_manager, max_concurrent_worklists=1,
+                                   journal=journal)
+        scheduler.recover()
+        scheduler.start_scheduler()
+        try:
+            deadline = time.monotonic() + 5.0
+            while len(scheduler.completed_runs) < 2 and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            scheduler.stop_scheduler()
+            robot_scheduler.stop_scheduler()
+
+        assert [run.worklist.name for run in scheduler.completed_runs] == ["Running", "Queued"]
+        state = StateJournal(path).load_state()
+        assert state.worklists == {} and state.plates == {}
+
+    def test_pending_wait_keeps_its_remaining_time(self, tmp_path):
+        path = str(tmp_path / "journal.db")
+        crashed, _, _ = self._crashed_run(path, [WaitTask(30.0)])
+        waiting = [plate for plate in crashed.active_plates if crashed.wait_remaining(plate) is not None]
+        assert waiting
+        # Stop the old timers without journaling a cancel
+        for plate in waiting:
+            crashed.timer_service.cancel(crashed._wait_timers[plate][1])
+
+        device_manager = _cell(HeldDevice)
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        report = scheduler.recover(StateJournal(path))
+
+        assert len(report.resumed_waits) == len(waiting)
+        for plate in report.resumed_waits:
+            assert plate.busy
+            assert 28.0 < scheduler.wait_remaining(plate) <= 30.0
+            scheduler.cancel_wait(plate)
+
+    def test_recover_without_journal(self, device_manager):
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        with pytest.raises(ValueError):
+            scheduler.recover()
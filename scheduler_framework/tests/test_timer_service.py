@@ -0,0 +1,161 @@
+"""
+Unit tests for timer_service.py and WaitTask handling in PlateScheduler
+"""
+
+import threading
+import time
+import pytest
+from scheduler import PlateScheduler, RobotScheduler, ActiveSourcePlate, WaitTask
+from scheduler.timer_service import TimerService
+
+
+class TestTimerService:
+    """Tests for TimerService"""
+
+    def test_timers_fire_in_deadline_order(self):
+        service = TimerService()
+        fired = []
+        done = threading.Event()
+        service.schedule(0.06, lambda: (fired.append("late"), done.set()))
+        service.schedule(0.02, lambda: fired.append("early"))
+        service.schedule(0.0, lambda: fired.append("now"))
+
+        assert done.wait(timeout=2.0)
+        assert fired == ["now", "early", "late"]
+
+    def test_cancel(self):
+        service = TimerService()
+        fired = []
+        handle = service.schedule(0.05, lambda: fired.append(1))
+
+        assert service.cancel(handle)
+        assert not service.cancel(handle)
+        time.sleep(0.1)
+        assert fired == []
+        assert service.remaining(handle) == 0.0
+        assert service.pending() == []
+
+    def test_pause_freezes_remaining_time(self):
+        now = [100.0]
+        service = TimerService(clock=lambda: now[0])
+        handle = service.schedule(10.0, lambda: None)
+        now[0] = 104.0
+        service.pause()
+        now[0] = 150.0
+        assert service.remaining(handle) == pytest.approx(6.0)
+
+        service.resume()
+        assert service.remaining(handle) == pytest.approx(6.0)
+        assert handle.deadline == pytest.approx(156.0)
+        service.cancel(handle)
+
+    def test_paused_timers_do_not_fire(self):
+        service = TimerService()
+        fired = threading.Event()
+        service.pause()
+        service.schedule(0.01, fired.set)
+
+        assert not fired.wait(timeout=0.1)
+        service.resume()
+        assert fired.wait(timeout=2.0)
+
+    def test_one_thread_only_while_pending(self):
+        service = TimerService(name="TestTimers")
+        handles = [service.schedule(5.0, lambda: None) for _ in range(200)]
+
+        assert sum(t.name == "TestTimers" for t in threading.enumerate()) == 1
+        for handle in handles:
+            service.cancel(handle)
+        time.sleep(0.1)
+        assert not any(t.name == "TestTimers" for t in threading.enumerate())
+
+    def test_failing_callback_does_not_stop_service(self):
+        service = TimerService()
+        fired = threading.Event()
+        service.schedule(0.0, lambda: 1 / 0)
+        service.schedule(0.01, fired.set)
+        assert fired.wait(timeout=2.0)
+
+
+class TestWaitTasks:
+    """WaitTask handling in PlateScheduler"""
+
+    def _waiting_plate(self, device_manager, sample_worklist, seconds):
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        plate = ActiveSourcePlate(sample_worklist, 0)
+        wait = WaitTask(seconds)
+        plate.todo_list = [wait]
+        plate.still_have_todos = True
+        scheduler.active_plates.add(plate)
+        scheduler._handle_wait_task(plate, wait)
+        return scheduler, plate, wait
+
+    def test_wait_completes_plate(self, device_manager, sample_worklist):
+        scheduler, plate, wait = self._waiting_plate(device_manager, sample_worklist, 0.05)
+        assert plate.busy
+
+        assert plate.plate_is_free.wait(timeout=2.0)
+        assert wait.completed
+        assert plate.is_finished()
+        assert scheduler.wait_remaining(plate) is None
+
+    def test_many_waits_share_one_thread(self, device_manager, sample_worklist):
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        before = threading.active_count()
+        plates = []
+        for i in range(100):
+            plate = ActiveSourcePlate(sample_worklist, i)
+            plates.append(plate)
+            scheduler._handle_wait_task(plate, WaitTask(5.0))
+
+        assert threading.active_count() - before == 1
+        for plate in plates:
+            assert scheduler.cancel_wait(plate)
+
+    def test_cancel_wait(self, device_manager, sample_worklist):
+        scheduler, plate, wait = self._waiting_plate(device_manager, sample_worklist, 5.0)
+
+        assert scheduler.cancel_wait(plate)
+        assert not plate.busy
+        assert not wait.completed
+        # The wait is still the plate's current task
+        assert plate.get_current_todo() is wait
+        assert not scheduler.cancel_wait(plate)
+
+    def test_cancel_wait_and_complete(self, device_manager, sample_worklist):
+        scheduler, plate, wait = self._waiting_plate(device_manager, sample_worklist, 5.0)
+
+        assert scheduler.cancel_wait(plate, complete=True)
+        assert wait.completed
+        assert plate.is_finished()
+
+    def test_pause_holds_waits_and_dispatching(self, device_manager, sample_worklist):
+        scheduler, plate, wait = self._waiting_plate(device_manager, sample_worklist, 0.1)
+
+        scheduler.pause()
+        assert "Paused" in scheduler.get_status()
+        time.sleep(0.2)
+        assert plate.busy
+        remaining = scheduler.wait_remaining(plate)
+        assert 0.0 < remaining <= 0.1
+        assert f"Wait remaining: {remaining:.1f}s" in scheduler.get_status()
+
+        scheduler.resume()
+        assert plate.plate_is_free.wait(timeout=2.0)
+        assert wait.completed
+
+    def test_paused_scheduler_dispatches_nothing(self, device_manager, sample_worklist):
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        scheduler._start_worklist(sample_worklist)
+        scheduler.pause()
+        scheduler._scheduling_pass()
+        assert len(scheduler.active_plates) == 0
+
+        scheduler.resume()
+        scheduler._scheduling_pass()
+        assert len(scheduler.active_plates) > 0
+
+    def test_expected_remaining_covers_waits(self, device_manager, sample_worklist):
+        scheduler, plate, wait = self._waiting_plate(device_manager, sample_worklist, 30.0)
+        assert scheduler.expected_remaining(plate) == pytest.approx(30.0, abs=1.0)
+        scheduler.cancel_wait(plate)
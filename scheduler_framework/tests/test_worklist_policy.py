@@ -0,0 +1,155 @@
+"""
+Unit tests for worklist_policy.py and concurrent worklists
+"""
+
+import pytest
+import threading
+import time
+from scheduler import (
+    PlateScheduler, RobotScheduler, PlateLocation, PlatePlace,
+    PriorityPolicy, FairSharePolicy
+)
+from scheduler.worklist import Worklist, Plate, PlateTask, TransferOverview, Transfer
+from scheduler.worklist_policy import WorklistRun
+from tests.conftest import AsyncMockDevice, MockRobot
+
+
+def _worklist(name, num_sources=1, priority=0, share=1.0):
+    worklist = Worklist(name)
+    worklist.priority = priority
+    worklist.share = share
+    destination = Plate(f"{name}_DST", "96-well", "96-well")
+    worklist.add_destination_plate(destination)
+    sources = {}
+    transfers = []
+    for i in range(num_sources):
+        source = Plate(f"{name}_SRC{i}", "96-well", "96-well")
+        worklist.add_source_plate(source)
+        sources[source.barcode] = source
+        transfers.append(Transfer(source, destination, volume=10.0))
+    worklist.transfer_overview = TransferOverview(
+        transfers=transfers, source_plates=sources,
+        destination_plates={destination.barcode: destination}
+    )
+    worklist.transfer_overview.tasks.source_prehitpick_tasks = [PlateTask("Reader", "read")]
+    return worklist
+
+
+def _deck(device_manager, delay=0.02, reader_locations=2):
+    # Finished plates stay where they are, so leave a Bumblebee location per plate
+    devices = {}
+    for name, product, count in (("Reader1", "Reader", reader_locations),
+                                 ("Bumblebee1", "Bumblebee", 6)):
+        device = AsyncMockDevice(name, product, delay)
+        for i in range(count):
+            loc = PlateLocation(f"{name}_Loc{i}", name)
+            loc.places = [PlatePlace(f"{name}_Place{i}", loc)]
+            device.add_location(loc)
+        device_manager.register_device(device)
+        devices[product] = device
+    device_manager.register_robot(MockRobot("Robot"))
+    return devices
+
+
+class TestWorklistPolicies:
+    """Tests for worklist ordering policies"""
+    
+    def test_priority_policy(self):
+        """Test higher priority first, then admission order"""
+        runs = [WorklistRun(_worklist("A", priority=0), 0),
+                WorklistRun(_worklist("B", priority=5), 1),
+                WorklistRun(_worklist("C", priority=0), 2)]
+        
+        ordered = PriorityPolicy().order(runs)
+        assert [run.worklist.name for run in ordered] == ["B", "A", "C"]
+    
+    def test_fair_share_policy(self):
+        """Test that the least-served worklist (relative to its share) goes first"""
+        a = WorklistRun(_worklist("A", share=1.0), 0)
+        b = WorklistRun(_worklist("B", share=2.0), 1)
+        a.tasks_dispatched = 2
+        b.tasks_dispatched = 3
+        
+        assert FairSharePolicy().order([a, b]) == [b, a]
+        b.tasks_dispatched = 5
+        assert FairSharePolicy().order([a, b]) == [a, b]
+    
+    def test_run_counts(self):
+        """Test that a run starts with all plates still to create"""
+        run = WorklistRun(_worklist("A", num_sources=3), 0)
+        assert run.plates_to_create == 4
+        assert run.active_plates == []
+
+
+class TestConcurrentWorklists:
+    """Tests for several worklists in one scheduling loop"""
+    
+    def _run(self, device_manager, worklists, **kwargs):
+        robot_scheduler = RobotScheduler(device_manager)
+        robot_scheduler.start_scheduler()
+        scheduler = PlateScheduler(robot_scheduler, device_manager, **kwargs)
+        done = threading.Semaphore(0)
+        for worklist in worklists:
+            worklist.add_completion_callback(lambda *args: done.release())
+            scheduler.enqueue_worklist(worklist)
+        scheduler.start_scheduler()
+        try:
+            for _ in worklists:
+                assert done.acquire(timeout=10.0)
+        finally:
+            scheduler.stop_scheduler()
+            robot_scheduler.stop_scheduler()
+        return scheduler
+    
+    def test_worklists_overlap(self, device_manager):
+        """Test that a second worklist starts before the first one finishes"""
+        _deck(device_manager)
+        scheduler = self._run(device_manager, [_worklist("A", 2), _worklist("B", 2)])
+        
+        first, second = scheduler.completed_runs[0], scheduler.completed_runs[1]
+        assert len(scheduler.completed_runs) == 2
+        assert scheduler.worklist_runs == []
+        assert max(first.started_at, second.started_at) < min(first.finished_at, second.finished_at)
+    
+    def test_max_concurrent_worklists(self, device_manager):
+        """Test that a limit of one processes worklists back to back"""
+        _deck(device_manager)
+        scheduler = self._run(device_manager, [_worklist("A", 2), _worklist("B", 2)],
+                              max_concurrent_worklists=1)
+        
+        first, second = scheduler.completed_runs
+        assert first.worklist.name == "A"
+        assert second.started_at >= first.finished_at
+    
+    def test_priority_gets_device_first(self, device_manager):
+        """Test that the higher-priority worklist is dispatched first on a contended device"""
+        devices = _deck(device_manager, reader_locations=1)
+        low = _worklist("Low", 1, priority=0)
+        high = _worklist("High", 1, priority=10)
+        
+        robot_scheduler = RobotScheduler(device_manager)
+        scheduler = PlateScheduler(robot_scheduler, device_manager)
+        scheduler.enqueue_worklist(low)
+        scheduler.enqueue_worklist(high)
+        scheduler._admit_worklists()
+        # Release plates, then dispatch
+        scheduler._scheduling_pass()
+        
+        first_job = devices["Reader"].job_queue[0]
+        assert first_job.worklist is high
+    
+    def test_enqueue_sets_priority(self, device_manager):
+        """Test enqueue_worklist(priority=...)"""
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        worklist = _worklist("A")
+        scheduler.enqueue_worklist(worklist, priority=3)
+        assert worklist.priority == 3
+    
+    def test_status_lists_worklists(self, device_manager):
+        """Test that get_status reports running worklists"""
+        scheduler = PlateScheduler(RobotScheduler(device_manager), device_manager)
+        scheduler._start_worklist(_worklist("A"))
+        
+        status = scheduler.get_status()
+        assert "Running worklists: 1" in status
+        assert "A: priority 0" in status
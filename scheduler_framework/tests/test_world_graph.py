@@ -0,0 +1,168 @@
+"""
+Unit tests for world_graph.py
+"""
+
+import pytest
+import math
+from scheduler import PlateLocation, PlatePlace
+from scheduler.path_planner import PathPlanner
+from scheduler.world_graph import WorldGraph, Node, Connection
+from tests.conftest import MockDevice, MockRobot
+
+
+def _graph(edges, n, robots=("RobotA", "RobotB")):
+    """Small WorldGraph from (u, v, weight, robot index) edges"""
+    rows = [[] for _ in range(n)]
+    for u, v, w, r in edges:
+        rows[u].append((v, w, r))
+    keys = [f"Loc{i}:Place{i}" for i in range(n)]
+    return WorldGraph.from_rows(keys, [None] * n, [None] * n, [None] * n,
+                                [MockRobot(name) for name in robots], rows)
+
+
+class TestWorldGraph:
+    """Tests for WorldGraph"""
+    
+    def test_empty(self):
+        """Test the empty graph"""
+        graph = WorldGraph.empty()
+        assert graph.num_places == 0
+        assert graph.num_edges == 0
+    
+    def test_csr_layout(self):
+        """Test that rows are contiguous and sorted by target"""
+        graph = _graph([(0, 2, 1.0, 0), (0, 1, 2.0, 0), (1, 0, 2.0, 0)], 3)
+        
+        assert list(graph.offsets) == [0, 2, 3, 3]
+        assert list(graph.targets) == [1, 2, 0]
+        assert list(graph.weights) == [2.0, 1.0, 2.0]
+        assert graph.neighbors(0) == [(1, 2.0), (2, 1.0)]
+        assert graph.degree(2) == 0
+    
+    def test_find_edge_picks_cheapest_robot(self):
+        """Test O(1) edge lookup across parallel edges"""
+        graph = _graph([(0, 1, 3.0, 0), (0, 1, 1.5, 1)], 2)
+        
+        e = graph.find_edge(0, 1)
+        assert graph.edge_robot(e).name == "RobotB"
+        assert graph.edge_cost(0, 1) == 1.5
+        assert graph.find_edge(1, 0) is None
+        assert graph.edge_cost(1, 0) == math.inf
+        assert graph.find_edge(0, 7) is None
+    
+    def test_robot_enabled_mask(self):
+        """Test that disabled robots' edges are skipped"""
+        graph = _graph([(0, 1, 3.0, 0), (0, 1, 1.5, 1)], 2)
+        
+        graph.set_robot_enabled("RobotB", False)
+        assert graph.edge_cost(0, 1) == 3.0
+        assert graph.neighbors(0) == [(1, 3.0)]
+        assert graph.robot_pairs("RobotB") == {(0, 1)}
+    
+    def test_set_edge_weight(self):
+        """Test updating an existing edge"""
+        graph = _graph([(0, 1, 3.0, 0)], 2)
+        
+        assert graph.set_edge_weight(0, 1, "RobotA", 0.5)
+        assert graph.edge_cost(0, 1) == 0.5
+        assert not graph.set_edge_weight(0, 1, "RobotB", 0.5)
+    
+    def test_with_edges(self):
+        """Test adding edges produces a new graph"""
+        graph = _graph([(0, 1, 3.0, 0)], 3)
+        bigger = graph.with_edges([(1, 2, 1.0, 1)])
+        
+        assert bigger.edge_cost(1, 2) == 1.0
+        assert graph.edge_cost(1, 2) == math.inf
+    
+    def test_snapshot_is_independent(self):
+        """Test that snapshots copy weights and the robot mask"""
+        graph = _graph([(0, 1, 3.0, 0)], 2)
+        snapshot = graph.snapshot()
+        
+        snapshot.set_edge_weight(0, 1, "RobotA", 9.0)
+        snapshot.set_robot_enabled("RobotA", False)
+        
+        assert graph.edge_cost(0, 1) == 3.0
+        assert snapshot.find_edge(0, 1) is None
+        assert snapshot.targets is graph.targets
+    
+    def test_nodes_materialize_connections_lazily(self):
+        """Test that Node.connections are built from the graph on demand"""
+        graph = _graph([(0, 1, 3.0, 0)], 2)
+        node = graph.node(0)
+        
+        assert node is graph.node(0)
+        assert node._connections is None
+        connections = node.connections
+        assert len(connections) == 1
+        assert connections[0].node is graph.node(1)
+        assert connections[0].cost == 3.0
+        assert connections[0].extra_info.name == "RobotA"
+    
+    def test_standalone_node(self):
+        """Test that hand-built nodes still work without a graph"""
+        node = Node("n")
+        assert node.index == -1
+        assert node.connections == []
+        node.connections.append(Connection(Node("m"), 1.0))
+        assert len(node.connections) == 1
+
+
+class TestPathPlannerCompactGraph:
+    """Tests for PathPlanner on the compact graph"""
+    
+    def _planner(self, device_manager, count=3):
+        device_manager.register_robot(MockRobot("Robot"))
+        locations = []
+        for i in range(count):
+            device = MockDevice(f"Device{i}", "Product")
+            loc = PlateLocation(f"Loc{i}", device.name)
+            loc.places = [PlatePlace(f"Place{i}", loc)]
+            device.add_location(loc)
+            device_manager.register_device(device)
+            locations.append(loc)
+        planner = PathPlanner(device_manager)
+        planner.create_world()
+        return planner, locations
+    
+    def test_place_ids_are_interned(self, device_manager):
+        """Test that every place gets a dense integer id"""
+        planner, locations = self._planner(device_manager)
+        
+        assert planner.graph.place_ids == {"Loc0:Place0": 0, "Loc1:Place1": 1, "Loc2:Place2": 2}
+        assert planner.graph.locations[1] is locations[1]
+    
+    def test_path_nodes_carry_ids(self, device_manager):
+        """Test that plan_path returns nodes indexed into the graph"""
+        planner, locations = self._planner(device_manager)
+        
+        path = planner.plan_path(locations[0], locations[2])
+        assert [node.index for node in path] == [0, 2]
+    
+    def test_find_edge_and_place_info(self, device_manager):
+        """Test the lookups used when executing a path"""
+        planner, locations = self._planner(device_manager)
+        path = planner.plan_path(locations[0], locations[1])
+        
+        robot, cost = planner.find_edge(path[0], path[1])
+        assert robot.name == "Robot"
+        assert cost == 1.0
+        
+        device, location, place = planner.place_info(path[1])
+        assert device.name == "Device1"
+        assert location is locations[1]
+        assert place is locations[1].places[0]
+        
+        assert planner.find_edge(Node("x"), path[1]) is None
+        assert planner.place_info(Node("x")) is None
+    
+    def test_legacy_views(self, device_manager):
+        """Test the name-keyed views of the compact graph"""
+        planner, locations = self._planner(device_manager)
+        
+        assert planner.world_places["Loc1:Place1"] is locations[1]
+        assert planner.world_place_objects["Loc1:Place1"] is locations[1].places[0]
+        assert planner.world_locations["Loc1"].name == "Device1"
+        assert planner.world_location_objects["Loc1"] is locations[1]
+        assert planner.world_nodes["Loc1:Place1"] is planner.graph.node(1)
@@ -11,15 +11,40 @@ This is a reference microservice we can copy/adapt for:
 
 It uses an in-memory job store for async actions. For real distributed execution,
 we'll swap this with Redis / a DB-backed queue.
+
+Job records live in a bounded store: finished jobs expire after NODE_JOB_TTL_S
+(default 1 hour) or beyond the newest NODE_MAX_FINISHED_JOBS (default 10000).
+Set NODE_JOB_DB to a SQLite path to keep them on disk as well, so status
+lookups and request_id deduplication survive a restart (for NODE_JOB_DB_TTL_S,
+default 24 hours).
+
+Submitted jobs run on a fixed pool of NODE_JOB_WORKERS worker threads (default 1,
+right for a single-arm robot; use one per unit for a bank of readers). Waiting
+jobs are taken by `priority` (higher first), in submit order within a priority.
+`GET /stats` reports queue depth, running jobs and queue wait times.
+
+`GET /actions/status/{execution_id}?wait=N` long-polls: the request is held
+until the job finishes (or N seconds pass, capped at MAX_STATUS_WAIT_S), so
+the scheduler learns about completion without polling in a loop. The handler
+is async and waits on a future the worker completes, so a held request ties
+up no threadpool thread.
 """
 
 from __future__ import annotations
 
+import asyncio
+import itertools
+import json
+import logging
+import os
+import queue
+import sqlite3
 import threading
 import time
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from pydantic import BaseModel, Field
 
 
@@ -31,8 +56,6 @@ def _new_ulid_str() -> str:
 
         return new_ulid_str()
     except Exception:
-        import os
-
         alphabet = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
 
         def enc(v: int, n: int) -> str:
@@ -66,6 +89,8 @@ class ActionRequestModel(BaseModel):
     action: str
     args: Dict[str, Any] = Field(default_factory=dict)
     locations: Dict[str, Any] = Field(default_factory=dict)
+    # Queue order for submitted actions: higher runs first
+    priority: int = 0
 
 
 class ActionResponseModel(BaseModel):
@@ -77,24 +102,206 @@ class ActionResponseModel(BaseModel):
     error: Optional[str] = None
 
 
+class BatchSubmitRequestModel(BaseModel):
+    requests: list[ActionRequestModel] = Field(default_factory=list)
+
+
+class BatchStatusRequestModel(BaseModel):
+    execution_ids: list[str] = Field(default_factory=list)
+
+
+class BatchResponseModel(BaseModel):
+    # One response per request / execution_id, in the same order
+    responses: list[ActionResponseModel] = Field(default_factory=list)
+
+
 class _Job:
-    def __init__(self, request_id: str, action: str, args: Dict[str, Any], locations: Dict[str, Any]):
+    def __init__(self, request_id: str, action: str, args: Dict[str, Any], locations: Dict[str, Any],
+                 priority: int = 0):
         self.request_id = request_id
         self.execution_id = _new_ulid_str()
         self.action = action
         self.args = args
         self.locations = locations
+        self.priority = priority
         self.status = "queued"
         self.success = True
         self.result: Dict[str, Any] = {}
         self.error: Optional[str] = None
         self.created_at = time.time()
         self.updated_at = time.time()
+        # Set once the job reaches a terminal status; see mark_done()
+        self.done = threading.Event()
+        # (loop, future) of long-polling status requests
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._waiters_lock = threading.Lock()
+
+    def mark_done(self) -> None:
+        """Set `done` and wake every status request waiting on this job"""
+        with self._waiters_lock:
+            self.done.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve_waiter, future)
+
+    async def wait_done(self, timeout: float) -> bool:
+        """Wait on the running loop, without a thread, until the job is done; False on timeout"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._waiters_lock:
+            if self.done.is_set():
+                return True
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait({future}, timeout=timeout)
+            return future.done()
+        finally:
+            with self._waiters_lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+
+def _resolve_waiter(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+# Longest a status request may be held open (`?wait=`)
+MAX_STATUS_WAIT_S = 60.0
+
+logger = logging.getLogger(__name__)
+
+class _JobStore:
+    """
+    Jobs by execution_id and by request_id, with finished jobs expiring.
+
+    Finished jobs are dropped once they are older than `ttl_s` or beyond the
+    newest `max_finished`; queued and running jobs are never dropped. With
+    `db_path`, jobs are also written to SQLite, so a restarted node still
+    answers status requests and deduplicates resubmitted request_ids for jobs
+    from the last `db_ttl_s`. Not thread-safe: callers hold `_jobs_lock`.
+    """
+
+    def __init__(self, ttl_s: float = 3600.0, max_finished: int = 10_000, db_path: Optional[str] = None,
+                 db_ttl_s: float = 86400.0):
+        self.ttl_s = ttl_s
+        self.max_finished = max_finished
+        self.db_ttl_s = db_ttl_s
+        self.evicted = 0
+        self._by_execution_id: Dict[str, _Job] = {}
+        self._execution_id_by_request_id: Dict[str, str] = {}
+        # execution_id -> finish time, oldest first
+        self._finished: OrderedDict[str, float] = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pruned_at = 0.0
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                execution_id TEXT PRIMARY KEY,
+                request_id TEXT NOT NULL UNIQUE,
+                action TEXT NOT NULL,
+                status TEXT NOT NULL,
+                success INTEGER NOT NULL,
+                result TEXT NOT NULL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL)""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at)")
+            # Jobs that were queued or running when the node stopped will never finish
+            self._db.execute("UPDATE jobs SET status = 'failed', success = 0, error = ?, updated_at = ? "
+                             "WHERE status IN ('queued', 'running')",
+                             ("Node restarted before the job finished", time.time()))
+
+    def __len__(self) -> int:
+        return len(self._by_execution_id)
+
+    def add(self, job: _Job) -> None:
+        self._by_execution_id[job.execution_id] = job
+        self._execution_id_by_request_id[job.request_id] = job.execution_id
+        self._save(job)
+        self.evict()
+
+    def finish(self, job: _Job) -> None:
+        """Record that `job` reached a terminal status (starts its TTL)"""
+        self._finished[job.execution_id] = job.updated_at
+        self._save(job)
+        self.evict()
+
+    def get(self, execution_id: str) -> Optional[_Job]:
+        job = self._by_execution_id.get(execution_id)
+        return job if job is not None else self._load("execution_id", execution_id)
+
+    def get_by_request_id(self, request_id: str) -> Optional[_Job]:
+        execution_id = self._execution_id_by_request_id.get(request_id)
+        if execution_id is not None:
+            return self._by_execution_id[execution_id]
+        return self._load("request_id", request_id)
+
+    def evict(self) -> int:
+        """Drop expired and surplus finished jobs; returns how many"""
+        now = time.time()
+        evicted = 0
+        while self._finished:
+            execution_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and now - finished_at <= self.ttl_s:
+                break
+            self._finished.popitem(last=False)
+            job = self._by_execution_id.pop(execution_id, None)
+            if job is not None and self._execution_id_by_request_id.get(job.request_id) == execution_id:
+                del self._execution_id_by_request_id[job.request_id]
+            evicted += 1
+        self.evicted += evicted
+        if self._db is not None and now - self._db_pruned_at > 60.0:
+            self._db_pruned_at = now
+            self._db.execute("DELETE FROM jobs WHERE updated_at < ? AND status NOT IN ('queued', 'running')",
+                             (now - self.db_ttl_s,))
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "jobs": len(self._by_execution_id),
+            "finished": len(self._finished),
+            "evicted": self.evicted,
+            "persisted": self._db is not None,
+        }
+
+    def _save(self, job: _Job) -> None:
+        if self._db is None:
+            return
+        self._db.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (job.execution_id, job.request_id, job.action, job.status, int(job.success),
+                          json.dumps(job.result), job.error, job.created_at, job.updated_at))
+
+    def _load(self, column: str, value: str) -> Optional[_Job]:
+        """A finished job from the database (no longer in memory, or from before a restart)"""
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT execution_id, request_id, action, status, success, result, error, "
+                               f"created_at, updated_at FROM jobs WHERE {column} = ?", (value,)).fetchone()
+        if row is None:
+            return None
+        job = _Job(request_id=row[1], action=row[2], args={}, locations={})
+        job.execution_id = row[0]
+        job.status = row[3]
+        job.success = bool(row[4])
+        job.result = json.loads(row[5])
+        job.error = row[6]
+        job.created_at = row[7]
+        job.updated_at = row[8]
+        job.done.set()
+        return job
 
 
 _jobs_lock = threading.Lock()
-_jobs_by_execution_id: Dict[str, _Job] = {}
-_execution_id_by_request_id: Dict[str, str] = {}
+_jobs = _JobStore(
+    ttl_s=float(os.environ.get("NODE_JOB_TTL_S", "3600")),
+    max_finished=int(os.environ.get("NODE_MAX_FINISHED_JOBS", "10000")),
+    db_path=os.environ.get("NODE_JOB_DB") or None,
+    db_ttl_s=float(os.environ.get("NODE_JOB_DB_TTL_S", "86400")),
+)
 
 
 app = FastAPI(title="Tachyon Node Template", version="0.0.1")
@@ -150,33 +357,87 @@ def _execute_job(job: _Job) -> None:
     finally:
         with _jobs_lock:
             job.updated_at = time.time()
-
-
-@app.post("/actions/{action}", response_model=ActionResponseModel)
-def action_sync(action: str, req: ActionRequestModel) -> ActionResponseModel:
-    # Override action from path to avoid ambiguity
-    req_action = action
-
-    if req_action == "echo":
-        return ActionResponseModel(
-            request_id=req.request_id,
-            execution_id="",
-            status="succeeded",
-            success=True,
-            result={"message": req.args.get("message"), "locations": req.locations},
-            error=None,
-        )
-
-    raise HTTPException(status_code=400, detail="Use /submit for long-running actions or unknown sync action.")
-
-
-@app.post("/actions/{action}/submit", response_model=ActionResponseModel)
-def action_submit(action: str, req: ActionRequestModel) -> ActionResponseModel:
+            _jobs.finish(job)
+        job.mark_done()
+
+
+class _JobExecutor:
+    """
+    Fixed pool of worker threads fed by a priority queue.
+
+    Higher `priority` runs first; equal priorities run in submit order. Workers
+    start on the first submit.
+    """
+
+    def __init__(self, run_job: Callable[[_Job], None], workers: int = 1):
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1 (got {workers})")
+        self.workers = workers
+        self._run_job = run_job
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._running = 0
+        self._submitted = 0
+        self._started = 0
+        self._completed = 0
+        self._wait_total_s = 0.0
+        self._wait_max_s = 0.0
+
+    def submit(self, job: _Job) -> None:
+        with self._lock:
+            if not self._threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._worker, daemon=True, name=f"job-worker-{i}")
+                    thread.start()
+                    self._threads.append(thread)
+            self._submitted += 1
+            self._queue.put((-job.priority, next(self._sequence), job))
+
+    def _worker(self) -> None:
+        while True:
+            _, _, job = self._queue.get()
+            waited = max(0.0, time.time() - job.created_at)
+            with self._lock:
+                self._running += 1
+                self._started += 1
+                self._wait_total_s += waited
+                self._wait_max_s = max(self._wait_max_s, waited)
+            try:
+                self._run_job(job)
+            except Exception:
+                # The job runner records failures on the job; keep the worker alive regardless
+                logger.exception(f"Job {job.execution_id} raised")
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self._queue.qsize(),
+                "running": self._running,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "queue_wait_s": {
+                    "count": self._started,
+                    "mean": self._wait_total_s / self._started if self._started else 0.0,
+                    "max": self._wait_max_s,
+                },
+            }
+
+
+_executor = _JobExecutor(_execute_job, workers=int(os.environ.get("NODE_JOB_WORKERS", "1")))
+
+
+def _submit_job(action: str, req: ActionRequestModel) -> ActionResponseModel:
     # Idempotency on request_id: return same execution_id if already submitted.
     with _jobs_lock:
-        existing = _execution_id_by_request_id.get(req.request_id)
-        if existing:
-            job = _jobs_by_execution_id[existing]
+        job = _jobs.get_by_request_id(req.request_id)
+        if job is not None:
             return ActionResponseModel(
                 request_id=job.request_id,
                 execution_id=job.execution_id,
@@ -186,12 +447,11 @@ def action_submit(action: str, req: ActionRequestModel) -> ActionResponseModel:
                 error=job.error,
             )
 
-        job = _Job(request_id=req.request_id, action=action, args=req.args, locations=req.locations)
-        _jobs_by_execution_id[job.execution_id] = job
-        _execution_id_by_request_id[req.request_id] = job.execution_id
+        job = _Job(request_id=req.request_id, action=action, args=req.args, locations=req.locations,
+                   priority=req.priority)
+        _jobs.add(job)
 
-    t = threading.Thread(target=_execute_job, args=(job,), daemon=True, name=f"job-{job.execution_id}")
-    t.start()
+    _executor.submit(job)
 
     return ActionResponseModel(
         request_id=job.request_id,
@@ -203,14 +463,7 @@ def action_submit(action: str, req: ActionRequestModel) -> ActionResponseModel:
     )
 
 
-@app.get("/actions/status/{execution_id}", response_model=ActionResponseModel)
-def action_status(execution_id: str) -> ActionResponseModel:
-    with _jobs_lock:
-        job = _jobs_by_execution_id.get(execution_id)
-
-    if not job:
-        raise HTTPException(status_code=404, detail="Unknown execution_id")
-
+def _status_response(job: _Job) -> ActionResponseModel:
     return ActionResponseModel(
         request_id=job.request_id,
         execution_id=job.execution_id,
@@ -221,3 +474,68 @@ def action_status(execution_id: str) -> ActionResponseModel:
     )
 
 
+# Batch routes are registered before /actions/{action} so "batch" and "status:batch" aren't taken as actions
+@app.post("/actions/batch/submit", response_model=BatchResponseModel)
+def action_batch_submit(req: BatchSubmitRequestModel) -> BatchResponseModel:
+    # Each request is submitted (and deduplicated on its request_id) as by /actions/{action}/submit
+    return BatchResponseModel(responses=[_submit_job(item.action, item) for item in req.requests])
+
+
+@app.post("/actions/status:batch", response_model=BatchResponseModel)
+def action_batch_status(req: BatchStatusRequestModel) -> BatchResponseModel:
+    responses = []
+    with _jobs_lock:
+        for execution_id in req.execution_ids:
+            job = _jobs.get(execution_id)
+            if job is None:
+                responses.append(ActionResponseModel(request_id="", execution_id=execution_id, status="unknown",
+                                                     success=False, error="Unknown execution_id"))
+            else:
+                responses.append(_status_response(job))
+    return BatchResponseModel(responses=responses)
+
+
+@app.post("/actions/{action}", response_model=ActionResponseModel)
+def action_sync(action: str, req: ActionRequestModel) -> ActionResponseModel:
+    # Override action from path to avoid ambiguity
+    req_action = action
+
+    if req_action == "echo":
+        return ActionResponseModel(
+            request_id=req.request_id,
+            execution_id="",
+            status="succeeded",
+            success=True,
+            result={"message": req.args.get("message"), "locations": req.locations},
+            error=None,
+        )
+
+    raise HTTPException(status_code=400, detail="Use /submit for long-running actions or unknown sync action.")
+
+
+@app.post("/actions/{action}/submit", response_model=ActionResponseModel)
+def action_submit(action: str, req: ActionRequestModel) -> ActionResponseModel:
+    return _submit_job(action, req)
+
+
+@app.get("/actions/status/{execution_id}", response_model=ActionResponseModel)
+async def action_status(execution_id: str, wait: float = Query(0.0, ge=0.0)) -> ActionResponseModel:
+    with _jobs_lock:
+        job = _jobs.get(execution_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Unknown execution_id")
+
+    if wait > 0:
+        # Long-poll: hold the request until the job finishes or `wait` passes.
+        # Async, so a held request takes no threadpool thread away from submits.
+        await job.wait_done(min(wait, MAX_STATUS_WAIT_S))
+
+    return _status_response(job)
+
+
+@app.get("/stats")
+def stats() -> Dict[str, Any]:
+    with _jobs_lock:
+        store = _jobs.stats()
+    return {**_executor.stats(), "store": store}
@@ -0,0 +1,275 @@
+"""
+Unit tests for the Node template (main.py).
+
+Jobs run on a stub runner, never the demo actions.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+import anyio.to_thread
+import httpx
+import pytest
+
+# Add the template directory to path
+template_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, template_dir)
+
+import main  # noqa: E402
+
+
+@pytest.fixture
+def stub_node():
+    """A fresh job store and an executor whose jobs finish once `gate` is set"""
+    gate = threading.Event()
+    gate.set()
+
+    def run_job(job):
+        gate.wait(5)
+        with main._jobs_lock:
+            job.status = "succeeded"
+            job.result = {"action": job.action}
+            main._jobs.finish(job)
+        job.mark_done()
+
+    with patch.object(main, "_jobs", main._JobStore()), \
+            patch.object(main, "_executor", main._JobExecutor(run_job, workers=1)):
+        yield gate
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://node")
+
+
+async def _submit(client: httpx.AsyncClient, request_id: str) -> str:
+    response = await client.post("/actions/sleep/submit", json={"request_id": request_id, "action": "sleep"})
+    assert response.status_code == 200
+    return response.json()["execution_id"]
+
+
+class TestStatusLongPoll:
+    """GET /actions/status/{execution_id}?wait="""
+
+    def test_wait_returns_when_job_finishes(self, stub_node):
+        async def scenario():
+            async with _client() as client:
+                execution_id = await _submit(client, "poll-1")
+                poll = asyncio.create_task(client.get(f"/actions/status/{execution_id}", params={"wait": 30}))
+                await asyncio.sleep(0.2)
+                assert not poll.done()
+
+                started = time.monotonic()
+                stub_node.set()
+                response = await asyncio.wait_for(poll, 5)
+                return response, time.monotonic() - started
+
+        stub_node.clear()
+        response, elapsed = asyncio.run(scenario())
+        assert elapsed < 2.0
+        assert response.json()["status"] == "succeeded"
+        assert response.json()["result"] == {"action": "sleep"}
+
+    def test_wait_times_out_with_current_status(self, stub_node):
+        async def scenario():
+            async with _client() as client:
+                execution_id = await _submit(client, "poll-1")
+                return await client.get(f"/actions/status/{execution_id}", params={"wait": 0.2})
+
+        stub_node.clear()
+        try:
+            response = asyncio.run(scenario())
+        finally:
+            stub_node.set()
+        assert response.json()["status"] in ("queued", "running")
+        # The timed-out request left nothing registered on the job
+        assert main._jobs.get(response.json()["execution_id"])._waiters == []
+
+    def test_waiting_requests_hold_no_threadpool_thread(self, stub_node):
+        async def scenario():
+            # One threadpool thread for sync routes: a blocking long-poll would take it
+            anyio.to_thread.current_default_thread_limiter().total_tokens = 1
+            async with _client() as client:
+                execution_id = await _submit(client, "poll-1")
+                polls = [asyncio.create_task(client.get(f"/actions/status/{execution_id}",
+                                                        params={"wait": 30}))
+                         for _ in range(5)]
+                await asyncio.sleep(0.2)
+                # A sync route still gets the thread while all five wait
+                await asyncio.wait_for(_submit(client, "poll-2"), 2)
+                stub_node.set()
+                return await asyncio.wait_for(asyncio.gather(*polls), 5)
+
+        stub_node.clear()
+        try:
+            responses = asyncio.run(scenario())
+        finally:
+            stub_node.set()
+        assert [response.json()["status"] for response in responses] == ["succeeded"] * 5
+
+    def test_unknown_execution_id(self, stub_node):
+        async def scenario():
+            async with _client() as client:
+                return await client.get("/actions/status/missing", params={"wait": 1})
+
+        assert asyncio.run(scenario()).status_code == 404
+
+
+class TestJobExecutor:
+    """_JobExecutor ordering and GET /stats"""
+
+    def test_jobs_run_by_priority_then_submit_order(self):
+        order = []
+        blocking, gate, finished = threading.Event(), threading.Event(), threading.Event()
+
+        def run_job(job):
+            if job.action == "block":
+                blocking.set()
+                gate.wait(5)
+            order.append(job.action)
+            if len(order) == 5:
+                finished.set()
+
+        executor = main._JobExecutor(run_job, workers=1)
+        executor.submit(main._Job("r0", "block", {}, {}))
+        assert blocking.wait(5)
+        for request_id, action, priority in [("r1", "a", 0), ("r2", "b", 5), ("r3", "c", 0), ("r4", "d", 5)]:
+            executor.submit(main._Job(request_id, action, {}, {}, priority=priority))
+        gate.set()
+
+        assert finished.wait(5)
+        assert order == ["block", "b", "d", "a", "c"]
+        stats = executor.stats()
+        assert stats["submitted"] == stats["completed"] == 5
+        assert stats["queue_depth"] == 0
+        assert stats["queue_wait_s"]["count"] == 5
+
+    def test_worker_survives_a_failing_runner(self):
+        ran = threading.Event()
+
+        def run_job(job):
+            if job.action == "boom":
+                raise RuntimeError("boom")
+            ran.set()
+
+        executor = main._JobExecutor(run_job, workers=1)
+        executor.submit(main._Job("r1", "boom", {}, {}))
+        executor.submit(main._Job("r2", "ok", {}, {}))
+        assert ran.wait(5)
+
+    def test_workers_must_be_positive(self):
+        with pytest.raises(ValueError):
+            main._JobExecutor(lambda job: None, workers=0)
+
+    def test_submit_passes_priority_to_the_job(self, stub_node):
+        async def scenario():
+            async with _client() as client:
+                response = await client.post("/actions/sleep/submit",
+                                             json={"request_id": "p-1", "action": "sleep", "priority": 7})
+                return response.json()["execution_id"]
+
+        assert main._jobs.get(asyncio.run(scenario())).priority == 7
+
+    def test_stats_endpoint(self, stub_node):
+        async def scenario():
+            async with _client() as client:
+                execution_id = await _submit(client, "stats-1")
+                assert main._jobs.get(execution_id).done.wait(5)
+                return (await client.get("/stats")).json()
+
+        data = asyncio.run(scenario())
+        assert data["workers"] == 1
+        assert data["submitted"] == data["completed"] == 1
+        assert data["store"]["jobs"] == 1
+        assert data["store"]["finished"] == 1
+
+
+def _finished_job(store, request_id):
+    job = main._Job(request_id, "sleep", {}, {})
+    store.add(job)
+    job.status = "succeeded"
+    job.result = {"request": request_id}
+    store.finish(job)
+    return job
+
+
+class TestJobStore:
+    """_JobStore eviction and SQLite spill"""
+
+    def test_only_finished_jobs_are_evicted(self):
+        store = main._JobStore(max_finished=10)
+        queued = main._Job("queued", "sleep", {}, {})
+        running = main._Job("running", "sleep", {}, {})
+        running.status = "running"
+        store.add(queued)
+        store.add(running)
+
+        jobs = [_finished_job(store, f"r{i}") for i in range(100)]
+
+        assert len(store) == 12
+        assert store.evicted == 90
+        assert store.get(jobs[0].execution_id) is None
+        assert store.get_by_request_id("r0") is None
+        assert store.get_by_request_id("r99") is jobs[-1]
+        assert store.get(queued.execution_id) is queued
+        assert store.get(running.execution_id) is running
+
+    def test_finished_jobs_expire(self):
+        store = main._JobStore(ttl_s=60.0)
+        job = _finished_job(store, "r1")
+        job.updated_at -= 120.0
+        store._finished[job.execution_id] = job.updated_at
+
+        assert store.evict() == 1
+        assert store.get(job.execution_id) is None
+        assert store.stats()["evicted"] == 1
+
+    def test_evicted_jobs_are_found_in_the_db(self, tmp_path):
+        store = main._JobStore(max_finished=1, db_path=str(tmp_path / "jobs.db"))
+        first = _finished_job(store, "r1")
+        _finished_job(store, "r2")
+        assert first.execution_id not in store._by_execution_id
+
+        by_execution_id = store.get(first.execution_id)
+        assert by_execution_id.status == "succeeded"
+        assert by_execution_id.result == {"request": "r1"}
+        assert by_execution_id.done.is_set()
+        assert store.get_by_request_id("r1").execution_id == first.execution_id
+
+    def test_unfinished_jobs_fail_on_restart(self, tmp_path):
+        db_path = str(tmp_path / "jobs.db")
+        store = main._JobStore(db_path=db_path)
+        finished = _finished_job(store, "r1")
+        queued = main._Job("r2", "sleep", {}, {})
+        store.add(queued)
+        running = main._Job("r3", "sleep", {}, {})
+        store.add(running)
+        running.status = "running"
+        store._save(running)
+
+        restarted = main._JobStore(db_path=db_path)
+        assert restarted.get(finished.execution_id).status == "succeeded"
+        for job in (queued, running):
+            reloaded = restarted.get(job.execution_id)
+            assert reloaded.status == "failed"
+            assert not reloaded.success
+            assert reloaded.error == "Node restarted before the job finished"
+            assert reloaded.done.is_set()
+
+    def test_resubmit_after_restart_is_deduplicated(self, tmp_path):
+        db_path = str(tmp_path / "jobs.db")
+        first = _finished_job(main._JobStore(db_path=db_path), "r1")
+
+        async def scenario():
+            async with _client() as client:
+                response = await client.post("/actions/sleep/submit", json={"request_id": "r1", "action": "sleep"})
+                return response.json()
+
+        with patch.object(main, "_jobs", main._JobStore(db_path=db_path)), \
+                patch.object(main, "_executor", main._JobExecutor(lambda job: None, workers=1)):
+            data = asyncio.run(scenario())
+        assert data["execution_id"] == first.execution_id
+        assert data["status"] == "succeeded"
+        assert data["result"] == {"request": "r1"}